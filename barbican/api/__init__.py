@@ -16,6 +16,7 @@
 """
 API handler for Barbican
 """
+import io
 import pkgutil
 
 from oslo_policy import policy
@@ -31,12 +32,55 @@ from barbican import i18n as u
 LOG = utils.getLogger(__name__)
 CONF = config.CONF
 
+# Request bodies are read in chunks of at most this many bytes.
+BODY_CHUNK_SIZE = 64 * 1024
+
 
 class ApiResource(object):
     """Base class for API resources."""
     pass
 
 
+def iter_body(req, max_size):
+    """Iterates over the body of an HTTP request in bounded chunks.
+
+    The size of the body is checked as it is read, so that a body larger
+    than max_size is rejected as soon as it is seen, rather than once it
+    has been read into memory whole.
+
+    :param req: The HTTP request instance to read the body from.
+    :param max_size: Maximum number of bytes allowed in the body.
+    :raises: LimitExceeded if the body holds more than max_size bytes.
+    """
+    if req.content_length is not None and req.content_length > max_size:
+        raise exception.LimitExceeded()
+
+    body_file = req.body_file
+    # Read one byte past max_size to tell whether the body is too large.
+    remaining = max_size + 1
+    while True:
+        chunk = body_file.read(min(BODY_CHUNK_SIZE, remaining))
+        if not chunk:
+            return
+        remaining -= len(chunk)
+        if remaining <= 0:
+            raise exception.LimitExceeded()
+        yield chunk
+
+
+def read_body(req, max_size):
+    """Reads the body of an HTTP request, of at most max_size bytes.
+
+    :raises: LimitExceeded if the body holds more than max_size bytes.
+    """
+    # Unlike joining a list of the chunks, getting the value of a BytesIO
+    # does not copy the body once more.
+    body = io.BytesIO()
+    for chunk in iter_body(req, max_size):
+        body.write(chunk)
+    return body.getvalue()
+
+
 def load_body(req, resp=None, validator=None):
     """Helper function for loading an HTTP request body from JSON.
 
@@ -46,10 +90,12 @@ def load_body(req, resp=None, validator=None):
     :param resp: The HTTP response instance.
     :param validator: The JSON validator to enforce.
     :return: A dict of values from the JSON request.
+    :raises: LimitExceeded if the request is larger than allowed.
     """
     try:
-        body = req.body_file.read(CONF.max_allowed_request_size_in_bytes)
-        req.body_file.seek(0)
+        body = read_body(req, CONF.max_allowed_request_size_in_bytes)
+        if req.is_body_seekable:
+            req.body_file.seek(0)
     except IOError:
         LOG.exception("Problem reading request JSON stream.")
         pecan.abort(500, u._('Read Error'))
@@ -61,14 +107,14 @@ def load_body(req, resp=None, validator=None):
         parsed_body = json.loads(body)
         strip_whitespace(parsed_body)
     except ValueError:
-        LOG.exception("Problem loading request JSON.")
+        LOG.info("Problem loading request JSON.")
         pecan.abort(400, u._('Malformed JSON'))
 
     if validator:
         try:
             parsed_body = validator.validate(parsed_body)
         except exception.BarbicanHTTPException as e:
-            LOG.exception(e.message)
+            LOG.info(e.message)
             pecan.abort(e.status_code, e.client_message)
 
     return parsed_body
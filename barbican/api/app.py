@@ -30,6 +30,7 @@ from oslo_log import log
 
 from barbican.api.controllers import versions
 from barbican.api import hooks
+from barbican.common import access_log
 from barbican.common import config
 from barbican.model import repositories
 from barbican import queue
@@ -73,6 +74,7 @@ def main_app(func):
 
         # Configure oslo logging and configuration services.
         log.setup(CONF, 'barbican')
+        access_log.setup_async_logging()
 
         config.setup_remote_pydev_debug()
 
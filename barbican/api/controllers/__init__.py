@@ -16,6 +16,7 @@ import pecan
 from webob import exc
 
 from barbican import api
+from barbican.common import access_log
 from barbican.common import utils
 from barbican import i18n as u
 
@@ -101,8 +102,13 @@ def handle_exceptions(operation_name=u._('System')):
         def handler(inst, *args, **kwargs):
             try:
                 return fn(inst, *args, **kwargs)
-            except exc.HTTPError:
-                LOG.exception('Webob error seen')
+            except exc.HTTPError as e:
+                # Client errors are expected, their tracebacks are noise.
+                if e.code < 500:
+                    LOG.info('Webob error seen: %s', e)
+                else:
+                    access_log.log_exception(LOG, 'Webob error seen',
+                                             (operation_name, e.code))
                 raise  # Already converted to Webob exception, just reraise
             # In case PolicyNotAuthorized, we do not want to expose payload by
             # logging exception, so just LOG.error
@@ -117,7 +123,11 @@ def handle_exceptions(operation_name=u._('System')):
 
                 status, message = api.generate_safe_exception_message(
                     operation_name, e)
-                LOG.exception(message)
+                if status < 500:
+                    LOG.info(message)
+                else:
+                    access_log.log_exception(
+                        LOG, message, (operation_name, type(e).__name__))
                 pecan.abort(status, message)
 
         return handler
@@ -177,8 +187,11 @@ class ACLMixin(object):
     def get_acl_tuple(self, req, **kwargs):
         return None, None
 
-    def get_acl_dict_for_user(self, req, acl_list):
-        """Get acl operation found for token user in acl list.
+    def get_acl_dict_for_user(self, req, acls):
+        """Get acl operation found for token user in acl summary.
+
+        The acl summary, as returned by the acl repositories, maps each acl
+        operation to its set of user ids and project_access flag.
 
         Token user is looked into users list present for each acl operation.
         If there is a match, it means that ACL data is applicable for policy
@@ -214,10 +227,12 @@ class ACLMixin(object):
         ctxt = _get_barbican_context(req)
         if not ctxt:
             return {}
-        acl_dict = {acl.operation: acl.operation for acl in acl_list
-                    if ctxt.user in acl.to_dict_fields().get('users', [])}
-        co_dict = {'%s_project_access' % acl.operation: acl.project_access for
-                   acl in acl_list if acl.project_access is not None}
+        acl_dict = {operation: operation
+                    for operation, acl in acls.items()
+                    if ctxt.user in acl.user_ids}
+        co_dict = {'%s_project_access' % operation: acl.project_access
+                   for operation, acl in acls.items()
+                   if acl.project_access is not None}
         acl_dict.update(co_dict)
 
         return acl_dict
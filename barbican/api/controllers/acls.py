@@ -22,6 +22,7 @@ from barbican.common import validators
 from barbican import i18n as u
 from barbican.model import models
 from barbican.model import repositories as repo
+from barbican.plugin.util import payload_cache
 
 LOG = utils.getLogger(__name__)
 
@@ -50,7 +51,7 @@ class SecretACLsController(controllers.ACLMixin):
         self.secret = secret
         self.secret_project_id = self.secret.project.external_id
         self.acl_repo = repo.get_secret_acl_repository()
-        self.validator = validators.ACLValidator()
+        self.validator = validators.get_validator(validators.ACLValidator)
 
     def get_acl_tuple(self, req, **kwargs):
         d = {'project_id': self.secret_project_id,
@@ -117,6 +118,7 @@ class SecretACLsController(controllers.ACLMixin):
                                          project_access=project_access)
             self.acl_repo.create_or_replace_from(self.secret, secret_acl=s_acl,
                                                  user_ids=user_ids)
+        payload_cache.invalidate(self.secret.id)
 
         acl_ref = '{0}/acl'.format(
             hrefs.convert_secret_to_href(self.secret.id))
@@ -181,6 +183,7 @@ class SecretACLsController(controllers.ACLMixin):
         for acl in existing_acls_map.values():
             self.acl_repo.delete_entity_by_id(entity_id=acl.id,
                                               external_project_id=None)
+        payload_cache.invalidate(self.secret.id)
         acl_ref = '{0}/acl'.format(
             hrefs.convert_secret_to_href(self.secret.id))
         return {'acl_ref': acl_ref}
@@ -193,6 +196,7 @@ class SecretACLsController(controllers.ACLMixin):
         count = self.acl_repo.get_count(self.secret.id)
         if count > 0:
             self.acl_repo.delete_acls_for_secret(self.secret)
+            payload_cache.invalidate(self.secret.id)
 
     def _return_acl_list_response(self, secret_id):
         result = self.acl_repo.get_by_secret_id(secret_id)
@@ -214,7 +218,7 @@ class ContainerACLsController(controllers.ACLMixin):
         self.container_id = container.id
         self.acl_repo = repo.get_container_acl_repository()
         self.container_repo = repo.get_container_repository()
-        self.validator = validators.ACLValidator()
+        self.validator = validators.get_validator(validators.ACLValidator)
         self.container_project_id = container.project.external_id
 
     def get_acl_tuple(self, req, **kwargs):
@@ -268,7 +268,7 @@ class CertificateAuthoritiesController(controllers.ACLMixin):
         self.project_ca_repo = repo.get_project_ca_repository()
         self.preferred_ca_repo = repo.get_preferred_ca_repository()
         self.project_repo = repo.get_project_repository()
-        self.validator = validators.NewCAValidator()
+        self.validator = validators.get_validator(validators.NewCAValidator)
         self.quota_enforcer = quota.QuotaEnforcer('cas', self.ca_repo)
         # Populate the CA table at start up
         cert_resources.refresh_certificate_resources()
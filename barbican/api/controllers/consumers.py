@@ -50,7 +50,8 @@ class ContainerConsumerController(controllers.ACLMixin):
     def __init__(self, consumer_id):
         self.consumer_id = consumer_id
         self.consumer_repo = repo.get_container_consumer_repository()
-        self.validator = validators.ContainerConsumerValidator()
+        self.validator = validators.get_validator(
+            validators.ContainerConsumerValidator)
 
     @pecan.expose(generic=True)
     def index(self):
@@ -68,8 +69,8 @@ class ContainerConsumerController(controllers.ACLMixin):
 
         dict_fields = consumer.to_dict_fields()
 
-        LOG.info('Retrieved a consumer for project: %s',
-                 external_project_id)
+        LOG.debug('Retrieved a consumer for project: %s',
+                  external_project_id)
 
         return hrefs.convert_to_hrefs(
             hrefs.convert_to_hrefs(dict_fields)
@@ -84,7 +85,8 @@ class ContainerConsumersController(controllers.ACLMixin):
         self.consumer_repo = repo.get_container_consumer_repository()
         self.container_repo = repo.get_container_repository()
         self.project_repo = repo.get_project_repository()
-        self.validator = validators.ContainerConsumerValidator()
+        self.validator = validators.get_validator(
+            validators.ContainerConsumerValidator)
         self.quota_enforcer = quota.QuotaEnforcer('consumers',
                                                   self.consumer_repo)
 
@@ -132,8 +134,8 @@ class ContainerConsumersController(controllers.ACLMixin):
             )
             resp_ctrs_overall.update({'total': total})
 
-        LOG.info('Retrieved a consumer list for project: %s',
-                 external_project_id)
+        LOG.debug('Retrieved a consumer list for project: %s',
+                  external_project_id)
         return resp_ctrs_overall
 
     @index.when(method='POST', template='json')
@@ -50,13 +50,16 @@ class ContainerController(controllers.ACLMixin):
         self.container_id = container.id
         self.consumer_repo = repo.get_container_consumer_repository()
         self.container_repo = repo.get_container_repository()
-        self.validator = validators.ContainerValidator()
+        self.acl_repo = repo.get_container_acl_repository()
+        self.validator = validators.get_validator(
+            validators.ContainerValidator)
         self.consumers = consumers.ContainerConsumersController(
             self.container_id)
         self.acl = acls.ContainerACLsController(self.container)
 
     def get_acl_tuple(self, req, **kwargs):
-        d = self.get_acl_dict_for_user(req, self.container.container_acls)
+        d = self.get_acl_dict_for_user(
+            req, self.acl_repo.get_acl_summary(self.container))
         d['project_id'] = self.container.project.external_id
         d['creator_id'] = self.container.creator_id
         return 'container', d
@@ -74,8 +77,8 @@ class ContainerController(controllers.ACLMixin):
         for secret_ref in dict_fields['secret_refs']:
             hrefs.convert_to_hrefs(secret_ref)
 
-        LOG.info('Retrieved container for project: %s',
-                 external_project_id)
+        LOG.debug('Retrieved container for project: %s',
+                  external_project_id)
         return hrefs.convert_to_hrefs(
             hrefs.convert_to_hrefs(dict_fields)
         )
@@ -116,7 +119,8 @@ class ContainersController(controllers.ACLMixin):
         self.consumer_repo = repo.get_container_consumer_repository()
         self.container_repo = repo.get_container_repository()
         self.secret_repo = repo.get_secret_repository()
-        self.validator = validators.ContainerValidator()
+        self.validator = validators.get_validator(
+            validators.ContainerValidator)
         self.quota_enforcer = quota.QuotaEnforcer('containers',
                                                   self.container_repo)
 
@@ -175,7 +179,7 @@ class ContainersController(controllers.ACLMixin):
             )
             resp_ctrs_overall.update({'total': total})
 
-        LOG.info('Retrieved container list for project: %s', project_id)
+        LOG.debug('Retrieved container list for project: %s', project_id)
         return resp_ctrs_overall
 
     @index.when(method='POST', template='json')
@@ -233,7 +237,8 @@ class ContainersSecretsController(controllers.ACLMixin):
         self.container = container
         self.container_secret_repo = repo.get_container_secret_repository()
         self.secret_repo = repo.get_secret_repository()
-        self.validator = validators.ContainerSecretValidator()
+        self.validator = validators.get_validator(
+            validators.ContainerSecretValidator)
 
     @pecan.expose(generic=True)
     def index(self, **kwargs):
@@ -10,11 +10,14 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+import time
+
 from oslo_log import versionutils
 import pecan
 
 from barbican import api
 from barbican.api import controllers
+from barbican.common import config
 from barbican.common import hrefs
 from barbican.common import quota
 from barbican.common import resources as res
@@ -24,9 +27,12 @@ from barbican import i18n as u
 from barbican.model import models
 from barbican.model import repositories as repo
 from barbican.queue import client as async_client
+from barbican.queue import order_notifier
 
 LOG = utils.getLogger(__name__)
 
+CONF = config.CONF
+
 _DEPRECATION_MSG = '%s has been deprecated in the Newton release. ' \
                    'It will be removed in the Pike release.'
 
@@ -59,6 +65,12 @@ def _order_cannot_be_updated_if_not_pending(order_status):
                          "{0} state.").format(order_status))
 
 
+def _invalid_wait(wait):
+    """Throw exception that the wait parameter is not a number of seconds."""
+    pecan.abort(400, u._("Invalid 'wait' parameter '{0}', a number of "
+                         "seconds was expected.").format(wait))
+
+
 def order_cannot_modify_order_type():
     """Throw exception that order type cannot be modified."""
     pecan.abort(400, u._("Cannot modify order type."))
@@ -72,7 +84,8 @@ class OrderController(controllers.ACLMixin):
         self.order = order
         self.order_repo = repo.get_order_repository()
         self.queue = queue_resource or async_client.TaskClient()
-        self.type_order_validator = validators.TypeOrderValidator()
+        self.type_order_validator = validators.get_validator(
+            validators.TypeOrderValidator)
 
     @pecan.expose(generic=True)
     def index(self, **kwargs):
@@ -81,9 +94,63 @@ class OrderController(controllers.ACLMixin):
     @index.when(method='GET', template='json')
     @controllers.handle_exceptions(u._('Order retrieval'))
     @controllers.enforce_rbac('order:get')
-    def on_get(self, external_project_id):
+    def on_get(self, external_project_id, **kwargs):
+        wait = kwargs.get('wait')
+        if wait is not None:
+            self._wait_while_pending(wait)
         return hrefs.convert_to_hrefs(self.order.to_dict_fields())
 
+    def _wait_while_pending(self, wait):
+        """Hold the request until the order leaves the PENDING state.
+
+        The order is waited for up to 'wait' seconds, bounded by
+        order_wait_max_seconds. Its status is checked again whenever its
+        task notifies this process, or else every order_wait_poll_interval
+        seconds, with a query of the status alone. At most
+        order_wait_max_requests requests wait at the same time, further
+        ones return right away.
+        """
+        try:
+            wait = float(wait)
+        except (TypeError, ValueError):
+            # Such as when the parameter is repeated.
+            _invalid_wait(wait)
+        if not 0 <= wait < float('inf'):
+            _invalid_wait(wait)
+
+        wait = min(wait, CONF.order_wait_max_seconds)
+        if self.order.status != models.States.PENDING or not wait:
+            return
+
+        notifier = order_notifier.get_order_notifier()
+        if not notifier.start_waiting(CONF.order_wait_max_requests):
+            LOG.debug("Not waiting on order %s, as %s requests already are",
+                      self.order.id, CONF.order_wait_max_requests)
+            return
+        try:
+            self._poll_while_pending(notifier, wait)
+        finally:
+            notifier.stop_waiting()
+
+    def _poll_while_pending(self, notifier, wait):
+        status = self.order.status
+        deadline = time.time() + wait
+        while status == models.States.PENDING:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            # End the transaction, so that no connection is held while
+            # waiting and the status is then read as last committed. This
+            # also expires the order, which is reloaded once its status
+            # changed.
+            repo.rollback()
+            notifier.wait(self.order.id,
+                          min(remaining, CONF.order_wait_poll_interval))
+            status = self.order_repo.get_status(self.order.id)
+
+        if status is None:
+            _order_not_found()
+
     @index.when(method='PUT')
     @controllers.handle_exceptions(u._('Order update'))
     @controllers.enforce_rbac('order:put')
@@ -137,7 +204,8 @@ class OrdersController(controllers.ACLMixin):
         LOG.debug('Creating OrdersController')
         self.order_repo = repo.get_order_repository()
         self.queue = queue_resource or async_client.TaskClient()
-        self.type_order_validator = validators.TypeOrderValidator()
+        self.type_order_validator = validators.get_validator(
+            validators.TypeOrderValidator)
         self.quota_enforcer = quota.QuotaEnforcer('orders', self.order_repo)
 
     @pecan.expose()
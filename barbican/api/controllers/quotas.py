@@ -61,7 +61,8 @@ class ProjectQuotasController(controllers.ACLMixin):
     def __init__(self, project_id):
         LOG.debug('=== Creating ProjectQuotasController ===')
         self.passed_project_id = project_id
-        self.validator = validators.ProjectQuotaValidator()
+        self.validator = validators.get_validator(
+            validators.ProjectQuotaValidator)
         self.quota_driver = quota.QuotaDriver()
 
     @pecan.expose(generic=True)
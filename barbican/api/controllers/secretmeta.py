@@ -38,8 +38,10 @@ class SecretMetadataController(controllers.ACLMixin):
         self.secret_project_id = self.secret.project.external_id
         self.secret_repo = repo.get_secret_repository()
         self.user_meta_repo = repo.get_secret_user_meta_repository()
-        self.metadata_validator = validators.NewSecretMetadataValidator()
-        self.metadatum_validator = validators.NewSecretMetadatumValidator()
+        self.metadata_validator = validators.get_validator(
+            validators.NewSecretMetadataValidator)
+        self.metadatum_validator = validators.get_validator(
+            validators.NewSecretMetadatumValidator)
 
     @pecan.expose(generic=True)
     def index(self, **kwargs):
@@ -114,7 +116,8 @@ class SecretMetadatumController(controllers.ACLMixin):
         LOG.debug('=== Creating SecretMetadatumController ===')
         self.user_meta_repo = repo.get_secret_user_meta_repository()
         self.secret = secret
-        self.metadatum_validator = validators.NewSecretMetadatumValidator()
+        self.metadatum_validator = validators.get_validator(
+            validators.NewSecretMetadatumValidator)
 
     @pecan.expose(generic=True)
     def index(self, **kwargs):
@@ -12,16 +12,19 @@
 
 from oslo_utils import timeutils
 import pecan
+import six
 from six.moves.urllib import parse
 
 from barbican import api
 from barbican.api import controllers
 from barbican.api.controllers import acls
 from barbican.api.controllers import secretmeta
+from barbican.common import config
 from barbican.common import exception
 from barbican.common import hrefs
 from barbican.common import quota
 from barbican.common import resources as res
+from barbican.common import serializers
 from barbican.common import utils
 from barbican.common import validators
 from barbican import i18n as u
@@ -32,6 +35,9 @@ from barbican.plugin import util as putil
 
 
 LOG = utils.getLogger(__name__)
+CONF = config.CONF
+
+METADATA_FILTER_PREFIX = 'metadata.'
 
 
 def _secret_not_found():
@@ -77,9 +83,11 @@ class SecretController(controllers.ACLMixin):
         LOG.debug('=== Creating SecretController ===')
         self.secret = secret
         self.transport_key_repo = repo.get_transport_key_repository()
+        self.acl_repo = repo.get_secret_acl_repository()
 
     def get_acl_tuple(self, req, **kwargs):
-        d = self.get_acl_dict_for_user(req, self.secret.secret_acls)
+        d = self.get_acl_dict_for_user(
+            req, self.acl_repo.get_acl_summary(self.secret))
         d['project_id'] = self.secret.project.external_id
         d['creator_id'] = self.secret.creator_id
         return 'secret', d
@@ -118,8 +126,8 @@ class SecretController(controllers.ACLMixin):
         if controllers.is_json_request_accept(pecan.request):
             resp = self._on_get_secret_metadata(self.secret, **kwargs)
 
-            LOG.info('Retrieved secret metadata for project: %s',
-                     external_project_id)
+            LOG.debug('Retrieved secret metadata for project: %s',
+                      external_project_id)
             return resp
         else:
             LOG.warning('Decrypted secret %s requested using deprecated '
@@ -202,8 +210,8 @@ class SecretController(controllers.ACLMixin):
                                            external_project_id,
                                            **kwargs)
 
-        LOG.info('Retrieved secret payload for project: %s',
-                 external_project_id)
+        LOG.debug('Retrieved secret payload for project: %s',
+                  external_project_id)
         return resp
 
     @index.when(method='PUT')
@@ -223,11 +231,10 @@ class SecretController(controllers.ACLMixin):
 
         transport_key_id = kwargs.get('transport_key_id')
 
-        payload = pecan.request.body
+        payload = api.read_body(pecan.request,
+                                CONF.max_allowed_secret_in_bytes)
         if not payload:
             raise exception.NoDataToProcess()
-        if validators.secret_too_big(payload):
-            raise exception.LimitExceeded()
 
         if self.secret.encrypted_data or self.secret.secret_store_metadata:
             _secret_already_has_data()
@@ -259,7 +266,8 @@ class SecretsController(controllers.ACLMixin):
 
     def __init__(self):
         LOG.debug('Creating SecretsController')
-        self.validator = validators.NewSecretValidator()
+        self.validator = validators.get_validator(
+            validators.NewSecretValidator)
         self.secret_repo = repo.get_secret_repository()
         self.quota_enforcer = quota.QuotaEnforcer('secrets', self.secret_repo)
 
@@ -317,6 +325,23 @@ class SecretsController(controllers.ACLMixin):
                 sorted_keys[key] = direction
         return True
 
+    def _get_metadata_filter(self, params):
+        """Returns the user metadata filter of the query string parameters.
+
+        Each 'metadata.<key>=<value>' parameter selects secrets with that
+        user metadata key and value. Keys are matched in lower case, as they
+        are stored. Returns None if the filter is invalid.
+        """
+        metadata = {}
+        for param, value in params.items():
+            if not param.startswith(METADATA_FILTER_PREFIX):
+                continue
+            key = param[len(METADATA_FILTER_PREFIX):].lower()
+            if not key or not isinstance(value, six.string_types):
+                return None
+            metadata[key] = value
+        return metadata
+
     @pecan.expose()
     def _lookup(self, secret_id, *remainder):
         # NOTE(jaosorior): It's worth noting that even though this section
@@ -341,9 +366,6 @@ class SecretsController(controllers.ACLMixin):
     @controllers.handle_exceptions(u._('Secret(s) retrieval'))
     @controllers.enforce_rbac('secrets:get')
     def on_get(self, external_project_id, **kw):
-        def secret_fields(field):
-            return putil.mime_types.augment_fields_with_content_types(field)
-
         LOG.debug('Start secrets on_get '
                   'for project-ID %s:', external_project_id)
 
@@ -365,12 +387,16 @@ class SecretsController(controllers.ACLMixin):
                 _bad_query_string_parameters()
         if kw.get('sort') and not self._is_valid_sorting(kw.get('sort')):
             _bad_query_string_parameters()
+        metadata = self._get_metadata_filter(kw)
+        if metadata is None:
+            _bad_query_string_parameters()
 
         ctxt = controllers._get_barbican_context(pecan.request)
         user_id = None
         if ctxt:
             user_id = ctxt.user
 
+        serializer = serializers.SecretListSerializer()
         result = self.secret_repo.get_secret_list(
             external_project_id,
             offset_arg=kw.get('offset', 0),
@@ -386,7 +412,9 @@ class SecretsController(controllers.ACLMixin):
             created=kw.get('created'),
             updated=kw.get('updated'),
             expiration=kw.get('expiration'),
-            sort=kw.get('sort')
+            sort=kw.get('sort'),
+            columns=serializer.columns,
+            metadata=metadata
         )
 
         secrets, offset, limit, total = result
@@ -395,19 +423,16 @@ class SecretsController(controllers.ACLMixin):
             secrets_resp_overall = {'secrets': [],
                                     'total': total}
         else:
-            secrets_resp = [
-                hrefs.convert_to_hrefs(secret_fields(s))
-                for s in secrets
-            ]
+            secrets_resp = serializer.serialize_rows(secrets)
             secrets_resp_overall = hrefs.add_nav_hrefs(
                 'secrets', offset, limit, total,
                 {'secrets': secrets_resp}
             )
             secrets_resp_overall.update({'total': total})
 
-        LOG.info('Retrieved secret list for project: %s',
-                 external_project_id)
-        return secrets_resp_overall
+        LOG.debug('Retrieved secret list for project: %s',
+                  external_project_id)
+        return serializers.render_json(secrets_resp_overall)
 
     @index.when(method='POST', template='json')
     @controllers.handle_exceptions(u._('Secret creation'))
@@ -438,7 +463,8 @@ class SecretsController(controllers.ACLMixin):
             secret_model=secret_model,
             project_model=project,
             transport_key_needed=transport_key_needed,
-            transport_key_id=data.get('transport_key_id'))
+            transport_key_id=data.get('transport_key_id'),
+            unencrypted_bytes=data.get(validators.PAYLOAD_BYTES))
 
         url = hrefs.convert_secret_to_href(new_secret.id)
         LOG.debug('URI to secret is %s', url)
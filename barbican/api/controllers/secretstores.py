@@ -49,6 +49,9 @@ def convert_secret_store_to_response_format(secret_store):
         data['secret_store_id'])
     # no need to pass store id as secret_store_ref is returned
     data.pop('secret_store_id', None)
+    backend_status = multiple_backends.get_backend_status(secret_store)
+    if backend_status is not None:
+        data['backend_status'] = backend_status
     return data
 
 
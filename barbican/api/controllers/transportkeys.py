@@ -84,7 +84,8 @@ class TransportKeysController(controllers.ACLMixin):
     def __init__(self, transport_key_repo=None):
         LOG.debug('Creating TransportKeyController')
         self.repo = transport_key_repo or repo.TransportKeyRepo()
-        self.validator = validators.NewTransportKeyValidator()
+        self.validator = validators.get_validator(
+            validators.NewTransportKeyValidator)
 
     @pecan.expose()
     def _lookup(self, transport_key_id, *remainder):
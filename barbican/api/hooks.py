@@ -23,6 +23,7 @@ try:
 except ImportError:
     newrelic_loaded = False
 
+from barbican.api import controllers
 from barbican.model import repositories
 
 
@@ -39,7 +40,18 @@ class JSONErrorHook(pecan.hooks.PecanHook):
 
 
 class BarbicanTransactionHook(pecan.hooks.TransactionHook):
-    """Custom hook for Barbican transactions."""
+    """Custom hook for Barbican transactions.
+
+    Read-only requests for resources listed in READ_ONLY_RESOURCES are routed
+    to the read-only database, if one is configured.
+    """
+
+    # Top-level resources whose GET requests only read metadata from the
+    # database. Secret payload retrieval is excluded as it goes through the
+    # secret store plugins.
+    READ_ONLY_RESOURCES = ('secrets', 'containers', 'cas', 'quotas',
+                           'project-quotas')
+
     def __init__(self):
         super(BarbicanTransactionHook, self).__init__(
             start=repositories.start,
@@ -49,6 +61,45 @@ class BarbicanTransactionHook(pecan.hooks.TransactionHook):
             clear=repositories.clear
         )
 
+    def on_route(self, state):
+        if self.is_transactional(state):
+            super(BarbicanTransactionHook, self).on_route(state)
+            return
+
+        state.request.error = False
+        state.request.transactional = False
+        self.start_ro(
+            external_project_id=self._get_external_project_id(state.request),
+            use_replica=self.is_read_only_safe(state.request))
+
+    def after(self, state):
+        wrote = (getattr(state.request, 'transactional', False) and
+                 not state.request.error)
+        super(BarbicanTransactionHook, self).after(state)
+        if wrote:
+            repositories.record_project_write(
+                self._get_external_project_id(state.request))
+
+    def is_read_only_safe(self, request):
+        """Decide if a non-transactional request can use a replica."""
+        parts = [part for part in request.path_info.split('/') if part]
+        if not parts or parts[0] not in self.READ_ONLY_RESOURCES:
+            return False
+
+        if parts[0] == 'secrets':
+            if parts[-1] == 'payload':
+                return False
+            # Deprecated payload retrieval via the secret resource itself.
+            if (len(parts) == 2 and
+                    not controllers.is_json_request_accept(request)):
+                return False
+
+        return True
+
+    def _get_external_project_id(self, request):
+        ctx = controllers._get_barbican_context(request)
+        return ctx.project if ctx else None
+
 
 class NewRelicHook(pecan.hooks.PecanHook):
     def on_error(self, state, exc):
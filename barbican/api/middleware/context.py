@@ -12,9 +12,11 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import webob.dec
 import webob.exc
 
 from barbican.api import middleware as mw
+from barbican.common import access_log
 from barbican.common import config
 from barbican.common import utils
 import barbican.context
@@ -25,7 +27,13 @@ CONF = config.CONF
 
 
 class BaseContextMiddleware(mw.Middleware):
+    def __init__(self, app):
+        super(BaseContextMiddleware, self).__init__(app)
+        if CONF.access_log.db_timing:
+            access_log.enable_db_timing()
+
     def process_request(self, req):
+        access_log.start_request()
         request_id = req.headers.get('x-openstack-request-id')
         if not request_id:
             request_id = 'req-' + utils.generate_uuid()
@@ -34,13 +42,20 @@ class BaseContextMiddleware(mw.Middleware):
     def process_response(self, resp):
 
         resp.headers['x-openstack-request-id'] = resp.request.request_id
-
-        LOG.info('Processed request: %(status)s - %(method)s %(url)s',
-                 {"status": resp.status,
-                  "method": resp.request.method,
-                  "url": resp.request.url})
+        access_log.log_request(resp.request, resp)
         return resp
 
+    @webob.dec.wsgify
+    def __call__(self, req):
+        try:
+            return super(BaseContextMiddleware, self).__call__(req)
+        except webob.exc.HTTPException as e:
+            # Requests rejected by process_request(), such as unauthenticated
+            # ones, get their request ID and are access logged as well.
+            resp = req.get_response(e)
+            resp.request = req
+            return self.process_response(resp)
+
 
 class ContextMiddleware(BaseContextMiddleware):
     def __init__(self, app):
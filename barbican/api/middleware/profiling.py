@@ -0,0 +1,292 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+On-demand profiling of single API requests.
+
+A request is profiled when it carries an X-Barbican-Profile header signed
+with one of the configured hmac_keys, or set to 'admin' by an
+administrator when allow_admin is enabled, or when it is picked by
+sample_rate. It then runs under cProfile, while its SQL statements and
+plugin calls are timed, and two artifacts named after its request ID are
+written to output_dir: <request_id>.prof, which pstats or snakeviz load,
+and <request_id>.json, with the SQL statements and plugin calls.
+
+The filter is to be placed after the context filter. When profiling is
+not enabled, its factory returns the application unwrapped, so that it
+costs nothing. Only one request is profiled at a time by each process and,
+under eventlet, the profile also covers the green threads run while the
+request waits on I/O.
+"""
+import cProfile
+import hashlib
+import hmac
+import os
+import random
+import re
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_serialization import jsonutils as json
+import sqlalchemy
+import webob.dec
+
+from barbican.api import middleware as mw
+from barbican.common import config
+from barbican.common import utils
+from barbican import i18n as u
+from barbican.plugin.util import circuit_breaker
+
+LOG = utils.getLogger(__name__)
+
+CONF = config.CONF
+
+PROFILE_HEADER = 'X-Barbican-Profile'
+
+profiling_opt_group = cfg.OptGroup(name='profiling',
+                                   title='API Request Profiling Options')
+profiling_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help=u._('Enable the profiling filter of the barbican-api '
+                         'pipeline. When disabled, it is left out of the '
+                         'pipeline.')
+                ),
+    cfg.ListOpt('hmac_keys',
+                default=[],
+                secret=True,
+                help=u._('Keys the X-Barbican-Profile header of a request '
+                         'can be signed with to have it profiled. The '
+                         'header holds an expiry UNIX timestamp and the hex '
+                         'HMAC-SHA256 of this timestamp, separated by a '
+                         'colon.')
+                ),
+    cfg.BoolOpt('allow_admin',
+                default=False,
+                help=u._('Profile the requests of administrators setting '
+                         'the X-Barbican-Profile header to admin.')
+                ),
+    cfg.FloatOpt('sample_rate',
+                 default=0.0, min=0.0, max=1.0,
+                 help=u._('Fraction of the API requests profiled regardless '
+                          'of their headers.')
+                 ),
+    cfg.StrOpt('output_dir',
+               help=u._('Directory the profiles are written to, required '
+                        'when profiling is enabled. It is created, only '
+                        'accessible to the barbican-api user, if it does not '
+                        'exist. Profiles hold the SQL statements of the '
+                        'requests, so it should not be shared with other '
+                        'users, such as the temporary directory of the '
+                        'system is.')
+               ),
+]
+CONF.register_group(profiling_opt_group)
+CONF.register_opts(profiling_opts, group=profiling_opt_group)
+
+# Request IDs are client supplied, so only those safe to use as file names
+# are used to name the profiles.
+_SAFE_REQUEST_ID = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+# Recorder of the request being profiled by the current thread, if any.
+_REQUEST_STATE = threading.local()
+
+_LISTENERS_LOCK = threading.Lock()
+_LISTENERS_ADDED = False
+
+
+def list_opts():
+    yield profiling_opt_group, profiling_opts
+
+
+def sign(key, expires):
+    """Returns an X-Barbican-Profile header value, signed with key."""
+    expires = str(int(expires))
+    digest = hmac.new(key.encode('utf-8'), expires.encode('utf-8'),
+                      hashlib.sha256).hexdigest()
+    return '%s:%s' % (expires, digest)
+
+
+def _is_signed(value):
+    expires = value.partition(':')[0]
+    try:
+        if int(expires) < time.time():
+            return False
+    except ValueError:
+        return False
+    return any(hmac.compare_digest(sign(key, expires), value)
+               for key in CONF.profiling.hmac_keys)
+
+
+class _Recorder(object):
+    """Collects the SQL statements and plugin calls of a request."""
+
+    def __init__(self):
+        self.statements = []
+        self.plugin_calls = []
+
+    def to_dict(self):
+        return {
+            'sql': {
+                'count': len(self.statements),
+                'seconds': sum(s['seconds'] for s in self.statements),
+                'statements': self.statements,
+            },
+            'plugin_calls': self.plugin_calls,
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if getattr(_REQUEST_STATE, 'recorder', None) is not None:
+        conn.info['barbican_profile_start'] = time.time()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    recorder = getattr(_REQUEST_STATE, 'recorder', None)
+    started_at = conn.info.pop('barbican_profile_start', None)
+    if recorder is not None and started_at is not None:
+        # The parameters are left out, as they may hold secrets.
+        recorder.statements.append({
+            'statement': statement,
+            'seconds': time.time() - started_at,
+        })
+
+
+def _handle_error(context):
+    # No after_cursor_execute event follows a failed statement.
+    if context.connection is not None:
+        context.connection.info.pop('barbican_profile_start', None)
+
+
+def _observe_plugin_call(plugin, seconds):
+    recorder = getattr(_REQUEST_STATE, 'recorder', None)
+    if recorder is not None:
+        recorder.plugin_calls.append({
+            'plugin': utils.generate_fullname_for(plugin),
+            'seconds': seconds,
+        })
+
+
+def _add_listeners():
+    global _LISTENERS_ADDED
+    with _LISTENERS_LOCK:
+        circuit_breaker.add_call_observer(_observe_plugin_call)
+        if _LISTENERS_ADDED:
+            return
+        sqlalchemy.event.listen(sqlalchemy.engine.Engine,
+                                'before_cursor_execute',
+                                _before_cursor_execute)
+        sqlalchemy.event.listen(sqlalchemy.engine.Engine,
+                                'after_cursor_execute',
+                                _after_cursor_execute)
+        sqlalchemy.event.listen(sqlalchemy.engine.Engine, 'handle_error',
+                                _handle_error)
+        _LISTENERS_ADDED = True
+
+
+class ProfilingMiddleware(mw.Middleware):
+    """Profiles the requests asking for it, or picked by sampling."""
+
+    def __init__(self, app):
+        super(ProfilingMiddleware, self).__init__(app)
+        if not CONF.profiling.output_dir:
+            raise ValueError(u._('output_dir is required when profiling is '
+                                 'enabled'))
+        self.output_dir = CONF.profiling.output_dir
+        self._lock = threading.Lock()
+        _add_listeners()
+
+    @classmethod
+    def factory(cls, global_conf, **local_conf):
+        def filter(app):
+            if not CONF.profiling.enabled:
+                return app
+            return cls(app)
+        return filter
+
+    def _is_requested(self, req):
+        value = req.headers.get(PROFILE_HEADER)
+        if value:
+            if value == 'admin':
+                ctx = req.environ.get('barbican.context')
+                if CONF.profiling.allow_admin and ctx and ctx.is_admin:
+                    return True
+            elif _is_signed(value):
+                return True
+            LOG.warning('Ignoring the invalid %s header of request %s',
+                        PROFILE_HEADER, self._get_request_id(req))
+        rate = CONF.profiling.sample_rate
+        return rate > 0 and random.random() < rate
+
+    def _get_request_id(self, req):
+        request_id = (getattr(req, 'request_id', None) or
+                      req.headers.get('x-openstack-request-id'))
+        if not request_id or not _SAFE_REQUEST_ID.match(request_id):
+            request_id = 'req-' + utils.generate_uuid()
+        return request_id
+
+    @webob.dec.wsgify
+    def __call__(self, req):
+        if not self._is_requested(req):
+            return req.get_response(self.application)
+        # cProfile only supports one profiler per thread, and concurrent
+        # profiles would be skewed by each other anyway.
+        if not self._lock.acquire(False):
+            LOG.debug('Not profiling request, as another one is')
+            return req.get_response(self.application)
+        try:
+            return self._profile(req)
+        finally:
+            self._lock.release()
+
+    def _profile(self, req):
+        recorder = _Recorder()
+        profiler = cProfile.Profile()
+        _REQUEST_STATE.recorder = recorder
+        start = time.time()
+        try:
+            resp = profiler.runcall(req.get_response, self.application)
+        finally:
+            duration = time.time() - start
+            _REQUEST_STATE.recorder = None
+
+        request_id = self._get_request_id(req)
+        summary = {
+            'request_id': request_id,
+            'method': req.method,
+            'path': req.path,
+            'status': resp.status_int,
+            'seconds': duration,
+        }
+        summary.update(recorder.to_dict())
+        try:
+            self._write(request_id, profiler, summary)
+        except (IOError, OSError):
+            LOG.exception('Unable to write the profile of request %s',
+                          request_id)
+        return resp
+
+    def _write(self, request_id, profiler, summary):
+        if not os.path.isdir(self.output_dir):
+            os.makedirs(self.output_dir, 0o700)
+        path = os.path.join(self.output_dir, request_id)
+        profiler.dump_stats(path + '.prof')
+        with open(path + '.json', 'w') as f:
+            f.write(json.dumps(summary, indent=2, sort_keys=True))
+        LOG.info('Profiled request %(request_id)s in %(seconds).3fs, '
+                 'written to %(path)s.prof',
+                 {'request_id': request_id, 'seconds': summary['seconds'],
+                  'path': path})
@@ -27,11 +27,9 @@ import sys
 from oslo_config import cfg
 from oslo_log import log as logging
 
-from barbican.cmd import pkcs11_kek_rewrap as pkcs11_rewrap
 from barbican.common import config
 from barbican.model import clean
 from barbican.model.migration import commands
-from barbican.plugin.crypto import pkcs11
 import barbican.version
 
 CONF = cfg.CONF
@@ -200,11 +198,15 @@ class HSMCommands(object):
     @args('--dry-run', action="store_true", dest='dryrun', default=False,
           help='Displays changes that will be made (Non-destructive)')
     def rewrap_pkek(self, dryrun=None):
+        # The PKCS#11 modules load cffi and the vendor library, so they are
+        # only imported by the commands that talk to the HSM.
+        from barbican.cmd import pkcs11_kek_rewrap as pkcs11_rewrap
         rewrapper = pkcs11_rewrap.KekRewrap(pkcs11_rewrap.CONF)
         rewrapper.execute(dryrun)
         rewrapper.pkcs11.return_session(rewrapper.hsm_session)
 
     def _create_pkcs11_session(self, passphrase, libpath, slotid):
+        from barbican.plugin.crypto import pkcs11
         self.pkcs11 = pkcs11.PKCS11(
             library_path=libpath, login_passphrase=passphrase,
             rw_session=True, slot_id=slotid
@@ -221,9 +223,128 @@ class HSMCommands(object):
             sys.exit(1)
 
 
+class KEKCommands(object):
+    """Class for managing the key encryption keys of projects"""
+
+    description = "Subcommands for managing project KEKs"
+
+    rotate_description = ("Rotate the KEKs of a project and re-encrypt its "
+                          "secrets under the new KEKs")
+
+    @args('--db-url', '-d', metavar='<db-url>', dest='dburl',
+          help='barbican database URL')
+    @args('--project-id', '-p', metavar='<project-id>', dest='project_id',
+          required=True, help='Keystone id of the project')
+    @args('--plugin-name', metavar='<plugin-name>', dest='plugin_name',
+          help='Full name of the crypto plugin to rotate the KEK of. '
+          'Defaults to all the crypto plugins the project has KEKs with.')
+    @args('--no-reencrypt', action='store_false', dest='reencrypt',
+          default=True, help='Only rotate the KEKs, leaving the secrets '
+          'to be re-encrypted later with "kek reencrypt".')
+    @args('--batch-size', '-b', metavar='<batch-size>', dest='batch_size',
+          type=int, default=100, help='Number of secrets re-encrypted per '
+          'transaction. Default is %(default)s.')
+    @args('--max-rate', '-r', metavar='<max-rate>', dest='max_rate',
+          type=float, default=50, help='Maximum number of secrets '
+          're-encrypted per second, 0 for no limit. Default is %(default)s.')
+    def rotate(self, dburl=None, project_id=None, plugin_name=None,
+               reencrypt=None, batch_size=None, max_rate=None):
+        from barbican.plugin import kek_rotation
+        kek_rotation.rotate_command(
+            sql_url=dburl or CONF.sql_connection,
+            external_project_id=project_id,
+            plugin_name=plugin_name,
+            reencrypt=reencrypt,
+            batch_size=batch_size,
+            max_rate=max_rate)
+
+    reencrypt_description = ("Re-encrypt the secrets of a project still "
+                             "under previous KEKs")
+
+    @args('--db-url', '-d', metavar='<db-url>', dest='dburl',
+          help='barbican database URL')
+    @args('--project-id', '-p', metavar='<project-id>', dest='project_id',
+          required=True, help='Keystone id of the project')
+    @args('--plugin-name', metavar='<plugin-name>', dest='plugin_name',
+          help='Full name of the crypto plugin to re-encrypt the secrets '
+          'of. Defaults to all the crypto plugins the project has KEKs '
+          'with.')
+    @args('--batch-size', '-b', metavar='<batch-size>', dest='batch_size',
+          type=int, default=100, help='Number of secrets re-encrypted per '
+          'transaction. Default is %(default)s.')
+    @args('--max-rate', '-r', metavar='<max-rate>', dest='max_rate',
+          type=float, default=50, help='Maximum number of secrets '
+          're-encrypted per second, 0 for no limit. Default is %(default)s.')
+    def reencrypt(self, dburl=None, project_id=None, plugin_name=None,
+                  batch_size=None, max_rate=None):
+        from barbican.plugin import kek_rotation
+        kek_rotation.reencrypt_command(
+            sql_url=dburl or CONF.sql_connection,
+            external_project_id=project_id,
+            plugin_name=plugin_name,
+            batch_size=batch_size,
+            max_rate=max_rate)
+
+    status_description = ("Show the KEKs of a project and the number of "
+                          "secrets left to re-encrypt")
+
+    @args('--db-url', '-d', metavar='<db-url>', dest='dburl',
+          help='barbican database URL')
+    @args('--project-id', '-p', metavar='<project-id>', dest='project_id',
+          required=True, help='Keystone id of the project')
+    def status(self, dburl=None, project_id=None):
+        from barbican.plugin import kek_rotation
+        kek_rotation.status_command(
+            sql_url=dburl or CONF.sql_connection,
+            external_project_id=project_id)
+
+
+class SecretStoreCommands(object):
+    """Class for managing the secret stores of multiple backends"""
+
+    description = "Subcommands for managing secret stores"
+
+    migrate_description = ("Migrate the secrets of a project or of a secret "
+                           "store to another secret store")
+
+    @args('--db-url', '-d', metavar='<db-url>', dest='dburl',
+          help='barbican database URL')
+    @args('--target-store', '-t', metavar='<target-store>',
+          dest='target_store', required=True,
+          help='Name or id of the secret store to migrate the secrets to')
+    @args('--project-id', '-p', metavar='<project-id>', dest='project_id',
+          help='Keystone id of the project to migrate the secrets of')
+    @args('--source-store', '-s', metavar='<source-store>',
+          dest='source_store', help='Name or id of the secret store to '
+          'migrate the secrets of')
+    @args('--workers', '-w', metavar='<workers>', dest='workers', type=int,
+          default=4, help='Number of threads migrating secrets, 0 to '
+          'migrate them one at a time. Default is %(default)s.')
+    @args('--per-store', metavar='<per-store>', dest='per_store', type=int,
+          default=2, help='Maximum number of secrets migrated from or to '
+          'each secret store at a time. Default is %(default)s.')
+    @args('--batch-size', '-b', metavar='<batch-size>', dest='batch_size',
+          type=int, default=100, help='Number of secrets listed at a time. '
+          'Default is %(default)s.')
+    def migrate(self, dburl=None, target_store=None, project_id=None,
+                source_store=None, workers=None, per_store=None,
+                batch_size=None):
+        from barbican.plugin import secret_migration
+        secret_migration.migrate_command(
+            sql_url=dburl or CONF.sql_connection,
+            target_store=target_store,
+            external_project_id=project_id,
+            source_store=source_store,
+            workers=workers,
+            per_store_concurrency=per_store,
+            page_size=batch_size)
+
+
 CATEGORIES = {
     'db': DbCommands,
     'hsm': HSMCommands,
+    'kek': KEKCommands,
+    'secretstore': SecretStoreCommands,
 }
 
 
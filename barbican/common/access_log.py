@@ -0,0 +1,397 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Access logging of API requests, off the request threads.
+
+Each API request is logged once, by the context middleware, as a record of
+the 'barbican.api.access' logger carrying the request_id, project_id,
+method, route, status, latency_ms and db_ms fields, which structured log
+formatters such as oslo.log's JSONFormatter output as such. Successful
+requests may be sampled, while failed and slow requests are always logged.
+
+When async_logging is enabled, the records of all the loggers of an API
+process are queued by the request threads, and formatted and written out
+by a single background writer thread. Tracebacks of unexpected errors are
+rate limited, per operation and exception type.
+"""
+import atexit
+import logging
+import random
+import re
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_context import context as oslo_context
+from six.moves import queue
+import sqlalchemy
+
+from barbican.common import config
+from barbican.common import utils
+from barbican import i18n as u
+
+LOG = utils.getLogger(__name__)
+ACCESS_LOG = utils.getLogger('barbican.api.access')
+
+CONF = config.CONF
+
+access_log_opt_group = cfg.OptGroup(name='access_log',
+                                    title='API Access Log Options')
+access_log_opts = [
+    cfg.BoolOpt('async_logging',
+                default=False,
+                help=u._('Queue the log records of the barbican-api '
+                         'processes, to have them formatted and written out '
+                         'by a background thread rather than by the request '
+                         'threads. Records are dropped, and their number '
+                         'logged, while the queue is full.')
+                ),
+    cfg.IntOpt('queue_size',
+               default=10000, min=1,
+               help=u._('Maximum number of log records queued when '
+                        'async_logging is enabled.')
+               ),
+    cfg.FloatOpt('success_sample_rate',
+                 default=1.0, min=0.0, max=1.0,
+                 help=u._('Fraction of the successful API requests that are '
+                          'access logged. Failed requests, and requests '
+                          'slower than slow_request_ms, are always logged.')
+                 ),
+    cfg.IntOpt('slow_request_ms',
+               default=1000, min=0,
+               help=u._('Number of milliseconds after which a successful '
+                        'request is access logged regardless of '
+                        'success_sample_rate. Set to 0 to disable.')
+               ),
+    cfg.BoolOpt('db_timing',
+                default=True,
+                help=u._('Measure the time each API request spends in '
+                         'database statements, logged as its db_ms.')
+                ),
+    cfg.IntOpt('exception_burst',
+               default=5, min=0,
+               help=u._('Number of tracebacks logged, for each operation '
+                        'and exception type, per exception_interval. Further '
+                        'errors are logged without a traceback.')
+               ),
+    cfg.IntOpt('exception_interval',
+               default=60, min=1,
+               help=u._('Number of seconds over which exception_burst '
+                        'applies.')
+               ),
+]
+CONF.register_group(access_log_opt_group)
+CONF.register_opts(access_log_opts, group=access_log_opt_group)
+
+# Path segments that are IDs are replaced in the logged route, so that the
+# requests to the same resource can be grouped.
+_ID_SEGMENT = re.compile(
+    r'/(?:[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}|[0-9]+)'
+    r'(?=/|$)')
+
+# Per request cycle (thread or green thread) timing state, see
+# start_request().
+_REQUEST_STATE = threading.local()
+
+_DB_TIMING_LOCK = threading.Lock()
+_DB_TIMING_ENABLED = False
+
+_LISTENER = None
+_EXCEPTION_LIMITER = None
+
+
+def list_opts():
+    yield access_log_opt_group, access_log_opts
+
+
+def get_route(path):
+    """Returns the path of a request with its ID segments replaced."""
+    return _ID_SEGMENT.sub('/{id}', path)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if getattr(_REQUEST_STATE, 'started_at', None) is not None:
+        conn.info['barbican_query_start'] = time.time()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    started_at = conn.info.pop('barbican_query_start', None)
+    if (started_at is not None and
+            getattr(_REQUEST_STATE, 'started_at', None) is not None):
+        _REQUEST_STATE.db_seconds += time.time() - started_at
+
+
+def _handle_error(context):
+    # No after_cursor_execute event follows a failed statement, whose start
+    # would otherwise be accounted to the next statement of the connection.
+    if context.connection is not None:
+        context.connection.info.pop('barbican_query_start', None)
+
+
+def enable_db_timing():
+    """Accounts the time spent in database statements to the requests.
+
+    The listeners are attached to all the engines, and only measure the
+    statements executed between start_request() and end_request().
+    """
+    global _DB_TIMING_ENABLED
+    with _DB_TIMING_LOCK:
+        if _DB_TIMING_ENABLED:
+            return
+        sqlalchemy.event.listen(sqlalchemy.engine.Engine,
+                                'before_cursor_execute',
+                                _before_cursor_execute)
+        sqlalchemy.event.listen(sqlalchemy.engine.Engine,
+                                'after_cursor_execute',
+                                _after_cursor_execute)
+        sqlalchemy.event.listen(sqlalchemy.engine.Engine, 'handle_error',
+                                _handle_error)
+        _DB_TIMING_ENABLED = True
+
+
+def start_request():
+    """Starts timing the request of the current thread."""
+    _REQUEST_STATE.started_at = time.time()
+    _REQUEST_STATE.db_seconds = 0.0
+
+
+def end_request():
+    """Stops timing the request of the current thread.
+
+    :returns: (latency, db_time) of the request in seconds, or None if it
+              was not started.
+    """
+    started_at = getattr(_REQUEST_STATE, 'started_at', None)
+    if started_at is None:
+        return None
+    _REQUEST_STATE.started_at = None
+    return time.time() - started_at, _REQUEST_STATE.db_seconds
+
+
+def _is_sampled(status_code, latency_ms):
+    if status_code >= 400:
+        return True
+    slow_request_ms = CONF.access_log.slow_request_ms
+    if slow_request_ms and latency_ms >= slow_request_ms:
+        return True
+    rate = CONF.access_log.success_sample_rate
+    return rate >= 1.0 or random.random() < rate
+
+
+def log_request(req, resp):
+    """Access logs a request ended with resp, unless it is sampled out."""
+    timings = end_request()
+    latency, db_time = timings if timings else (0.0, 0.0)
+    latency_ms = round(latency * 1000, 1)
+    db_ms = round(db_time * 1000, 1)
+    if not _is_sampled(resp.status_code, latency_ms):
+        return
+
+    ctx = req.environ.get('barbican.context')
+    ACCESS_LOG.info(
+        'Processed request: %(status)s - %(method)s %(url)s '
+        '%(latency_ms)sms (db %(db_ms)sms)',
+        {'status': resp.status,
+         'method': req.method,
+         'url': req.url,
+         'latency_ms': latency_ms,
+         'db_ms': db_ms},
+        request_id=req.request_id,
+        project_id=ctx.project if ctx else None,
+        method=req.method,
+        route=get_route(req.path),
+        status=resp.status_code,
+        latency_ms=latency_ms,
+        db_ms=db_ms)
+
+
+class QueueHandler(logging.Handler):
+    """Queues the records to be written out by a QueueListener.
+
+    The message of a record is resolved, and the request context of the
+    emitting thread attached to it, before it is queued, so that it is
+    formatted the same on the writer thread. Records are dropped rather
+    than waited for while the queue is full.
+    """
+
+    def __init__(self, record_queue):
+        super(QueueHandler, self).__init__()
+        self.queue = record_queue
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if 'context' not in record.__dict__:
+            record.context = oslo_context.get_current()
+        return record
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+
+class QueueListener(object):
+    """Writes out the queued records through the handlers, on a thread."""
+
+    _sentinel = None
+
+    def __init__(self, record_queue, handlers, queue_handler=None):
+        self.queue = record_queue
+        self.handlers = handlers
+        self.queue_handler = queue_handler
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run,
+                                        name='barbican-log-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Writes out the records queued so far and stops the thread."""
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+
+    def handle(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _report_dropped(self):
+        dropped = self.queue_handler.dropped if self.queue_handler else 0
+        if dropped:
+            self.queue_handler.dropped -= dropped
+            self.handle(logging.LogRecord(
+                LOG.logger.name, logging.WARNING, __file__, 0,
+                '%d log records were dropped while the log queue was full',
+                (dropped,), None))
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is self._sentinel:
+                break
+            self.handle(record)
+            if self.queue.empty():
+                self._report_dropped()
+        self._report_dropped()
+
+
+def setup_async_logging():
+    """Moves the root logger's handlers behind a queue, if configured.
+
+    To be called once logging is set up. Does nothing unless async_logging
+    is enabled, or when the handlers were already moved.
+    """
+    global _LISTENER
+    if not CONF.access_log.async_logging or _LISTENER is not None:
+        return
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    record_queue = queue.Queue(CONF.access_log.queue_size)
+    queue_handler = QueueHandler(record_queue)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _LISTENER = QueueListener(record_queue, handlers, queue_handler)
+    _LISTENER.start()
+    atexit.register(stop_async_logging)
+
+
+def stop_async_logging():
+    """Writes out the queued records and restores the root handlers."""
+    global _LISTENER
+    if _LISTENER is None:
+        return
+    listener, _LISTENER = _LISTENER, None
+    root = logging.getLogger()
+    root.removeHandler(listener.queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        root.addHandler(handler)
+
+
+class ExceptionLogLimiter(object):
+    """Limits the tracebacks logged per key to burst per interval."""
+
+    def __init__(self, burst, interval):
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Counts an error for key.
+
+        :returns: (allowed, suppressed) where allowed tells whether its
+                  traceback is to be logged, and suppressed is the number of
+                  errors whose traceback was not logged since the last one.
+        """
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                window = [now, 0, suppressed]
+                self._windows[key] = window
+            if window[1] < self.burst:
+                window[1] += 1
+                suppressed, window[2] = window[2], 0
+                return True, suppressed
+            window[2] += 1
+            return False, window[2]
+
+
+def _get_exception_limiter():
+    global _EXCEPTION_LIMITER
+    if _EXCEPTION_LIMITER is None:
+        _EXCEPTION_LIMITER = ExceptionLogLimiter(
+            CONF.access_log.exception_burst,
+            CONF.access_log.exception_interval)
+    return _EXCEPTION_LIMITER
+
+
+def log_exception(logger, message, key):
+    """Logs the exception being handled, its traceback rate limited by key.
+
+    :param logger: Logger to log the error with.
+    :param message: Message logged, with or without the traceback.
+    :param key: Hashable grouping the similar errors, such as the operation
+                name and exception type.
+    """
+    allowed, suppressed = _get_exception_limiter().acquire(key)
+    if not allowed:
+        logger.error(message)
+        return
+    if suppressed:
+        logger.error('%d similar errors were logged without traceback',
+                     suppressed)
+    logger.exception(message)
+
+
+def reset():
+    """Drops the exception rate limits, used for unit testing."""
+    global _EXCEPTION_LIMITER
+    _EXCEPTION_LIMITER = None
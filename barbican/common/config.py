@@ -17,6 +17,7 @@
 Configuration setup for Barbican.
 """
 
+import importlib
 import logging
 import os
 
@@ -50,6 +51,44 @@ common_opts = [
     cfg.IntOpt('max_allowed_secret_in_bytes',
                default=DEFAULT_MAX_SECRET_BYTES,
                help=u._("Maximum allowed secret size in bytes.")),
+    cfg.IntOpt('acl_cache_ttl',
+               default=0, min=0,
+               help=u._("Number of seconds the ACLs of a secret or container "
+                        "are cached for by each barbican-api process, or 0 "
+                        "to disable the cache. A cached entry is dropped once "
+                        "the secret or container is loaded with a later "
+                        "updated_at, which every ACL change bumps. As "
+                        "updated_at only has a precision of a second on "
+                        "some databases, such as MySQL, a process may then "
+                        "miss the later of two ACL changes made within the "
+                        "same second, including a revocation, for up to "
+                        "this number of seconds. Only enable the cache where "
+                        "this is acceptable.")),
+    cfg.IntOpt('order_wait_max_seconds',
+               default=0, min=0,
+               help=u._("Maximum number of seconds an order retrieval "
+                        "with the 'wait' URL parameter is held for, waiting "
+                        "for the order to leave the PENDING state, or 0 to "
+                        "ignore the 'wait' parameter. A waiting request "
+                        "holds its barbican-api thread, so only enable this "
+                        "when barbican-api runs with several threads per "
+                        "process, or under eventlet, and not with a single "
+                        "thread per process, where a waiting request "
+                        "stalls every other request of its process.")),
+    cfg.IntOpt('order_wait_max_requests',
+               default=10, min=1,
+               help=u._("Maximum number of order retrievals each "
+                        "barbican-api process holds at the same time when "
+                        "order_wait_max_seconds is set. Further retrievals "
+                        "return the order right away, whatever its state. "
+                        "Keep this below the number of threads of the "
+                        "process.")),
+    cfg.FloatOpt('order_wait_poll_interval',
+                 default=1.0, min=0.1,
+                 help=u._("Number of seconds between the checks of the "
+                          "status of an order waited for, when its worker "
+                          "does not notify the waiting barbican-api process, "
+                          "such as when it runs in another process.")),
 ]
 
 host_opts = [
@@ -128,6 +167,32 @@ db_opts = [
                         "will be placed on the total number of concurrent "
                         "connections. Comment out to allow SQLAlchemy to "
                         "select the default.")),
+    cfg.StrOpt('sql_connection_readonly',
+               secret=True,
+               help=u._("SQLAlchemy connection string for a read-only "
+                        "replica of the registry database. When set, GET "
+                        "requests that only read metadata (secret "
+                        "metadata, lists, containers, consumers, ACLs, "
+                        "quotas and CAs) are served from this database. "
+                        "Leave blank to serve all requests from "
+                        "sql_connection.")),
+    cfg.IntOpt('sql_readonly_pool_size', default=5,
+               help=u._("Size of pool used by SQLAlchemy for the read-only "
+                        "database connection. Has the same meaning as "
+                        "sql_pool_size.")),
+    cfg.IntOpt('sql_readonly_pool_max_overflow', default=10,
+               help=u._("The maximum overflow size of the pool used by "
+                        "SQLAlchemy for the read-only database connection. "
+                        "Has the same meaning as sql_pool_max_overflow.")),
+    cfg.IntOpt('sql_readonly_read_after_write_seconds', default=5,
+               help=u._("Number of seconds after a successful write by a "
+                        "project during which read-only requests from that "
+                        "same project keep using sql_connection, so that "
+                        "they are not served stale data by a lagging "
+                        "replica. Writes are only tracked by the process "
+                        "serving them, so with several API processes, reads "
+                        "served by another process may still be stale. Set "
+                        "to 0 to disable this protection.")),
 ]
 
 retry_opt_group = cfg.OptGroup(name='retry_scheduler',
@@ -140,6 +205,13 @@ retry_opts = [
     cfg.FloatOpt(
         'periodic_interval_max_seconds', default=10.0,
         help=u._('Seconds (float) to wait between periodic schedule events')),
+    cfg.IntOpt(
+        'status_check_batch_size', default=100, min=0,
+        help=u._('Maximum number of certificate status checks sent to the '
+                 'workers in a single message, for the orders pending on '
+                 'the same CA to be checked together. Set to 0 to send a '
+                 'message per order, as workers predating batched status '
+                 'checks expect.')),
 ]
 
 queue_opt_group = cfg.OptGroup(name='queue',
@@ -159,6 +231,29 @@ queue_opts = [
                help=u._('Server name for RPC task processing server')),
     cfg.IntOpt('asynchronous_workers', default=1,
                help=u._('Number of asynchronous worker processes')),
+    cfg.IntOpt('cast_batch_window_ms', default=0, min=0,
+               help=u._('Milliseconds the API waits to coalesce new orders '
+                        'into a single message to the workers. Set to 0 to '
+                        'send a message per order. Only enable once all '
+                        'workers support batches of orders.')),
+    cfg.IntOpt('cast_batch_max_size', default=100, min=1,
+               help=u._('Maximum number of orders coalesced into a single '
+                        'message to the workers.')),
+    cfg.IntOpt('cast_batch_retries', default=3, min=0,
+               help=u._('Number of times the API retries sending a batch of '
+                        'orders to the workers, waiting 1, 2, 4... seconds '
+                        'in between. The orders of a batch that could not be '
+                        'sent are then put in the ERROR state, unless '
+                        'drain_pending_orders_after_seconds is set, in '
+                        'which case the workers pick them up from the '
+                        'database.')),
+    cfg.IntOpt('drain_pending_orders_after_seconds', default=0, min=0,
+               help=u._('Seconds after which workers process new orders '
+                        'straight from the database, should their message '
+                        'not have reached a worker yet. Workers check for '
+                        'such orders at this same interval. Set well above '
+                        'the time taken to process an order, or to 0 to '
+                        'only process orders when their message arrives.')),
 ]
 
 ks_queue_opt_group = cfg.OptGroup(name=KS_NOTIFICATIONS_GRP_NAME,
@@ -341,13 +436,21 @@ CONF = new_config()
 LOG = logging.getLogger(__name__)
 parse_args(CONF)
 
-# Adding global scope dict for all different configs created in various
-# modules. In barbican, each plugin module creates its own *new* config
-# instance so its error prone to share/access config values across modules
-# as these module imports introduce a cyclic dependency. To avoid this, each
-# plugin can set this dict after its own config instance is created and parsed.
+# Plugin modules register their option groups with the shared CONF when they
+# are imported, so that the configuration files are only parsed once per
+# process, and a plugin's options are only registered when it is loaded.
+# Each module also sets its group name in this dict, to let other modules
+# read its options without importing it, as these module imports would
+# introduce a cyclic dependency.
 _CONFIGS = {}
 
+# Modules registering the option groups read through get_module_config(),
+# imported when one of these groups is asked for before it is registered.
+_MODULE_CONFIG_PROVIDERS = {
+    'secretstore': 'barbican.plugin.interface.secret_store',
+    'crypto': 'barbican.plugin.crypto.manager',
+}
+
 
 def set_module_config(name, module_conf):
     """Each plugin can set its own conf instance with its group name."""
@@ -356,4 +459,6 @@ def set_module_config(name, module_conf):
 
 def get_module_config(name):
     """Get handle to plugin specific config instance by its group name."""
+    if name not in _CONFIGS and name in _MODULE_CONFIG_PROVIDERS:
+        importlib.import_module(_MODULE_CONFIG_PROVIDERS[name])
     return _CONFIGS[name]
@@ -394,3 +394,11 @@ class MultipleStorePluginValueMissing(BarbicanException):
                 ).format(section_name)
         )
         self.section_name = section_name
+
+
+class PluginBackendUnavailable(BarbicanHTTPException):
+    message = u._("The backend of plugin %(plugin_name)s is failing, calls "
+                  "to it are suspended.")
+    client_message = u._("The backend is temporarily unavailable, please "
+                         "try again later")
+    status_code = 503
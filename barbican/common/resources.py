@@ -41,6 +41,12 @@ def get_or_create_project(project_id):
     project_repo = repositories.get_project_repository()
     project = project_repo.find_by_external_project_id(project_id,
                                                        suppress_exception=True)
+    if not project and repositories.is_read_only():
+        # The replica may lag behind and cannot take writes, so look again
+        # in the primary database and register the project there.
+        repositories.leave_read_only()
+        project = project_repo.find_by_external_project_id(
+            project_id, suppress_exception=True)
     if not project:
         LOG.debug('Creating project for %s', project_id)
         project = models.Project()
@@ -0,0 +1,115 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Serializers for list responses.
+
+List endpoints can return hundreds of entities per page. Rather than loading
+full ORM entities and converting each one through to_dict_fields() and
+convert_to_hrefs(), a serializer selects just the columns it needs and turns
+each row into its response dict directly, resolving the base href once per
+request.
+"""
+from oslo_serialization import jsonutils
+import pecan
+import sqlalchemy as sa
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from barbican.common import utils
+from barbican.model import models
+from barbican.plugin.util import mime_types
+
+
+def dumps(data):
+    """Encode a response body as JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return jsonutils.dump_as_bytes(data)
+
+
+def render_json(data):
+    """Return a pre-encoded JSON body from a pecan JSON controller.
+
+    This bypasses pecan's generic JSON renderer for response bodies that are
+    already made up of plain types only.
+    """
+    pecan.override_template('', 'application/json')
+    return dumps(data)
+
+
+def _isoformat(value):
+    return value.isoformat() if value else value
+
+
+class SecretListSerializer(object):
+    """Serializes secret list rows into secret response dicts.
+
+    The produced dicts match those built via
+    mime_types.augment_fields_with_content_types() and
+    hrefs.convert_to_hrefs() for a live secret.
+    """
+
+    _content_type = sa.select(
+        [models.SecretStoreMetadatum.value]
+    ).where(
+        sa.and_(models.SecretStoreMetadatum.secret_id == models.Secret.id,
+                models.SecretStoreMetadatum.key == 'content_type')
+    ).limit(1).as_scalar()
+
+    columns = (
+        models.Secret.id,
+        models.Secret.created_at,
+        models.Secret.updated_at,
+        models.Secret.status,
+        models.Secret.name,
+        models.Secret.secret_type,
+        models.Secret.expiration,
+        models.Secret.algorithm,
+        models.Secret.bit_length,
+        models.Secret.mode,
+        models.Secret.creator_id,
+        _content_type,
+    )
+
+    def __init__(self, base_href=None):
+        base_href = base_href or utils.hostname_for_refs()
+        self._ref_prefix = base_href + '/secrets/'
+
+    def serialize(self, row):
+        (secret_id, created_at, updated_at, status, name, secret_type,
+         expiration, algorithm, bit_length, mode, creator_id,
+         content_type) = row
+
+        fields = {
+            'created': _isoformat(created_at),
+            'updated': _isoformat(updated_at),
+            'status': status,
+            'name': name,
+            'secret_type': secret_type,
+            'expiration': _isoformat(expiration),
+            'algorithm': algorithm,
+            'bit_length': bit_length,
+            'mode': mode,
+            'creator_id': creator_id,
+            'secret_ref': self._ref_prefix + secret_id,
+        }
+        if content_type in mime_types.CTYPES_MAPPINGS:
+            fields['content_types'] = mime_types.CTYPES_MAPPINGS[content_type]
+        return fields
+
+    def serialize_rows(self, rows):
+        serialize = self.serialize
+        return [serialize(row) for row in rows]
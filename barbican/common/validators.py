@@ -15,6 +15,7 @@ API JSON validators.
 
 import abc
 import base64
+import io
 import re
 
 import jsonschema as schema
@@ -34,6 +35,7 @@ from barbican.model import models
 from barbican.model import repositories as repo
 from barbican.plugin.interface import secret_store
 from barbican.plugin.util import mime_types
+from barbican.plugin.util import translations
 
 
 DEFAULT_MAX_SECRET_BYTES = config.DEFAULT_MAX_SECRET_BYTES
@@ -44,6 +46,10 @@ MYSQL_SMALL_INT_MAX = 32767
 
 ACL_OPERATIONS = ['read', 'write', 'delete', 'list']
 
+# Key under which NewSecretValidator carries the bytes decoded from a base64
+# encoded payload, for them to be stored without decoding the payload again.
+PAYLOAD_BYTES = 'payload_bytes'
+
 
 def secret_too_big(data):
     if isinstance(data, six.text_type):
@@ -148,13 +154,27 @@ class ValidatorBase(object):
                     parent_schema_name=parent_schema)
         return schema_name
 
+    def _get_schema_validator(self):
+        """Returns the jsonschema validator of this class' schema.
+
+        The schema is checked against its metaschema and compiled into a
+        jsonschema validator only once, rather than on every validation.
+        """
+        schema_validator = self.__dict__.get('_schema_validator')
+        if schema_validator is None:
+            validator_class = schema.validators.validator_for(self.schema)
+            validator_class.check_schema(self.schema)
+            schema_validator = validator_class(self.schema)
+            self._schema_validator = schema_validator
+        return schema_validator
+
     def _assert_schema_is_valid(self, json_data, schema_name):
         """Assert that the JSON structure is valid for the given schema.
 
         :raises: InvalidObject exception if the data is not schema compliant.
         """
         try:
-            schema.validate(json_data, self.schema)
+            self._get_schema_validator().validate(json_data)
         except schema.ValidationError as e:
             raise exception.InvalidObject(schema=schema_name,
                                           reason=e.message,
@@ -225,6 +245,8 @@ class NewSecretValidator(ValidatorBase):
         schema_name = self._full_name(parent_schema)
         self._assert_schema_is_valid(json_data, schema_name)
 
+        # Only ever carry the payload bytes decoded here, never any sent in.
+        json_data.pop(PAYLOAD_BYTES, None)
         json_data['name'] = self._extract_name(json_data)
 
         expiration = self._extract_expiration(json_data, schema_name)
@@ -242,9 +264,11 @@ class NewSecretValidator(ValidatorBase):
                                   u._("If 'payload' specified, must be non "
                                       "empty"),
                                   "payload")
-            self._validate_payload_by_content_encoding(content_encoding,
-                                                       payload, schema_name)
+            payload_bytes = self._validate_payload_by_content_encoding(
+                content_encoding, payload, schema_name)
             json_data['payload'] = payload
+            if payload_bytes is not None:
+                json_data[PAYLOAD_BYTES] = payload_bytes
         elif 'payload_content_type' in json_data:
             # parent_schema would be populated if it comes from an order.
             self._assert_validity(parent_schema is not None, schema_name,
@@ -330,15 +354,25 @@ class NewSecretValidator(ValidatorBase):
 
     def _validate_payload_by_content_encoding(self, payload_content_encoding,
                                               payload, schema_name):
+        """Validates the payload against its content encoding.
+
+        :returns: The bytes decoded from a base64 encoded payload, so it
+                  need not be decoded again to be stored, or None.
+        """
         if payload_content_encoding == 'base64':
             try:
-                base64.b64decode(payload)
+                decoded = io.BytesIO()
+                for chunk in translations.iter_base64_decode(
+                        translations.iter_chunks(payload)):
+                    decoded.write(chunk)
+                return decoded.getvalue()
             except Exception:
                 LOG.exception("Problem parsing payload")
                 raise exception.InvalidObject(
                     schema=schema_name,
                     reason=u._("Invalid payload for payload_content_encoding"),
                     property="payload")
+        return None
 
     def _extract_payload(self, json_data):
         """Extracts and returns the payload from the JSON data.
@@ -513,7 +547,7 @@ class TypeOrderValidator(ValidatorBase, CACommonHelpersMixin):
     def _validate_key_meta(self, key_meta, schema_name):
         """Validation specific to meta for key type order."""
 
-        secret_validator = NewSecretValidator()
+        secret_validator = get_validator(NewSecretValidator)
         secret_validator.validate(key_meta, parent_schema=self.name)
 
         self._assert_validity(key_meta.get('payload') is None,
@@ -530,7 +564,7 @@ class TypeOrderValidator(ValidatorBase, CACommonHelpersMixin):
         """Validation specific to meta for asymmetric type order."""
 
         # Validate secret metadata.
-        secret_validator = NewSecretValidator()
+        secret_validator = get_validator(NewSecretValidator)
         secret_validator.validate(asymmetric_meta, parent_schema=self.name)
 
         self._assert_validity(asymmetric_meta.get('payload') is None,
@@ -1034,3 +1068,34 @@ class NewCAValidator(ValidatorBase, CACommonHelpersMixin):
         subject_dn = json_data['subject_dn']
         self._validate_subject_dn_data(subject_dn)
         return json_data
+
+
+_VALIDATORS = {}
+
+
+def get_validator(validator_class):
+    """Returns the shared instance of a validator class.
+
+    Validators keep no state between validations, so a single instance of
+    each, with its schema checked and compiled once, serves all requests.
+    """
+    validator = _VALIDATORS.get(validator_class)
+    if validator is None:
+        validator = validator_class()
+        validator._get_schema_validator()
+        validator = _VALIDATORS.setdefault(validator_class, validator)
+    return validator
+
+
+for _validator_class in (NewSecretValidator,
+                         NewSecretMetadataValidator,
+                         NewSecretMetadatumValidator,
+                         TypeOrderValidator,
+                         ACLValidator,
+                         ContainerConsumerValidator,
+                         ContainerSecretValidator,
+                         ContainerValidator,
+                         NewTransportKeyValidator,
+                         ProjectQuotaValidator,
+                         NewCAValidator):
+    get_validator(_validator_class)
@@ -0,0 +1,31 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add key/value index to secret user metadata
+
+Revision ID: a1e4bd2c7f3b
+Revises: 39cf2e645cba
+Create Date: 2026-10-18 09:12:41.230518
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'a1e4bd2c7f3b'
+down_revision = '39cf2e645cba'
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('secret_user_metadata_key_value_idx',
+                    'secret_user_metadata', ['key', 'value', 'secret_id'],
+                    unique=False)
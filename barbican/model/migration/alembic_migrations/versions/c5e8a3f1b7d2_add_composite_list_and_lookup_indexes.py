@@ -0,0 +1,44 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add composite indexes for list and lookup queries
+
+Revision ID: c5e8a3f1b7d2
+Revises: a1e4bd2c7f3b
+Create Date: 2026-10-19 08:41:17.604912
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a3f1b7d2'
+down_revision = 'a1e4bd2c7f3b'
+
+from alembic import op
+
+
+def upgrade():
+    for table in ('secrets', 'containers', 'orders'):
+        op.create_index('%s_project_deleted_created_idx' % table, table,
+                        ['project_id', 'deleted', 'created_at'],
+                        unique=False)
+
+    for table in ('secret_acl_users', 'container_acl_users'):
+        op.create_index('%s_user_acl_idx' % table, table,
+                        ['user_id', 'acl_id'], unique=False)
+
+    for table in ('encrypted_data', 'secret_store_metadata',
+                  'secret_user_metadata'):
+        op.create_index('%s_secret_deleted_idx' % table, table,
+                        ['secret_id', 'deleted'], unique=False)
+
+    op.create_index('order_retry_tasks_retry_at_idx', 'order_retry_tasks',
+                    ['retry_at'], unique=False)
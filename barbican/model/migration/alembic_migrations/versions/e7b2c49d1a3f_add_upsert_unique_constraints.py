@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add unique constraints for project quotas and active KEK data upserts
+
+Revision ID: e7b2c49d1a3f
+Revises: c5e8a3f1b7d2
+Create Date: 2026-10-19 11:05:52.318406
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2c49d1a3f'
+down_revision = 'c5e8a3f1b7d2'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _get_duplicates(connection, table, columns, where=None):
+    """Returns the ids of all but the oldest row of each group of columns."""
+    query = sa.select([table.c.id] + [table.c[c] for c in columns])
+    if where is not None:
+        query = query.where(where)
+    query = query.order_by(table.c.created_at, table.c.id)
+    seen = set()
+    duplicates = []
+    for row in connection.execute(query):
+        key = tuple(row[c] for c in columns)
+        if key in seen:
+            duplicates.append(row.id)
+        seen.add(key)
+    return duplicates
+
+
+def upgrade():
+    connection = op.get_bind()
+    metadata = sa.MetaData()
+
+    # Concurrent quota updates may have created several rows for a project,
+    # only the first of which was ever read.
+    project_quotas = sa.Table('project_quotas', metadata,
+                              autoload_with=connection)
+    duplicates = _get_duplicates(connection, project_quotas, ['project_id'])
+    if duplicates:
+        connection.execute(project_quotas.delete().where(
+            project_quotas.c.id.in_(duplicates)))
+    op.create_unique_constraint('_project_quotas_project_uc',
+                                'project_quotas', ['project_id'])
+
+    if connection.dialect.name not in ('postgresql', 'sqlite'):
+        return
+
+    # Concurrent secret creations may have created several active KEKs for
+    # a crypto plugin of a project. The newer ones are deactivated, which
+    # leaves the secrets encrypted under them readable.
+    kek_data = sa.Table('kek_data', metadata, autoload_with=connection)
+    duplicates = _get_duplicates(
+        connection, kek_data, ['project_id', 'plugin_name'],
+        where=sa.and_(kek_data.c.active == sa.true(),
+                      kek_data.c.deleted == sa.false()))
+    if duplicates:
+        connection.execute(kek_data.update().where(
+            kek_data.c.id.in_(duplicates)).values(active=False))
+    op.execute('CREATE UNIQUE INDEX kek_data_project_plugin_active_idx '
+               'ON kek_data (project_id, plugin_name) '
+               'WHERE active AND NOT deleted')
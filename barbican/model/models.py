@@ -116,7 +116,27 @@ class ModelBase(object):
             self.created_at = timeutils.utcnow()
             self.updated_at = self.created_at
         session.add(self)
-        session.flush()
+        if barbican.model.repositories.is_deferring_flush():
+            self._apply_column_defaults()
+            barbican.model.repositories.defer_flush(session)
+        else:
+            session.flush()
+
+    def _apply_column_defaults(self):
+        """Assign the Python side column defaults of unset attributes.
+
+        These are otherwise only assigned when the entity is flushed, which
+        unit_of_work() defers, while callers rely on the id of a saved
+        entity being known.
+        """
+        for prop in sa.inspect(self).mapper.column_attrs:
+            default = prop.columns[0].default
+            if default is None or getattr(self, prop.key) is not None:
+                continue
+            if default.is_scalar:
+                setattr(self, prop.key, default.arg)
+            elif default.is_callable:
+                setattr(self, prop.key, default.arg(None))
 
     def delete(self, session=None):
         """Delete this object."""
@@ -287,6 +307,11 @@ class Secret(BASE, SoftDeleteMixIn, ModelBase):
         index=True,
         nullable=False)
 
+    __table_args__ = (
+        sa.Index('secrets_project_deleted_created_idx',
+                 'project_id', 'deleted', 'created_at'),
+    )
+
     # TODO(jwood): Performance - Consider avoiding full load of all
     #   datum attributes here. This is only being done to support the
     #   building of the list of supported content types when secret
@@ -373,6 +398,11 @@ class SecretStoreMetadatum(BASE, SoftDeleteMixIn, ModelBase):
     secret_id = sa.Column(
         sa.String(36), sa.ForeignKey('secrets.id'), index=True, nullable=False)
 
+    __table_args__ = (
+        sa.Index('secret_store_metadata_secret_deleted_idx',
+                 'secret_id', 'deleted'),
+    )
+
     def __init__(self, key, value):
         super(SecretStoreMetadatum, self).__init__()
 
@@ -405,8 +435,13 @@ class SecretUserMetadatum(BASE, SoftDeleteMixIn, ModelBase):
     secret_id = sa.Column(
         sa.String(36), sa.ForeignKey('secrets.id'), index=True, nullable=False)
 
-    __table_args__ = (sa.UniqueConstraint('secret_id', 'key',
-                                          name='_secret_key_uc'),)
+    __table_args__ = (
+        sa.UniqueConstraint('secret_id', 'key', name='_secret_key_uc'),
+        sa.Index('secret_user_metadata_key_value_idx',
+                 'key', 'value', 'secret_id'),
+        sa.Index('secret_user_metadata_secret_deleted_idx',
+                 'secret_id', 'deleted'),
+    )
 
     def __init__(self, key, value):
         super(SecretUserMetadatum, self).__init__()
@@ -442,6 +477,10 @@ class EncryptedDatum(BASE, SoftDeleteMixIn, ModelBase):
         sa.String(36), sa.ForeignKey('kek_data.id'), index=True,
         nullable=False)
 
+    __table_args__ = (
+        sa.Index('encrypted_data_secret_deleted_idx', 'secret_id', 'deleted'),
+    )
+
     # TODO(jwood) Why LargeBinary on Postgres (BYTEA) not work correctly?
     cypher_text = sa.Column(sa.Text)
     kek_meta_extended = sa.Column(sa.Text)
@@ -514,6 +553,20 @@ class KEKDatum(BASE, SoftDeleteMixIn, ModelBase):
         return {'algorithm': self.algorithm}
 
 
+# Predicate of the partial unique index on the active KEK datum of each crypto
+# plugin of a project, which KEKDatumRepo.find_or_create_kek_datum() upserts
+# on. Inactive KEK data are kept once rotated, and MySQL has no partial
+# indexes, so it goes without.
+KEK_DATA_ACTIVE_WHERE = 'active AND NOT deleted'
+
+sa.event.listen(
+    KEKDatum.__table__, 'after_create',
+    sa.DDL('CREATE UNIQUE INDEX kek_data_project_plugin_active_idx '
+           'ON %(table)s (project_id, plugin_name) '
+           'WHERE ' + KEK_DATA_ACTIVE_WHERE).execute_if(
+        dialect=('postgresql', 'sqlite')))
+
+
 class Order(BASE, SoftDeleteMixIn, ModelBase):
     """Represents an Order in the datastore.
 
@@ -532,6 +585,11 @@ class Order(BASE, SoftDeleteMixIn, ModelBase):
         index=True,
         nullable=False)
 
+    __table_args__ = (
+        sa.Index('orders_project_deleted_created_idx',
+                 'project_id', 'deleted', 'created_at'),
+    )
+
     error_status_code = sa.Column(sa.String(16))
     error_reason = sa.Column(sa.String(ERROR_REASON_LENGTH))
 
@@ -688,7 +746,10 @@ class OrderBarbicanMetadatum(BASE, SoftDeleteMixIn, ModelBase):
 class OrderRetryTask(BASE, SoftDeleteMixIn, ModelBase):
 
     __tablename__ = "order_retry_tasks"
-    __table_args__ = {"mysql_engine": "InnoDB"}
+    __table_args__ = (
+        sa.Index('order_retry_tasks_retry_at_idx', 'retry_at'),
+        {"mysql_engine": "InnoDB"},
+    )
     __table_initialized__ = False
 
     id = sa.Column(
@@ -723,6 +784,11 @@ class Container(BASE, SoftDeleteMixIn, ModelBase):
         sa.ForeignKey('projects.id', name='containers_project_fk'),
         index=True,
         nullable=False)
+
+    __table_args__ = (
+        sa.Index('containers_project_deleted_created_idx',
+                 'project_id', 'deleted', 'created_at'),
+    )
     consumers = sa.orm.relationship("ContainerConsumerMetadatum")
     creator_id = sa.Column(sa.String(255))
 
@@ -1103,8 +1169,10 @@ class SecretACL(BASE, ModelBase):
 
     project_access = sa.Column(sa.Boolean, nullable=False, default=True)
 
+    # ACLs are only needed to authorize requests, which use the narrower
+    # SecretACLRepo.get_acl_summary() instead, so they are loaded lazily.
     secret = orm.relationship(
-        'Secret', backref=orm.backref('secret_acls', lazy=False))
+        'Secret', backref=orm.backref('secret_acls', lazy=True))
 
     acl_users = orm.relationship(
         'SecretACLUser', backref=orm.backref('secret_acl', lazy=False),
@@ -1179,8 +1247,10 @@ class ContainerACL(BASE, ModelBase):
 
     project_access = sa.Column(sa.Boolean, nullable=False, default=True)
 
+    # ACLs are only needed to authorize requests, which use the narrower
+    # ContainerACLRepo.get_acl_summary() instead, so they are loaded lazily.
     container = orm.relationship(
-        'Container', backref=orm.backref('container_acls', lazy=False))
+        'Container', backref=orm.backref('container_acls', lazy=True))
 
     acl_users = orm.relationship(
         'ContainerACLUser', backref=orm.backref('container_acl', lazy=False),
@@ -1251,8 +1321,11 @@ class SecretACLUser(BASE, ModelBase):
 
     user_id = sa.Column(sa.String(255), nullable=False)
 
-    __table_args__ = (sa.UniqueConstraint(
-        'acl_id', 'user_id', name='_secret_acl_user_uc'),)
+    __table_args__ = (
+        sa.UniqueConstraint('acl_id', 'user_id',
+                            name='_secret_acl_user_uc'),
+        sa.Index('secret_acl_users_user_acl_idx', 'user_id', 'acl_id'),
+    )
 
     def __init__(self, acl_id, user_id):
         """Creates secret ACL user entity."""
@@ -1288,8 +1361,11 @@ class ContainerACLUser(BASE, ModelBase):
 
     user_id = sa.Column(sa.String(255), nullable=False)
 
-    __table_args__ = (sa.UniqueConstraint(
-        'acl_id', 'user_id', name='_container_acl_user_uc'),)
+    __table_args__ = (
+        sa.UniqueConstraint('acl_id', 'user_id',
+                            name='_container_acl_user_uc'),
+        sa.Index('container_acl_users_user_acl_idx', 'user_id', 'acl_id'),
+    )
 
     def __init__(self, acl_id, user_id):
         """Creates container ACL user entity."""
@@ -1331,6 +1407,9 @@ class ProjectQuotas(BASE, ModelBase):
     consumers = sa.Column(sa.Integer, nullable=True)
     cas = sa.Column(sa.Integer, nullable=True)
 
+    __table_args__ = (sa.UniqueConstraint(
+        'project_id', name='_project_quotas_project_uc'),)
+
     def __init__(self, project_id=None, parsed_project_quotas=None):
         """Creates Project Quotas entity from a project and a dict.
 
@@ -20,16 +20,24 @@ TODO: The top part of this file was 'borrowed' from Glance, but seems
 quite intense for sqlalchemy, and maybe could be simplified.
 """
 
+import collections
+import contextlib
 import logging
 import re
 import sys
+import threading
 import time
 import uuid
 
 from oslo_db import exception as db_exc
 from oslo_db.sqlalchemy import session
 from oslo_utils import timeutils
+import six
 import sqlalchemy
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext import baked
+from sqlalchemy.ext import compiler
 from sqlalchemy import func as sa_func
 from sqlalchemy import or_
 import sqlalchemy.orm as sa_orm
@@ -46,6 +54,8 @@ LOG = utils.getLogger(__name__)
 
 _ENGINE = None
 _SESSION_FACTORY = None
+_RO_ENGINE = None
+_RO_SESSION_FACTORY = None
 BASE = models.BASE
 sa_logger = None
 
@@ -77,16 +87,39 @@ _PROJECT_SECRET_STORE_REPOSITORY = None
 
 CONF = config.CONF
 
+# Per request cycle (thread or green thread) routing state for read-only
+# requests, see start_read_only().
+_REQUEST_STATE = threading.local()
+
+# Maps external project id to the time of its last committed write request,
+# used to keep that project's reads on the primary database for a while.
+# Ordered by write time, so that the entries whose window has elapsed are
+# pruned from its front as writes are recorded. This is per process: a
+# write served by one API process does not keep the reads served by another
+# on the primary database.
+_PROJECT_LAST_WRITE = collections.OrderedDict()
+_PROJECT_LAST_WRITE_LOCK = threading.Lock()
+
+# Cache of constructed queries and their compiled SQL for the hottest
+# lookups. Queries built through it must only vary by bound parameters
+# (see sqlalchemy.bindparam), never by values captured in their lambdas.
+_BAKERY = baked.bakery()
+
 
 def hard_reset():
     """Performs a hard reset of database resources, used for unit testing."""
     # TODO(jvrbanac): Remove this as soon as we improve our unit testing
     # to not require this.
-    global _ENGINE, _SESSION_FACTORY
+    global _ENGINE, _SESSION_FACTORY, _RO_ENGINE, _RO_SESSION_FACTORY
     if _ENGINE:
         _ENGINE.dispose()
     _ENGINE = None
     _SESSION_FACTORY = None
+    if _RO_ENGINE:
+        _RO_ENGINE.dispose()
+    _RO_ENGINE = None
+    _RO_SESSION_FACTORY = None
+    _PROJECT_LAST_WRITE.clear()
 
     # Make sure we reinitialize the engine and session factory
     setup_database_engine_and_factory()
@@ -94,6 +127,7 @@ def hard_reset():
 
 def setup_database_engine_and_factory():
     global sa_logger, _SESSION_FACTORY, _ENGINE
+    global _RO_SESSION_FACTORY, _RO_ENGINE
 
     LOG.info('Setting up database engine and session factory')
     if CONF.debug:
@@ -109,25 +143,281 @@ def setup_database_engine_and_factory():
     # session instance per thread.
     session_maker = sa_orm.sessionmaker(bind=_ENGINE)
     _SESSION_FACTORY = sqlalchemy.orm.scoped_session(session_maker)
+
+    if CONF.sql_connection_readonly:
+        LOG.info('Setting up read-only database engine and session factory')
+        _RO_ENGINE = _get_read_only_engine(_RO_ENGINE)
+        ro_session_maker = sa_orm.sessionmaker(bind=_RO_ENGINE)
+        _RO_SESSION_FACTORY = sqlalchemy.orm.scoped_session(ro_session_maker)
+
     _initialize_secret_stores_data()
 
 
 def start():
-    """Start for read-write requests placeholder
+    """Start for read-write requests
 
     Typically performed at the start of a request cycle, say for POST or PUT
     requests.
     """
-    pass
+    _REQUEST_STATE.read_only = False
 
 
-def start_read_only():
-    """Start for read-only requests placeholder
+def start_read_only(external_project_id=None, use_replica=False):
+    """Start for read-only requests
 
     Typically performed at the start of a request cycle, say for GET or HEAD
-    requests.
+    requests. If use_replica is True and a read-only database is configured,
+    sessions for the rest of this request cycle are bound to it, unless the
+    given project has written to the primary database recently.
+
+    :param external_project_id: Keystone project id making the request.
+    :param use_replica: Whether the request only reads metadata, and so is
+                        safe to serve from a (possibly lagging) replica.
+    """
+    _REQUEST_STATE.read_only = (
+        use_replica and
+        _RO_SESSION_FACTORY is not None and
+        not _has_recent_write(external_project_id))
+
+
+def leave_read_only():
+    """Use the read-write database for the rest of this request cycle.
+
+    Used when a read-only request turns out to need the primary database,
+    for example to register a project seen for the first time. Entities
+    already loaded in this request cycle remain usable.
+    """
+    _REQUEST_STATE.read_only = False
+
+
+def is_read_only():
+    """Return True if this request cycle is using the read-only database."""
+    return getattr(_REQUEST_STATE, 'read_only', False)
+
+
+def record_project_write(external_project_id):
+    """Records that a project just committed a write request.
+
+    Read-only requests from this project will be served from the primary
+    database for sql_readonly_read_after_write_seconds afterwards.
     """
-    pass
+    window = CONF.sql_readonly_read_after_write_seconds
+    if (not external_project_id or _RO_SESSION_FACTORY is None or
+            window <= 0):
+        return
+    now = time.time()
+    with _PROJECT_LAST_WRITE_LOCK:
+        _PROJECT_LAST_WRITE.pop(external_project_id, None)
+        _PROJECT_LAST_WRITE[external_project_id] = now
+        # Forget about the projects whose window has elapsed.
+        expired = []
+        for project_id, last_write in six.iteritems(_PROJECT_LAST_WRITE):
+            if now - last_write < window:
+                break
+            expired.append(project_id)
+        for project_id in expired:
+            del _PROJECT_LAST_WRITE[project_id]
+
+
+def _has_recent_write(external_project_id):
+    if not external_project_id:
+        return False
+    last_write = _PROJECT_LAST_WRITE.get(external_project_id)
+    if last_write is None:
+        return False
+    window = CONF.sql_readonly_read_after_write_seconds
+    if time.time() - last_write < window:
+        return True
+    # Window elapsed, so forget about this project.
+    with _PROJECT_LAST_WRITE_LOCK:
+        if _PROJECT_LAST_WRITE.get(external_project_id) == last_write:
+            del _PROJECT_LAST_WRITE[external_project_id]
+    return False
+
+
+@contextlib.contextmanager
+def unit_of_work():
+    """Group the writes of a block into a single flush.
+
+    Entities saved within the block are only added to their session, with
+    their ids and other Python side column defaults assigned right away,
+    and are flushed together once the block completes. SQLAlchemy then
+    emits inserts into the same table as a single executemany, rather than
+    one round trip per entity. Queries run within the block still see the
+    pending entities, by way of the session's autoflush.
+
+    Nested blocks are part of the outermost one.
+    """
+    if is_deferring_flush():
+        yield
+        return
+
+    _REQUEST_STATE.deferred_sessions = []
+    try:
+        yield
+        sessions = _REQUEST_STATE.deferred_sessions
+    finally:
+        _REQUEST_STATE.deferred_sessions = None
+
+    try:
+        for deferred_session in sessions:
+            deferred_session.flush()
+    except db_exc.DBDuplicateEntry as e:
+        LOG.exception('Problem flushing entities for create')
+        error_msg = re.sub('[()]', '', str(e.args))
+        raise exception.ConstraintCheck(error=error_msg)
+
+
+@contextlib.contextmanager
+def independent_session():
+    """Yields a new session on the primary database, apart from the request's.
+
+    The session is committed once the block completes, rolled back if it
+    raises, and closed either way. Used for writes that must be persisted
+    whatever becomes of the current request, which may be a read-only
+    request that is never committed.
+    """
+    session = _SESSION_FACTORY.session_factory()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def is_deferring_flush():
+    """Return True if saved entities are flushed by a unit_of_work()."""
+    return getattr(_REQUEST_STATE, 'deferred_sessions', None) is not None
+
+
+def defer_flush(session):
+    """Have the enclosing unit_of_work() flush the given session."""
+    if session not in _REQUEST_STATE.deferred_sessions:
+        _REQUEST_STATE.deferred_sessions.append(session)
+
+
+def is_loaded(entity, attribute):
+    """Return True if an attribute of an entity was loaded already."""
+    state = sqlalchemy.inspect(entity, raiseerr=False)
+    return state is not None and attribute not in state.unloaded
+
+
+ACLSummary = collections.namedtuple('ACLSummary',
+                                    ['user_ids', 'project_access'])
+
+
+def summarize_acls(acls):
+    """Return the ACL summary of SecretACL or ContainerACL entities.
+
+    :returns: Dict of the ACLSummary of each ACL operation, with the set of
+              ids of the users the operation is granted to and the project
+              access flag of the operation.
+    """
+    return {acl.operation: ACLSummary(
+        frozenset(acl_user.user_id for acl_user in acl.acl_users
+                  if not acl_user.deleted),
+        acl.project_access) for acl in acls}
+
+
+class _ACLCache(object):
+    """Caches the ACL summaries of secrets and containers.
+
+    Entries are stamped with the updated_at of their secret or container,
+    which every ACL change bumps, so that an entry is no longer used once
+    the entity is loaded with a later timestamp. As two changes made within
+    the same second may share a timestamp, entries also expire after
+    acl_cache_ttl seconds, and nothing is cached unless it is set.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, entity_id, version):
+        entry = self._entries.get(entity_id)
+        if entry is None:
+            return None
+        cached_version, cached_at, acls = entry
+        if (cached_version != version or
+                time.time() - cached_at >= CONF.acl_cache_ttl):
+            return None
+        return acls
+
+    def put(self, entity_id, version, acls):
+        if CONF.acl_cache_ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(entity_id, None)
+            self._entries[entity_id] = (version, time.time(), acls)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, entity_id):
+        with self._lock:
+            self._entries.pop(entity_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_ACL_CACHE = _ACLCache(max_entries=10000)
+
+
+def _get_acl_summary(session, entity, acls_attribute, acl_model,
+                     acl_user_model, entity_id_column):
+    if is_loaded(entity, acls_attribute):
+        return summarize_acls(getattr(entity, acls_attribute))
+
+    acls = _ACL_CACHE.get(entity.id, entity.updated_at)
+    if acls is not None:
+        return acls
+
+    query = session.query(acl_model.operation, acl_model.project_access,
+                          acl_user_model.user_id)
+    query = query.outerjoin(acl_user_model, sqlalchemy.and_(
+        acl_user_model.acl_id == acl_model.id,
+        acl_user_model.deleted == sqlalchemy.false()))
+    query = query.filter(entity_id_column == entity.id)
+
+    user_ids = {}
+    project_access = {}
+    for operation, access, user_id in query:
+        project_access[operation] = access
+        users = user_ids.setdefault(operation, set())
+        if user_id is not None:
+            users.add(user_id)
+    acls = {operation: ACLSummary(frozenset(users), project_access[operation])
+            for operation, users in user_ids.items()}
+
+    _ACL_CACHE.put(entity.id, entity.updated_at, acls)
+    return acls
+
+
+def _acls_changed(entity):
+    """Mark the ACLs of a secret or container as changed."""
+    entity.updated_at = timeutils.utcnow()
+    _ACL_CACHE.invalidate(entity.id)
+
+
+def get_loaded_metadata(entity, relationship):
+    """Return the metadata of an entity, if loaded along with the entity.
+
+    :param entity: Entity with a key/value metadata relationship.
+    :param relationship: Name of the relationship, such as
+                         'order_plugin_metadata'.
+    :returns: Dict of the metadata keys and values, or None if the
+              relationship is not loaded.
+    """
+    if not is_loaded(entity, relationship):
+        return None
+    return {key: metadatum.value
+            for key, metadatum in getattr(entity, relationship).items()
+            if not metadatum.deleted}
 
 
 def commit():
@@ -154,10 +444,16 @@ def clear():
     """
     if _SESSION_FACTORY:  # not initialized in some unit test
         _SESSION_FACTORY.remove()
+    if _RO_SESSION_FACTORY:
+        _RO_SESSION_FACTORY.remove()
+    _REQUEST_STATE.read_only = False
+    _REQUEST_STATE.deferred_sessions = None
 
 
 def get_session():
     """Helper method to grab session."""
+    if is_read_only():
+        return _RO_SESSION_FACTORY()
     return _SESSION_FACTORY()
 
 
@@ -203,6 +499,37 @@ def _get_engine(engine):
     return engine
 
 
+def _get_read_only_engine(engine):
+    if not engine:
+        connection = CONF.sql_connection_readonly
+
+        engine_args = {
+            'idle_timeout': CONF.sql_idle_timeout}
+        if CONF.sql_readonly_pool_size:
+            engine_args['max_pool_size'] = CONF.sql_readonly_pool_size
+        if CONF.sql_readonly_pool_max_overflow:
+            engine_args['max_overflow'] = (
+                CONF.sql_readonly_pool_max_overflow)
+
+        # NOTE: Schema management is left to the primary engine, a replica
+        # receives its tables through replication.
+        db_connection = None
+        try:
+            engine = _create_engine(connection, **engine_args)
+            db_connection = engine.connect()
+        except Exception as err:
+            msg = u._("Error configuring read-only registry database with "
+                      "supplied sql_connection_readonly. Got error: "
+                      "{error}").format(error=err)
+            LOG.exception(msg)
+            raise exception.BarbicanException(msg)
+        finally:
+            if db_connection:
+                db_connection.close()
+
+    return engine
+
+
 def _initialize_secret_stores_data():
     """Initializes secret stores data in database.
 
@@ -315,6 +642,146 @@ def clean_paging_values(offset_arg=0, limit_arg=CONF.default_limit_paging):
     return offset, limit
 
 
+class _SQLiteInsert(sqlalchemy.sql.expression.Insert):
+    """INSERT ... ON CONFLICT statement for SQLite.
+
+    SQLAlchemy only provides it for PostgreSQL, so the clause is appended
+    to the compiled INSERT statement.
+    """
+    conflict_columns = ()
+    update_columns = ()
+    conflict_where = None
+
+
+@compiler.compiles(_SQLiteInsert, 'sqlite')
+def _compile_sqlite_insert(insert, compiler, **kw):
+    quote = compiler.preparer.quote
+    text = compiler.visit_insert(insert, **kw)
+    text += ' ON CONFLICT (%s)' % ', '.join(
+        quote(insert.table.c[key].name) for key in insert.conflict_columns)
+    if insert.conflict_where is not None:
+        text += ' WHERE %s' % compiler.process(
+            insert.conflict_where, include_table=False, literal_binds=True)
+    if insert.update_columns:
+        text += ' DO UPDATE SET %s' % ', '.join(
+            '{0} = excluded.{0}'.format(quote(insert.table.c[key].name))
+            for key in insert.update_columns)
+    else:
+        text += ' DO NOTHING'
+    return text
+
+
+def _build_upsert(table, values, conflict_columns, update_columns,
+                  conflict_where, dialect_name):
+    if dialect_name == 'postgresql':
+        insert = postgresql.insert(table).values(values)
+        if update_columns:
+            return insert.on_conflict_do_update(
+                index_elements=conflict_columns, index_where=conflict_where,
+                set_=dict((key, insert.excluded[key])
+                          for key in update_columns))
+        return insert.on_conflict_do_nothing(
+            index_elements=conflict_columns, index_where=conflict_where)
+
+    if dialect_name == 'mysql':
+        # MySQL updates the row conflicting on any unique key, and has no
+        # partial indexes to conflict on.
+        insert = mysql.insert(table).values(values)
+        if update_columns:
+            return insert.on_duplicate_key_update(
+                **dict((key, insert.inserted[key]) for key in update_columns))
+        return insert.on_duplicate_key_update(id=table.c.id)
+
+    if dialect_name == 'sqlite':
+        insert = _SQLiteInsert(table).values(values)
+        insert.conflict_columns = conflict_columns
+        insert.update_columns = update_columns
+        insert.conflict_where = conflict_where
+        return insert
+
+    return None
+
+
+def _select_then_upsert(session, table, values, conflict_columns,
+                        update_columns, conflict_where):
+    """Upserts a row with a SELECT and then an INSERT or UPDATE.
+
+    Used for the databases without an upsert statement, where concurrent
+    callers may still both find no row and then insert one.
+    """
+    criteria = [table.c[key] == values.get(key) for key in conflict_columns]
+    if conflict_where is not None:
+        criteria.append(conflict_where)
+    query = sqlalchemy.select([table.c.id]).where(sqlalchemy.and_(*criteria))
+    row = session.execute(query).first()
+    if row is None:
+        session.execute(table.insert().values(values))
+    elif update_columns:
+        session.execute(table.update().where(table.c.id == row.id).values(
+            dict((key, values.get(key)) for key in update_columns)))
+
+
+def upsert(entity, conflict_columns, update_columns=None,
+           conflict_where=None, session=None):
+    """Inserts the row of an entity, or updates the row it conflicts with.
+
+    This takes a single INSERT ... ON CONFLICT statement on PostgreSQL and
+    SQLite, or INSERT ... ON DUPLICATE KEY UPDATE on MySQL, so that
+    concurrent callers can't both find no row and then insert one. Other
+    databases fall back on looking up the row before inserting or updating
+    it.
+
+    The entity is not added to the session. Instances of the row already
+    loaded in the session are expired, to be reloaded on access.
+
+    :param entity: New entity holding the values of the row.
+    :param conflict_columns: Names of the columns of the unique constraint
+                             or index the row may conflict on.
+    :param update_columns: Names of the columns to set from the entity on
+                           conflict, along with updated_at. If None, the
+                           conflicting row is left as is.
+    :param conflict_where: SQL expression of the predicate of the partial
+                           unique index the row may conflict on.
+    :param session: SQLAlchemy session object.
+    """
+    session = get_session() if session is None else session
+    # Rows the new one references may still be pending.
+    session.flush()
+
+    table = entity.__table__
+    values = {}
+    for column in table.columns:
+        value = getattr(entity, column.key)
+        if value is not None:
+            values[column.key] = value
+    update_columns = list(update_columns or ())
+    if update_columns:
+        values['updated_at'] = timeutils.utcnow()
+        update_columns.append('updated_at')
+
+    conflict_columns = list(conflict_columns)
+    statement = _build_upsert(
+        table, values, conflict_columns, update_columns, conflict_where,
+        session.get_bind().dialect.name)
+    if statement is not None:
+        session.execute(statement)
+    else:
+        _select_then_upsert(session, table, values, conflict_columns,
+                            update_columns, conflict_where)
+
+    # The conflict columns are compared as loaded in the instances, as
+    # reading expired attributes would reload them. Instances whose conflict
+    # columns are not all loaded are expired as well.
+    missing = object()
+    for instance in list(session.identity_map.values()):
+        if not isinstance(instance, type(entity)):
+            continue
+        loaded = sqlalchemy.inspect(instance).dict
+        if all(loaded.get(key, missing) in (missing, values.get(key))
+               for key in conflict_columns):
+            session.expire(instance)
+
+
 def delete_all_project_resources(project_id):
     """Logic to cleanup all project resources.
 
@@ -360,13 +827,25 @@ class BaseRepo(object):
         session = self.get_session(session)
 
         try:
-            query = self._do_build_get_query(entity_id,
-                                             external_project_id,
-                                             session)
+            baked_query = self._do_build_baked_get_query()
+            if baked_query is not None:
+                # filter out deleted entities if requested
+                if not force_show_deleted:
+                    baked_query = baked_query.with_criteria(
+                        lambda q: q.filter_by(deleted=False))
+
+                query = baked_query(session).params(
+                    entity_id=entity_id,
+                    external_project_id=external_project_id,
+                    utcnow=timeutils.utcnow())
+            else:
+                query = self._do_build_get_query(entity_id,
+                                                 external_project_id,
+                                                 session)
 
-            # filter out deleted entities if requested
-            if not force_show_deleted:
-                query = query.filter_by(deleted=False)
+                # filter out deleted entities if requested
+                if not force_show_deleted:
+                    query = query.filter_by(deleted=False)
 
             entity = query.one()
 
@@ -448,6 +927,16 @@ class BaseRepo(object):
         """Sub-class hook: build a retrieve query."""
         return None
 
+    def _do_build_baked_get_query(self):
+        """Sub-class hook: build a cached retrieve query.
+
+        Optional alternative to _do_build_get_query() for hot lookups. The
+        returned baked query may use the 'entity_id', 'external_project_id'
+        and 'utcnow' bound parameters, which are supplied at execution time.
+        Returns None to use _do_build_get_query() instead.
+        """
+        return None
+
     def _do_convert_values(self, values):
         """Sub-class hook: convert text-based values to target types
 
@@ -586,10 +1075,13 @@ class ProjectRepo(BaseRepo):
         session = self.get_session(session)
 
         try:
-            query = session.query(models.Project)
-            query = query.filter_by(external_id=external_project_id)
+            baked_query = _BAKERY(lambda s: s.query(models.Project))
+            baked_query += lambda q: q.filter(
+                models.Project.external_id ==
+                sqlalchemy.bindparam('external_project_id'))
 
-            entity = query.one()
+            entity = baked_query(session).params(
+                external_project_id=external_project_id).one()
 
         except sa_orm.exc.NoResultFound:
             entity = None
@@ -618,19 +1110,26 @@ class SecretRepo(BaseRepo):
                         bits=0, secret_type=None, suppress_exception=False,
                         session=None, acl_only=None, user_id=None,
                         created=None, updated=None, expiration=None,
-                        sort=None):
+                        sort=None, columns=None, metadata=None):
         """Returns a list of secrets
 
         The list is scoped to secrets that are associated with the
         external_project_id (e.g. Keystone Project ID), and filtered
-        using any provided filters.
+        using any provided filters. The metadata filter is a dict of user
+        metadata keys and values that the secrets must all have.
+
+        If columns are provided, rows holding just those column values are
+        returned instead of fully loaded Secret entities.
         """
         offset, limit = clean_paging_values(offset_arg, limit_arg)
 
         session = self.get_session(session)
         utcnow = timeutils.utcnow()
 
-        query = session.query(models.Secret)
+        if columns:
+            query = session.query(*columns).select_from(models.Secret)
+        else:
+            query = session.query(models.Secret)
         query = query.filter_by(deleted=False)
 
         query = query.filter(or_(models.Secret.expiration.is_(None),
@@ -657,6 +1156,8 @@ class SecretRepo(BaseRepo):
         else:
             query = query.filter(or_(models.Secret.expiration.is_(None),
                                      models.Secret.expiration > utcnow))
+        if metadata:
+            query = self._build_metadata_filter_query(query, metadata)
         if sort:
             query = self._build_sort_filter_query(query, sort)
 
@@ -669,7 +1170,10 @@ class SecretRepo(BaseRepo):
             query = query.filter(
                 models.Project.external_id == external_project_id)
 
-        total = query.count()
+        if columns:
+            total = query.with_entities(models.Secret.id).count()
+        else:
+            total = query.count()
         end_offset = offset + limit
 
         LOG.debug('Retrieving from %s to %s', offset, end_offset)
@@ -685,6 +1189,22 @@ class SecretRepo(BaseRepo):
 
         return entities, offset, limit, total
 
+    def _build_metadata_filter_query(self, query, metadata):
+        """Filters secrets by user metadata key/value pairs.
+
+        Each pair is matched with its own EXISTS sub-query, which can be
+        answered from the (key, value, secret_id) index.
+        """
+        for key, value in sorted(metadata.items()):
+            query = query.filter(
+                sqlalchemy.exists().where(sqlalchemy.and_(
+                    models.SecretUserMetadatum.key == key,
+                    models.SecretUserMetadatum.value == value,
+                    models.SecretUserMetadatum.secret_id == models.Secret.id,
+                    models.SecretUserMetadatum.deleted == sqlalchemy.false()
+                )))
+        return query
+
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "Secret"
@@ -703,6 +1223,28 @@ class SecretRepo(BaseRepo):
         query = query.filter(models.Project.external_id == external_project_id)
         return query
 
+    def _do_build_baked_get_query(self):
+        """Sub-class hook: build a cached retrieve query."""
+        baked_query = self._build_baked_by_id_query()
+        baked_query += lambda q: q.join(models.Project)
+        baked_query += lambda q: q.filter(
+            models.Project.external_id ==
+            sqlalchemy.bindparam('external_project_id'))
+        return baked_query
+
+    def _build_baked_by_id_query(self):
+        """Builds a cached query for a live secret by its id.
+
+        Expects 'entity_id' and 'utcnow' bound parameters.
+        """
+        baked_query = _BAKERY(lambda s: s.query(models.Secret))
+        baked_query += lambda q: q.filter(
+            models.Secret.id == sqlalchemy.bindparam('entity_id'),
+            models.Secret.deleted == sqlalchemy.false(),
+            or_(models.Secret.expiration.is_(None),
+                models.Secret.expiration > sqlalchemy.bindparam('utcnow')))
+        return baked_query
+
     def _do_validate(self, values):
         """Sub-class hook: validate values."""
         pass
@@ -781,19 +1323,47 @@ class SecretRepo(BaseRepo):
             )
         return query.order_by(*ordering)
 
+    def get_secret_ids(self, project_id=None, store_plugin_name=None,
+                       after_id=None, limit=100, session=None):
+        """Returns the ids of secrets, one page at a time.
+
+        Meant to go through a large number of secrets, such as to migrate
+        them, each page starting after the last id of the previous one.
+
+        :param project_id: If set, only return the secrets of this project.
+        :param store_plugin_name: If set, only return the secrets stored
+                                  with this secret store plugin.
+        :param after_id: Only return the ids that sort after this one.
+        :param limit: The maximum amount of ids to return.
+        :param session: SQLAlchemy session object.
+        :returns: List of secret ids, in order.
+        """
+        session = self.get_session(session)
+
+        query = session.query(models.Secret.id)
+        query = query.filter(models.Secret.deleted == sqlalchemy.false())
+        if project_id:
+            query = query.filter(models.Secret.project_id == project_id)
+        if store_plugin_name:
+            stored_with = session.query(
+                models.SecretStoreMetadatum.secret_id).filter(
+                models.SecretStoreMetadatum.key == 'plugin_name',
+                models.SecretStoreMetadatum.value == store_plugin_name,
+                models.SecretStoreMetadatum.deleted == sqlalchemy.false())
+            query = query.filter(models.Secret.id.in_(stored_with))
+        if after_id:
+            query = query.filter(models.Secret.id > after_id)
+        query = query.order_by(models.Secret.id).limit(limit)
+        return [secret_id for secret_id, in query.all()]
+
     def get_secret_by_id(self, entity_id, suppress_exception=False,
                          session=None):
         """Gets secret by its entity id without project id check."""
         session = self.get_session(session)
         try:
-            utcnow = timeutils.utcnow()
-            expiration_filter = or_(models.Secret.expiration.is_(None),
-                                    models.Secret.expiration > utcnow)
-
-            query = session.query(models.Secret)
-            query = query.filter_by(id=entity_id, deleted=False)
-            query = query.filter(expiration_filter)
-            entity = query.one()
+            baked_query = self._build_baked_by_id_query()
+            entity = baked_query(session).params(
+                entity_id=entity_id, utcnow=timeutils.utcnow()).one()
         except sa_orm.exc.NoResultFound:
             entity = None
             if not suppress_exception:
@@ -812,6 +1382,54 @@ class EncryptedDatumRepo(BaseRepo):
     Stores encrypted information on behalf of a Secret.
     """
 
+    def get_by_inactive_kek(self, project_id, plugin_name, limit,
+                            session=None):
+        """Returns encrypted data still encrypted under an inactive KEK.
+
+        :param project_id: id of barbican project entity
+        :param plugin_name: Name of the crypto plugin of the KEKs.
+        :param limit: The maximum amount of encrypted data to return.
+        :param session: existing db session reference.
+        :returns: List of encrypted data, along with their KEK datum.
+        """
+        session = self.get_session(session)
+
+        query = session.query(models.EncryptedDatum)
+        query = query.join(models.KEKDatum,
+                           models.EncryptedDatum.kek_meta_project)
+        query = query.filter(
+            models.KEKDatum.project_id == project_id,
+            models.KEKDatum.plugin_name == plugin_name,
+            models.KEKDatum.active == sqlalchemy.false(),
+            models.EncryptedDatum.deleted == sqlalchemy.false())
+        query = query.order_by(models.EncryptedDatum.kek_id,
+                               models.EncryptedDatum.id)
+        return query.limit(limit).all()
+
+    def count_by_kek(self, project_id, plugin_name=None, session=None):
+        """Counts the encrypted data under each KEK of a project.
+
+        :param project_id: id of barbican project entity
+        :param plugin_name: If set, only count the encrypted data under the
+                            KEKs of this crypto plugin.
+        :param session: existing db session reference.
+        :returns: Dict of the number of encrypted data by KEK datum id,
+                  leaving out KEKs with no encrypted data.
+        """
+        session = self.get_session(session)
+
+        query = session.query(models.EncryptedDatum.kek_id,
+                              sa_func.count(models.EncryptedDatum.id))
+        query = query.join(models.KEKDatum,
+                           models.EncryptedDatum.kek_meta_project)
+        query = query.filter(
+            models.KEKDatum.project_id == project_id,
+            models.EncryptedDatum.deleted == sqlalchemy.false())
+        if plugin_name:
+            query = query.filter(models.KEKDatum.plugin_name == plugin_name)
+        query = query.group_by(models.EncryptedDatum.kek_id)
+        return dict(query.all())
+
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "EncryptedDatum"
@@ -849,14 +1467,16 @@ class SecretStoreMetadatumRepo(BaseRepo):
 
         session = get_session()
 
-        query = session.query(models.SecretStoreMetadatum)
-        query = query.filter_by(deleted=False)
-
-        query = query.filter(
-            models.SecretStoreMetadatum.secret_id == secret_id)
+        baked_query = _BAKERY(lambda s: s.query(
+            models.SecretStoreMetadatum.key,
+            models.SecretStoreMetadatum.value))
+        baked_query += lambda q: q.filter(
+            models.SecretStoreMetadatum.deleted == sqlalchemy.false(),
+            models.SecretStoreMetadatum.secret_id ==
+            sqlalchemy.bindparam('secret_id'))
 
-        metadata = query.all()
-        return {m.key: m.value for m in metadata}
+        metadata = baked_query(session).params(secret_id=secret_id).all()
+        return {key: value for key, value in metadata}
 
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
@@ -960,33 +1580,56 @@ class KEKDatumRepo(BaseRepo):
                 u._('Tried to register crypto plugin with null or empty '
                     'name.'))
 
-        kek_datum = None
-
         session = self.get_session(session)
 
-        # TODO(jfwood): Reverse this...attempt insert first, then get on fail.
-        try:
-            query = session.query(models.KEKDatum)
-            query = query.filter_by(project_id=project.id,
-                                    plugin_name=plugin_name,
-                                    active=True,
-                                    deleted=False)
-
-            kek_datum = query.one()
+        query = session.query(models.KEKDatum)
+        query = query.filter_by(project_id=project.id,
+                                plugin_name=plugin_name,
+                                active=True,
+                                deleted=False)
+        query = query.order_by(models.KEKDatum.created_at)
+
+        kek_datum = query.first()
+        if kek_datum is None:
+            new_kek_datum = models.KEKDatum()
+            new_kek_datum.kek_label = "project-{0}-key-{1}".format(
+                project.external_id, uuid.uuid4())
+            new_kek_datum.project_id = project.id
+            new_kek_datum.plugin_name = plugin_name
+            new_kek_datum.status = models.States.ACTIVE
+
+            # Only one of concurrent requests creates the KEK datum, as it
+            # is unique per crypto plugin of a project, except on MySQL.
+            upsert(new_kek_datum, ['project_id', 'plugin_name'],
+                   conflict_where=sqlalchemy.text(
+                       models.KEK_DATA_ACTIVE_WHERE),
+                   session=session)
+            kek_datum = query.first()
 
-        except sa_orm.exc.NoResultFound:
+        return kek_datum
 
-            kek_datum = models.KEKDatum()
+    def deactivate_kek_data(self, project_id, plugin_name, session=None):
+        """Deactivates the active KEK datum of a project's crypto plugin.
 
-            kek_datum.kek_label = "project-{0}-key-{1}".format(
-                project.external_id, uuid.uuid4())
-            kek_datum.project_id = project.id
-            kek_datum.plugin_name = plugin_name
-            kek_datum.status = models.States.ACTIVE
+        The next call to find_or_create_kek_datum() then creates a new KEK
+        datum. Deactivated KEK data remain in use to decrypt the secrets
+        encrypted under them.
 
-            self.save(kek_datum)
+        :param project_id: id of barbican project entity
+        :param plugin_name: Name of the crypto plugin of the KEK datum.
+        :param session: existing db session reference.
+        :returns: The number of KEK data deactivated.
+        """
+        session = self.get_session(session)
 
-        return kek_datum
+        query = session.query(models.KEKDatum)
+        query = query.filter_by(project_id=project_id,
+                                plugin_name=plugin_name,
+                                active=True,
+                                deleted=False)
+        return query.update({models.KEKDatum.active: False,
+                             models.KEKDatum.updated_at: timeutils.utcnow()},
+                            synchronize_session='evaluate')
 
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
@@ -1063,6 +1706,112 @@ class OrderRepo(BaseRepo):
 
         return entities, offset, limit, total
 
+    def get_status(self, entity_id, session=None):
+        """Returns the status of an order, without loading the order.
+
+        :param entity_id: The order id.
+        :param session: SQLAlchemy session object.
+        :returns: The status of the order, or None if it is not found or was
+                  deleted.
+        """
+        session = self.get_session(session)
+
+        query = session.query(models.Order.status)
+        query = query.filter(models.Order.id == entity_id,
+                             models.Order.deleted == sqlalchemy.false())
+        row = query.first()
+        return row.status if row is not None else None
+
+    def get_for_processing(self, order_ids, session=None):
+        """Returns the orders with the given ids, for workers to process.
+
+        The project and metadata of the orders are loaded along with them,
+        with a query per relationship for all orders rather than per order.
+
+        :param order_ids: List of order ids.
+        :param session: SQLAlchemy session object.
+        :returns: List of orders, leaving out orders not found or deleted.
+        """
+        if not order_ids:
+            return []
+
+        session = self.get_session(session)
+
+        query = session.query(models.Order)
+        query = query.filter(models.Order.id.in_(order_ids),
+                             models.Order.deleted == sqlalchemy.false())
+        query = query.options(
+            sa_orm.joinedload(models.Order.project),
+            sa_orm.subqueryload(models.Order.order_plugin_metadata),
+            sa_orm.subqueryload(models.Order.order_barbican_metadata))
+        return query.all()
+
+    def get_unprocessed(self, updated_before, limit, session=None):
+        """Returns orders no worker has processed yet.
+
+        These are the PENDING orders which were not given a sub status by a
+        worker yet, such as orders whose task is still queued.
+
+        :param updated_before: Only return orders last updated, or claimed,
+                               before this time.
+        :param limit: The maximum amount of orders to return.
+        :param session: SQLAlchemy session object.
+        :returns: List of (order id, external project id, updated at) tuples,
+                  oldest orders first.
+        """
+        session = self.get_session(session)
+
+        query = session.query(models.Order.id, models.Project.external_id,
+                              models.Order.updated_at)
+        query = query.join(models.Project, models.Order.project)
+        query = query.filter(models.Order.status == models.States.PENDING,
+                             models.Order.sub_status.is_(None),
+                             models.Order.deleted == sqlalchemy.false(),
+                             models.Order.updated_at < updated_before)
+        query = query.order_by(models.Order.created_at)
+        return query.limit(limit).all()
+
+    def claim(self, order_id, updated_at, session=None):
+        """Claims an order returned by get_unprocessed() for processing.
+
+        The order is not returned by get_unprocessed() again until its
+        updated_at passes updated_before.
+
+        :returns: True if the order was claimed, False if another worker
+                  claimed or updated it since it was returned.
+        """
+        session = self.get_session(session)
+
+        query = session.query(models.Order)
+        query = query.filter_by(id=order_id, updated_at=updated_at)
+        return bool(query.update({'updated_at': timeutils.utcnow()},
+                                 synchronize_session=False))
+
+    def set_unprocessed_error(self, order_ids, status_code, reason,
+                              session=None):
+        """Puts the orders no worker has processed yet in the ERROR state.
+
+        :param order_ids: List of order ids.
+        :param status_code: Error status code of the orders.
+        :param reason: Error reason of the orders.
+        :param session: SQLAlchemy session object.
+        :returns: The number of orders put in the ERROR state, leaving out
+                  those a worker has processed or started processing since.
+        """
+        session = self.get_session(session)
+
+        query = session.query(models.Order)
+        query = query.filter(models.Order.id.in_(order_ids),
+                             models.Order.status == models.States.PENDING,
+                             models.Order.sub_status.is_(None),
+                             models.Order.deleted == sqlalchemy.false())
+        return query.update(
+            {'status': models.States.ERROR,
+             'error_status_code': status_code,
+             'error_reason': reason[:models.ERROR_REASON_LENGTH],
+             'updated_at': timeutils.utcnow()},
+            synchronize_session=False)
+
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "Order"
@@ -1075,6 +1824,18 @@ class OrderRepo(BaseRepo):
         query = query.filter(models.Project.external_id == external_project_id)
         return query
 
+    def _do_build_baked_get_query(self):
+        """Sub-class hook: build a cached retrieve query."""
+        baked_query = _BAKERY(lambda s: s.query(models.Order))
+        baked_query += lambda q: q.filter(
+            models.Order.id == sqlalchemy.bindparam('entity_id'),
+            models.Order.deleted == sqlalchemy.false())
+        baked_query += lambda q: q.join(models.Project, models.Order.project)
+        baked_query += lambda q: q.filter(
+            models.Project.external_id ==
+            sqlalchemy.bindparam('external_project_id'))
+        return baked_query
+
     def _do_validate(self, values):
         """Sub-class hook: validate values."""
         pass
@@ -1313,6 +2074,27 @@ class ContainerRepo(BaseRepo):
         query = query.filter(models.Project.external_id == external_project_id)
         return query
 
+    def _do_build_baked_get_query(self):
+        """Sub-class hook: build a cached retrieve query."""
+        baked_query = self._build_baked_by_id_query()
+        baked_query += lambda q: q.join(models.Project,
+                                        models.Container.project)
+        baked_query += lambda q: q.filter(
+            models.Project.external_id ==
+            sqlalchemy.bindparam('external_project_id'))
+        return baked_query
+
+    def _build_baked_by_id_query(self):
+        """Builds a cached query for a live container by its id.
+
+        Expects an 'entity_id' bound parameter.
+        """
+        baked_query = _BAKERY(lambda s: s.query(models.Container))
+        baked_query += lambda q: q.filter(
+            models.Container.id == sqlalchemy.bindparam('entity_id'),
+            models.Container.deleted == sqlalchemy.false())
+        return baked_query
+
     def _do_validate(self, values):
         """Sub-class hook: validate values."""
         pass
@@ -1331,9 +2113,8 @@ class ContainerRepo(BaseRepo):
         """Gets container by its entity id without project id check."""
         session = self.get_session(session)
         try:
-            query = session.query(models.Container)
-            query = query.filter_by(id=entity_id, deleted=False)
-            entity = query.one()
+            baked_query = self._build_baked_by_id_query()
+            entity = baked_query(session).params(entity_id=entity_id).one()
         except sa_orm.exc.NoResultFound:
             entity = None
             if not suppress_exception:
@@ -1422,26 +2203,18 @@ class ContainerConsumerRepo(BaseRepo):
         return consumer
 
     def create_or_update_from(self, new_consumer, container, session=None):
+        """Registers a consumer of a container.
+
+        This operation is idempotent: an existing registration of the same
+        consumer, even deleted, is reused by clearing its deleted flags.
+        """
         session = self.get_session(session)
-        try:
-            container.updated_at = timeutils.utcnow()
-            container.consumers.append(new_consumer)
-            container.save(session=session)
-        except db_exc.DBDuplicateEntry:
-            session.rollback()  # We know consumer already exists.
-
-            # This operation is idempotent, so log this and move on
-            LOG.debug("Consumer %s with URL %s already exists for "
-                      "container %s, continuing...", new_consumer.name,
-                      new_consumer.URL, new_consumer.container_id)
-            # Get the existing entry and reuse it by clearing the deleted flags
-            existing_consumer = self.get_by_values(
-                new_consumer.container_id, new_consumer.name, new_consumer.URL,
-                show_deleted=True)
-            existing_consumer.deleted = False
-            existing_consumer.deleted_at = None
-            # We are not concerned about timing here -- set only, no reads
-            existing_consumer.save()
+        upsert(new_consumer, ['data_hash'],
+               update_columns=['deleted', 'deleted_at'], session=session)
+
+        container.updated_at = timeutils.utcnow()
+        container.save(session=session)
+        session.expire(container, ['consumers'])
 
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
@@ -1518,9 +2291,16 @@ class TransportKeyRepo(BaseRepo):
     def get_latest_transport_key(self, plugin_name, suppress_exception=False,
                                  session=None):
         """Returns the latest transport key for a given plugin."""
-        entity, offset, limit, total = self.get_by_create_date(
-            plugin_name, offset_arg=0, limit_arg=1,
-            suppress_exception=suppress_exception, session=session)
+        session = self.get_session(session)
+
+        query = session.query(models.TransportKey)
+        query = query.filter_by(deleted=False, plugin_name=plugin_name)
+        query = query.order_by(models.TransportKey.created_at.desc())
+        entity = query.first()
+
+        if not entity and not suppress_exception:
+            _raise_no_entities_found(self._do_entity_name())
+
         return entity
 
     def _do_build_get_query(self, entity_id, external_project_id, session):
@@ -1850,18 +2630,9 @@ class PreferredCertificateAuthorityRepo(BaseRepo):
         :param session: SQLAlchemy session object.
         :return: None
         """
-        session = self.get_session(session)
-        query = session.query(models.PreferredCertificateAuthority)
-        query = query.filter_by(project_id=project_id)
-        try:
-            entity = query.one()
-        except sa_orm.exc.NoResultFound:
-            self.create_from(
-                models.PreferredCertificateAuthority(project_id, ca_id),
-                session=session)
-        else:
-            entity.ca_id = ca_id
-            entity.save(session)
+        upsert(models.PreferredCertificateAuthority(project_id, ca_id),
+               ['project_id'], update_columns=['ca_id'],
+               session=self.get_session(session))
 
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
@@ -1921,10 +2692,24 @@ class SecretACLRepo(BaseRepo):
 
         return query.all()
 
+    def get_acl_summary(self, secret, session=None):
+        """Return the ACL summary of a secret, for authorizing requests.
+
+        Unless the ACLs of the secret are loaded already, the summary is
+        loaded with a single query of the few columns it needs, and cached
+        until the ACLs of the secret change.
+
+        :returns: Dict of the ACLSummary of each operation with an ACL.
+        """
+        return _get_acl_summary(
+            self.get_session(session), secret, 'secret_acls',
+            models.SecretACL, models.SecretACLUser,
+            models.SecretACL.secret_id)
+
     def create_or_replace_from(self, secret, secret_acl, user_ids=None,
                                session=None):
         session = self.get_session(session)
-        secret.updated_at = timeutils.utcnow()
+        _acls_changed(secret)
         secret_acl.updated_at = timeutils.utcnow()
         secret.secret_acls.append(secret_acl)
         secret.save(session=session)
@@ -1974,8 +2759,19 @@ class SecretACLRepo(BaseRepo):
         query = query.filter(models.SecretACL.secret_id == secret_id)
         return query.scalar()
 
+    def delete_entity_by_id(self, entity_id, external_project_id,
+                            session=None):
+        """Remove the secret ACL by its ID."""
+        session = self.get_session(session)
+        entity = self.get(entity_id=entity_id,
+                          external_project_id=external_project_id,
+                          session=session)
+        _acls_changed(entity.secret)
+        entity.delete(session=session)
+
     def delete_acls_for_secret(self, secret, session=None):
         session = self.get_session(session)
+        _acls_changed(secret)
 
         for entity in secret.secret_acls:
             entity.delete(session=session)
@@ -2016,10 +2812,20 @@ class ContainerACLRepo(BaseRepo):
         query = query.filter_by(container_id=container_id)
         return query.all()
 
+    def get_acl_summary(self, container, session=None):
+        """Return the ACL summary of a container, for authorizing requests.
+
+        See SecretACLRepo.get_acl_summary().
+        """
+        return _get_acl_summary(
+            self.get_session(session), container, 'container_acls',
+            models.ContainerACL, models.ContainerACLUser,
+            models.ContainerACL.container_id)
+
     def create_or_replace_from(self, container, container_acl,
                                user_ids=None, session=None):
         session = self.get_session(session)
-        container.updated_at = timeutils.utcnow()
+        _acls_changed(container)
         container_acl.updated_at = timeutils.utcnow()
         container.container_acls.append(container_acl)
         container.save(session=session)
@@ -2070,8 +2876,19 @@ class ContainerACLRepo(BaseRepo):
         query = query.filter(models.ContainerACL.container_id == container_id)
         return query.scalar()
 
+    def delete_entity_by_id(self, entity_id, external_project_id,
+                            session=None):
+        """Remove the container ACL by its ID."""
+        session = self.get_session(session)
+        entity = self.get(entity_id=entity_id,
+                          external_project_id=external_project_id,
+                          session=session)
+        _acls_changed(entity.container)
+        entity.delete(session=session)
+
     def delete_acls_for_container(self, container, session=None):
         session = self.get_session(session)
+        _acls_changed(container)
 
         for entity in container.container_acls:
             entity.delete(session=session)
@@ -2139,19 +2956,10 @@ class ProjectQuotasRepo(BaseRepo):
         :param session: SQLAlchemy session object.
         :return: None
         """
-        session = self.get_session(session)
-        query = session.query(models.ProjectQuotas)
-        query = query.filter_by(project_id=project_id)
-        try:
-            entity = query.one()
-        except sa_orm.exc.NoResultFound:
-            self.create_from(
-                models.ProjectQuotas(project_id,
-                                     parsed_project_quotas),
-                session=session)
-        else:
-            self._update_values(entity, parsed_project_quotas)
-            entity.save(session)
+        # Quotas missing from parsed_project_quotas are left as they are.
+        upsert(models.ProjectQuotas(project_id, parsed_project_quotas),
+               ['project_id'], update_columns=list(parsed_project_quotas),
+               session=self.get_session(session))
 
     def get_by_external_project_id(self, external_project_id,
                                    suppress_exception=False, session=None):
@@ -2295,17 +3103,11 @@ class ProjectSecretStoreRepo(BaseRepo):
         store id.
         """
         session = self.get_session(session)
-        try:
-            entity = self.get_secret_store_for_project(project_id, None,
-                                                       session=session)
-        except exception.NotFound:
-            entity = self.create_from(
-                models.ProjectSecretStore(project_id, secret_store_id),
-                session=session)
-        else:
-            entity.secret_store_id = secret_store_id
-            entity.save(session)
-        return entity
+        upsert(models.ProjectSecretStore(project_id, secret_store_id),
+               ['project_id'], update_columns=['secret_store_id'],
+               session=session)
+        return self.get_secret_store_for_project(project_id, None,
+                                                 session=session)
 
     def get_count_by_secret_store(self, secret_store_id, session=None):
         """Gets count of projects mapped to a given secret store.
@@ -250,6 +250,12 @@ class CryptoPluginBase(object):
     persist the data that is assigned to these DTOs by the plugin.
     """
 
+    # Whether the methods of the plugin may be run on native threads by
+    # barbican.plugin.crypto.offload when running under eventlet. They must
+    # then only use its native_rlock() locks and log through its
+    # deferred_log().
+    thread_safe = False
+
     @abc.abstractmethod
     def get_plugin_name(self):
         """Gets user friendly plugin name.
@@ -300,6 +306,44 @@ class CryptoPluginBase(object):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def encrypt_batch(self, encrypt_dtos, kek_meta_dto, project_id):
+        """Encrypt several secrets of a project under the same KEK.
+
+        Plugins able to share work between the encryptions, such as loading
+        the KEK or checking out a session with their backend, may override
+        this method. By default, :meth:`encrypt` is called for each secret.
+
+        :param encrypt_dtos: List of :class:`EncryptDTO` instances, each
+            containing the raw secret byte data to be encrypted.
+        :param kek_meta_dto: :class:`KEKMetaDTO` instance of the project's
+            Key Encryption Key (KEK), as for :meth:`encrypt`.
+        :param project_id: Project ID associated with the unencrypted data.
+        :return: List of response DTOs, in the order of encrypt_dtos.
+        :rtype: list of :class:`ResponseDTO`
+        """
+        return [self.encrypt(encrypt_dto, kek_meta_dto, project_id)
+                for encrypt_dto in encrypt_dtos]
+
+    def decrypt_batch(self, decrypt_dtos, kek_meta_dto, kek_meta_extendeds,
+                      project_id):
+        """Decrypt several encrypted data of a project under the same KEK.
+
+        Plugins able to share work between the decryptions may override
+        this method. By default, :meth:`decrypt` is called for each datum.
+
+        :param decrypt_dtos: List of data transfer objects containing the
+               cyphertexts to be decrypted.
+        :param kek_meta_dto: Key encryption key metadata to use for decryption
+        :param kek_meta_extendeds: List of the optional per-secret KEK
+            metadata of each cyphertext, in the order of decrypt_dtos.
+        :param project_id: Project ID associated with the encrypted data.
+        :returns: list -- unencrypted byte data, in the order of decrypt_dtos
+        """
+        return [self.decrypt(decrypt_dto, kek_meta_dto, kek_meta_extended,
+                             project_id)
+                for decrypt_dto, kek_meta_extended
+                in zip(decrypt_dtos, kek_meta_extendeds)]
+
     @abc.abstractmethod
     def bind_kek_metadata(self, kek_meta_dto):
         """Key Encryption Key Metadata binding function
@@ -340,6 +384,24 @@ class CryptoPluginBase(object):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def generate_symmetric_batch(self, generate_dtos, kek_meta_dto,
+                                 project_id):
+        """Generate several new keys for a project under the same KEK.
+
+        Plugins able to share work between the generations may override
+        this method. By default, :meth:`generate_symmetric` is called for
+        each key.
+
+        :param generate_dtos: List of data transfer objects for the records
+               associated with the generation requests.
+        :param kek_meta_dto: Key encryption key metadata to use for encryption
+        :param project_id: Project ID associated with the data.
+        :returns: List of ResponseDTO objects, in the order of generate_dtos.
+        """
+        return [self.generate_symmetric(generate_dto, kek_meta_dto,
+                                        project_id)
+                for generate_dto in generate_dtos]
+
     @abc.abstractmethod
     def generate_asymmetric(self, generate_dto, kek_meta_dto, project_id):
         """Create a new asymmetric key.
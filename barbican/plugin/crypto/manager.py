@@ -26,7 +26,7 @@ from barbican.plugin.util import utils as plugin_utils
 _PLUGIN_MANAGER = None
 _PLUGIN_MANAGER_LOCK = threading.RLock()
 
-CONF = config.new_config()
+CONF = config.CONF
 
 DEFAULT_PLUGIN_NAMESPACE = 'barbican.crypto.plugin'
 DEFAULT_PLUGINS = ['simple_crypto']
@@ -41,11 +41,36 @@ crypto_opts = [
     cfg.MultiStrOpt('enabled_crypto_plugins',
                     default=DEFAULT_PLUGINS,
                     help=u._('List of crypto plugins to load.')
-                    )
+                    ),
+    cfg.BoolOpt('offload_blocking_calls',
+                default=True,
+                help=u._('When running under eventlet, such as in the '
+                         'worker, run crypto plugin calls in a native thread '
+                         'pool so that a slow HSM call or key generation '
+                         'does not stall the other green threads.')
+                ),
+    cfg.IntOpt('thread_pool_size',
+               default=20, min=1,
+               help=u._('Number of native threads used to run offloaded '
+                        'crypto plugin calls.')
+               ),
+    cfg.IntOpt('max_concurrent_calls_per_plugin',
+               default=1, min=1,
+               help=u._('Maximum number of offloaded calls run at the same '
+                        'time for each crypto plugin. Further calls wait '
+                        'for their turn. The default of 1 is safe for every '
+                        'plugin: the PKCS#11 library is initialized without '
+                        'multithreading support, so it must not be called '
+                        'concurrently, and the calls were already run one '
+                        'at a time on the single native thread of the '
+                        'process before being offloaded, so that they lose '
+                        'no throughput while no longer stalling the other '
+                        'requests. Only raise this for plugins whose '
+                        'backend library is thread safe.')
+               )
 ]
 CONF.register_group(crypto_opt_group)
 CONF.register_opts(crypto_opts, group=crypto_opt_group)
-config.parse_args(CONF)
 
 config.set_module_config("crypto", CONF)
 
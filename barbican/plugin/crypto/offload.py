@@ -0,0 +1,211 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Runs blocking crypto plugin calls on native threads.
+
+The worker and other eventlet based processes monkey patch the standard
+library, so every request is handled by a green thread on a single native
+thread. Crypto plugin calls that block in C code, such as PKCS#11 calls into
+an HSM, or that are CPU-bound, such as RSA key generation, would then stall
+every other green thread in the process. When running under eventlet, these
+calls are handed to eventlet's native thread pool instead, with a bounded
+number of concurrent calls per plugin.
+
+Only the plugins declaring themselves thread_safe are offloaded. Once the
+standard library is monkey patched, its locks are green locks, which must
+not be used from native threads, and so is the logging module. Offloaded
+plugins thus guard their state with native_rlock() locks, and log through
+deferred_log(), whose records are logged once the call returns to its
+green thread.
+"""
+import collections
+import sys
+import threading
+import time
+
+from barbican.common import config
+from barbican.common import utils
+
+LOG = utils.getLogger(__name__)
+
+_EXECUTOR = None
+
+
+def _native_threading():
+    if 'eventlet' not in sys.modules:
+        return threading
+    from eventlet import patcher
+    return patcher.original('threading')
+
+
+# Set on the native threads while they run an offloaded call.
+_NATIVE_STATE = _native_threading().local()
+
+# Log records of offloaded calls, waiting to be logged by their green
+# threads. deque's append and popleft are atomic, so that it needs no lock.
+_DEFERRED_LOGS = collections.deque()
+
+
+def native_rlock():
+    """Returns a reentrant lock usable from native and green threads.
+
+    Under eventlet, it blocks the whole native thread it is taken on, so
+    that it is only to be held for short periods of time.
+    """
+    return _native_threading().RLock()
+
+
+def deferred_log(log_func, msg, *args):
+    """Logs a message, once back on a green thread when offloaded.
+
+    :param log_func: logging method to log with, such as LOG.warning.
+    """
+    if getattr(_NATIVE_STATE, 'offloaded', False):
+        _DEFERRED_LOGS.append((log_func, msg, args))
+    else:
+        log_func(msg, *args)
+
+
+def _flush_deferred_logs():
+    while True:
+        try:
+            log_func, msg, args = _DEFERRED_LOGS.popleft()
+        except IndexError:
+            return
+        log_func(msg, *args)
+
+
+def _call_natively(func, args, kwargs):
+    _NATIVE_STATE.offloaded = True
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _NATIVE_STATE.offloaded = False
+
+
+class _PluginCallLimiter(object):
+    """Bounds and counts the concurrent calls into one crypto plugin."""
+
+    def __init__(self, max_calls):
+        self._semaphore = threading.Semaphore(max_calls)
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.calls = 0
+
+    def acquire(self):
+        if not self._semaphore.acquire(False):
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        self.active += 1
+        self.calls += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def get_stats(self):
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_waiting': self.max_waiting,
+            'calls': self.calls,
+        }
+
+
+class PluginCallExecutor(object):
+    """Runs crypto plugin calls, on native threads when under eventlet."""
+
+    def __init__(self, enabled, max_calls_per_plugin):
+        self.enabled = enabled
+        self.max_calls_per_plugin = max_calls_per_plugin
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def run(self, plugin, func, *args, **kwargs):
+        """Calls func(*args, **kwargs) on behalf of a crypto plugin.
+
+        :param plugin: the CryptoPluginBase instance being called. Its
+                       calls are only offloaded if it is thread_safe.
+        :param func: the plugin method to call.
+        :returns: the result of the call.
+        """
+        if not (self.enabled and getattr(plugin, 'thread_safe', False)):
+            return func(*args, **kwargs)
+
+        plugin_name = utils.generate_fullname_for(plugin)
+        limiter = self._get_limiter(plugin_name)
+
+        start = time.time()
+        limiter.acquire()
+        waited = time.time() - start
+        if waited >= 0.1:
+            LOG.debug('Waited %.3f seconds to call crypto plugin %s; %s '
+                      'more calls are queued', waited, plugin_name,
+                      limiter.waiting)
+        try:
+            from eventlet import tpool
+            return tpool.execute(_call_natively, func, args, kwargs)
+        finally:
+            limiter.release()
+            _flush_deferred_logs()
+
+    def get_stats(self):
+        """Returns the call and queue depth counters of each plugin."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {name: limiter.get_stats()
+                for name, limiter in limiters.items()}
+
+    def _get_limiter(self, plugin_name):
+        limiter = self._limiters.get(plugin_name)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.setdefault(
+                    plugin_name,
+                    _PluginCallLimiter(self.max_calls_per_plugin))
+        return limiter
+
+
+def _is_monkey_patched():
+    # eventlet is only imported here when it was already imported by the
+    # process, so that processes not using it do not pay for importing it.
+    if 'eventlet' not in sys.modules:
+        return False
+    from eventlet import patcher
+    return patcher.is_monkey_patched('thread')
+
+
+def get_executor():
+    """Return a singleton crypto plugin call executor."""
+    global _EXECUTOR
+    if not _EXECUTOR:
+        crypto_conf = config.get_module_config('crypto').crypto
+        enabled = (crypto_conf.offload_blocking_calls and
+                   _is_monkey_patched())
+        if enabled:
+            from eventlet import tpool
+            tpool.set_num_threads(crypto_conf.thread_pool_size)
+        _EXECUTOR = PluginCallExecutor(
+            enabled, crypto_conf.max_concurrent_calls_per_plugin)
+    return _EXECUTOR
+
+
+def run(plugin, func, *args, **kwargs):
+    """Calls a crypto plugin method through the singleton executor."""
+    return get_executor().run(plugin, func, *args, **kwargs)
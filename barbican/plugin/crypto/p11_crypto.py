@@ -13,7 +13,6 @@
 
 import base64
 import collections
-import threading
 import time
 
 from oslo_config import cfg
@@ -24,9 +23,10 @@ from barbican.common import exception
 from barbican.common import utils
 from barbican import i18n as u
 from barbican.plugin.crypto import base as plugin
+from barbican.plugin.crypto import offload
 from barbican.plugin.crypto import pkcs11
 
-CONF = config.new_config()
+CONF = config.CONF
 LOG = utils.getLogger(__name__)
 
 CachedKEK = collections.namedtuple("CachedKEK", ["kek", "expires"])
@@ -78,7 +78,6 @@ p11_crypto_plugin_opts = [
 ]
 CONF.register_group(p11_crypto_plugin_group)
 CONF.register_opts(p11_crypto_plugin_opts, group=p11_crypto_plugin_group)
-config.parse_args(CONF)
 
 
 def list_opts():
@@ -94,6 +93,8 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
 
     """
 
+    thread_safe = True
+
     def __init__(self, conf=CONF, ffi=None, pkcs11=None):
         self.conf = conf
         plugin_conf = conf.p11_crypto_plugin
@@ -126,6 +127,15 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
         return self._call_pkcs11(self._decrypt, decrypt_dto, kek_meta_dto,
                                  kek_meta_extended, project_id)
 
+    def encrypt_batch(self, encrypt_dtos, kek_meta_dto, project_id):
+        return self._call_pkcs11(self._encrypt_batch, encrypt_dtos,
+                                 kek_meta_dto, project_id)
+
+    def decrypt_batch(self, decrypt_dtos, kek_meta_dto, kek_meta_extendeds,
+                      project_id):
+        return self._call_pkcs11(self._decrypt_batch, decrypt_dtos,
+                                 kek_meta_dto, kek_meta_extendeds, project_id)
+
     def bind_kek_metadata(self, kek_meta_dto):
         return self._call_pkcs11(self._bind_kek_metadata, kek_meta_dto)
 
@@ -133,6 +143,11 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
         return self._call_pkcs11(self._generate_symmetric, generate_dto,
                                  kek_meta_dto, project_id)
 
+    def generate_symmetric_batch(self, generate_dtos, kek_meta_dto,
+                                 project_id):
+        return self._call_pkcs11(self._generate_symmetric_batch,
+                                 generate_dtos, kek_meta_dto, project_id)
+
     def generate_asymmetric(self, generate_dto, kek_meta_dto, project_id):
         raise NotImplementedError(u._("Feature not implemented for PKCS11"))
 
@@ -152,7 +167,8 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
         try:
             return func(*args, **kwargs)
         except (exception.PKCS11Exception) as pe:
-            LOG.warning("Reinitializing PKCS#11 library: %s", pe)
+            offload.deferred_log(LOG.warning,
+                                 "Reinitializing PKCS#11 library: %s", pe)
             self._reinitialize_pkcs11()
             return func(*args, **kwargs)
 
@@ -167,10 +183,7 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
             if 'session' in locals():
                 self._return_session(session)
 
-        kek_meta_extended = json_dumps_compact(
-            {'iv': base64.b64encode(ct_data['iv'])}
-        )
-        return plugin.ResponseDTO(ct_data['ct'], kek_meta_extended)
+        return self._build_response_dto(ct_data)
 
     def _decrypt(self, decrypt_dto, kek_meta_dto, kek_meta_extended,
                  project_id):
@@ -189,6 +202,54 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
 
         return pt_data
 
+    def _encrypt_batch(self, encrypt_dtos, kek_meta_dto, project_id):
+        # Load the KEK and check out a session once for the whole batch.
+        kek = self._load_kek_from_meta_dto(kek_meta_dto)
+        session = self._get_session()
+        try:
+            return [
+                self._build_response_dto(
+                    self.pkcs11.encrypt(kek, encrypt_dto.unencrypted, session))
+                for encrypt_dto in encrypt_dtos]
+        finally:
+            self._return_session(session)
+
+    def _decrypt_batch(self, decrypt_dtos, kek_meta_dto, kek_meta_extendeds,
+                       project_id):
+        kek = self._load_kek_from_meta_dto(kek_meta_dto)
+        session = self._get_session()
+        try:
+            return [
+                self.pkcs11.decrypt(
+                    kek,
+                    base64.b64decode(json.loads(kek_meta_extended)['iv']),
+                    decrypt_dto.encrypted, session)
+                for decrypt_dto, kek_meta_extended
+                in zip(decrypt_dtos, kek_meta_extendeds)]
+        finally:
+            self._return_session(session)
+
+    def _generate_symmetric_batch(self, generate_dtos, kek_meta_dto,
+                                  project_id):
+        kek = self._load_kek_from_meta_dto(kek_meta_dto)
+        session = self._get_session()
+        try:
+            response_dtos = []
+            for generate_dto in generate_dtos:
+                byte_length = int(generate_dto.bit_length) // 8
+                buf = self.pkcs11.generate_random(byte_length, session)
+                response_dtos.append(self._build_response_dto(
+                    self.pkcs11.encrypt(kek, buf, session)))
+            return response_dtos
+        finally:
+            self._return_session(session)
+
+    def _build_response_dto(self, ct_data):
+        kek_meta_extended = json_dumps_compact(
+            {'iv': base64.b64encode(ct_data['iv'])}
+        )
+        return plugin.ResponseDTO(ct_data['ct'], kek_meta_extended)
+
     def _bind_kek_metadata(self, kek_meta_dto):
         if not kek_meta_dto.plugin_meta:
             # Generate wrapped kek and jsonify
@@ -215,23 +276,20 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
             if 'session' in locals():
                 self._return_session(session)
 
-        kek_meta_extended = json_dumps_compact(
-            {'iv': base64.b64encode(ct_data['iv'])}
-        )
-        return plugin.ResponseDTO(ct_data['ct'], kek_meta_extended)
+        return self._build_response_dto(ct_data)
 
     def _configure_object_cache(self):
         # Master Key cache
         self.mk_cache = {}
-        self.mk_cache_lock = threading.RLock()
+        self.mk_cache_lock = offload.native_rlock()
 
         # Project KEK cache
         self.pkek_cache = collections.OrderedDict()
-        self.pkek_cache_lock = threading.RLock()
+        self.pkek_cache_lock = offload.native_rlock()
 
         # Session for object caching
         self.caching_session = self._get_session()
-        self.caching_session_lock = threading.RLock()
+        self.caching_session_lock = offload.native_rlock()
 
         # Cache master keys
         self._get_master_key(self.mkek_label)
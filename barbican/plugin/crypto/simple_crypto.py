@@ -27,7 +27,7 @@ from barbican import i18n as u
 from barbican.plugin.crypto import base as c
 
 
-CONF = config.new_config()
+CONF = config.CONF
 LOG = utils.getLogger(__name__)
 
 simple_crypto_plugin_group = cfg.OptGroup(name='simple_crypto_plugin',
@@ -43,7 +43,6 @@ simple_crypto_plugin_opts = [
 ]
 CONF.register_group(simple_crypto_plugin_group)
 CONF.register_opts(simple_crypto_plugin_opts, group=simple_crypto_plugin_group)
-config.parse_args(CONF)
 
 
 def list_opts():
@@ -53,6 +52,8 @@ def list_opts():
 class SimpleCryptoPlugin(c.CryptoPluginBase):
     """Insecure implementation of the crypto plugin."""
 
+    thread_safe = True
+
     def __init__(self, conf=CONF):
         self.master_kek = conf.simple_crypto_plugin.kek
         self.plugin_name = conf.simple_crypto_plugin.plugin_name
@@ -75,8 +76,10 @@ class SimpleCryptoPlugin(c.CryptoPluginBase):
 
         return encryptor.decrypt(kek_meta_dto.plugin_meta)
 
-    def encrypt(self, encrypt_dto, kek_meta_dto, project_id):
-        kek = self._get_kek(kek_meta_dto)
+    def _get_encryptor(self, kek_meta_dto):
+        return fernet.Fernet(self._get_kek(kek_meta_dto))
+
+    def _encrypt(self, encryptor, encrypt_dto):
         unencrypted = encrypt_dto.unencrypted
         if not isinstance(unencrypted, six.binary_type):
             raise ValueError(
@@ -87,16 +90,27 @@ class SimpleCryptoPlugin(c.CryptoPluginBase):
                     unencrypted_type=type(unencrypted)
                 )
             )
-        encryptor = fernet.Fernet(kek)
         cyphertext = encryptor.encrypt(unencrypted)
         return c.ResponseDTO(cyphertext, None)
 
+    def encrypt(self, encrypt_dto, kek_meta_dto, project_id):
+        return self._encrypt(self._get_encryptor(kek_meta_dto), encrypt_dto)
+
+    def encrypt_batch(self, encrypt_dtos, kek_meta_dto, project_id):
+        encryptor = self._get_encryptor(kek_meta_dto)
+        return [self._encrypt(encryptor, encrypt_dto)
+                for encrypt_dto in encrypt_dtos]
+
     def decrypt(self, encrypted_dto, kek_meta_dto, kek_meta_extended,
                 project_id):
-        kek = self._get_kek(kek_meta_dto)
-        encrypted = encrypted_dto.encrypted
-        decryptor = fernet.Fernet(kek)
-        return decryptor.decrypt(encrypted)
+        decryptor = self._get_encryptor(kek_meta_dto)
+        return decryptor.decrypt(encrypted_dto.encrypted)
+
+    def decrypt_batch(self, decrypt_dtos, kek_meta_dto, kek_meta_extendeds,
+                      project_id):
+        decryptor = self._get_encryptor(kek_meta_dto)
+        return [decryptor.decrypt(decrypt_dto.encrypted)
+                for decrypt_dto in decrypt_dtos]
 
     def bind_kek_metadata(self, kek_meta_dto):
         kek_meta_dto.algorithm = 'aes'
@@ -117,6 +131,13 @@ class SimpleCryptoPlugin(c.CryptoPluginBase):
                             kek_meta_dto,
                             project_id)
 
+    def generate_symmetric_batch(self, generate_dtos, kek_meta_dto,
+                                 project_id):
+        encrypt_dtos = [
+            c.EncryptDTO(os.urandom(int(generate_dto.bit_length) // 8))
+            for generate_dto in generate_dtos]
+        return self.encrypt_batch(encrypt_dtos, kek_meta_dto, project_id)
+
     def generate_asymmetric(self, generate_dto, kek_meta_dto, project_id):
         """Generate asymmetric keys based on below rules:
 
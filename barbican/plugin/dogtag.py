@@ -17,6 +17,7 @@ import base64
 import copy
 import datetime
 import os
+import threading
 import uuid
 
 from Crypto.PublicKey import RSA
@@ -36,6 +37,7 @@ import pki.crypto as cryptoutil
 import pki.key as key
 import pki.kra
 import pki.profile
+from requests import adapters
 from requests import exceptions as request_exceptions
 
 from barbican.common import exception
@@ -49,7 +51,7 @@ import barbican.plugin.dogtag_config_opts  # noqa
 import barbican.plugin.interface.certificate_manager as cm
 import barbican.plugin.interface.secret_store as sstore
 
-# reuse the conf object to not call config.new_config() twice
+# the dogtag options are registered by dogtag_config_opts
 CONF = barbican.plugin.dogtag_config_opts.CONF
 LOG = utils.getLogger(__name__)
 
@@ -58,6 +60,11 @@ CERT_FOOTER = "-----END CERTIFICATE-----"
 
 KRA_TRANSPORT_NICK = "KRA transport cert"
 
+# HTTP sessions shared by the connections to a Dogtag instance, keyed by
+# host, port and client certificate, see create_connection().
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
 
 def _create_nss_db_if_needed(nss_db_path, nss_password):
     """Creates NSS DB if it's not setup already
@@ -114,6 +121,19 @@ def _import_kra_transport_cert_to_nss_db(conf, crypto):
                   " KRA may not be enabled: %s", e)
 
 
+class _TimeoutHTTPAdapter(adapters.HTTPAdapter):
+    """HTTP adapter applying a default timeout to the requests it sends."""
+
+    def __init__(self, timeout, **kwargs):
+        self._timeout = timeout
+        super(_TimeoutHTTPAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self._timeout
+        return super(_TimeoutHTTPAdapter, self).send(request, **kwargs)
+
+
 def create_connection(conf, subsystem_path):
     pem_path = conf.dogtag_plugin.pem_path
     if pem_path is None:
@@ -124,8 +144,34 @@ def create_connection(conf, subsystem_path):
         conf.dogtag_plugin.dogtag_port,
         subsystem_path)
     connection.set_authentication_cert(pem_path)
+    _share_session(conf, connection)
     return connection
 
+
+def _share_session(conf, connection):
+    """Have the connection use the shared session to its Dogtag instance.
+
+    Connections are created for each plugin instance, so that without
+    sharing their sessions, each new plugin instance would open, and
+    negotiate TLS for, new connections to the Dogtag instance. The shared
+    session keeps a pool of connections alive instead, for the connections
+    to all subsystems of the instance.
+    """
+    key = (conf.dogtag_plugin.dogtag_host, conf.dogtag_plugin.dogtag_port,
+           conf.dogtag_plugin.pem_path)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = connection.session
+            pool_size = conf.dogtag_plugin.connection_pool_size
+            session.mount('https://', _TimeoutHTTPAdapter(
+                timeout=(conf.dogtag_plugin.connect_timeout,
+                         conf.dogtag_plugin.read_timeout),
+                pool_connections=pool_size,
+                pool_maxsize=pool_size))
+            _SESSIONS[key] = session
+    connection.session = session
+
 crypto = _setup_nss_db_services(CONF)
 if crypto:
     crypto.initialize()
@@ -666,6 +712,7 @@ class DogtagCAPlugin(cm.CertificatePluginBase):
         self.certclient = pki.cert.CertClient(connection)
         self.simple_cmc_profile = conf.dogtag_plugin.simple_cmc_profile
         self.auto_approved_profiles = conf.dogtag_plugin.auto_approved_profiles
+        self.connection_pool_size = conf.dogtag_plugin.connection_pool_size
 
         self.working_dir = conf.dogtag_plugin.plugin_working_dir
         if not os.path.isdir(self.working_dir):
@@ -854,6 +901,24 @@ class DogtagCAPlugin(cm.CertificatePluginBase):
             raise cm.CertificateGeneralException(
                 u._("Invalid request_status returned by CA"))
 
+    def check_certificate_statuses(self, requests):
+        """Check the status of a batch of certificate requests.
+
+        The requests are checked concurrently, over the pooled connections
+        to the CA, when running in an eventlet monkey patched process such
+        as the worker.
+        """
+        from eventlet import greenpool
+
+        def check(request):
+            try:
+                return self.check_certificate_status(*request)
+            except Exception as e:
+                return e
+
+        pool = greenpool.GreenPool(self.connection_pool_size)
+        return list(pool.imap(check, requests))
+
     @_catch_request_exception
     def issue_certificate_request(self, order_id, order_meta, plugin_meta,
                                   barbican_meta_dto):
@@ -20,7 +20,7 @@ from barbican import i18n as u
 
 import barbican.plugin.interface.certificate_manager as cm
 
-CONF = config.new_config()
+CONF = config.CONF
 
 dogtag_plugin_group = cfg.OptGroup(name='dogtag_plugin',
                                    title="Dogtag Plugin Options")
@@ -51,11 +51,23 @@ dogtag_plugin_opts = [
     cfg.StrOpt('plugin_name',
                help=u._('User friendly plugin name'),
                default='Dogtag KRA'),
+    cfg.IntOpt('connection_pool_size',
+               default=10, min=1,
+               help=u._('Maximum number of keep-alive connections to the '
+                        'Dogtag instance, shared by the KRA and CA plugins '
+                        'of a process')),
+    cfg.FloatOpt('connect_timeout',
+                 default=10, min=0,
+                 help=u._('Seconds to wait for a connection to the Dogtag '
+                          'instance')),
+    cfg.FloatOpt('read_timeout',
+                 default=60, min=0,
+                 help=u._('Seconds to wait for a response from the Dogtag '
+                          'instance')),
 ]
 
 CONF.register_group(dogtag_plugin_group)
 CONF.register_opts(dogtag_plugin_opts, group=dogtag_plugin_group)
-config.parse_args(CONF)
 
 
 def list_opts():
@@ -37,7 +37,7 @@ from barbican.model import repositories as repos
 from barbican.plugin.util import utils as plugin_utils
 
 LOG = utils.getLogger(__name__)
-CONF = config.new_config()
+CONF = config.CONF
 
 # Configuration for certificate processing plugins:
 DEFAULT_PLUGIN_NAMESPACE = 'barbican.certificate.plugin'
@@ -57,7 +57,6 @@ cert_opts = [
 ]
 CONF.register_group(cert_opt_group)
 CONF.register_opts(cert_opts, group=cert_opt_group)
-config.parse_args(CONF)
 
 
 def list_opts():
@@ -314,6 +313,28 @@ class CertificatePluginBase(object):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def issue_certificate_requests(self, requests):
+        """Create a batch of initial orders
+
+        Plugins that can share work across the orders of a batch, such as
+        the signing context of a CA, override this. By default, each order
+        is passed to :meth:`issue_certificate_request` in turn.
+
+        :param requests: List of (order_id, order_meta, plugin_meta,
+                         barbican_meta_dto) tuples, with the arguments of
+                         :meth:`issue_certificate_request` for each order
+        :returns: A list with, for each request in order, the
+                  :class:`ResultDTO` of the request or the exception
+                  raised while processing it
+        """
+        results = []
+        for request in requests:
+            try:
+                results.append(self.issue_certificate_request(*request))
+            except Exception as e:
+                results.append(e)
+        return results
+
     @abc.abstractmethod
     def modify_certificate_request(self, order_id, order_meta, plugin_meta,
                                    barbican_meta_dto):
@@ -380,6 +401,28 @@ class CertificatePluginBase(object):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def check_certificate_statuses(self, requests):
+        """Check the status of a batch of certificate requests
+
+        Plugins that can check many requests at once, or concurrently,
+        override this. By default, each request is passed to
+        :meth:`check_certificate_status` in turn.
+
+        :param requests: List of (order_id, order_meta, plugin_meta,
+                         barbican_meta_dto) tuples, with the arguments of
+                         :meth:`check_certificate_status` for each order
+        :returns: A list with, for each request in order, the
+                  :class:`ResultDTO` of the request or the exception
+                  raised while checking it
+        """
+        results = []
+        for request in requests:
+            try:
+                results.append(self.check_certificate_status(*request))
+            except Exception as e:
+                results.append(e)
+        return results
+
     @abc.abstractmethod
     def supports(self, certificate_spec):
         """Returns if the plugin supports the certificate type.
@@ -24,12 +24,13 @@ from barbican.common import exception
 from barbican.common import utils
 from barbican import i18n as u
 from barbican.plugin.util import multiple_backends
+from barbican.plugin.util import transport_keys
 from barbican.plugin.util import utils as plugin_utils
 
 
 _SECRET_STORE = None
 
-CONF = config.new_config()
+CONF = config.CONF
 DEFAULT_PLUGIN_NAMESPACE = 'barbican.secretstore.plugin'
 DEFAULT_PLUGINS = ['store_crypto']
 
@@ -52,11 +53,18 @@ store_opts = [
     cfg.ListOpt('stores_lookup_suffix',
                 help=u._('List of suffix to use for looking up plugins which '
                          'are supported with multiple backend support.')
-                )
+                ),
+    cfg.IntOpt('transport_key_cache_ttl',
+               default=300,
+               help=u._('Number of seconds the current transport key of a '
+                        'secret store plugin is cached for before it is '
+                        'checked again with the plugin, in the background. '
+                        'Set to 0 to check with the plugin on every '
+                        'request.')
+               )
 ]
 CONF.register_group(store_opt_group)
 CONF.register_opts(store_opts, group=store_opt_group)
-config.parse_args(CONF)
 
 config.set_module_config("secretstore", CONF)
 
@@ -334,7 +342,7 @@ class SecretDTO(object):
     # TODO(john-wood-w) Remove 'content_type' once secret normalization work is
     #  completed.
     def __init__(self, type, secret, key_spec, content_type,
-                 transport_key=None):
+                 transport_key=None, secret_bytes=None):
         """Creates a new SecretDTO.
 
         The secret is stored in the secret parameter. In the future this
@@ -348,12 +356,14 @@ class SecretDTO(object):
         :param transport_key: presence of this parameter indicates that the
                secret has been encrypted using a transport key.  The transport
                key is a base64 encoded x509 transport certificate.
+        :param secret_bytes: secret, already decoded from base64, if known
         """
         self.type = type or SecretType.OPAQUE
         self.secret = secret
         self.key_spec = key_spec
         self.content_type = content_type
         self.transport_key = transport_key
+        self.secret_bytes = secret_bytes
 
 
 class AsymmetricKeyMetadataDTO(object):
@@ -584,8 +594,9 @@ class SecretStorePluginManager(named.NamedExtensionManager):
                     return plugin
 
         else:
+            key_cache = transport_keys.get_transport_key_cache()
             for plugin in active_plugins:
-                if (plugin.get_transport_key() is not None and
+                if (key_cache.supports_transport_keys(plugin) and
                         plugin.store_secret_supports(key_spec)):
                     return plugin
 
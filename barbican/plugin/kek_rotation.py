@@ -0,0 +1,317 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Online rotation of the key encryption keys (KEKs) of a project.
+
+Rotating the KEK of a project deactivates its KEK datum, so that secrets are
+encrypted under a new KEK from then on. The secrets encrypted under previous
+KEKs remain readable while the project is in use, as each encrypted datum
+references the KEK it is encrypted under. They are then decrypted and
+encrypted again under the new KEK through the crypto plugin, in throttled
+batches each committed on its own, so that re-encryption can be interrupted
+and resumed. Previous KEKs are soft deleted once no secret is encrypted
+under them anymore.
+"""
+from __future__ import print_function
+
+import base64
+import collections
+import time
+
+from oslo_log import log
+
+from barbican.common import config
+from barbican.common import exception
+from barbican import i18n as u
+from barbican.model import repositories as repo
+from barbican.plugin.crypto import base
+from barbican.plugin.crypto import manager
+from barbican.plugin import store_crypto
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+
+class ReencryptionProgress(collections.namedtuple(
+        'ReencryptionProgress', ['reencrypted', 'remaining', 'elapsed'])):
+    """Progress of the re-encryption of a project's secrets."""
+
+    @property
+    def rate(self):
+        """Number of secrets re-encrypted per second."""
+        if not self.elapsed:
+            return 0.0
+        return self.reencrypted / float(self.elapsed)
+
+
+def get_plugin_names(project_model):
+    """Returns the names of the crypto plugins a project has KEKs with."""
+    kek_repo = repo.get_kek_datum_repository()
+    return sorted(set(kek_datum.plugin_name for kek_datum in
+                      kek_repo.get_project_entities(project_model.id)))
+
+
+def rotate_kek(project_model, plugin_name):
+    """Replaces the active KEK of a project's crypto plugin.
+
+    :param project_model: The project whose KEK to rotate.
+    :param plugin_name: Full name of the crypto plugin of the KEK.
+    :returns: The new, active KEKDatum.
+    """
+    plugin_inst = manager.get_manager().get_plugin_retrieve(plugin_name)
+    repo.get_kek_datum_repository().deactivate_kek_data(project_model.id,
+                                                        plugin_name)
+    kek_datum_model, _ = store_crypto._find_or_create_kek_objects(
+        plugin_inst, project_model)
+    LOG.info("Rotated the KEK of project %s for plugin %s, now KEK %s",
+             project_model.external_id, plugin_name, kek_datum_model.id)
+    return kek_datum_model
+
+
+class KEKReencryptor(object):
+    """Re-encrypts the secrets of a project under its active KEK.
+
+    Secrets are processed batch_size at a time, each batch being decrypted
+    and encrypted with a single call per KEK to the crypto plugin and then
+    committed. No more than max_rate secrets are re-encrypted per second.
+    """
+
+    def __init__(self, project_model, plugin_name, batch_size=100,
+                 max_rate=None, progress_callback=None):
+        self.project_model = project_model
+        self.plugin_name = plugin_name
+        self.batch_size = batch_size
+        self.max_rate = max_rate
+        self.progress_callback = progress_callback
+        self.datum_repo = repo.get_encrypted_datum_repository()
+        self.kek_repo = repo.get_kek_datum_repository()
+
+    def run(self):
+        """Re-encrypts the secrets still under a previous KEK.
+
+        :returns: ReencryptionProgress once done.
+        """
+        plugin_inst = manager.get_manager().get_plugin_retrieve(
+            self.plugin_name)
+        kek_datum_model, kek_meta_dto = (
+            store_crypto._find_or_create_kek_objects(plugin_inst,
+                                                     self.project_model))
+        repo.commit()
+
+        started_at = time.time()
+        reencrypted = 0
+        progress = self._get_progress(reencrypted, started_at)
+        while True:
+            datum_models = self.datum_repo.get_by_inactive_kek(
+                self.project_model.id, self.plugin_name, self.batch_size)
+            if not datum_models:
+                break
+
+            self._reencrypt(plugin_inst, datum_models, kek_datum_model,
+                            kek_meta_dto)
+            repo.commit()
+
+            reencrypted += len(datum_models)
+            progress = self._get_progress(reencrypted, started_at)
+            if self.progress_callback:
+                self.progress_callback(progress)
+            self._throttle(reencrypted, started_at)
+
+        self._delete_drained_keks()
+        repo.commit()
+        return progress
+
+    def _reencrypt(self, plugin_inst, datum_models, kek_datum_model,
+                   kek_meta_dto):
+        external_project_id = self.project_model.external_id
+        batches = collections.OrderedDict()
+        for datum_model in datum_models:
+            batches.setdefault(datum_model.kek_id, []).append(datum_model)
+
+        for batch in batches.values():
+            old_kek_meta_dto = base.KEKMetaDTO(batch[0].kek_meta_project)
+            decrypt_dtos = [
+                base.DecryptDTO(base64.b64decode(datum_model.cypher_text))
+                for datum_model in batch]
+            secrets = store_crypto._call_crypto_plugin(
+                plugin_inst, plugin_inst.decrypt_batch, decrypt_dtos,
+                old_kek_meta_dto,
+                [datum_model.kek_meta_extended for datum_model in batch],
+                external_project_id)
+
+            response_dtos = store_crypto._call_crypto_plugin(
+                plugin_inst, plugin_inst.encrypt_batch,
+                [base.EncryptDTO(secret) for secret in secrets],
+                kek_meta_dto, external_project_id)
+
+            for datum_model, response_dto in zip(batch, response_dtos):
+                datum_model.cypher_text = base64.b64encode(
+                    response_dto.cypher_text)
+                datum_model.kek_meta_extended = response_dto.kek_meta_extended
+                datum_model.kek_id = kek_datum_model.id
+                datum_model.kek_meta_project = kek_datum_model
+                self.datum_repo.save(datum_model)
+
+    def _get_progress(self, reencrypted, started_at):
+        counts = self.datum_repo.count_by_kek(self.project_model.id,
+                                              self.plugin_name)
+        active_ids = set(
+            kek_datum.id
+            for kek_datum in self.kek_repo.get_project_entities(
+                self.project_model.id)
+            if kek_datum.active)
+        remaining = sum(count for kek_id, count in counts.items()
+                        if kek_id not in active_ids)
+        return ReencryptionProgress(reencrypted, remaining,
+                                    time.time() - started_at)
+
+    def _throttle(self, reencrypted, started_at):
+        if not self.max_rate:
+            return
+        delay = reencrypted / float(self.max_rate) - (time.time() -
+                                                      started_at)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _delete_drained_keks(self):
+        counts = self.datum_repo.count_by_kek(self.project_model.id,
+                                              self.plugin_name)
+        for kek_datum in self.kek_repo.get_project_entities(
+                self.project_model.id):
+            if (kek_datum.plugin_name == self.plugin_name and
+                    not kek_datum.active and not counts.get(kek_datum.id)):
+                LOG.info("Deleting KEK %s of project %s, no longer in use",
+                         kek_datum.id, self.project_model.external_id)
+                kek_datum.delete()
+
+
+def _get_project(external_project_id):
+    project_model = repo.get_project_repository().find_by_external_project_id(
+        external_project_id, suppress_exception=True)
+    if project_model is None:
+        raise exception.NotFound(
+            u._("No project found with keystone-ID {id}").format(
+                id=external_project_id))
+    return project_model
+
+
+def _print_progress(progress):
+    print("Re-encrypted {0} secrets, {1} remaining, in {2:.1f}s "
+          "({3:.1f} secrets/s)".format(progress.reencrypted,
+                                       progress.remaining, progress.elapsed,
+                                       progress.rate))
+
+
+def _run_command(sql_url, func, *args):
+    try:
+        if sql_url:
+            CONF.set_override('sql_connection', sql_url)
+        repo.setup_database_engine_and_factory()
+        func(*args)
+        repo.commit()
+    except Exception:
+        LOG.exception('Failed to rotate project KEKs.')
+        repo.rollback()
+        raise
+    finally:
+        repo.clear()
+        if sql_url:
+            CONF.clear_override('sql_connection')
+
+
+def rotate_command(sql_url, external_project_id, plugin_name=None,
+                   reencrypt=True, batch_size=100, max_rate=None):
+    """Command to rotate the KEKs of a project.
+
+    :param sql_url: sql connection string to connect to a database
+    :param external_project_id: Keystone id of the project
+    :param plugin_name: Crypto plugin to rotate the KEK of, else all the
+                        crypto plugins the project has KEKs with
+    :param reencrypt: If True, re-encrypt the secrets of the project under
+                      the new KEKs right away
+    :param batch_size: Number of secrets re-encrypted per transaction
+    :param max_rate: Maximum number of secrets re-encrypted per second
+    """
+    def rotate():
+        project_model = _get_project(external_project_id)
+        plugin_names = ([plugin_name] if plugin_name else
+                        get_plugin_names(project_model))
+        for name in plugin_names:
+            kek_datum_model = rotate_kek(project_model, name)
+            repo.commit()
+            print("Rotated KEK of plugin {0}, now KEK {1}".format(
+                name, kek_datum_model.id))
+            if reencrypt:
+                _reencrypt(project_model, name, batch_size, max_rate)
+
+    _run_command(sql_url, rotate)
+
+
+def reencrypt_command(sql_url, external_project_id, plugin_name=None,
+                      batch_size=100, max_rate=None):
+    """Command to re-encrypt the secrets of a project under its active KEKs.
+
+    Resumes the re-encryption of a previous rotation.
+
+    :param sql_url: sql connection string to connect to a database
+    :param external_project_id: Keystone id of the project
+    :param plugin_name: Crypto plugin to re-encrypt the secrets of, else all
+                        the crypto plugins the project has KEKs with
+    :param batch_size: Number of secrets re-encrypted per transaction
+    :param max_rate: Maximum number of secrets re-encrypted per second
+    """
+    def reencrypt():
+        project_model = _get_project(external_project_id)
+        plugin_names = ([plugin_name] if plugin_name else
+                        get_plugin_names(project_model))
+        for name in plugin_names:
+            _reencrypt(project_model, name, batch_size, max_rate)
+
+    _run_command(sql_url, reencrypt)
+
+
+def _reencrypt(project_model, plugin_name, batch_size, max_rate):
+    print("Re-encrypting secrets of plugin {0}".format(plugin_name))
+    progress = KEKReencryptor(
+        project_model, plugin_name, batch_size=batch_size,
+        max_rate=max_rate, progress_callback=_print_progress).run()
+    _print_progress(progress)
+
+
+def status_command(sql_url, external_project_id):
+    """Command to show the KEKs of a project and the secrets under each.
+
+    :param sql_url: sql connection string to connect to a database
+    :param external_project_id: Keystone id of the project
+    """
+    def status():
+        project_model = _get_project(external_project_id)
+        counts = repo.get_encrypted_datum_repository().count_by_kek(
+            project_model.id)
+        kek_data = sorted(
+            repo.get_kek_datum_repository().get_project_entities(
+                project_model.id),
+            key=lambda kek_datum: kek_datum.created_at)
+        remaining = 0
+        for kek_datum in kek_data:
+            count = counts.get(kek_datum.id, 0)
+            if not kek_datum.active:
+                remaining += count
+            print("{0} {1} {2} created {3}: {4} secrets".format(
+                kek_datum.id, kek_datum.plugin_name,
+                'active' if kek_datum.active else 'inactive',
+                kek_datum.created_at, count))
+        print("{0} secrets left to re-encrypt".format(remaining))
+
+    _run_command(sql_url, status)
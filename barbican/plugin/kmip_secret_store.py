@@ -41,7 +41,7 @@ from barbican.plugin.util import translations
 
 LOG = log.getLogger(__name__)
 
-CONF = config.new_config()
+CONF = config.CONF
 
 kmip_opt_group = cfg.OptGroup(name='kmip_plugin', title='KMIP Plugin')
 kmip_opts = [
@@ -84,7 +84,6 @@ kmip_opts = [
 ]
 CONF.register_group(kmip_opt_group)
 CONF.register_opts(kmip_opts, group=kmip_opt_group)
-config.parse_args(CONF)
 
 
 def list_opts():
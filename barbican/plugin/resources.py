@@ -17,7 +17,10 @@ from barbican.model import models
 from barbican.model import repositories as repos
 from barbican.plugin.interface import secret_store
 from barbican.plugin import store_crypto
+from barbican.plugin.util import circuit_breaker
+from barbican.plugin.util import payload_cache
 from barbican.plugin.util import translations as tr
+from barbican.plugin.util import transport_keys
 
 
 def _get_transport_key_model(key_spec, transport_key_needed, project_id):
@@ -29,18 +32,9 @@ def _get_transport_key_model(key_spec, transport_key_needed, project_id):
         store_plugin = plugin_manager.get_plugin_store(
             key_spec=key_spec, transport_key_needed=True,
             project_id=project_id)
-        plugin_name = utils.generate_fullname_for(store_plugin)
-
-        key_repo = repos.get_transport_key_repository()
-        key_model = key_repo.get_latest_transport_key(plugin_name)
-
-        if not key_model or not store_plugin.is_transport_key_current(
-                key_model.transport_key):
-            # transport key does not exist or is not current.
-            # need to get a new transport key
-            transport_key = store_plugin.get_transport_key()
-            new_key_model = models.TransportKey(plugin_name, transport_key)
-            key_model = key_repo.create_from(new_key_model)
+
+        key_cache = transport_keys.get_transport_key_cache()
+        key_model = key_cache.get(store_plugin)
     return key_model
 
 
@@ -67,8 +61,12 @@ def _get_plugin_name_and_transport_key(transport_key_id):
 def store_secret(unencrypted_raw, content_type_raw, content_encoding,
                  secret_model, project_model,
                  transport_key_needed=False,
-                 transport_key_id=None):
-    """Store a provided secret into secure backend."""
+                 transport_key_id=None, unencrypted_bytes=None):
+    """Store a provided secret into secure backend.
+
+    unencrypted_bytes may provide the bytes of a base64 encoded
+    unencrypted_raw, when already decoded, to spare decoding it again.
+    """
     if _secret_already_has_stored_data(secret_model):
         raise ValueError('Secret already has encrypted data stored for it.')
 
@@ -93,6 +91,9 @@ def store_secret(unencrypted_raw, content_type_raw, content_encoding,
     unencrypted, content_type = tr.normalize_before_encryption(
         unencrypted_raw, content_type_raw, content_encoding,
         secret_model.secret_type, enforce_text_only=True)
+    if unencrypted is not unencrypted_raw:
+        # The payload was encoded rather than passed through as is.
+        unencrypted_bytes = None
 
     plugin_manager = secret_store.get_manager()
     store_plugin = plugin_manager.get_plugin_store(key_spec=key_spec,
@@ -103,48 +104,69 @@ def store_secret(unencrypted_raw, content_type_raw, content_encoding,
                                         secret=unencrypted,
                                         key_spec=key_spec,
                                         content_type=content_type,
-                                        transport_key=transport_key)
+                                        transport_key=transport_key,
+                                        secret_bytes=unencrypted_bytes)
 
-    secret_metadata = _store_secret_using_plugin(store_plugin, secret_dto,
-                                                 secret_model, project_model)
-    _save_secret_in_repo(secret_model, project_model)
-    _save_secret_metadata_in_repo(secret_model, secret_metadata, store_plugin,
-                                  content_type)
+    # Flush the secret, its encrypted datum and metadata in one go.
+    with repos.unit_of_work():
+        secret_metadata = _store_secret_using_plugin(
+            store_plugin, secret_dto, secret_model, project_model)
+        _save_secret_in_repo(secret_model, project_model)
+        _save_secret_metadata_in_repo(secret_model, secret_metadata,
+                                      store_plugin, content_type)
 
     return secret_model, None
 
 
 def get_secret(requesting_content_type, secret_model, project_model,
                twsk=None, transport_key=None):
-    secret_metadata = _get_secret_meta(secret_model)
+    # Payloads wrapped with a transport key differ between requests.
+    use_cache = (twsk is None and
+                 payload_cache.is_enabled_for(secret_model, project_model))
+    cached = None
+    if use_cache:
+        cached = payload_cache.get_payload_cache().get(
+            secret_model.id, secret_model.updated_at)
+
+    if cached is not None:
+        stored_content_type, secret = cached
+    else:
+        secret_metadata = _get_secret_meta(secret_model)
+        stored_content_type = secret_metadata['content_type']
 
     # NOTE: */* is the pecan default meaning no content type sent in.  In this
     # case we should use the mime type stored in the metadata.
     if requesting_content_type == '*/*':
-        requesting_content_type = secret_metadata['content_type']
+        requesting_content_type = stored_content_type
 
     tr.analyze_before_decryption(requesting_content_type)
 
-    if twsk is not None:
-        secret_metadata['trans_wrapped_session_key'] = twsk
-        secret_metadata['transport_key'] = transport_key
+    if cached is None:
+        if twsk is not None:
+            secret_metadata['trans_wrapped_session_key'] = twsk
+            secret_metadata['transport_key'] = transport_key
 
-    # Locate a suitable plugin to store the secret.
-    plugin_manager = secret_store.get_manager()
-    retrieve_plugin = plugin_manager.get_plugin_retrieve_delete(
-        secret_metadata.get('plugin_name'))
+        # Locate a suitable plugin to store the secret.
+        plugin_manager = secret_store.get_manager()
+        retrieve_plugin = plugin_manager.get_plugin_retrieve_delete(
+            secret_metadata.get('plugin_name'))
 
-    # Retrieve the secret.
-    secret_dto = _get_secret(
-        retrieve_plugin, secret_metadata, secret_model, project_model)
+        # Retrieve the secret.
+        secret_dto = _get_secret(
+            retrieve_plugin, secret_metadata, secret_model, project_model)
+        secret = secret_dto.secret
+
+        if twsk is not None:
+            del secret_metadata['transport_key']
+            del secret_metadata['trans_wrapped_session_key']
 
-    if twsk is not None:
-        del secret_metadata['transport_key']
-        del secret_metadata['trans_wrapped_session_key']
+        if use_cache:
+            payload_cache.get_payload_cache().put(
+                secret_model.id, secret_model.updated_at,
+                stored_content_type, secret)
 
     # Denormalize the secret.
-    return tr.denormalize_after_decryption(secret_dto.secret,
-                                           requesting_content_type)
+    return tr.denormalize_after_decryption(secret, requesting_content_type)
 
 
 def get_transport_key_id_for_retrieval(secret_model):
@@ -156,8 +178,9 @@ def get_transport_key_id_for_retrieval(secret_model):
     retrieve_plugin = plugin_manager.get_plugin_retrieve_delete(
         secret_metadata.get('plugin_name'))
 
-    transport_key_id = retrieve_plugin.get_transport_key()
-    return transport_key_id
+    key_cache = transport_keys.get_transport_key_cache()
+    key_model = key_cache.get(retrieve_plugin)
+    return key_model.id if key_model else None
 
 
 def generate_secret(spec, content_type, project_model):
@@ -176,14 +199,16 @@ def generate_secret(spec, content_type, project_model):
     secret_model = models.Secret(spec)
     secret_model['secret_type'] = secret_store.SecretType.SYMMETRIC
 
-    # Generate the secret.
-    secret_metadata = _generate_symmetric_key(
-        generate_plugin, key_spec, secret_model, project_model, content_type)
+    with repos.unit_of_work():
+        # Generate the secret.
+        secret_metadata = _generate_symmetric_key(
+            generate_plugin, key_spec, secret_model, project_model,
+            content_type)
 
-    # Save secret and metadata.
-    _save_secret_in_repo(secret_model, project_model)
-    _save_secret_metadata_in_repo(secret_model, secret_metadata,
-                                  generate_plugin, content_type)
+        # Save secret and metadata.
+        _save_secret_in_repo(secret_model, project_model)
+        _save_secret_metadata_in_repo(secret_model, secret_metadata,
+                                      generate_plugin, content_type)
 
     return secret_model
 
@@ -210,40 +235,41 @@ def generate_asymmetric_secret(spec, content_type, project_model):
         passphrase_type = secret_store.SecretType.PASSPHRASE
         passphrase_secret_model['secret_type'] = passphrase_type
 
-    asymmetric_meta_dto = _generate_asymmetric_key(
-        generate_plugin,
-        key_spec,
-        private_secret_model,
-        public_secret_model,
-        passphrase_secret_model,
-        project_model,
-        content_type
-    )
-
-    _save_secret_in_repo(private_secret_model, project_model)
-    _save_secret_metadata_in_repo(private_secret_model,
-                                  asymmetric_meta_dto.private_key_meta,
-                                  generate_plugin,
-                                  content_type)
+    with repos.unit_of_work():
+        asymmetric_meta_dto = _generate_asymmetric_key(
+            generate_plugin,
+            key_spec,
+            private_secret_model,
+            public_secret_model,
+            passphrase_secret_model,
+            project_model,
+            content_type
+        )
 
-    _save_secret_in_repo(public_secret_model, project_model)
-    _save_secret_metadata_in_repo(public_secret_model,
-                                  asymmetric_meta_dto.public_key_meta,
-                                  generate_plugin,
-                                  content_type)
+        _save_secret_in_repo(private_secret_model, project_model)
+        _save_secret_metadata_in_repo(private_secret_model,
+                                      asymmetric_meta_dto.private_key_meta,
+                                      generate_plugin,
+                                      content_type)
 
-    if passphrase_secret_model:
-        _save_secret_in_repo(passphrase_secret_model, project_model)
-        _save_secret_metadata_in_repo(passphrase_secret_model,
-                                      asymmetric_meta_dto.passphrase_meta,
+        _save_secret_in_repo(public_secret_model, project_model)
+        _save_secret_metadata_in_repo(public_secret_model,
+                                      asymmetric_meta_dto.public_key_meta,
                                       generate_plugin,
                                       content_type)
 
-    container_model = _create_container_for_asymmetric_secret(spec,
-                                                              project_model)
-    _save_asymmetric_secret_in_repo(
-        container_model, private_secret_model, public_secret_model,
-        passphrase_secret_model)
+        if passphrase_secret_model:
+            _save_secret_in_repo(passphrase_secret_model, project_model)
+            _save_secret_metadata_in_repo(passphrase_secret_model,
+                                          asymmetric_meta_dto.passphrase_meta,
+                                          generate_plugin,
+                                          content_type)
+
+        container_model = _create_container_for_asymmetric_secret(
+            spec, project_model)
+        _save_asymmetric_secret_in_repo(
+            container_model, private_secret_model, public_secret_model,
+            passphrase_secret_model)
 
     return container_model
 
@@ -261,8 +287,9 @@ def delete_secret(secret_model, project_id):
         delete_plugin = plugin_manager.get_plugin_retrieve_delete(
             secret_metadata.get('plugin_name'))
 
-        # Delete the secret from plugin storage.
-        delete_plugin.delete_secret(secret_metadata)
+        delete_stored_secret(delete_plugin, secret_metadata)
+
+    payload_cache.invalidate(secret_model.id)
 
     # Delete the secret from data model.
     secret_repo = repos.get_secret_repository()
@@ -270,6 +297,63 @@ def delete_secret(secret_model, project_id):
                                     external_project_id=project_id)
 
 
+def delete_stored_secret(delete_plugin, secret_metadata):
+    """Remove a secret from the plugin storage it was stored with."""
+    # Crypto plugin calls made through the adapter are guarded by
+    # store_crypto instead.
+    if isinstance(delete_plugin, store_crypto.StoreCryptoAdapterPlugin):
+        delete_plugin.delete_secret(secret_metadata)
+    else:
+        circuit_breaker.call(delete_plugin, delete_plugin.delete_secret,
+                             secret_metadata)
+
+
+def migrate_secret(secret_model, project_model, store_plugin,
+                   crypto_plugin_name=None):
+    """Move a stored secret to another secret store.
+
+    The secret is retrieved through the plugin it is stored with, then
+    stored through store_plugin, by way of the crypto plugin named
+    crypto_plugin_name if store_plugin is the crypto adapter. Its previous
+    encrypted data and secret store metadata are replaced with the new
+    ones, for the caller to commit at once.
+
+    :returns: The plugin the secret was stored with and its previous secret
+              store metadata, to delete it from that plugin once committed,
+              with delete_stored_secret().
+    """
+    secret_metadata = _get_secret_meta(secret_model)
+    plugin_manager = secret_store.get_manager()
+    retrieve_plugin = plugin_manager.get_plugin_retrieve_delete(
+        secret_metadata.get('plugin_name'))
+    secret_dto = _get_secret(
+        retrieve_plugin, secret_metadata, secret_model, project_model)
+    content_type = secret_metadata.get('content_type')
+
+    # Encrypted data are removed for good, as the crypto adapter retrieves
+    # the first datum of a secret, whether soft deleted or not.
+    session = repos.get_session()
+    for datum_model in secret_model.encrypted_data:
+        session.delete(datum_model)
+    secret_model.secret_store_metadata.clear()
+
+    if isinstance(store_plugin, store_crypto.StoreCryptoAdapterPlugin):
+        context = store_crypto.StoreCryptoContext(
+            project_model,
+            secret_model=secret_model,
+            content_type=content_type,
+            crypto_plugin_name=crypto_plugin_name)
+        new_metadata = store_plugin.store_secret(secret_dto, context)
+    else:
+        new_metadata = circuit_breaker.call(
+            store_plugin, store_plugin.store_secret, secret_dto)
+    _save_secret_metadata_in_repo(secret_model, new_metadata, store_plugin,
+                                  content_type)
+
+    payload_cache.invalidate(secret_model.id)
+    return retrieve_plugin, secret_metadata
+
+
 def _store_secret_using_plugin(store_plugin, secret_dto, secret_model,
                                project_model):
     if isinstance(store_plugin, store_crypto.StoreCryptoAdapterPlugin):
@@ -278,7 +362,8 @@ def _store_secret_using_plugin(store_plugin, secret_dto, secret_model,
             secret_model=secret_model)
         secret_metadata = store_plugin.store_secret(secret_dto, context)
     else:
-        secret_metadata = store_plugin.store_secret(secret_dto)
+        secret_metadata = circuit_breaker.call(
+            store_plugin, store_plugin.store_secret, secret_dto)
     return secret_metadata
 
 
@@ -292,7 +377,8 @@ def _generate_symmetric_key(
         secret_metadata = generate_plugin.generate_symmetric_key(
             key_spec, context)
     else:
-        secret_metadata = generate_plugin.generate_symmetric_key(key_spec)
+        secret_metadata = circuit_breaker.call(
+            generate_plugin, generate_plugin.generate_symmetric_key, key_spec)
     return secret_metadata
 
 
@@ -309,7 +395,9 @@ def _generate_asymmetric_key(generate_plugin, key_spec, private_secret_model,
         asymmetric_meta_dto = generate_plugin.generate_asymmetric_key(
             key_spec, context)
     else:
-        asymmetric_meta_dto = generate_plugin.generate_asymmetric_key(key_spec)
+        asymmetric_meta_dto = circuit_breaker.call(
+            generate_plugin, generate_plugin.generate_asymmetric_key,
+            key_spec)
     return asymmetric_meta_dto
 
 
@@ -322,8 +410,9 @@ def _get_secret(retrieve_plugin, secret_metadata, secret_model, project_model):
                                                 secret_metadata,
                                                 context)
     else:
-        secret_dto = retrieve_plugin.get_secret(secret_model.secret_type,
-                                                secret_metadata)
+        secret_dto = circuit_breaker.call(
+            retrieve_plugin, retrieve_plugin.get_secret,
+            secret_model.secret_type, secret_metadata)
     return secret_dto
 
 
@@ -0,0 +1,336 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migration of secrets between the secret stores of multiple backends.
+
+Changing the preferred secret store of a project only affects the secrets
+created afterwards. Migrating moves the existing secrets of a project, or
+of a secret store, to a target secret store. Each secret is retrieved
+through the plugin it is stored with and stored through the plugin of the
+target store, its stored data and secret store metadata being replaced in
+a single transaction. It is then deleted from its previous plugin.
+
+Secrets are migrated by a pool of threads, with at most a given number of
+secrets being migrated from or to each secret store at a time. Secrets
+already in the target store are skipped, so an interrupted migration is
+resumed by running it again.
+"""
+from __future__ import print_function
+
+import collections
+import threading
+import time
+
+from oslo_log import log
+from six.moves import queue
+
+from barbican.common import config
+from barbican.common import exception
+from barbican.common import utils
+from barbican import i18n as u
+from barbican.model import repositories as repo
+from barbican.plugin.crypto import manager as crypto_manager
+from barbican.plugin.interface import secret_store
+from barbican.plugin import resources
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+MIGRATED = 'migrated'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+class MigrationProgress(collections.namedtuple(
+        'MigrationProgress', ['migrated', 'skipped', 'failed', 'elapsed'])):
+    """Progress of the migration of secrets to a secret store."""
+
+    @property
+    def rate(self):
+        """Number of secrets migrated per second."""
+        if not self.elapsed:
+            return 0.0
+        return self.migrated / float(self.elapsed)
+
+
+def get_secret_store(name_or_id):
+    """Returns the SecretStores entity with the given name or id."""
+    for store_model in repo.get_secret_stores_repository().get_all():
+        if name_or_id in (store_model.id, store_model.name):
+            return store_model
+    raise exception.NotFound(
+        u._("No secret store found with name or ID {0}").format(name_or_id))
+
+
+def _get_plugin(ext_manager, ext_name):
+    for ext in ext_manager.extensions:
+        if ext.name == ext_name and ext.obj:
+            return ext.obj
+    raise exception.NotFound(
+        u._("Plugin {0} is not enabled").format(ext_name))
+
+
+def _get_store_plugins(store_model):
+    """Returns the plugin and crypto plugin name of a secret store."""
+    store_plugin = _get_plugin(secret_store.get_manager(),
+                               store_model.store_plugin)
+    crypto_plugin_name = None
+    if store_model.crypto_plugin:
+        crypto_plugin_name = utils.generate_fullname_for(_get_plugin(
+            crypto_manager.get_manager(), store_model.crypto_plugin))
+    return store_plugin, crypto_plugin_name
+
+
+def _get_store_key(secret_model, secret_metadata):
+    """Identifies the store of a secret by its plugin and crypto plugin."""
+    crypto_plugin_name = None
+    if secret_model.encrypted_data:
+        crypto_plugin_name = (
+            secret_model.encrypted_data[0].kek_meta_project.plugin_name)
+    return secret_metadata.get('plugin_name'), crypto_plugin_name
+
+
+class SecretMigrator(object):
+    """Migrates secrets to a secret store.
+
+    The secrets of the given project, or else of all projects, are listed
+    page_size at a time. With a source store, only the secrets stored in it
+    are migrated. Secrets are migrated by the given number of worker
+    threads, or else one at a time by the calling thread, and each secret
+    store takes part in no more than per_store_concurrency migrations at a
+    time.
+    """
+
+    def __init__(self, target_store, project_model=None, source_store=None,
+                 workers=4, per_store_concurrency=2, page_size=100,
+                 progress_callback=None):
+        self.project_model = project_model
+        self.workers = workers
+        self.per_store_concurrency = per_store_concurrency
+        self.page_size = page_size
+        self.progress_callback = progress_callback
+
+        self.store_plugin, crypto_plugin_name = _get_store_plugins(
+            target_store)
+        self.crypto_plugin_name = crypto_plugin_name
+        self.target_key = (utils.generate_fullname_for(self.store_plugin),
+                           crypto_plugin_name)
+        self.source_key = None
+        if source_store is not None:
+            source_plugin, source_crypto_plugin_name = _get_store_plugins(
+                source_store)
+            self.source_key = (utils.generate_fullname_for(source_plugin),
+                               source_crypto_plugin_name)
+
+        self.secret_repo = repo.get_secret_repository()
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._counts = collections.Counter()
+        self._started_at = None
+
+    def run(self):
+        """Migrates the secrets.
+
+        :returns: MigrationProgress once done.
+        """
+        self._started_at = time.time()
+        if self.workers > 0:
+            pending = queue.Queue(maxsize=self.workers * 2)
+            threads = [threading.Thread(target=self._work, args=(pending,))
+                       for _ in range(self.workers)]
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+            try:
+                for page in self._get_pages():
+                    for secret_id in page:
+                        pending.put(secret_id)
+                    self._report_progress()
+            finally:
+                for _ in threads:
+                    pending.put(None)
+                for thread in threads:
+                    thread.join()
+        else:
+            for page in self._get_pages():
+                for secret_id in page:
+                    self._migrate(secret_id)
+                self._report_progress()
+        return self.get_progress()
+
+    def get_progress(self):
+        with self._lock:
+            return MigrationProgress(
+                self._counts[MIGRATED], self._counts[SKIPPED],
+                self._counts[FAILED], time.time() - self._started_at)
+
+    def _get_pages(self):
+        project_id = self.project_model.id if self.project_model else None
+        source_plugin_name = self.source_key[0] if self.source_key else None
+        after_id = None
+        while True:
+            secret_ids = self.secret_repo.get_secret_ids(
+                project_id=project_id, store_plugin_name=source_plugin_name,
+                after_id=after_id, limit=self.page_size)
+            repo.rollback()
+            if not secret_ids:
+                return
+            yield secret_ids
+            after_id = secret_ids[-1]
+
+    def _work(self, pending):
+        try:
+            while True:
+                secret_id = pending.get()
+                if secret_id is None:
+                    return
+                self._migrate(secret_id)
+        finally:
+            repo.clear()
+
+    def _migrate(self, secret_id):
+        try:
+            result = self._migrate_secret(secret_id)
+            repo.commit()
+        except Exception:
+            LOG.exception("Failed to migrate secret %s", secret_id)
+            repo.rollback()
+            result = FAILED
+        with self._lock:
+            self._counts[result] += 1
+
+    def _migrate_secret(self, secret_id):
+        secret_model = self.secret_repo.get_secret_by_id(
+            secret_id, suppress_exception=True)
+        if secret_model is None:
+            return SKIPPED
+        secret_metadata = repo.get_secret_meta_repository(
+        ).get_metadata_for_secret(secret_id)
+        if not secret_metadata:
+            # The secret has no payload yet.
+            return SKIPPED
+
+        source_key = _get_store_key(secret_model, secret_metadata)
+        if source_key == self.target_key or (
+                self.source_key and source_key != self.source_key):
+            return SKIPPED
+
+        project_model = repo.get_project_repository().get(
+            secret_model.project_id)
+        with self._limit(source_key, self.target_key):
+            source_plugin, source_metadata = resources.migrate_secret(
+                secret_model, project_model, self.store_plugin,
+                crypto_plugin_name=self.crypto_plugin_name)
+            repo.commit()
+            LOG.debug("Migrated secret %s from %s to %s", secret_id,
+                      source_key, self.target_key)
+
+            try:
+                resources.delete_stored_secret(source_plugin,
+                                               source_metadata)
+            except Exception:
+                LOG.exception("Failed to delete migrated secret %s from %s",
+                              secret_id, source_key)
+        return MIGRATED
+
+    def _limit(self, *store_keys):
+        """Limits the number of migrations involving each store."""
+        semaphores = []
+        with self._lock:
+            for store_key in sorted(set(store_keys), key=str):
+                if store_key not in self._semaphores:
+                    self._semaphores[store_key] = threading.BoundedSemaphore(
+                        self.per_store_concurrency)
+                semaphores.append(self._semaphores[store_key])
+        return _Acquired(semaphores)
+
+    def _report_progress(self):
+        if self.progress_callback:
+            self.progress_callback(self.get_progress())
+
+
+class _Acquired(object):
+    """Holds semaphores, acquired in order, for the duration of a block."""
+
+    def __init__(self, semaphores):
+        self.semaphores = semaphores
+
+    def __enter__(self):
+        for semaphore in self.semaphores:
+            semaphore.acquire()
+
+    def __exit__(self, *exc_info):
+        for semaphore in reversed(self.semaphores):
+            semaphore.release()
+
+
+def _print_progress(progress):
+    print("Migrated {0} secrets, skipped {1}, failed {2}, in {3:.1f}s "
+          "({4:.1f} secrets/s)".format(progress.migrated, progress.skipped,
+                                       progress.failed, progress.elapsed,
+                                       progress.rate))
+
+
+def migrate_command(sql_url, target_store, external_project_id=None,
+                    source_store=None, workers=4, per_store_concurrency=2,
+                    page_size=100):
+    """Command to migrate secrets to another secret store.
+
+    :param sql_url: sql connection string to connect to a database
+    :param target_store: Name or id of the secret store to migrate to
+    :param external_project_id: Keystone id of the project to migrate the
+                                secrets of
+    :param source_store: Name or id of the secret store to migrate the
+                         secrets of
+    :param workers: Number of threads migrating secrets, 0 to migrate them
+                    one at a time
+    :param per_store_concurrency: Maximum number of secrets migrated from or
+                                  to each secret store at a time
+    :param page_size: Number of secrets listed at a time
+    """
+    if not (external_project_id or source_store):
+        raise ValueError(u._('A project or a source secret store is '
+                             'required.'))
+    if not utils.is_multiple_backends_enabled():
+        raise ValueError(u._('Secrets can only be migrated between the '
+                             'secret stores of multiple backends.'))
+
+    try:
+        if sql_url:
+            CONF.set_override('sql_connection', sql_url)
+        repo.setup_database_engine_and_factory()
+
+        project_model = None
+        if external_project_id:
+            project_model = repo.get_project_repository(
+            ).find_by_external_project_id(external_project_id)
+        migrator = SecretMigrator(
+            get_secret_store(target_store),
+            project_model=project_model,
+            source_store=(get_secret_store(source_store)
+                          if source_store else None),
+            workers=workers,
+            per_store_concurrency=per_store_concurrency,
+            page_size=page_size,
+            progress_callback=_print_progress)
+        progress = migrator.run()
+        _print_progress(progress)
+        if progress.failed:
+            raise exception.BarbicanException(
+                u._('{0} secrets could not be migrated, run the migration '
+                    'again to retry them.').format(progress.failed))
+    finally:
+        repo.clear()
+        if sql_url:
+            CONF.clear_override('sql_connection')
@@ -14,6 +14,7 @@
 #    under the License.
 
 import base64
+import collections
 import datetime
 import os
 import re
@@ -30,7 +31,7 @@ from barbican.common import utils
 from barbican import i18n as u
 import barbican.plugin.interface.certificate_manager as cert_manager
 
-CONF = config.new_config()
+CONF = config.CONF
 LOG = utils.getLogger(__name__)
 
 
@@ -53,7 +54,6 @@ snakeoil_ca_plugin_opts = [
 
 CONF.register_group(snakeoil_ca_plugin_group)
 CONF.register_opts(snakeoil_ca_plugin_opts, group=snakeoil_ca_plugin_group)
-config.parse_args(CONF)
 
 
 def list_opts():
@@ -118,76 +118,84 @@ class SnakeoilCA(object):
         self._chain_val = None
         self._pkcs7_val = None
 
+        # Parsed CA objects, each with the signature of the file or value
+        # it was parsed from.
+        self._parsed = {}
+
+    def _load(self, name, path, value, parse):
+        """Returns the parsed cert, key, chain or pkcs7 of the CA.
+
+        The parsed object is cached, until the file it was read from is
+        modified or the setter is called.
+        """
+        if path:
+            stat = os.stat(path)
+            signature = (stat.st_ino, stat.st_mtime, stat.st_size)
+        else:
+            signature = value
+
+        cached = self._parsed.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        if path:
+            with open(path, 'rb') as fh:
+                value = fh.read()
+        parsed = parse(value)
+        self._parsed[name] = (signature, parsed)
+        return parsed
+
+    def _store(self, name, path, value):
+        self._parsed.pop(name, None)
+        if path:
+            with open(path, 'wb') as fh:
+                fh.write(value)
+        else:
+            setattr(self, '_%s_val' % name, value)
+
     @property
     def cert(self):
         self.ensure_exists()
-        if self.cert_path:
-            with open(self.cert_path, 'rb') as cert_fh:
-                return crypto.load_certificate(crypto.FILETYPE_PEM,
-                                               cert_fh.read())
-        else:
-            return crypto.load_certificate(crypto.FILETYPE_PEM, self._cert_val)
+        return self._load(
+            'cert', self.cert_path, self._cert_val,
+            lambda pem: crypto.load_certificate(crypto.FILETYPE_PEM, pem))
 
     @cert.setter
     def cert(self, val):
-        if self.cert_path:
-            with open(self.cert_path, 'wb') as cert_fh:
-                cert_fh.write(crypto.dump_certificate(crypto.FILETYPE_PEM,
-                                                      val))
-        else:
-            self._cert_val = crypto.dump_certificate(crypto.FILETYPE_PEM, val)
+        self._store('cert', self.cert_path,
+                    crypto.dump_certificate(crypto.FILETYPE_PEM, val))
 
     @property
     def key(self):
         self.ensure_exists()
-        if self.key_path:
-            with open(self.key_path, 'rb') as key_fh:
-                return crypto.load_privatekey(crypto.FILETYPE_PEM,
-                                              key_fh.read())
-        else:
-            return crypto.load_privatekey(crypto.FILETYPE_PEM, self._key_val)
+        return self._load(
+            'key', self.key_path, self._key_val,
+            lambda pem: crypto.load_privatekey(crypto.FILETYPE_PEM, pem))
 
     @key.setter
     def key(self, val):
-        if self.key_path:
-            with open(self.key_path, 'wb') as key_fh:
-                key_fh.write(crypto.dump_privatekey(crypto.FILETYPE_PEM, val))
-        else:
-            self._key_val = crypto.dump_privatekey(crypto.FILETYPE_PEM, val)
+        self._store('key', self.key_path,
+                    crypto.dump_privatekey(crypto.FILETYPE_PEM, val))
 
     @property
     def chain(self):
         self.ensure_exists()
-        if self.chain_path:
-            with open(self.chain_path, 'rb') as chain_fh:
-                return chain_fh.read()
-        else:
-            return self._chain_val
+        return self._load('chain', self.chain_path, self._chain_val,
+                          lambda val: val)
 
     @chain.setter
     def chain(self, val):
-        if self.chain_path:
-            with open(self.chain_path, 'wb') as chain_fh:
-                chain_fh.write(val)
-        else:
-            self._chain_val = val
+        self._store('chain', self.chain_path, val)
 
     @property
     def pkcs7(self):
         self.ensure_exists()
-        if self.pkcs7_path:
-            with open(self.pkcs7_path, 'rb') as pkcs7_fh:
-                return pkcs7_fh.read()
-        else:
-            return self._pkcs7_val
+        return self._load('pkcs7', self.pkcs7_path, self._pkcs7_val,
+                          lambda val: val)
 
     @pkcs7.setter
     def pkcs7(self, val):
-        if self.pkcs7_path:
-            with open(self.pkcs7_path, 'wb') as pkcs7_fh:
-                pkcs7_fh.write(val)
-        else:
-            self._pkcs7_val = val
+        self._store('pkcs7', self.pkcs7_path, val)
 
     @property
     def exists(self):
@@ -283,15 +291,24 @@ class CertManager(object):
         return uuid.uuid4().int
 
     def make_certificate(self, csr, expires=2 * 365):
-        cert = crypto.X509()
-        cert.set_serial_number(self.get_new_serial())
-        cert.gmtime_adj_notBefore(0)
-        cert.gmtime_adj_notAfter(expires)
-        cert.set_issuer(self.ca.cert.get_subject())
-        cert.set_subject(csr.get_subject())
-        cert.set_pubkey(csr.get_pubkey())
-        cert.sign(self.ca.key, 'sha256')
-        return cert
+        return self.make_certificates([csr], expires=expires)[0]
+
+    def make_certificates(self, csrs, expires=2 * 365):
+        """Signs a list of CSRs, looking up the CA cert and key only once."""
+        issuer = self.ca.cert.get_subject()
+        signing_key = self.ca.key
+        certs = []
+        for csr in csrs:
+            cert = crypto.X509()
+            cert.set_serial_number(self.get_new_serial())
+            cert.gmtime_adj_notBefore(0)
+            cert.gmtime_adj_notAfter(expires)
+            cert.set_issuer(issuer)
+            cert.set_subject(csr.get_subject())
+            cert.set_pubkey(csr.get_pubkey())
+            cert.sign(signing_key, 'sha256')
+            certs.append(cert)
+        return certs
 
 
 class SnakeoilCACertificatePlugin(cert_manager.CertificatePluginBase):
@@ -352,34 +369,84 @@ class SnakeoilCACertificatePlugin(cert_manager.CertificatePluginBase):
 
     def issue_certificate_request(self, order_id, order_meta, plugin_meta,
                                   barbican_meta_dto):
+        csr = self._load_csr(order_meta, barbican_meta_dto)
+        if csr is None:
+            return self._no_request_data_result()
+        ca = self._get_ca(barbican_meta_dto.plugin_ca_id)
+
+        cert_mgr = CertManager(ca)
+        cert = cert_mgr.make_certificate(csr)
+        return self._generated_result(cert, base64.b64encode(ca.pkcs7))
+
+    def issue_certificate_requests(self, requests):
+        """Issues a batch of certificates, signing them by CA.
+
+        The certificates of all the requests for the same CA are signed
+        with one lookup of the CA cert, key and intermediates.
+        """
+        results = [None] * len(requests)
+        requests_by_ca = collections.OrderedDict()
+        for index, request in enumerate(requests):
+            order_id, order_meta, plugin_meta, barbican_meta_dto = request
+            try:
+                csr = self._load_csr(order_meta, barbican_meta_dto)
+                if csr is None:
+                    results[index] = self._no_request_data_result()
+                    continue
+                ca = self._get_ca(barbican_meta_dto.plugin_ca_id)
+            except Exception as e:
+                results[index] = e
+                continue
+            ca_requests = requests_by_ca.setdefault(id(ca), (ca, []))[1]
+            ca_requests.append((index, csr))
+
+        for ca, ca_requests in requests_by_ca.values():
+            cert_mgr = CertManager(ca)
+            try:
+                certs = cert_mgr.make_certificates(
+                    [csr for index, csr in ca_requests])
+                intermediates = base64.b64encode(ca.pkcs7)
+            except Exception as e:
+                for index, csr in ca_requests:
+                    results[index] = e
+                continue
+            for (index, csr), cert in zip(ca_requests, certs):
+                results[index] = self._generated_result(cert, intermediates)
+        return results
+
+    def _load_csr(self, order_meta, barbican_meta_dto):
         if barbican_meta_dto.generated_csr is not None:
             encoded_csr = barbican_meta_dto.generated_csr
         else:
             try:
                 encoded_csr = base64.b64decode(order_meta['request_data'])
             except KeyError:
-                return cert_manager.ResultDTO(
-                    cert_manager.CertificateStatus.CLIENT_DATA_ISSUE_SEEN,
-                    status_message=u._("No request_data specified"))
-        csr = crypto.load_certificate_request(crypto.FILETYPE_PEM, encoded_csr)
-
-        ca_id = barbican_meta_dto.plugin_ca_id
-        if ca_id:
-            ca = self.cas.get(ca_id)
-            if ca is None:
-                raise cert_manager.CertificateGeneralException(
-                    "Invalid ca_id passed into snake oil plugin:" + ca_id)
-        else:
-            ca = self.ca
+                return None
+        return crypto.load_certificate_request(crypto.FILETYPE_PEM,
+                                               encoded_csr)
+
+    def _get_ca(self, ca_id):
+        if not ca_id:
+            return self.ca
+        ca = self.cas.get(ca_id)
+        if ca is None:
+            raise cert_manager.CertificateGeneralException(
+                "Invalid ca_id passed into snake oil plugin:" + ca_id)
+        return ca
 
-        cert_mgr = CertManager(ca)
-        cert = cert_mgr.make_certificate(csr)
-        cert_enc = crypto.dump_certificate(crypto.FILETYPE_PEM, cert)
+    @staticmethod
+    def _no_request_data_result():
+        return cert_manager.ResultDTO(
+            cert_manager.CertificateStatus.CLIENT_DATA_ISSUE_SEEN,
+            status_message=u._("No request_data specified"))
 
+    @staticmethod
+    def _generated_result(cert, intermediates):
+        cert_enc = crypto.dump_certificate(crypto.FILETYPE_PEM, cert)
         return cert_manager.ResultDTO(
             cert_manager.CertificateStatus.CERTIFICATE_GENERATED,
             certificate=base64.b64encode(cert_enc),
-            intermediates=base64.b64encode(ca.pkcs7))
+            intermediates=intermediates)
 
     def modify_certificate_request(self, order_id, order_meta, plugin_meta,
                                    barbican_meta_dto):
@@ -12,17 +12,22 @@
 # limitations under the License.
 
 import base64
+import collections
 
-from barbican.common import config
 from barbican.common import utils
 from barbican.model import models
 from barbican.model import repositories
 from barbican.plugin.crypto import base
 from barbican.plugin.crypto import manager
+from barbican.plugin.crypto import offload
 from barbican.plugin.interface import secret_store as sstore
+from barbican.plugin.util import circuit_breaker
 
-CONF = config.new_config()
-config.parse_args(CONF)
+
+def _call_crypto_plugin(plugin, func, *args, **kwargs):
+    """Calls a crypto plugin method, guarded by the plugin's breaker."""
+    return circuit_breaker.call(plugin, offload.run, plugin, func,
+                                *args, **kwargs)
 
 
 class StoreCryptoContext(object):
@@ -38,13 +43,17 @@ class StoreCryptoContext(object):
             private_secret_model=None,
             public_secret_model=None,
             passphrase_secret_model=None,
-            content_type=None):
+            content_type=None,
+            crypto_plugin_name=None):
         self.secret_model = secret_model
         self.private_secret_model = private_secret_model
         self.public_secret_model = public_secret_model
         self.passphrase_secret_model = passphrase_secret_model
         self.project_model = project_model
         self.content_type = content_type
+        # Crypto plugin to store the secret with, rather than the one
+        # applicable to the project, such as to migrate it.
+        self.crypto_plugin_name = crypto_plugin_name
 
 
 class StoreCryptoAdapterPlugin(object):
@@ -73,17 +82,24 @@ class StoreCryptoAdapterPlugin(object):
         """
 
         # Find HSM-style 'crypto' plugin.
-        encrypting_plugin = manager.get_manager().get_plugin_store_generate(
-            base.PluginSupportTypes.ENCRYPT_DECRYPT,
-            project_id=context.project_model.id
-        )
+        if context.crypto_plugin_name:
+            encrypting_plugin = manager.get_manager().get_plugin_retrieve(
+                context.crypto_plugin_name)
+        else:
+            encrypting_plugin = (
+                manager.get_manager().get_plugin_store_generate(
+                    base.PluginSupportTypes.ENCRYPT_DECRYPT,
+                    project_id=context.project_model.id))
 
         # Find or create a key encryption key metadata.
         kek_datum_model, kek_meta_dto = _find_or_create_kek_objects(
             encrypting_plugin, context.project_model)
 
-        # Secrets are base64 encoded before being passed to the secret stores.
-        secret_bytes = base64.b64decode(secret_dto.secret)
+        # Secrets are base64 encoded before being passed to the secret stores,
+        # unless already decoded while validating the request.
+        secret_bytes = secret_dto.secret_bytes
+        if secret_bytes is None:
+            secret_bytes = base64.b64decode(secret_dto.secret)
 
         encrypt_dto = base.EncryptDTO(secret_bytes)
 
@@ -93,7 +109,8 @@ class StoreCryptoAdapterPlugin(object):
             context.content_type = secret_dto.content_type
 
         # Create an encrypted datum instance and add the encrypted cyphertext.
-        response_dto = encrypting_plugin.encrypt(
+        response_dto = _call_crypto_plugin(
+            encrypting_plugin, encrypting_plugin.encrypt,
             encrypt_dto, kek_meta_dto, context.project_model.external_id
         )
 
@@ -103,6 +120,49 @@ class StoreCryptoAdapterPlugin(object):
 
         return None
 
+    def store_secret_batch(self, secret_dtos, contexts):
+        """Store several secrets of a project.
+
+        The secrets are encrypted with a single call to the crypto plugin,
+        under the project's key encryption key.
+
+        :param secret_dtos: list of SecretDTO for the secrets
+        :param contexts: list of StoreCryptoContext, one for each secret,
+                         all for the same project
+        :returns: list of optional dictionaries containing metadata about
+                  each secret
+        """
+        if not secret_dtos:
+            return []
+        project_model = _get_batch_project(contexts)
+
+        encrypting_plugin = manager.get_manager().get_plugin_store_generate(
+            base.PluginSupportTypes.ENCRYPT_DECRYPT,
+            project_id=project_model.id
+        )
+        kek_datum_model, kek_meta_dto = _find_or_create_kek_objects(
+            encrypting_plugin, project_model)
+
+        encrypt_dtos = []
+        for secret_dto, context in zip(secret_dtos, contexts):
+            secret_bytes = secret_dto.secret_bytes
+            if secret_bytes is None:
+                secret_bytes = base64.b64decode(secret_dto.secret)
+            encrypt_dtos.append(base.EncryptDTO(secret_bytes))
+            if not context.content_type:
+                context.content_type = secret_dto.content_type
+
+        response_dtos = _call_crypto_plugin(
+            encrypting_plugin, encrypting_plugin.encrypt_batch,
+            encrypt_dtos, kek_meta_dto, project_model.external_id
+        )
+
+        for context, response_dto in zip(contexts, response_dtos):
+            _store_secret_and_datum(
+                context, context.secret_model, kek_datum_model, response_dto)
+
+        return [None] * len(secret_dtos)
+
     def get_secret(self, secret_type, metadata, context):
         """Retrieve a secret.
 
@@ -130,10 +190,12 @@ class StoreCryptoAdapterPlugin(object):
         decrypt_dto = base.DecryptDTO(encrypted)
 
         # Decrypt the secret.
-        secret = decrypting_plugin.decrypt(decrypt_dto,
-                                           kek_meta_dto,
-                                           datum_model.kek_meta_extended,
-                                           context.project_model.external_id)
+        secret = _call_crypto_plugin(decrypting_plugin,
+                                     decrypting_plugin.decrypt,
+                                     decrypt_dto,
+                                     kek_meta_dto,
+                                     datum_model.kek_meta_extended,
+                                     context.project_model.external_id)
         secret = base64.b64encode(secret)
         key_spec = sstore.KeySpec(alg=context.secret_model.algorithm,
                                   bit_length=context.secret_model.bit_length,
@@ -143,6 +205,53 @@ class StoreCryptoAdapterPlugin(object):
                                 secret, key_spec,
                                 datum_model.content_type)
 
+    def get_secret_batch(self, contexts):
+        """Retrieve several secrets.
+
+        The secrets encrypted under the same key encryption key are
+        decrypted with a single call to their crypto plugin.
+
+        :param contexts: list of StoreCryptoContext, one for each secret
+        :returns: list of SecretDTO, in the order of contexts
+        """
+        # Group the secrets by the KEK their datum is encrypted under.
+        batches = collections.OrderedDict()
+        for index, context in enumerate(contexts):
+            if (not context.secret_model or
+                    not context.secret_model.encrypted_data):
+                raise sstore.SecretNotFoundException()
+            datum_model = context.secret_model.encrypted_data[0]
+            kek_datum_model = datum_model.kek_meta_project
+            batch = batches.setdefault(kek_datum_model.id,
+                                       (kek_datum_model, []))
+            batch[1].append((index, context, datum_model))
+
+        secret_dtos = [None] * len(contexts)
+        for kek_datum_model, items in batches.values():
+            decrypting_plugin = manager.get_manager().get_plugin_retrieve(
+                kek_datum_model.plugin_name)
+            kek_meta_dto = base.KEKMetaDTO(kek_datum_model)
+            decrypt_dtos = [
+                base.DecryptDTO(base64.b64decode(datum_model.cypher_text))
+                for _, _, datum_model in items]
+            kek_meta_extendeds = [datum_model.kek_meta_extended
+                                  for _, _, datum_model in items]
+
+            secrets = _call_crypto_plugin(
+                decrypting_plugin, decrypting_plugin.decrypt_batch,
+                decrypt_dtos, kek_meta_dto, kek_meta_extendeds,
+                items[0][1].project_model.external_id)
+
+            for (index, context, datum_model), secret in zip(items, secrets):
+                secret_model = context.secret_model
+                key_spec = sstore.KeySpec(alg=secret_model.algorithm,
+                                          bit_length=secret_model.bit_length,
+                                          mode=secret_model.mode)
+                secret_dtos[index] = sstore.SecretDTO(
+                    secret_model.secret_type, base64.b64encode(secret),
+                    key_spec, datum_model.content_type)
+        return secret_dtos
+
     def delete_secret(self, secret_metadata):
         """Delete a secret."""
         pass
@@ -176,7 +285,8 @@ class StoreCryptoAdapterPlugin(object):
                                         key_spec.bit_length,
                                         key_spec.mode, None)
         # Create the encrypted meta.
-        response_dto = generating_plugin.generate_symmetric(
+        response_dto = _call_crypto_plugin(
+            generating_plugin, generating_plugin.generate_symmetric,
             generate_dto, kek_meta_dto, context.project_model.external_id)
 
         # Convert binary data into a text-based format.
@@ -185,6 +295,48 @@ class StoreCryptoAdapterPlugin(object):
 
         return None
 
+    def generate_symmetric_key_batch(self, key_spec, contexts):
+        """Generate several symmetric keys of a project.
+
+        The keys are generated with a single call to the crypto plugin.
+
+        :param key_spec: KeySpec that contains details on the type of keys
+                         to generate
+        :param contexts: list of StoreCryptoContext, one for each key, all
+                         for the same project
+        :returns: list of dictionaries that contain metadata about each key
+        """
+        if not contexts:
+            return []
+        project_model = _get_batch_project(contexts)
+
+        plugin_type = _determine_generation_type(key_spec.alg)
+        if base.PluginSupportTypes.SYMMETRIC_KEY_GENERATION != plugin_type:
+            raise sstore.SecretAlgorithmNotSupportedException(key_spec.alg)
+        generating_plugin = manager.get_manager().get_plugin_store_generate(
+            plugin_type,
+            key_spec.alg,
+            key_spec.bit_length,
+            key_spec.mode,
+            project_id=project_model.id)
+
+        kek_datum_model, kek_meta_dto = _find_or_create_kek_objects(
+            generating_plugin, project_model)
+
+        generate_dtos = [base.GenerateDTO(key_spec.alg,
+                                          key_spec.bit_length,
+                                          key_spec.mode, None)
+                         for _ in contexts]
+        response_dtos = _call_crypto_plugin(
+            generating_plugin, generating_plugin.generate_symmetric_batch,
+            generate_dtos, kek_meta_dto, project_model.external_id)
+
+        for context, response_dto in zip(contexts, response_dtos):
+            _store_secret_and_datum(
+                context, context.secret_model, kek_datum_model, response_dto)
+
+        return [None] * len(contexts)
+
     def generate_asymmetric_key(self, key_spec, context):
         """Generates an asymmetric key.
 
@@ -211,10 +363,9 @@ class StoreCryptoAdapterPlugin(object):
                                         None, key_spec.passphrase)
 
         # Create the encrypted meta.
-        private_key_dto, public_key_dto, passwd_dto = (
-            generating_plugin.generate_asymmetric(
-                generate_dto, kek_meta_dto, context.project_model.external_id
-            )
+        private_key_dto, public_key_dto, passwd_dto = _call_crypto_plugin(
+            generating_plugin, generating_plugin.generate_asymmetric,
+            generate_dto, kek_meta_dto, context.project_model.external_id
         )
 
         _store_secret_and_datum(
@@ -274,6 +425,16 @@ def _determine_generation_type(algorithm):
         raise sstore.SecretAlgorithmNotSupportedException(algorithm)
 
 
+def _get_batch_project(contexts):
+    """Returns the project shared by the contexts of a batch."""
+    project_model = contexts[0].project_model
+    if any(context.project_model.id != project_model.id
+           for context in contexts):
+        raise ValueError('The secrets of a batch must belong to the same '
+                         'project.')
+    return project_model
+
+
 def _find_or_create_kek_objects(plugin_inst, project_model):
     kek_repo = repositories.get_kek_datum_repository()
 
@@ -287,7 +448,9 @@ def _find_or_create_kek_objects(plugin_inst, project_model):
     # bind operation just be declared idempotent in the plugin contract?
     kek_meta_dto = base.KEKMetaDTO(kek_datum_model)
     if not kek_datum_model.bind_completed:
-        kek_meta_dto = plugin_inst.bind_kek_metadata(kek_meta_dto)
+        kek_meta_dto = _call_crypto_plugin(plugin_inst,
+                                           plugin_inst.bind_kek_metadata,
+                                           kek_meta_dto)
 
         # By contract, enforce that plugins return a
         # (typically modified) DTO.
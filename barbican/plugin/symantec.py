@@ -25,7 +25,7 @@ from barbican.common import config
 from barbican import i18n as u
 from barbican.plugin.interface import certificate_manager as cert
 
-CONF = config.new_config()
+CONF = config.CONF
 
 symantec_plugin_group = cfg.OptGroup(name='symantec_plugin',
                                      title='Symantec Plugin Options')
@@ -42,7 +42,6 @@ symantec_plugin_opts = [
 
 CONF.register_group(symantec_plugin_group)
 CONF.register_opts(symantec_plugin_opts, group=symantec_plugin_group)
-config.parse_args(CONF)
 
 
 class SymantecCertificatePlugin(cert.CertificatePluginBase):
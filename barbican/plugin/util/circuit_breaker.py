@@ -0,0 +1,288 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-plugin circuit breakers around calls into plugin backends.
+
+Each plugin calling out to a backend, such as an HSM, a KMIP server or a
+Dogtag instance, gets a breaker tracking the outcome and latency of its
+calls over a rolling window. When too many of these calls fail, or take
+too long, the breaker opens and further calls fail right away with a 503,
+rather than each tying up a thread until the backend times out. Once
+open_seconds have passed, a single call is let through to probe the
+backend, closing the breaker again if it succeeds.
+"""
+import collections
+import contextlib
+import threading
+import time
+
+from oslo_config import cfg
+
+from barbican.common import config
+from barbican.common import exception
+from barbican.common import utils
+from barbican import i18n as u
+
+LOG = utils.getLogger(__name__)
+
+CONF = config.CONF
+
+circuit_breaker_opt_group = cfg.OptGroup(
+    name='circuit_breaker', title='Plugin Circuit Breaker Options')
+circuit_breaker_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help=u._('Fail calls to a secret store, crypto or '
+                         'certificate plugin right away while its backend '
+                         'is failing, instead of waiting on the backend.')
+                ),
+    cfg.IntOpt('window_seconds',
+               default=60, min=1,
+               help=u._('Number of seconds of plugin calls the failure '
+                        'ratio of a plugin backend is computed over.')
+               ),
+    cfg.IntOpt('minimum_calls',
+               default=20, min=1,
+               help=u._('Minimum number of calls to a plugin within the '
+                        'window before its circuit breaker can open.')
+               ),
+    cfg.FloatOpt('failure_ratio',
+                 default=0.5, min=0, max=1,
+                 help=u._('Ratio of failed calls to a plugin within the '
+                          'window at which its circuit breaker opens.')
+                 ),
+    cfg.FloatOpt('slow_call_seconds',
+                 default=0, min=0,
+                 help=u._('Calls to a plugin taking at least this many '
+                          'seconds count as failed calls. Set to 0 to only '
+                          'count errors.')
+                 ),
+    cfg.IntOpt('open_seconds',
+               default=30, min=1,
+               help=u._('Number of seconds calls to a plugin fail right away '
+                        'once its circuit breaker opened, before a call is '
+                        'let through to probe its backend.')
+               ),
+]
+CONF.register_group(circuit_breaker_opt_group)
+CONF.register_opts(circuit_breaker_opts, group=circuit_breaker_opt_group)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+# Callables notified of the plugin instance and duration in seconds of each
+# guarded call, such as the request profiler's, see add_call_observer().
+_CALL_OBSERVERS = []
+
+
+def list_opts():
+    yield circuit_breaker_opt_group, circuit_breaker_opts
+
+
+def _is_backend_failure(e):
+    # Errors caused by the request itself say nothing about the backend.
+    if isinstance(e, NotImplementedError):
+        return False
+    if isinstance(e, exception.BarbicanHTTPException):
+        return e.status_code >= 500
+    return True
+
+
+class CallOutcome(object):
+    """Outcome of a guarded call, which the caller can flag as failed."""
+
+    def __init__(self):
+        self.failed = False
+
+
+class CircuitBreaker(object):
+    """Tracks the calls to one plugin, failing fast while it is open."""
+
+    def __init__(self, name, window_seconds, minimum_calls, failure_ratio,
+                 slow_call_seconds, open_seconds):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.minimum_calls = minimum_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        # (completed at, failed, latency) of the calls within the window.
+        self._calls = collections.deque()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def guard(self):
+        """Guards a call to the plugin.
+
+        Raises PluginBackendUnavailable while the breaker is open. An
+        exception raised by the call counts as a failure, unless it is
+        caused by the request itself. The caller may also flag the call as
+        failed through the yielded CallOutcome. A call interrupted by a
+        BaseException, such as a killed green thread, is not counted, but
+        still ends the probe of a half open breaker.
+        """
+        probe = self._before_call()
+        outcome = CallOutcome()
+        start = time.time()
+        failed = None
+        try:
+            yield outcome
+            failed = outcome.failed
+        except Exception as e:
+            failed = _is_backend_failure(e)
+            raise
+        finally:
+            self._after_call(probe, start, failed)
+
+    def get_status(self):
+        """Returns the state and rolling window statistics of the breaker."""
+        with self._lock:
+            self._trim(time.time())
+            calls = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            latency = sum(latency for _, _, latency in self._calls)
+            return {
+                'state': self.state,
+                'calls': calls,
+                'failures': failures,
+                'average_latency': (round(latency / calls, 3)
+                                    if calls else None),
+            }
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.time() - self._opened_at < self.open_seconds:
+                    raise exception.PluginBackendUnavailable(
+                        plugin_name=self.name)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    raise exception.PluginBackendUnavailable(
+                        plugin_name=self.name)
+                self._probing = True
+                return True
+            return False
+
+    def _after_call(self, probe, start, failed):
+        now = time.time()
+        latency = now - start
+        if failed is None:
+            # The call was interrupted, so it tells nothing of the backend.
+            if probe:
+                with self._lock:
+                    self._probing = False
+            return
+        if self.slow_call_seconds and latency >= self.slow_call_seconds:
+            failed = True
+
+        with self._lock:
+            if probe:
+                self._probing = False
+                if failed:
+                    self._open(now)
+                else:
+                    LOG.info('Backend of plugin %s recovered, closing its '
+                             'circuit breaker', self.name)
+                    self.state = CLOSED
+                    self._calls.clear()
+                return
+
+            self._calls.append((now, failed, latency))
+            self._trim(now)
+            if self.state != CLOSED or len(self._calls) < self.minimum_calls:
+                return
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            if failures >= self.failure_ratio * len(self._calls):
+                self._open(now)
+
+    def _open(self, now):
+        LOG.warning('Backend of plugin %s is failing, opening its circuit '
+                    'breaker for %s seconds', self.name, self.open_seconds)
+        self.state = OPEN
+        self._opened_at = now
+
+    def _trim(self, now):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+
+def is_enabled():
+    return CONF.circuit_breaker.enabled
+
+
+def get_circuit_breaker(plugin):
+    """Returns the circuit breaker of a plugin instance."""
+    name = utils.generate_fullname_for(plugin)
+    breaker = _BREAKERS.get(name)
+    if breaker is None:
+        conf = CONF.circuit_breaker
+        with _BREAKERS_LOCK:
+            breaker = _BREAKERS.setdefault(name, CircuitBreaker(
+                name,
+                window_seconds=conf.window_seconds,
+                minimum_calls=conf.minimum_calls,
+                failure_ratio=conf.failure_ratio,
+                slow_call_seconds=conf.slow_call_seconds,
+                open_seconds=conf.open_seconds))
+    return breaker
+
+
+def add_call_observer(observer):
+    """Has observer(plugin, seconds) called after each guarded call."""
+    if observer not in _CALL_OBSERVERS:
+        _CALL_OBSERVERS.append(observer)
+
+
+def remove_call_observer(observer):
+    if observer in _CALL_OBSERVERS:
+        _CALL_OBSERVERS.remove(observer)
+
+
+@contextlib.contextmanager
+def guard(plugin):
+    """Guards a call to a plugin with its circuit breaker, if enabled."""
+    start = time.time() if _CALL_OBSERVERS else None
+    try:
+        if not is_enabled():
+            yield CallOutcome()
+        else:
+            with get_circuit_breaker(plugin).guard() as outcome:
+                yield outcome
+    finally:
+        if start is not None:
+            latency = time.time() - start
+            for observer in list(_CALL_OBSERVERS):
+                observer(plugin, latency)
+
+
+def call(plugin, func, *args, **kwargs):
+    """Calls func(*args, **kwargs) guarded by the plugin's breaker."""
+    with guard(plugin):
+        return func(*args, **kwargs)
+
+
+def get_status(plugin):
+    """Returns the breaker status of a plugin, or None if not enabled."""
+    if not is_enabled():
+        return None
+    return get_circuit_breaker(plugin).get_status()
@@ -23,6 +23,7 @@ from barbican.common import utils
 from barbican import i18n as u
 from barbican.model import models as db_models
 from barbican.model import repositories as db_repos
+from barbican.plugin.util import circuit_breaker
 
 LOG = utils.getLogger(__name__)
 
@@ -205,6 +206,34 @@ def get_global_default_secret_store():
     return default_ss
 
 
+def get_backend_status(secret_store):
+    """Get the circuit breaker status of the backend of a secret store.
+
+    The backend of a store using a crypto plugin is the crypto plugin's,
+    else it is the secret store plugin's. Returns None when circuit
+    breakers are not enabled, or the plugin is not loaded.
+    """
+    # doing local import to avoid circular dependency between managers and
+    # current utils module
+    from barbican.plugin.crypto import manager as cm
+    from barbican.plugin.interface import secret_store as ss
+
+    if not circuit_breaker.is_enabled():
+        return None
+
+    if secret_store.crypto_plugin:
+        manager = cm.get_manager()
+        plugin_name = secret_store.crypto_plugin
+    else:
+        manager = ss.get_manager()
+        plugin_name = secret_store.store_plugin
+
+    for ext in manager.extensions:
+        if ext.name == plugin_name and ext.obj:
+            return circuit_breaker.get_status(ext.obj)
+    return None
+
+
 def get_applicable_crypto_plugins(manager, project_id, existing_plugin_name):
     """Get list of crypto plugins available for use.
 
@@ -0,0 +1,182 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Opt-in, short lived cache of decrypted secret payloads.
+
+Some secrets, such as the TLS keys of a load balancer fleet, are retrieved
+over and over again, each time looking up the secret's metadata and
+decrypting it through its secret store or crypto plugin backend. For the
+projects and secrets it is enabled for, the cache keeps the decrypted
+payload of a secret for a few seconds, so that most of these retrievals do
+not reach the backend.
+
+Payloads are held encrypted, under a key generated by each process and
+never persisted. An entry is only used for the version of the secret it was
+cached for, as stamped by its updated_at, and is dropped once the secret is
+deleted or its ACLs are changed.
+"""
+import collections
+import threading
+import time
+
+from cryptography import fernet
+from oslo_config import cfg
+import six
+
+from barbican.common import config
+from barbican.common import utils
+from barbican import i18n as u
+
+LOG = utils.getLogger(__name__)
+
+CONF = config.CONF
+
+payload_cache_opt_group = cfg.OptGroup(
+    name='payload_cache', title='Decrypted Payload Cache Options')
+payload_cache_opts = [
+    cfg.ListOpt('project_ids',
+                default=[],
+                help=u._('External IDs of the projects whose decrypted '
+                         'secret payloads are cached.')
+                ),
+    cfg.ListOpt('secret_ids',
+                default=[],
+                help=u._('IDs of the secrets whose decrypted payloads are '
+                         'cached, whatever their project.')
+                ),
+    cfg.FloatOpt('ttl_seconds',
+                 default=5, min=0,
+                 help=u._('Number of seconds a decrypted secret payload is '
+                          'cached for. Set to 0 to disable the cache.')
+                 ),
+    cfg.IntOpt('max_entries',
+               default=1000, min=1,
+               help=u._('Maximum number of decrypted secret payloads cached '
+                        'by each API process.')
+               ),
+    cfg.IntOpt('stats_log_interval',
+               default=300, min=0,
+               help=u._('Number of seconds between the logging of the hit, '
+                        'miss and eviction counts of the cache. Set to 0 to '
+                        'disable.')
+               ),
+]
+CONF.register_group(payload_cache_opt_group)
+CONF.register_opts(payload_cache_opts, group=payload_cache_opt_group)
+
+CachedPayload = collections.namedtuple(
+    'CachedPayload', ['content_type', 'secret'])
+
+_PAYLOAD_CACHE = None
+
+
+def list_opts():
+    yield payload_cache_opt_group, payload_cache_opts
+
+
+class PayloadCache(object):
+    """Caches decrypted secret payloads, encrypted under an ephemeral key.
+
+    Entries are stamped with the updated_at of their secret, so that an
+    entry is no longer used once the secret is loaded with a later
+    timestamp, and expire after ttl_seconds. The oldest entries are evicted
+    once there are more than max_entries.
+    """
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._fernet = fernet.Fernet(fernet.Fernet.generate_key())
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+        self._stats_logged_at = time.time()
+
+    def get(self, secret_id, version):
+        """Returns the CachedPayload of a secret version, or None."""
+        entry = self._entries.get(secret_id)
+        if entry is not None:
+            cached_version, expires_at, content_type, token = entry
+            if cached_version == version and time.time() < expires_at:
+                self._count('hits')
+                return CachedPayload(
+                    content_type, self._fernet.decrypt(token).decode('ascii'))
+        self._count('misses')
+        return None
+
+    def put(self, secret_id, version, content_type, secret):
+        """Caches the base64 encoded, decrypted payload of a secret."""
+        if isinstance(secret, six.text_type):
+            secret = secret.encode('ascii')
+        entry = (version, time.time() + self.ttl_seconds, content_type,
+                 self._fernet.encrypt(secret))
+        with self._lock:
+            self._entries.pop(secret_id, None)
+            self._entries[secret_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, secret_id):
+        with self._lock:
+            if self._entries.pop(secret_id, None) is not None:
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Returns the size of the cache and its counts since started."""
+        with self._lock:
+            stats = {'entries': len(self._entries)}
+            for name in ('hits', 'misses', 'evictions', 'invalidations'):
+                stats[name] = self._stats[name]
+            return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+            interval = CONF.payload_cache.stats_log_interval
+            now = time.time()
+            if not interval or now - self._stats_logged_at < interval:
+                return
+            self._stats_logged_at = now
+        LOG.info('Decrypted payload cache stats: %s', self.get_stats())
+
+
+def is_enabled_for(secret_model, project_model):
+    """Tells whether the payload of a secret is to be cached."""
+    conf = CONF.payload_cache
+    if not conf.ttl_seconds or not (conf.secret_ids or conf.project_ids):
+        return False
+    if secret_model.id in conf.secret_ids:
+        return True
+    return (project_model is not None and
+            project_model.external_id in conf.project_ids)
+
+
+def get_payload_cache():
+    global _PAYLOAD_CACHE
+    if _PAYLOAD_CACHE is None:
+        _PAYLOAD_CACHE = PayloadCache(
+            ttl_seconds=CONF.payload_cache.ttl_seconds,
+            max_entries=CONF.payload_cache.max_entries)
+    return _PAYLOAD_CACHE
+
+
+def invalidate(secret_id):
+    """Drops the cached payload of a secret, if any."""
+    if _PAYLOAD_CACHE is not None:
+        _PAYLOAD_CACHE.invalidate(secret_id)
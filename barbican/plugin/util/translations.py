@@ -11,6 +11,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import binascii
+import io
+import re
+
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 from OpenSSL import crypto
@@ -21,6 +25,16 @@ from barbican import i18n as u  # noqa
 from barbican.plugin.interface import secret_store as s
 from barbican.plugin.util import mime_types
 
+# Base64 encoded data is decoded in chunks of this many characters.
+BASE64_CHUNK_SIZE = 64 * 1024
+
+# Data is base64 encoded in chunks of this many bytes, a multiple of three
+# so that the encoded chunks can be concatenated.
+_BASE64_ENCODE_CHUNK_SIZE = 48 * 1024
+
+# Characters outside of the base64 alphabet, discarded when decoding.
+_NON_BASE64_CHARACTERS = re.compile(b'[^A-Za-z0-9+/=]')
+
 
 def normalize_before_encryption(unencrypted, content_type, content_encoding,
                                 secret_type, enforce_text_only=False):
@@ -50,15 +64,15 @@ def normalize_before_encryption(unencrypted, content_type, content_encoding,
     if normalized_media_type in mime_types.PLAIN_TEXT:
         # normalize text to binary and then base64 encode it
         if six.PY3:
-            b64payload = base64.encode_as_bytes(unencrypted)
+            b64payload = _encode_base64(unencrypted)
         else:
             unencrypted_bytes = unencrypted.encode('utf-8')
-            b64payload = base64.encode_as_bytes(unencrypted_bytes)
+            b64payload = _encode_base64(unencrypted_bytes)
 
     # Process binary type.
     else:
         if not content_encoding:
-            b64payload = base64.encode_as_bytes(unencrypted)
+            b64payload = _encode_base64(unencrypted)
         elif content_encoding.lower() == 'base64':
             b64payload = unencrypted
         elif enforce_text_only:
@@ -88,6 +102,86 @@ def analyze_before_decryption(content_type):
         raise s.SecretAcceptNotSupportedException(content_type)
 
 
+def _encode_base64(data):
+    """Base64 encodes data, one chunk at a time.
+
+    Encoding the data whole would take up to twice the size of the encoded
+    data in memory, which adds up for large secrets.
+    """
+    if isinstance(data, six.text_type):
+        data = data.encode('utf-8')
+    encoded = io.BytesIO()
+    for chunk in iter_chunks(memoryview(data), _BASE64_ENCODE_CHUNK_SIZE):
+        encoded.write(base64.encode_as_bytes(chunk))
+    return encoded.getvalue()
+
+
+def iter_chunks(data, chunk_size=BASE64_CHUNK_SIZE):
+    """Iterates over data in slices of at most chunk_size items."""
+    for start in six.moves.range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def iter_base64_decode(chunks):
+    """Decodes base64 encoded data, one chunk at a time.
+
+    Only a chunk of the data is decoded at any time, instead of the whole
+    of it, with the same result as base64.b64decode(): characters outside
+    of the base64 alphabet, such as line breaks, are discarded, and the
+    data ends with its first padded group of four characters, whatever
+    follows it.
+
+    :param chunks: Iterable over the base64 encoded data, as text or bytes
+    :returns: Iterator over the decoded bytes
+    :raises ValueError: If the data is not valid base64
+    """
+    pending = b''
+    for chunk in chunks:
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode('ascii')
+        data = pending + _NON_BASE64_CHARACTERS.sub(b'', chunk)
+        pending = b''
+
+        # Split off the padding characters, which b64decode() ignores
+        # unless they complete the group of four characters they are in.
+        groups = []
+        length = 0
+        position = 0
+        while True:
+            pad = data.find(b'=', position)
+            if pad < 0:
+                groups.append(data[position:])
+                break
+            groups.append(data[position:pad])
+            length += pad - position
+            group_position = length % 4
+            position = pad
+            while data[position:position + 1] == b'=':
+                position += 1
+            if group_position < 2:
+                continue
+            if group_position + position - pad >= 4:
+                # The data ends with this group.
+                groups.append(data[pad:pad + 4 - group_position])
+                yield binascii.a2b_base64(b''.join(groups))
+                return
+            if position == len(data):
+                # The group may be completed by the next chunk.
+                pending = data[pad:]
+                break
+
+        # Decode whole groups of four characters, keeping the rest for the
+        # next chunk.
+        data = b''.join(groups)
+        end = len(data) - len(data) % 4
+        pending = data[end:] + pending
+        if end:
+            yield binascii.a2b_base64(data[:end])
+    if pending:
+        # Raises the error b64decode() raises for incomplete data.
+        yield binascii.a2b_base64(pending)
+
+
 def denormalize_after_decryption(unencrypted, content_type):
     """Translate the decrypted data into the desired content type.
 
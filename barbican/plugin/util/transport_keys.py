@@ -0,0 +1,167 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-plugin cache of the current transport key of secret store plugins.
+
+Asking a plugin for its transport key, or whether a key is still current,
+can mean a round trip to the backend (e.g. the Dogtag KRA). The cache keeps
+the current key of each plugin for transport_key_cache_ttl seconds. Once
+that expires, the cached key keeps being served while a background thread
+checks with the plugin whether it is still current. A new key is only
+persisted when the plugin reports that its key has been rotated, and is
+committed right away, independently of the request that found it.
+"""
+import collections
+import threading
+import time
+
+from barbican.common import config
+from barbican.common import utils
+from barbican.model import models
+from barbican.model import repositories as repos
+
+LOG = utils.getLogger(__name__)
+
+_TRANSPORT_KEY_CACHE = None
+
+CachedTransportKey = collections.namedtuple(
+    'CachedTransportKey', ['id', 'plugin_name', 'transport_key'])
+
+
+class _CacheEntry(object):
+
+    def __init__(self, key):
+        # key is None for plugins that do not support transport keys.
+        self.key = key
+        self.checked_at = time.time()
+
+
+class TransportKeyCache(object):
+    """Caches the current transport key of each secret store plugin."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def get(self, store_plugin):
+        """Returns the current transport key of a secret store plugin.
+
+        :param store_plugin: the SecretStoreBase plugin instance.
+        :returns: a CachedTransportKey, or None if the plugin does not
+                  support transport keys.
+        """
+        plugin_name = utils.generate_fullname_for(store_plugin)
+        entry = self._entries.get(plugin_name)
+        if entry is None or self.ttl <= 0:
+            return self._load(plugin_name, store_plugin)
+
+        if time.time() - entry.checked_at >= self.ttl:
+            self._start_check(plugin_name, store_plugin)
+        return entry.key
+
+    def supports_transport_keys(self, store_plugin):
+        """Returns True if a secret store plugin supports transport keys."""
+        entry = self._entries.get(utils.generate_fullname_for(store_plugin))
+        if entry is not None:
+            return entry.key is not None
+        return store_plugin.get_transport_key() is not None
+
+    def invalidate(self, plugin_name=None):
+        """Drops the cached key of one plugin, or of all plugins."""
+        with self._lock:
+            if plugin_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(plugin_name, None)
+
+    def _load(self, plugin_name, store_plugin):
+        key, created = self._get_current_key(plugin_name, store_plugin)
+        self._set(plugin_name, key)
+        return key
+
+    def _start_check(self, plugin_name, store_plugin):
+        with self._lock:
+            if plugin_name in self._checks:
+                return
+            thread = threading.Thread(
+                target=self._check_in_background,
+                args=(plugin_name, store_plugin))
+            thread.daemon = True
+            self._checks[plugin_name] = thread
+        thread.start()
+
+    def _check_in_background(self, plugin_name, store_plugin):
+        try:
+            repos.start()
+            key, created = self._get_current_key(plugin_name, store_plugin)
+            if created:
+                LOG.info('Secret store plugin %s rotated its transport key',
+                         plugin_name)
+            self._set(plugin_name, key)
+        except Exception:
+            LOG.exception('Problem checking the transport key of secret '
+                          'store plugin %s', plugin_name)
+            repos.rollback()
+        finally:
+            repos.clear()
+            with self._lock:
+                self._checks.pop(plugin_name, None)
+
+    def _get_current_key(self, plugin_name, store_plugin):
+        """Returns the current key of a plugin, and whether it was created.
+
+        A new key is persisted and committed in a session of its own, as
+        the request looking it up may be a GET, which is never committed,
+        while the key's ID is handed out to the client right away.
+        """
+        key_repo = repos.get_transport_key_repository()
+        key_model = key_repo.get_latest_transport_key(
+            plugin_name, suppress_exception=True)
+        if key_model and store_plugin.is_transport_key_current(
+                key_model.transport_key):
+            return self._to_cached_key(key_model), False
+
+        # transport key does not exist or is not current.
+        # need to get a new transport key
+        transport_key = store_plugin.get_transport_key()
+        if transport_key is None:
+            return None, False
+        with repos.independent_session() as session:
+            key_model = key_repo.create_from(
+                models.TransportKey(plugin_name, transport_key),
+                session=session)
+            session.flush()
+            return self._to_cached_key(key_model), True
+
+    def _set(self, plugin_name, key):
+        with self._lock:
+            self._entries[plugin_name] = _CacheEntry(key)
+
+    @staticmethod
+    def _to_cached_key(key_model):
+        if key_model is None:
+            return None
+        return CachedTransportKey(key_model.id, key_model.plugin_name,
+                                  key_model.transport_key)
+
+
+def get_transport_key_cache():
+    global _TRANSPORT_KEY_CACHE
+    if not _TRANSPORT_KEY_CACHE:
+        secretstore_conf = config.get_module_config('secretstore')
+        _TRANSPORT_KEY_CACHE = TransportKeyCache(
+            secretstore_conf.secretstore.transport_key_cache_ttl)
+    return _TRANSPORT_KEY_CACHE
@@ -16,13 +16,21 @@
 """
 Client-side (i.e. API side) classes and logic.
 """
+import atexit
+import threading
+
+from barbican.common import config
 from barbican.common import utils
 from barbican import i18n as u
+from barbican.model import repositories
 from barbican import queue
+from barbican.queue import order_notifier
 from barbican.queue import server
 
 LOG = utils.getLogger(__name__)
 
+CONF = config.CONF
+
 
 class TaskClient(object):
     """API-side client interface to asynchronous queuing services.
@@ -38,14 +46,56 @@ class TaskClient(object):
         #   standalone single-node mode for Barbican.
         self._client = queue.get_client() or _DirectTaskInvokerClient()
 
+        # Optionally coalesce new orders into batches, when the workers are
+        #   reached through a queue.
+        self._type_order_batcher = None
+        window_ms = CONF.queue.cast_batch_window_ms
+        if window_ms and not isinstance(self._client,
+                                        _DirectTaskInvokerClient):
+            self._type_order_batcher = _CastBatcher(
+                self._client, 'process_type_orders', 'orders',
+                window_ms / 1000.0, CONF.queue.cast_batch_max_size,
+                CONF.queue.cast_batch_retries, self._handle_unsent_orders)
+
     def process_type_order(self, order_id, project_id, request_id):
         """Process TypeOrder."""
 
+        if self._type_order_batcher:
+            self._type_order_batcher.add(order_id=order_id,
+                                         project_id=project_id,
+                                         request_id=request_id)
+            return
+
         self._cast('process_type_order',
                    order_id=order_id,
                    project_id=project_id,
                    request_id=request_id)
 
+    def process_type_orders(self, orders):
+        """Process a batch of TypeOrders.
+
+        :param orders: List of dicts with the order_id, project_id and
+                       request_id of each order.
+        """
+        self._cast('process_type_orders', orders=orders)
+
+    def _handle_unsent_orders(self, orders):
+        """Puts the orders of a batch that could not be cast in error."""
+        if CONF.queue.drain_pending_orders_after_seconds:
+            LOG.warning('Leaving %d orders for the workers to pick up from '
+                        'the database', len(orders))
+            return
+
+        order_ids = [order['order_id'] for order in orders]
+        with repositories.independent_session() as session:
+            count = repositories.get_order_repository().set_unprocessed_error(
+                order_ids, 500,
+                u._('Order could not be sent to the workers'),
+                session=session)
+            for order_id in order_ids:
+                order_notifier.notify_on_commit(session, order_id)
+        LOG.error('Put %d orders in the ERROR state', count)
+
     def update_order(self, order_id, project_id, updated_meta, request_id):
         """Update Order."""
 
@@ -62,6 +112,14 @@ class TaskClient(object):
                    project_id=project_id,
                    request_id=request_id)
 
+    def check_certificate_statuses(self, orders):
+        """Check the status of a batch of certificate orders.
+
+        :param orders: List of dicts with the order_id, project_id and
+                       request_id of each order.
+        """
+        self._cast('check_certificate_statuses', orders=orders)
+
     def _cast(self, name, **kwargs):
         """Asynchronous call handler. Barbican probably only needs casts.
 
@@ -76,6 +134,91 @@ class TaskClient(object):
         return self._client.call({}, name, **kwargs)
 
 
+class _CastBatcher(object):
+    """Coalesces casts into batch casts.
+
+    Casts added within window seconds of the first pending one are sent as
+    a single cast of batch_method, with the list of their arguments passed
+    as batch_arg, or as soon as max_size casts are pending. Pending casts
+    are also sent when the process exits.
+
+    A batch that fails to be cast is retried up to retries times, waiting
+    retry_delay seconds before the first retry and twice as long before
+    each further one. The list of its arguments is then passed to
+    on_failure.
+    """
+
+    retry_delay = 1.0
+
+    def __init__(self, client, batch_method, batch_arg, window, max_size,
+                 retries=0, on_failure=None):
+        super(_CastBatcher, self).__init__()
+        self._client = client
+        self._batch_method = batch_method
+        self._batch_arg = batch_arg
+        self._window = window
+        self._max_size = max_size
+        self._retries = retries
+        self._on_failure = on_failure
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, **kwargs):
+        """Adds a cast with the given arguments to the pending batch."""
+        batch = None
+        with self._lock:
+            self._pending.append(kwargs)
+            if len(self._pending) >= self._max_size:
+                batch = self._take_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._cast(batch)
+
+    def flush(self):
+        """Sends the pending casts right away."""
+        with self._lock:
+            batch = self._take_pending()
+        if batch:
+            self._cast(batch)
+
+    def _take_pending(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _cast(self, batch, attempt=0):
+        LOG.debug("Casting '%s' for a batch of %d",
+                  self._batch_method, len(batch))
+        try:
+            self._client.cast({}, self._batch_method,
+                              **{self._batch_arg: batch})
+            return
+        except Exception:
+            LOG.exception("Problem casting '%s' for a batch of %d",
+                          self._batch_method, len(batch))
+
+        if attempt < self._retries:
+            delay = self.retry_delay * 2 ** attempt
+            LOG.warning("Retrying to cast '%s' in %s seconds",
+                        self._batch_method, delay)
+            timer = threading.Timer(delay, self._cast, (batch, attempt + 1))
+            timer.daemon = True
+            timer.start()
+        elif self._on_failure:
+            try:
+                self._on_failure(batch)
+            except Exception:
+                LOG.exception("Problem handling the failed '%s' cast of a "
+                              "batch of %d", self._batch_method, len(batch))
+
+
 class _DirectTaskInvokerClient(object):
     """Allows for direct invocation of queue.server Tasks.
 
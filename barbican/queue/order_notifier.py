@@ -0,0 +1,129 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-process notification of order status changes.
+
+Order retrievals with the 'wait' URL parameter hold the request until the
+order leaves the PENDING state. The order tasks notify the requests waiting
+on an order of the same process once their processing of the order is
+committed, as is the case when queuing is disabled. Otherwise, such as when
+the order is processed by a barbican-worker process, requests fall back on
+checking the status of the order every order_wait_poll_interval seconds.
+"""
+import threading
+
+import sqlalchemy
+from sqlalchemy import orm as sa_orm
+
+from barbican.common import utils
+
+LOG = utils.getLogger(__name__)
+
+_ORDER_NOTIFIER = None
+
+_SESSION_INFO_KEY = 'barbican_notified_orders'
+
+
+class OrderNotifier(object):
+    """Wakes up the requests waiting on an order of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._waiting_requests = 0
+
+    def start_waiting(self, max_requests):
+        """Counts a request about to wait on orders.
+
+        :param max_requests: Maximum number of requests waiting at the same
+                             time.
+        :returns: True if the request may wait, in which case it is to call
+                  stop_waiting() once done, or False if max_requests already
+                  are waiting.
+        """
+        with self._lock:
+            if self._waiting_requests >= max_requests:
+                return False
+            self._waiting_requests += 1
+            return True
+
+    def stop_waiting(self):
+        with self._lock:
+            self._waiting_requests -= 1
+
+    def wait(self, order_id, timeout):
+        """Waits up to timeout seconds for the order to be notified.
+
+        :returns: True if the order was notified, False on timeout.
+        """
+        event = threading.Event()
+        with self._lock:
+            self._waiters.setdefault(order_id, set()).add(event)
+        try:
+            return event.wait(timeout)
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(order_id)
+                if waiters is not None:
+                    waiters.discard(event)
+                    if not waiters:
+                        del self._waiters[order_id]
+
+    def notify(self, order_id):
+        """Wakes up the requests waiting on an order, if any."""
+        with self._lock:
+            waiters = self._waiters.pop(order_id, ())
+        for event in waiters:
+            event.set()
+        if waiters:
+            LOG.debug("Notified %s request(s) waiting on order %s",
+                      len(waiters), order_id)
+
+    def count_waiters(self):
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+
+def get_order_notifier():
+    global _ORDER_NOTIFIER
+    if _ORDER_NOTIFIER is None:
+        _ORDER_NOTIFIER = OrderNotifier()
+    return _ORDER_NOTIFIER
+
+
+def notify(order_id):
+    """Notifies the requests of this process waiting on an order."""
+    if _ORDER_NOTIFIER is not None:
+        _ORDER_NOTIFIER.notify(order_id)
+
+
+def notify_on_commit(session, order_id):
+    """Notifies the requests waiting on an order once session commits.
+
+    Waiting requests read the status of the order from the database, so
+    they are only notified once the change of status is committed. Nothing
+    is notified if the session rolls back instead.
+    """
+    session.info.setdefault(_SESSION_INFO_KEY, set()).add(order_id)
+
+
+@sqlalchemy.event.listens_for(sa_orm.Session, 'after_commit')
+def _notify_committed_orders(session):
+    for order_id in session.info.pop(_SESSION_INFO_KEY, ()):
+        notify(order_id)
+
+
+@sqlalchemy.event.listens_for(sa_orm.Session, 'after_rollback')
+def _forget_rolled_back_orders(session):
+    session.info.pop(_SESSION_INFO_KEY, None)
@@ -111,9 +111,19 @@ class PeriodicServer(service.Service):
         # Retrieve tasks to retry.
         entities, total = self._retrieve_tasks()
 
-        # Create RPC tasks for each retry task found.
+        # Create RPC tasks for each retry task found, but for the certificate
+        # status checks sent in batches.
+        batch_size = CONF.retry_scheduler.status_check_batch_size
+        status_checks = []
         for task in entities:
-            self._enqueue_task(task)
+            if (batch_size and task.retry_task == 'check_certificate_status'
+                    and not task.retry_args):
+                status_checks.append(task)
+            else:
+                self._enqueue_task(task)
+        while status_checks:
+            self._enqueue_status_checks(status_checks[:batch_size])
+            status_checks = status_checks[batch_size:]
 
         return total
 
@@ -167,3 +177,25 @@ class PeriodicServer(service.Service):
             repositories.rollback()
         finally:
             repositories.clear()
+
+    def _enqueue_status_checks(self, tasks):
+        """Re-enqueue the specified certificate status checks as a batch."""
+        repositories.start()
+        try:
+            self.queue.check_certificate_statuses(
+                [task.retry_kwargs for task in tasks])
+
+            for task in tasks:
+                task.status = models.States.ACTIVE
+                self.order_retry_repo.delete_entity_by_id(task.id, None)
+
+            repositories.commit()
+
+            LOG.debug("(Enqueued a batch of %d certificate status checks)",
+                      len(tasks))
+        except Exception:
+            LOG.exception("Problem enqueuing a batch of %d certificate status "
+                          "checks.", len(tasks))
+            repositories.rollback()
+        finally:
+            repositories.clear()
@@ -28,6 +28,7 @@ except ImportError:
 
 from oslo_service import service
 
+from barbican.common import config
 from barbican.common import utils
 from barbican.model import models
 from barbican.model import repositories
@@ -40,6 +41,8 @@ if newrelic_loaded:
 
 LOG = utils.getLogger(__name__)
 
+CONF = config.CONF
+
 
 # Maps the common/shared RetryTasks (returned from lower-level business logic
 # and plugin processing) to top-level RPC tasks in the Tasks class below.
@@ -211,6 +214,44 @@ class Tasks(object):
         return resources.BeginTypeOrder().process_and_suppress_exceptions(
             order_id, project_id)
 
+    @monitored
+    def process_type_orders(self, context, orders):
+        """Process a batch of TypeOrders.
+
+        Each order is processed, committed and retried on its own, as by
+        process_type_order(), so that a failing order does not revert the
+        others. The orders, along with their projects and metadata, are
+        loaded upfront for the whole batch though, and the requests of the
+        certificate orders for the same CA plugin are issued together.
+
+        :param orders: List of dicts with the order_id, project_id and
+                       request_id of each order.
+        """
+        LOG.info("Processing batch of %d type orders", len(orders))
+        self._prepare_batch(
+            orders, resources.issue_prefetched_certificate_requests)
+        try:
+            for order in orders:
+                self.process_type_order(context, **order)
+        finally:
+            resources.clear_prefetched()
+
+    def _prepare_batch(self, orders, call_ahead):
+        """Prefetches a batch of orders and makes their plugin calls ahead.
+
+        Should it fail, the orders are loaded and processed one at a time.
+        """
+        if not queue.is_server_side():
+            return
+        try:
+            resources.prefetch_orders([order['order_id'] for order in orders])
+            call_ahead(orders)
+        except Exception:
+            LOG.exception("Problem preparing batch of %d orders, processing "
+                          "them one at a time instead", len(orders))
+        finally:
+            repositories.clear()
+
     @monitored
     @transactional
     @retryable_order
@@ -238,6 +279,28 @@ class Tasks(object):
         return check_cert_order.process_and_suppress_exceptions(
             order_id, project_id)
 
+    @monitored
+    def check_certificate_statuses(self, context, orders):
+        """Check the status of a batch of certificate orders.
+
+        Each order is checked, committed and retried on its own, as by
+        check_certificate_status(). The orders are loaded upfront for the
+        whole batch though, and the orders pending on the same CA plugin
+        are checked with one call of the plugin.
+
+        :param orders: List of dicts with the order_id, project_id and
+                       request_id of each order.
+        """
+        LOG.info("Checking the certificate status of a batch of %d orders",
+                 len(orders))
+        self._prepare_batch(
+            orders, resources.check_prefetched_certificate_statuses)
+        try:
+            for order in orders:
+                self.check_certificate_status(context, **order)
+        finally:
+            resources.clear_prefetched()
+
 
 class TaskServer(Tasks, service.Service):
     """Server to process asynchronous tasking from Barbican API nodes.
@@ -269,6 +332,41 @@ class TaskServer(Tasks, service.Service):
         self._server.start()
         super(TaskServer, self).start()
 
+        interval = CONF.queue.drain_pending_orders_after_seconds
+        if interval:
+            self.tg.add_timer(interval, self._drain_pending_orders,
+                              initial_delay=interval)
+
+    def _drain_pending_orders(self):
+        """Processes new orders whose message did not reach a worker yet.
+
+        Each order is claimed first, so that other workers draining orders
+        skip it. Should its message arrive after the order was processed,
+        the order is skipped as it is no longer PENDING.
+        """
+        order_repo = repositories.get_order_repository()
+        updated_before = datetime.datetime.utcnow() - datetime.timedelta(
+            seconds=CONF.queue.drain_pending_orders_after_seconds)
+        orders = []
+        try:
+            for order_id, project_id, updated_at in order_repo.get_unprocessed(
+                    updated_before, CONF.queue.cast_batch_max_size):
+                if order_repo.claim(order_id, updated_at):
+                    orders.append({'order_id': order_id,
+                                   'project_id': project_id,
+                                   'request_id': None})
+            repositories.commit()
+        except Exception:
+            LOG.exception("Problem claiming pending orders to drain")
+            repositories.rollback()
+            return
+        finally:
+            repositories.clear()
+
+        if orders:
+            LOG.info("Draining %d pending orders", len(orders))
+            self.process_type_orders(None, orders)
+
     def stop(self):
         LOG.info("Halting the TaskServer")
         super(TaskServer, self).stop()
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import threading
+
 from ldap3.utils.dn import parse_dn
 from OpenSSL import crypto
 
@@ -24,10 +27,16 @@ from barbican.model import models
 from barbican.model import repositories as repos
 from barbican.plugin.interface import certificate_manager as cert
 from barbican.plugin import resources as plugin
+from barbican.plugin.util import circuit_breaker
 from barbican.tasks import common
 
 LOG = utils.getLogger(__name__)
 
+# Results of the certificate plugin calls made ahead, in batches, for the
+# orders processed by this thread (or green thread), see
+# issue_certificate_requests() and check_certificate_requests().
+_RESULTS_AHEAD = threading.local()
+
 # Order sub-status definitions
 ORDER_STATUS_REQUEST_PENDING = models.OrderStatus(
     "cert_request_pending",
@@ -78,6 +87,10 @@ def issue_certificate_request(order_model, project_model, result_follow_on):
     required. Barbican metadata is used to store intermediate information,
     including selected plugins by name, to support such retries.
 
+    If the request of the order was issued ahead, in a batch, by
+    issue_certificate_requests(), its result is used rather than issuing
+    the request again.
+
     :param: order_model - order associated with this cert request
     :param: project_model - project associated with this request
     :param: result_follow_on - A :class:`FollowOnProcessingStatusDTO` instance
@@ -86,6 +99,54 @@ def issue_certificate_request(order_model, project_model, result_follow_on):
     :returns: container_model - container with the relevant cert if
         the request has been completed.  None otherwise
     """
+    issued = _take_result_ahead(order_model.id)
+    if issued is not None:
+        plugin_meta, barbican_meta, result = issued
+    else:
+        # refresh the CA table.  This is mostly a no-op unless the entries
+        # for a plugin are expired.
+        cert.CertificatePluginManager().refresh_ca_table()
+
+        (cert_plugin, plugin_meta, barbican_meta,
+         barbican_meta_for_plugins_dto) = _prepare_certificate_request(
+            order_model, project_model)
+        result = _call_cert_plugin(
+            cert_plugin, cert_plugin.issue_certificate_request,
+            order_model.id, order_model.meta,
+            plugin_meta, barbican_meta_for_plugins_dto)
+
+    # Save plugin and barbican metadata for this order.
+    _save_plugin_metadata(order_model, plugin_meta)
+    _save_barbican_metadata(order_model, barbican_meta)
+
+    # Handle result
+    request_type = order_model.meta.get(cert.REQUEST_TYPE)
+    return _handle_task_result(
+        result, result_follow_on, order_model, project_model, request_type,
+        unavailable_status=ORDER_STATUS_CA_UNAVAIL_FOR_ISSUE)
+
+
+def issue_certificate_requests(orders):
+    """Issues the certificate requests of a batch of orders ahead.
+
+    The request of each order is prepared as by issue_certificate_request(),
+    and the requests for the same plugin are issued with a single
+    issue_certificate_requests() call of the plugin, so that it can share
+    work across them, such as the signing context of a CA. The results are
+    kept for issue_certificate_request() to complete each order with, in a
+    transaction of its own, until clear_results_ahead() is called.
+
+    An order whose request cannot be prepared is skipped, and so left to
+    issue_certificate_request() to fail on its own.
+
+    :param orders: List of (order_model, project_model) tuples.
+    """
+    cert.CertificatePluginManager().refresh_ca_table()
+    _run_ahead(orders, _prepare_certificate_request,
+               'issue_certificate_requests')
+
+
+def _prepare_certificate_request(order_model, project_model):
     plugin_meta = _get_plugin_meta(order_model)
     barbican_meta = _get_barbican_meta(order_model)
 
@@ -95,10 +156,6 @@ def issue_certificate_request(order_model, project_model, result_follow_on):
     # 'extended_meta_dto' or some such.
     barbican_meta_for_plugins_dto = cert.BarbicanMetaDTO()
 
-    # refresh the CA table.  This is mostly a no-op unless the entries
-    # for a plugin are expired.
-    cert.CertificatePluginManager().refresh_ca_table()
-
     cert_plugin = _get_cert_plugin(barbican_meta,
                                    barbican_meta_for_plugins_dto,
                                    order_model, project_model)
@@ -115,18 +172,111 @@ def issue_certificate_request(order_model, project_model, result_follow_on):
             barbican_meta['generated_csr'] = csr
         barbican_meta_for_plugins_dto.generated_csr = csr
 
-    result = cert_plugin.issue_certificate_request(
-        order_model.id, order_model.meta,
-        plugin_meta, barbican_meta_for_plugins_dto)
+    return (cert_plugin, plugin_meta, barbican_meta,
+            barbican_meta_for_plugins_dto)
 
-    # Save plugin and barbican metadata for this order.
-    _save_plugin_metadata(order_model, plugin_meta)
-    _save_barbican_metadata(order_model, barbican_meta)
 
-    # Handle result
-    return _handle_task_result(
-        result, result_follow_on, order_model, project_model, request_type,
-        unavailable_status=ORDER_STATUS_CA_UNAVAIL_FOR_ISSUE)
+def _run_ahead(orders, prepare, batch_method_name):
+    """Calls a batch method of the plugins for the orders, by plugin.
+
+    :param orders: List of (order_model, project_model) tuples.
+    :param prepare: Function of an order and its project returning the
+                    plugin, plugin metadata, barbican metadata and
+                    :class:`BarbicanMetaDTO` of its request.
+    :param batch_method_name: Name of the plugin method taking the list of
+                              requests.
+    """
+    results = getattr(_RESULTS_AHEAD, 'results', None)
+    if results is None:
+        results = _RESULTS_AHEAD.results = {}
+
+    requests_by_plugin = collections.OrderedDict()
+    for order_model, project_model in orders:
+        try:
+            prepared = prepare(order_model, project_model)
+        except Exception:
+            LOG.exception("Problem preparing the certificate request of "
+                          "order '%s' for a batch", order_model.id)
+            continue
+        plugin_name = utils.generate_fullname_for(prepared[0])
+        requests_by_plugin.setdefault(plugin_name, []).append(
+            (order_model,) + prepared)
+
+    for plugin_name, plugin_requests in requests_by_plugin.items():
+        cert_plugin = plugin_requests[0][1]
+        try:
+            plugin_results = _call_cert_plugin_batch(
+                cert_plugin, getattr(cert_plugin, batch_method_name),
+                [(order_model.id, order_model.meta, plugin_meta, dto)
+                 for order_model, _, plugin_meta, _, dto in plugin_requests])
+        except Exception:
+            LOG.exception("Problem calling '%(method)s' of plugin "
+                          "'%(plugin)s' for a batch of %(count)d orders",
+                          {'method': batch_method_name, 'plugin': plugin_name,
+                           'count': len(plugin_requests)})
+            continue
+        for request, result in zip(plugin_requests, plugin_results):
+            order_model, _, plugin_meta, barbican_meta, _ = request
+            results[order_model.id] = (plugin_meta, barbican_meta, result)
+
+
+def _take_result_ahead(order_id):
+    """Returns the metadata and result of an order's request made ahead.
+
+    An exception raised by the plugin for the request is raised again.
+    """
+    results = getattr(_RESULTS_AHEAD, 'results', None)
+    issued = results.pop(order_id, None) if results else None
+    if issued is not None and isinstance(issued[2], Exception):
+        raise issued[2]
+    return issued
+
+
+def clear_results_ahead():
+    """Drops the results of the requests made ahead by this thread."""
+    _RESULTS_AHEAD.results = {}
+
+
+def _call_cert_plugin(cert_plugin, method, *args):
+    """Calls a certificate plugin, guarded by the plugin's breaker.
+
+    A CA reported as unavailable counts as a failed call. While the breaker
+    is open, the CA is reported as unavailable without calling the plugin,
+    so that the order is retried later.
+    """
+    try:
+        with circuit_breaker.guard(cert_plugin) as call:
+            result = method(*args)
+            if (result.status ==
+                    cert.CertificateStatus.CA_UNAVAILABLE_FOR_REQUEST):
+                call.failed = True
+            return result
+    except excep.PluginBackendUnavailable as e:
+        return cert.ResultDTO(
+            cert.CertificateStatus.CA_UNAVAILABLE_FOR_REQUEST,
+            status_message=e.client_message,
+            retry_msec=cert.ERROR_RETRY_MSEC)
+
+
+def _call_cert_plugin_batch(cert_plugin, method, requests):
+    """Calls a batch method of a certificate plugin, guarded by its breaker.
+
+    The batch counts as a single call of the plugin, failed if the CA is
+    reported as unavailable for any of its requests.
+    """
+    unavailable = cert.CertificateStatus.CA_UNAVAILABLE_FOR_REQUEST
+    try:
+        with circuit_breaker.guard(cert_plugin) as call:
+            results = method(requests)
+            if any(getattr(result, 'status', None) == unavailable
+                   for result in results):
+                call.failed = True
+            return results
+    except excep.PluginBackendUnavailable as e:
+        return [cert.ResultDTO(unavailable,
+                               status_message=e.client_message,
+                               retry_msec=cert.ERROR_RETRY_MSEC)
+                for _ in requests]
 
 
 def _get_cert_plugin(barbican_meta, barbican_meta_for_plugins_dto,
@@ -152,6 +302,10 @@ def check_certificate_request(order_model, project_model, result_follow_on):
     required. Barbican metadata is used to store intermediate information,
     including selected plugins by name, to support such retries.
 
+    If the status of the request was checked ahead, in a batch, by
+    check_certificate_requests(), its result is used rather than checking
+    it again.
+
     :param: order_model - order associated with this cert request
     :param: project_model - project associated with this request
     :param: result_follow_on - A :class:`FollowOnProcessingStatusDTO` instance
@@ -160,6 +314,42 @@ def check_certificate_request(order_model, project_model, result_follow_on):
     :returns: container_model - container with the relevant cert if the
         request has been completed.  None otherwise.
     """
+    checked = _take_result_ahead(order_model.id)
+    if checked is not None:
+        plugin_meta, _, result = checked
+    else:
+        (cert_plugin, plugin_meta, _,
+         barbican_meta_for_plugins_dto) = _prepare_status_check(
+            order_model, project_model)
+        result = _call_cert_plugin(
+            cert_plugin, cert_plugin.check_certificate_status,
+            order_model.id, order_model.meta,
+            plugin_meta, barbican_meta_for_plugins_dto)
+
+    # Save plugin order plugin state
+    _save_plugin_metadata(order_model, plugin_meta)
+
+    request_type = order_model.meta.get(cert.REQUEST_TYPE)
+    return _handle_task_result(
+        result, result_follow_on, order_model, project_model, request_type,
+        unavailable_status=ORDER_STATUS_CA_UNAVAIL_FOR_CHECK)
+
+
+def check_certificate_requests(orders):
+    """Checks the status of the certificate requests of a batch of orders.
+
+    The requests pending on the same plugin are checked with a single
+    check_certificate_statuses() call of the plugin, which can poll them
+    in one pass. The results are kept for check_certificate_request() to
+    complete each order with, in a transaction of its own, until
+    clear_results_ahead() is called.
+
+    :param orders: List of (order_model, project_model) tuples.
+    """
+    _run_ahead(orders, _prepare_status_check, 'check_certificate_statuses')
+
+
+def _prepare_status_check(order_model, project_model):
     plugin_meta = _get_plugin_meta(order_model)
     barbican_meta = _get_barbican_meta(order_model)
 
@@ -169,17 +359,8 @@ def check_certificate_request(order_model, project_model, result_follow_on):
     cert_plugin = cert.CertificatePluginManager().get_plugin_by_name(
         barbican_meta.get('plugin_name'))
 
-    result = cert_plugin.check_certificate_status(
-        order_model.id, order_model.meta,
-        plugin_meta, barbican_meta_for_plugins_dto)
-
-    # Save plugin order plugin state
-    _save_plugin_metadata(order_model, plugin_meta)
-
-    request_type = order_model.meta.get(cert.REQUEST_TYPE)
-    return _handle_task_result(
-        result, result_follow_on, order_model, project_model, request_type,
-        unavailable_status=ORDER_STATUS_CA_UNAVAIL_FOR_CHECK)
+    return (cert_plugin, plugin_meta, barbican_meta,
+            barbican_meta_for_plugins_dto)
 
 
 def create_subordinate_ca(project_model, name, description, subject_dn,
@@ -408,6 +589,9 @@ def _update_result_follow_on(
 
 def _get_plugin_meta(order_model):
     if order_model:
+        meta = repos.get_loaded_metadata(order_model, 'order_plugin_metadata')
+        if meta is not None:
+            return meta
         order_plugin_meta_repo = repos.get_order_plugin_meta_repository()
         return order_plugin_meta_repo.get_metadata_for_order(order_model.id)
     else:
@@ -416,6 +600,10 @@ def _get_plugin_meta(order_model):
 
 def _get_barbican_meta(order_model):
     if order_model:
+        meta = repos.get_loaded_metadata(order_model,
+                                         'order_barbican_metadata')
+        if meta is not None:
+            return meta
         order_barbican_meta_repo = repos.get_order_barbican_meta_repository()
         return order_barbican_meta_repo.get_metadata_for_order(order_model.id)
     else:
@@ -17,6 +17,7 @@
 Task resources for the Barbican API.
 """
 import abc
+import threading
 
 import six
 
@@ -26,12 +27,90 @@ from barbican import i18n as u
 from barbican.model import models
 from barbican.model import repositories as rep
 from barbican.plugin import resources as plugin
+from barbican.queue import order_notifier
 from barbican.tasks import certificate_resources as cert
 from barbican.tasks import common
 
 
 LOG = utils.getLogger(__name__)
 
+# Orders prefetched by this thread (or green thread) for the batch of orders
+# it processes, see prefetch_orders().
+_PREFETCHED = threading.local()
+
+
+def prefetch_orders(order_ids):
+    """Loads a batch of orders to process, along with their relationships.
+
+    The orders are loaded with a few queries for the whole batch, and then
+    detached from the session, such that each order of the batch can later
+    be processed in a transaction of its own without loading it again.
+    Orders not processed by this thread are dropped by clear_prefetched().
+    """
+    orders = rep.get_order_repository().get_for_processing(order_ids)
+    _PREFETCHED.orders = {order.id: order for order in orders}
+    rep.clear()
+
+
+def issue_prefetched_certificate_requests(orders):
+    """Issues the certificate requests of prefetched orders in batches.
+
+    The requests of the pending certificate orders among the prefetched
+    ones are issued ahead, see certificate_resources.
+    issue_certificate_requests(), so that the requests for the same CA
+    plugin are issued together. Each order is then completed with its
+    result when it is processed.
+
+    :param orders: List of dicts with the order_id and project_id of each
+                   order, as passed to process_type_order().
+    """
+    cert_orders = _get_prefetched_certificate_orders(orders)
+    if cert_orders:
+        cert.issue_certificate_requests(cert_orders)
+
+
+def check_prefetched_certificate_statuses(orders):
+    """Checks the status of prefetched certificate orders in batches.
+
+    As issue_prefetched_certificate_requests(), but for the status checks
+    of certificate orders waiting on their CA, see certificate_resources.
+    check_certificate_requests().
+
+    :param orders: List of dicts with the order_id and project_id of each
+                   order, as passed to check_certificate_status().
+    """
+    cert_orders = _get_prefetched_certificate_orders(orders)
+    if cert_orders:
+        cert.check_certificate_requests(cert_orders)
+
+
+def _get_prefetched_certificate_orders(orders):
+    prefetched = getattr(_PREFETCHED, 'orders', None) or {}
+    cert_orders = []
+    for order in orders:
+        order_model = prefetched.get(order['order_id'])
+        if (order_model is not None and
+                order_model.project.external_id == order['project_id'] and
+                order_model.type == models.OrderType.CERTIFICATE and
+                order_model.status == models.States.PENDING):
+            cert_orders.append((order_model, order_model.project))
+    return cert_orders
+
+
+def clear_prefetched():
+    """Drops the orders prefetched, and their results, by this thread."""
+    _PREFETCHED.orders = {}
+    cert.clear_results_ahead()
+
+
+def _take_prefetched_order(order_id, external_project_id):
+    orders = getattr(_PREFETCHED, 'orders', None)
+    order = orders.pop(order_id, None) if orders else None
+    if order is None or order.project.external_id != external_project_id:
+        return None
+    # Attach the order to the current session, without querying it again.
+    return rep.get_session().merge(order, load=False)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class BaseTask(object):
@@ -95,6 +174,11 @@ class BaseTask(object):
                           "process task '%s'.", name)
             raise
 
+        if not self.is_processing_needed(entity, *args, **kwargs):
+            LOG.info("Entity was processed already, skipping task '%s'.",
+                     name)
+            return None
+
         # Process the target entity.
         try:
             result = self.handle_processing(entity, *args, **kwargs)
@@ -130,6 +214,16 @@ class BaseTask(object):
         :return: Entity instance to process in subsequent hook methods.
         """
 
+    def is_processing_needed(self, entity, *args, **kwargs):
+        """A hook method to skip entities which were processed already.
+
+        :param entity: Entity retrieved from _retrieve_entity() above.
+        :param args: List of arguments passed in from the client.
+        :param kwargs: Dict of arguments passed in from the client.
+        :return: False to skip processing the entity.
+        """
+        return True
+
     @abc.abstractmethod
     def handle_processing(self, entity, *args, **kwargs):
         """A hook method to handle processing on behalf of an entity.
@@ -183,13 +277,23 @@ class _OrderTaskHelper(object):
     """
     def __init__(self):
         self.order_repo = rep.get_order_repository()
+        self.project_repo = rep.get_project_repository()
 
     def retrieve_entity(self, order_id, external_project_id, *args, **kwargs):
         """Retrieve an order entity by its PK ID."""
+        order = _take_prefetched_order(order_id, external_project_id)
+        if order is not None:
+            return order
         return self.order_repo.get(
             entity_id=order_id,
             external_project_id=external_project_id)
 
+    def get_project(self, order):
+        """Retrieve the project of an order, unless prefetched."""
+        if rep.is_loaded(order, 'project'):
+            return order.project
+        return self.project_repo.get(order.project_id)
+
     def handle_error(self, order, status, message, exception,
                      *args, **kwargs):
         """Stamp the order entity as terminated due to an error."""
@@ -197,6 +301,8 @@ class _OrderTaskHelper(object):
         order.error_status_code = status
         order.set_error_reason_safely(message)
         self.order_repo.save(order)
+        order_notifier.notify_on_commit(self.order_repo.get_session(),
+                                        order.id)
 
     def handle_success(self, order, result, *args, **kwargs):
         """Handle if the order entity is terminated or else long running.
@@ -226,6 +332,9 @@ class _OrderTaskHelper(object):
             order.set_sub_status_message_safely(sub_status_message)
 
         self.order_repo.save(order)
+        if not is_follow_on_needed:
+            order_notifier.notify_on_commit(self.order_repo.get_session(),
+                                            order.id)
 
 
 class BeginTypeOrder(BaseTask):
@@ -237,12 +346,15 @@ class BeginTypeOrder(BaseTask):
     def __init__(self):
         super(BeginTypeOrder, self).__init__()
         LOG.debug('Creating BeginTypeOrder task processor')
-        self.project_repo = rep.get_project_repository()
         self.helper = _OrderTaskHelper()
 
     def retrieve_entity(self, *args, **kwargs):
         return self.helper.retrieve_entity(*args, **kwargs)
 
+    def is_processing_needed(self, order, *args, **kwargs):
+        # Orders are left PENDING only while there is more to process.
+        return order.status == models.States.PENDING
+
     def handle_processing(self, order, *args, **kwargs):
         return self.handle_order(order)
 
@@ -270,7 +382,7 @@ class BeginTypeOrder(BaseTask):
             meta_info.setdefault('creator_id', order_info.get('creator_id'))
 
         # Retrieve the project.
-        project = self.project_repo.get(order.project_id)
+        project = self.helper.get_project(order)
 
         if order_type == models.OrderType.KEY:
             # Create Secret
@@ -393,7 +505,7 @@ class CheckCertificateStatusOrder(BaseTask):
         order_type = order_info.get('type')
 
         # Retrieve the project.
-        project = self.project_repo.get(order.project_id)
+        project = self.helper.get_project(order)
 
         if order_type != models.OrderType.CERTIFICATE:
             raise NotImplementedError(
@@ -17,9 +17,11 @@ import uuid
 
 import mock
 
+from barbican.common import config
 from barbican.common import resources
 from barbican.model import models
 from barbican.model import repositories
+from barbican.queue import order_notifier
 from barbican.tests.api.controllers import test_acls
 from barbican.tests.api import test_resources_policy as test_policy
 from barbican.tests import utils
@@ -212,6 +214,150 @@ class WhenGettingOrDeletingOrders(utils.BarbicanAPIBaseTestCase):
         self.assertEqual(404, resp.status_int)
 
 
+@utils.parameterized_test_case
+class WhenWaitingForOrders(utils.BarbicanAPIBaseTestCase):
+
+    def setUp(self):
+        super(WhenWaitingForOrders, self).setUp()
+        _, self.order_uuid = create_order(
+            self.app,
+            order_type='key',
+            meta=generic_key_meta
+        )
+        self._set_status(models.States.PENDING)
+
+        self.clock = [1000.0]
+        patcher = mock.patch('time.time', side_effect=lambda: self.clock[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(order_notifier.OrderNotifier, 'wait')
+        self.mock_wait = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self._set_override('order_wait_max_seconds', 30)
+
+    def _set_status(self, status):
+        order = order_repo.get(self.order_uuid, self.project_id)
+        order.status = status
+        order_repo.save(order)
+        repositories.commit()
+
+    def _set_override(self, name, value):
+        config.CONF.set_override(name, value)
+        self.addCleanup(config.CONF.clear_override, name)
+
+    def test_returns_once_order_is_done(self):
+        def finish_order(order_id, timeout):
+            self._set_status(models.States.ACTIVE)
+            return True
+        self.mock_wait.side_effect = finish_order
+
+        resp = self.app.get('/orders/{0}?wait=10'.format(self.order_uuid))
+
+        self.assertEqual(200, resp.status_int)
+        self.assertEqual(models.States.ACTIVE, resp.json['status'])
+        self.mock_wait.assert_called_once_with(self.order_uuid, 1.0)
+
+    def test_returns_pending_order_once_wait_elapsed(self):
+        def advance_clock(order_id, timeout):
+            self.clock[0] += timeout
+            return False
+        self.mock_wait.side_effect = advance_clock
+        self._set_override('order_wait_poll_interval', 2)
+
+        resp = self.app.get('/orders/{0}?wait=5'.format(self.order_uuid))
+
+        self.assertEqual(200, resp.status_int)
+        self.assertEqual(models.States.PENDING, resp.json['status'])
+        self.assertEqual(
+            [mock.call(self.order_uuid, 2), mock.call(self.order_uuid, 2),
+             mock.call(self.order_uuid, 1)],
+            self.mock_wait.call_args_list)
+
+    def test_wait_is_bounded(self):
+        self._set_override('order_wait_max_seconds', 0)
+
+        resp = self.app.get('/orders/{0}?wait=10'.format(self.order_uuid))
+
+        self.assertEqual(models.States.PENDING, resp.json['status'])
+        self.assertFalse(self.mock_wait.called)
+
+    def test_wait_is_ignored_by_default(self):
+        config.CONF.clear_override('order_wait_max_seconds')
+
+        resp = self.app.get('/orders/{0}?wait=10'.format(self.order_uuid))
+
+        self.assertEqual(models.States.PENDING, resp.json['status'])
+        self.assertFalse(self.mock_wait.called)
+
+    def test_does_not_wait_beyond_max_requests(self):
+        self._set_override('order_wait_max_requests', 1)
+        notifier = order_notifier.get_order_notifier()
+        self.assertTrue(notifier.start_waiting(1))
+        self.addCleanup(notifier.stop_waiting)
+
+        resp = self.app.get('/orders/{0}?wait=10'.format(self.order_uuid))
+
+        self.assertEqual(models.States.PENDING, resp.json['status'])
+        self.assertFalse(self.mock_wait.called)
+
+    def test_releases_waiting_slot_once_done(self):
+        def finish_order(order_id, timeout):
+            self._set_status(models.States.ACTIVE)
+            return True
+        self.mock_wait.side_effect = finish_order
+        self._set_override('order_wait_max_requests', 1)
+
+        self.app.get('/orders/{0}?wait=10'.format(self.order_uuid))
+
+        notifier = order_notifier.get_order_notifier()
+        self.assertTrue(notifier.start_waiting(1))
+        notifier.stop_waiting()
+
+    def test_returns_400_with_repeated_wait(self):
+        resp = self.app.get(
+            '/orders/{0}?wait=1&wait=2'.format(self.order_uuid),
+            expect_errors=True)
+
+        self.assertEqual(400, resp.status_int)
+        self.assertFalse(self.mock_wait.called)
+
+    def test_does_not_wait_for_order_done(self):
+        self._set_status(models.States.ERROR)
+
+        resp = self.app.get('/orders/{0}?wait=10'.format(self.order_uuid))
+
+        self.assertEqual(models.States.ERROR, resp.json['status'])
+        self.assertFalse(self.mock_wait.called)
+
+    def test_returns_404_if_order_deleted_while_waiting(self):
+        def delete_order(order_id, timeout):
+            order_repo.delete_entity_by_id(order_id, self.project_id)
+            repositories.commit()
+            return True
+        self.mock_wait.side_effect = delete_order
+
+        resp = self.app.get('/orders/{0}?wait=10'.format(self.order_uuid),
+                            expect_errors=True)
+
+        self.assertEqual(404, resp.status_int)
+
+    @utils.parameterized_dataset({
+        'not_a_number': ['soon'],
+        'negative': ['-1'],
+        'infinite': ['inf'],
+        'nan': ['nan'],
+    })
+    def test_returns_400_with_invalid_wait(self, wait):
+        resp = self.app.get(
+            '/orders/{0}?wait={1}'.format(self.order_uuid, wait),
+            expect_errors=True)
+
+        self.assertEqual(400, resp.status_int)
+        self.assertFalse(self.mock_wait.called)
+
+
 @utils.parameterized_test_case
 class WhenPuttingAnOrderWithMetadata(utils.BarbicanAPIBaseTestCase):
     def setUp(self):
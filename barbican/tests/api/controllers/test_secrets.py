@@ -155,9 +155,26 @@ class WhenTestingSecretsResource(utils.BarbicanAPIBaseTestCase):
             secret_model=mock.ANY,
             project_model=mock.ANY,
             transport_key_id=transport_key_id,
-            transport_key_needed=False
+            transport_key_needed=False,
+            unencrypted_bytes=None
         )
 
+    @mock.patch('barbican.plugin.resources.store_secret')
+    def test_new_secret_carries_decoded_base64_payload(self, mocked_store):
+        mocked_store.return_value = models.Secret(), None
+
+        resp, _ = create_secret(
+            self.app,
+            payload='bXktc2VjcmV0LWhlcmU=',
+            content_type='application/octet-stream',
+            content_encoding='base64'
+        )
+
+        self.assertEqual(201, resp.status_int)
+        args, kwargs = mocked_store.call_args
+        self.assertEqual('bXktc2VjcmV0LWhlcmU=', kwargs['unencrypted_raw'])
+        self.assertEqual(b'my-secret-here', kwargs['unencrypted_bytes'])
+
     def test_new_secret_fails_with_invalid_transport_key_ref(self):
         resp, _ = create_secret(
             self.app,
@@ -240,6 +257,46 @@ class WhenGettingSecretsList(utils.BarbicanAPIBaseTestCase):
         secret_list = get_resp.json.get('secrets')
         self.assertGreater(len(secret_list), 0)
 
+    def test_list_entry_matches_secret_metadata(self):
+        create_resp, secret_uuid = create_secret(
+            self.app,
+            name='Felix Leiter',
+            algorithm='aes',
+            bit_length=256,
+            mode='cbc',
+            expiration='2099-02-28T19:14:44.180394'
+        )
+        self.assertEqual(201, create_resp.status_int)
+
+        list_resp = self.app.get('/secrets/', {'name': 'Felix Leiter'})
+        get_resp = self.app.get('/secrets/{0}'.format(secret_uuid),
+                                headers={'Accept': 'application/json'})
+
+        self.assertEqual('application/json', list_resp.content_type)
+        self.assertEqual([get_resp.json], list_resp.json['secrets'])
+
+    def test_list_secrets_by_metadata(self):
+        for name, env in (('prod secret', 'prod'), ('dev secret', 'dev')):
+            create_resp, secret_uuid = create_secret(self.app, name=name)
+            self.assertEqual(201, create_resp.status_int)
+            meta_resp = self.app.put_json(
+                '/secrets/{0}/metadata'.format(secret_uuid),
+                {'metadata': {'env': env, 'team': 'a'}})
+            self.assertEqual(201, meta_resp.status_int)
+
+        params = {'metadata.ENV': 'prod', 'metadata.team': 'a'}
+        get_resp = self.app.get('/secrets/', params)
+
+        self.assertEqual(200, get_resp.status_int)
+        self.assertEqual(1, get_resp.json['total'])
+        self.assertEqual(['prod secret'],
+                         [s['name'] for s in get_resp.json['secrets']])
+
+    def test_bad_metadata_filter_results_in_400(self):
+        params = {'metadata.': 'prod'}
+        get_resp = self.app.get('/secrets/', params, expect_errors=True)
+        self.assertEqual(400, get_resp.status_int)
+
     def test_pagination_attributes(self):
         # Create a list of secrets greater than default limit (10)
         for _ in range(11):
@@ -14,6 +14,7 @@
 # limitations under the License.
 import mock
 import oslotest.base as oslotest
+import webob
 
 from barbican.api.middleware import context
 
@@ -60,3 +61,26 @@ class TestUnauthenticatedContextMiddleware(oslotest.BaseTestCase):
                 domain=None,
                 user_domain=None
             )
+
+
+class TestContextMiddleware(oslotest.BaseTestCase):
+
+    def setUp(self):
+        super(TestContextMiddleware, self).setUp()
+        self.app = mock.MagicMock()
+        self.middleware = context.ContextMiddleware(self.app)
+
+    @mock.patch('barbican.common.access_log.log_request')
+    def test_access_logs_unauthenticated_request(self, mock_log_request):
+        request = webob.Request.blank('/v1/secrets')
+        request.headers['x-openstack-request-id'] = 'req-1234'
+
+        response = request.get_response(self.middleware)
+
+        self.assertEqual(401, response.status_int)
+        self.assertEqual('req-1234',
+                         response.headers['x-openstack-request-id'])
+        self.assertFalse(self.app.called)
+        mock_log_request.assert_called_once_with(mock.ANY, mock.ANY)
+        self.assertEqual(401,
+                         mock_log_request.call_args[0][1].status_int)
@@ -0,0 +1,149 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import pstats
+import time
+
+import fixtures
+import mock
+from oslo_serialization import jsonutils as json
+import sqlalchemy
+import webob
+import webob.dec
+
+from barbican.api.middleware import profiling
+from barbican.plugin.util import circuit_breaker
+from barbican.tests import utils
+
+
+class _Plugin(object):
+
+    def get_secret(self):
+        return 'secret'
+
+
+class WhenProfilingRequests(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenProfilingRequests, self).setUp()
+        self.output_dir = self.useFixture(fixtures.TempDir()).path
+        self._set_override('enabled', True)
+        self._set_override('output_dir', self.output_dir)
+        self._set_override('hmac_keys', ['key1'])
+        self.addCleanup(circuit_breaker.remove_call_observer,
+                        profiling._observe_plugin_call)
+
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        self.plugin = _Plugin()
+        self.middleware = profiling.ProfilingMiddleware.factory({})(
+            self._app)
+
+    def _set_override(self, name, value):
+        profiling.CONF.set_override(name, value, group='profiling')
+        self.addCleanup(profiling.CONF.clear_override, name,
+                        group='profiling')
+
+    @webob.dec.wsgify
+    def _app(self, req):
+        self.engine.execute('SELECT 1')
+        circuit_breaker.call(self.plugin, self.plugin.get_secret)
+        return webob.Response('ok')
+
+    def _request(self, header=None, request_id='req-1234', **environ):
+        req = webob.Request.blank('/v1/secrets', environ=environ)
+        req.request_id = request_id
+        if header:
+            req.headers[profiling.PROFILE_HEADER] = header
+        return req.get_response(self.middleware)
+
+    def _get_profiles(self):
+        return sorted(os.listdir(self.output_dir))
+
+    def test_app_left_unwrapped_when_disabled(self):
+        self._set_override('enabled', False)
+        app = mock.MagicMock()
+
+        self.assertIs(app, profiling.ProfilingMiddleware.factory({})(app))
+
+    def test_requires_output_dir_when_enabled(self):
+        self._set_override('output_dir', None)
+
+        self.assertRaises(ValueError,
+                          profiling.ProfilingMiddleware.factory({}),
+                          mock.MagicMock())
+
+    def test_profiles_signed_request(self):
+        resp = self._request(profiling.sign('key1', time.time() + 60))
+
+        self.assertEqual(200, resp.status_int)
+        self.assertEqual(['req-1234.json', 'req-1234.prof'],
+                         self._get_profiles())
+        pstats.Stats(os.path.join(self.output_dir, 'req-1234.prof'))
+        with open(os.path.join(self.output_dir, 'req-1234.json')) as f:
+            summary = json.loads(f.read())
+        self.assertEqual('req-1234', summary['request_id'])
+        self.assertEqual(200, summary['status'])
+        self.assertEqual(1, summary['sql']['count'])
+        self.assertEqual('SELECT 1',
+                         summary['sql']['statements'][0]['statement'])
+        self.assertEqual(1, len(summary['plugin_calls']))
+        self.assertIn('_Plugin', summary['plugin_calls'][0]['plugin'])
+
+    def test_ignores_invalid_or_expired_signatures(self):
+        self._request(profiling.sign('key2', time.time() + 60))
+        self._request(profiling.sign('key1', time.time() - 60))
+        self._request('garbage')
+
+        self.assertEqual([], self._get_profiles())
+
+    def test_profiles_admin_request_when_allowed(self):
+        ctx = mock.MagicMock(is_admin=True)
+        self._request('admin', **{'barbican.context': ctx})
+        self.assertEqual([], self._get_profiles())
+
+        self._set_override('allow_admin', True)
+        self._request('admin', **{'barbican.context': ctx})
+        self.assertEqual(['req-1234.json', 'req-1234.prof'],
+                         self._get_profiles())
+
+    def test_profiles_sampled_request(self):
+        self._set_override('sample_rate', 1.0)
+
+        self._request()
+
+        self.assertEqual(2, len(self._get_profiles()))
+
+    def test_replaces_unsafe_request_id(self):
+        self._set_override('sample_rate', 1.0)
+
+        self._request(request_id='../../etc/passwd')
+
+        profiles = self._get_profiles()
+        self.assertEqual(2, len(profiles))
+        self.assertTrue(profiles[0].startswith('req-'))
+
+    def test_forgets_start_of_failed_statements(self):
+        profiling._REQUEST_STATE.recorder = profiling._Recorder()
+        self.addCleanup(setattr, profiling._REQUEST_STATE, 'recorder', None)
+
+        with self.engine.connect() as conn:
+            self.assertRaises(sqlalchemy.exc.OperationalError,
+                              conn.execute, 'SELECT * FROM missing')
+
+            self.assertNotIn('barbican_profile_start', conn.info)
+
+    def test_does_not_record_unprofiled_requests(self):
+        self._request()
+
+        self.assertEqual([], self._get_profiles())
+        self.assertIsNone(getattr(profiling._REQUEST_STATE, 'recorder', None))
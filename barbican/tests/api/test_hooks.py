@@ -0,0 +1,103 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import webob
+
+from barbican.api import hooks
+from barbican.tests import utils
+
+
+class WhenRoutingReadOnlyRequests(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenRoutingReadOnlyRequests, self).setUp()
+        self.hook = hooks.BarbicanTransactionHook()
+        self.hook.start = mock.MagicMock()
+        self.hook.start_ro = mock.MagicMock()
+
+    def _build_state(self, path, method='GET', accept='application/json',
+                     project='project1'):
+        request = webob.Request.blank(path, method=method)
+        if accept:
+            request.accept = accept
+        if project:
+            request.environ['barbican.context'] = mock.MagicMock(
+                project=project)
+        return mock.MagicMock(request=request, controller=None)
+
+    def test_should_allow_replica_for_metadata_reads(self):
+        for path in ('/secrets', '/secrets/123', '/secrets/123/acl',
+                     '/secrets/123/metadata', '/containers',
+                     '/containers/123/consumers', '/cas', '/quotas',
+                     '/project-quotas/123'):
+            state = self._build_state(path)
+            self.assertTrue(self.hook.is_read_only_safe(state.request),
+                            path)
+
+    def test_should_not_allow_replica_for_payload_reads(self):
+        state = self._build_state('/secrets/123/payload')
+        self.assertFalse(self.hook.is_read_only_safe(state.request))
+
+        state = self._build_state('/secrets/123',
+                                  accept='application/octet-stream')
+        self.assertFalse(self.hook.is_read_only_safe(state.request))
+
+    def test_should_not_allow_replica_for_other_resources(self):
+        for path in ('/', '/orders', '/orders/123', '/transport_keys',
+                     '/secret-stores'):
+            state = self._build_state(path)
+            self.assertFalse(self.hook.is_read_only_safe(state.request),
+                             path)
+
+    def test_should_start_read_only_with_project_on_route(self):
+        state = self._build_state('/secrets')
+
+        self.hook.on_route(state)
+
+        self.hook.start_ro.assert_called_once_with(
+            external_project_id='project1', use_replica=True)
+        self.assertFalse(self.hook.start.called)
+        self.assertFalse(state.request.transactional)
+
+    def test_should_start_read_write_for_post(self):
+        state = self._build_state('/secrets', method='POST')
+
+        self.hook.on_route(state)
+
+        self.hook.start.assert_called_once_with()
+        self.assertFalse(self.hook.start_ro.called)
+
+    @mock.patch('barbican.model.repositories.record_project_write')
+    def test_should_record_project_write_after_commit(self, mock_record):
+        self.hook.commit = mock.MagicMock()
+        self.hook.clear = mock.MagicMock()
+        state = self._build_state('/secrets', method='POST')
+        self.hook.on_route(state)
+
+        self.hook.after(state)
+
+        self.hook.commit.assert_called_once_with()
+        mock_record.assert_called_once_with('project1')
+
+    @mock.patch('barbican.model.repositories.record_project_write')
+    def test_should_not_record_project_write_on_error(self, mock_record):
+        self.hook.rollback = mock.MagicMock()
+        self.hook.clear = mock.MagicMock()
+        state = self._build_state('/secrets', method='POST')
+        self.hook.on_route(state)
+        state.request.error = True
+
+        self.hook.after(state)
+
+        self.hook.rollback.assert_called_once_with()
+        self.assertFalse(mock_record.called)
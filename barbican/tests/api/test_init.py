@@ -14,11 +14,15 @@
 """
 This test module tests the barbican.api.__init__.py module functionality.
 """
-import mock
+import io
 
+import mock
 from oslo_serialization import jsonutils as json
+import webob.exc
 
 from barbican import api
+from barbican.api import controllers
+from barbican.common import access_log
 from barbican.common import exception
 from barbican.plugin.interface import secret_store
 from barbican.tests import utils
@@ -35,6 +39,7 @@ class WhenInvokingLoadBodyFunction(utils.BaseTestCase):
         mock_pecan_abort.side_effect = ValueError('Abort!')
 
         req = mock.MagicMock()
+        req.content_length = None
         req.body_file = mock.MagicMock()
         req.body_file.read.side_effect = IOError('Dummy IOError')
 
@@ -51,8 +56,8 @@ class WhenInvokingLoadBodyFunction(utils.BaseTestCase):
         body = json.dumps({'key1': 'value1'})
 
         req = mock.MagicMock()
-        req.body_file = mock.MagicMock()
-        req.body_file.read.return_value = body
+        req.content_length = None
+        req.body_file = io.BytesIO(body.encode('utf-8'))
 
         validator = mock.MagicMock()
         validator.validate.side_effect = exception.UnsupportedField('Field')
@@ -63,6 +68,51 @@ class WhenInvokingLoadBodyFunction(utils.BaseTestCase):
         self.assertEqual('Abort!', str(exception_result))
         validator.validate.assert_called_once_with(json.loads(body))
 
+    def _limit_request_size(self, size):
+        api.CONF.set_override('max_allowed_request_size_in_bytes', size)
+        self.addCleanup(api.CONF.clear_override,
+                        'max_allowed_request_size_in_bytes')
+
+    def _make_req(self, body, content_length=None):
+        req = mock.MagicMock()
+        req.content_length = content_length
+        req.body_file = io.BytesIO(body)
+        return req
+
+    def test_should_raise_limit_exceeded_for_large_body(self):
+        self._limit_request_size(10)
+        req = self._make_req(b'{"key1": "value1"}')
+
+        self.assertRaises(exception.LimitExceeded, api.load_body, req)
+
+    def test_should_raise_limit_exceeded_before_reading_large_body(self):
+        self._limit_request_size(10)
+        req = self._make_req(b'{"key1": "value1"}', content_length=18)
+
+        self.assertRaises(exception.LimitExceeded, api.load_body, req)
+        self.assertEqual(0, req.body_file.tell())
+
+
+class WhenInvokingIterBodyFunction(utils.BaseTestCase):
+    """Tests the iter_body function."""
+
+    def test_should_read_body_in_bounded_chunks(self):
+        req = mock.MagicMock()
+        req.content_length = None
+        req.body_file = io.BytesIO(b'x' * (api.BODY_CHUNK_SIZE + 1))
+
+        chunks = list(api.iter_body(req, api.BODY_CHUNK_SIZE + 1))
+
+        self.assertEqual([api.BODY_CHUNK_SIZE, 1],
+                         [len(chunk) for chunk in chunks])
+
+    def test_should_allow_body_of_max_size(self):
+        req = mock.MagicMock()
+        req.content_length = None
+        req.body_file = io.BytesIO(b'x' * 10)
+
+        self.assertEqual(b'x' * 10, api.read_body(req, 10))
+
 
 class WhenInvokingGenerateSafeExceptionMessageFunction(utils.BaseTestCase):
     """Tests the generate_safe_exception_message function."""
@@ -97,3 +147,45 @@ class WhenInvokingGenerateSafeExceptionMessageFunction(utils.BaseTestCase):
         self.assertEqual("operation issue seen - content-encoding of "
                          "'application/octet-stream' not "
                          "supported.", message)
+
+
+class WhenHandlingControllerExceptions(utils.BaseTestCase):
+    """Tests the logging of the handle_exceptions decorator."""
+
+    def setUp(self):
+        super(WhenHandlingControllerExceptions, self).setUp()
+        patcher = mock.patch.object(controllers, 'LOG')
+        self.log = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('pecan.abort')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(access_log.reset)
+
+    def _handle(self, excep):
+        @controllers.handle_exceptions('Operation')
+        def fn(inst):
+            raise excep
+        try:
+            fn(None)
+        except Exception:
+            pass
+
+    def test_client_errors_are_logged_without_traceback(self):
+        self._handle(exception.InvalidSubjectDN(subject_dn='cn=x'))
+        self._handle(webob.exc.HTTPNotFound())
+
+        self.assertEqual(2, self.log.info.call_count)
+        self.assertFalse(self.log.exception.called)
+
+    def test_server_error_tracebacks_are_rate_limited(self):
+        access_log.CONF.set_override('exception_burst', 1,
+                                     group='access_log')
+        self.addCleanup(access_log.CONF.clear_override, 'exception_burst',
+                        group='access_log')
+
+        for _ in range(3):
+            self._handle(ValueError())
+
+        self.assertEqual(1, self.log.exception.call_count)
+        self.assertEqual(2, self.log.error.call_count)
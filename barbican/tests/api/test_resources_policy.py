@@ -32,6 +32,7 @@ from barbican.api.controllers import versions
 from barbican.common import config
 from barbican import context
 from barbican.model import models
+from barbican.model import repositories
 from barbican.tests import utils
 
 
@@ -339,6 +340,11 @@ class WhenTestingSecretResource(BaseTestCase):
         secret.project.external_id = self.external_project_id
         secret.creator_id = self.creator_user_id
 
+        acl_repo = mock.MagicMock()
+        acl_repo.get_acl_summary.side_effect = (
+            lambda entity: repositories.summarize_acls(self.acl_list))
+        self.setup_secret_acl_repository_mock(acl_repo)
+
         self.resource = SecretResource(secret)
 
         # self.resource.controller.get_acl_tuple = mock.MagicMock(
@@ -732,6 +738,11 @@ class WhenTestingContainerResource(BaseTestCase):
 
         self.container_repo.get_container_by_id.return_value = container
 
+        acl_repo = mock.MagicMock()
+        acl_repo.get_acl_summary.side_effect = (
+            lambda entity: repositories.summarize_acls(self.acl_list))
+        self.setup_container_acl_repository_mock(acl_repo)
+
         self.setup_container_repository_mock(self.container_repo)
 
         self.resource = ContainerResource(container)
@@ -119,6 +119,85 @@ class TestBarbicanManage(TestBarbicanManageBase):
             log_file='/tmp/whatevs')
         manager.CONF.clear_override('log_file')
 
+    @mock.patch('barbican.plugin.kek_rotation.rotate_command')
+    def test_kek_rotate(self, mock_rotate_command):
+        self._main_test_helper(
+            ['barbican.cmd.barbican_manage', 'kek', 'rotate',
+             '--project-id', 'project1'],
+            func_name=mock_rotate_command,
+            sql_url='mockdburl',
+            external_project_id='project1',
+            plugin_name=None,
+            reencrypt=True,
+            batch_size=100,
+            max_rate=50)
+
+    @mock.patch('barbican.plugin.kek_rotation.rotate_command')
+    def test_kek_rotate_with_args(self, mock_rotate_command):
+        self._main_test_helper(
+            ['barbican.cmd.barbican_manage', 'kek', 'rotate',
+             '--db-url', 'somewhere', '--project-id', 'project1',
+             '--plugin-name', 'plugin', '--no-reencrypt',
+             '--batch-size', '10', '--max-rate', '0'],
+            func_name=mock_rotate_command,
+            sql_url='somewhere',
+            external_project_id='project1',
+            plugin_name='plugin',
+            reencrypt=False,
+            batch_size=10,
+            max_rate=0)
+
+    @mock.patch('barbican.plugin.kek_rotation.reencrypt_command')
+    def test_kek_reencrypt(self, mock_reencrypt_command):
+        self._main_test_helper(
+            ['barbican.cmd.barbican_manage', 'kek', 'reencrypt',
+             '--project-id', 'project1', '--max-rate', '20'],
+            func_name=mock_reencrypt_command,
+            sql_url='mockdburl',
+            external_project_id='project1',
+            plugin_name=None,
+            batch_size=100,
+            max_rate=20)
+
+    @mock.patch('barbican.plugin.kek_rotation.status_command')
+    def test_kek_status(self, mock_status_command):
+        self._main_test_helper(
+            ['barbican.cmd.barbican_manage', 'kek', 'status',
+             '--project-id', 'project1'],
+            func_name=mock_status_command,
+            sql_url='mockdburl',
+            external_project_id='project1')
+
+    @mock.patch('barbican.plugin.secret_migration.migrate_command')
+    def test_secretstore_migrate(self, mock_migrate_command):
+        self._main_test_helper(
+            ['barbican.cmd.barbican_manage', 'secretstore', 'migrate',
+             '--target-store', 'store2', '--project-id', 'project1'],
+            func_name=mock_migrate_command,
+            sql_url='mockdburl',
+            target_store='store2',
+            external_project_id='project1',
+            source_store=None,
+            workers=4,
+            per_store_concurrency=2,
+            page_size=100)
+
+    @mock.patch('barbican.plugin.secret_migration.migrate_command')
+    def test_secretstore_migrate_with_args(self, mock_migrate_command):
+        self._main_test_helper(
+            ['barbican.cmd.barbican_manage', 'secretstore', 'migrate',
+             '--db-url', 'somewhere', '--target-store', 'store2',
+             '--source-store', 'store1', '--workers', '0',
+             '--per-store', '1', '--batch-size', '10'],
+            func_name=mock_migrate_command,
+            sql_url='somewhere',
+            target_store='store2',
+            external_project_id=None,
+            source_store='store1',
+            workers=0,
+            per_store_concurrency=1,
+            page_size=10)
+
     @mock.patch('barbican.model.migration.commands.current')
     def test_db_current(self, mock_current):
         self._main_test_helper(
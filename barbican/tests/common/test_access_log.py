@@ -0,0 +1,196 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import itertools
+import logging
+
+import mock
+from six.moves import queue
+import sqlalchemy
+
+from barbican.common import access_log
+from barbican.tests import utils
+
+
+class _ListHandler(logging.Handler):
+
+    def __init__(self):
+        super(_ListHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class WhenAccessLoggingRequests(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenAccessLoggingRequests, self).setUp()
+        patcher = mock.patch.object(access_log, 'ACCESS_LOG')
+        self.access_log = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.req = mock.MagicMock(
+            method='GET', request_id='req-1234',
+            path='/v1/secrets/1f3b8c2e-6a4d-4e7f-9b0a-2c5d8e1f4a7b/payload')
+        self.req.environ = {'barbican.context': mock.MagicMock(
+            project='project1')}
+        self.resp = mock.MagicMock(status='200 OK', status_code=200)
+
+    def _set_override(self, name, value):
+        access_log.CONF.set_override(name, value, group='access_log')
+        self.addCleanup(access_log.CONF.clear_override, name,
+                        group='access_log')
+
+    def test_logs_structured_fields(self):
+        with mock.patch('time.time', side_effect=[10.0, 10.25]):
+            access_log.start_request()
+            access_log.log_request(self.req, self.resp)
+
+        kwargs = self.access_log.info.call_args[1]
+        self.assertEqual('req-1234', kwargs['request_id'])
+        self.assertEqual('project1', kwargs['project_id'])
+        self.assertEqual('/v1/secrets/{id}/payload', kwargs['route'])
+        self.assertEqual(200, kwargs['status'])
+        self.assertEqual(250.0, kwargs['latency_ms'])
+        self.assertEqual(0.0, kwargs['db_ms'])
+
+    def test_samples_successful_requests(self):
+        self._set_override('success_sample_rate', 0.0)
+        access_log.start_request()
+
+        access_log.log_request(self.req, self.resp)
+
+        self.assertFalse(self.access_log.info.called)
+
+    def test_always_logs_failed_requests(self):
+        self._set_override('success_sample_rate', 0.0)
+        self.resp.status_code = 404
+        access_log.start_request()
+
+        access_log.log_request(self.req, self.resp)
+
+        self.assertTrue(self.access_log.info.called)
+
+    def test_always_logs_slow_requests(self):
+        self._set_override('success_sample_rate', 0.0)
+        self._set_override('slow_request_ms', 100)
+
+        with mock.patch('time.time', side_effect=[10.0, 10.1]):
+            access_log.start_request()
+            access_log.log_request(self.req, self.resp)
+
+        self.assertTrue(self.access_log.info.called)
+
+    def test_accounts_database_time(self):
+        access_log.enable_db_timing()
+        engine = sqlalchemy.create_engine('sqlite://')
+
+        # Every reading of the clock is 10ms after the previous one.
+        with mock.patch('time.time', side_effect=itertools.count(10, 0.01)):
+            access_log.start_request()
+            engine.execute('SELECT 1')
+            access_log.log_request(self.req, self.resp)
+
+        self.assertGreater(self.access_log.info.call_args[1]['db_ms'], 0)
+
+    def test_forgets_start_of_failed_statements(self):
+        access_log.enable_db_timing()
+        engine = sqlalchemy.create_engine('sqlite://')
+        access_log.start_request()
+        self.addCleanup(access_log.end_request)
+
+        with engine.connect() as conn:
+            self.assertRaises(sqlalchemy.exc.OperationalError,
+                              conn.execute, 'SELECT * FROM missing')
+
+            self.assertNotIn('barbican_query_start', conn.info)
+
+    def test_get_route_keeps_non_id_segments(self):
+        self.assertEqual('/v1/secrets', access_log.get_route('/v1/secrets'))
+        self.assertEqual('/v1/orders/{id}',
+                         access_log.get_route('/v1/orders/12'))
+
+
+class WhenQueueingLogRecords(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenQueueingLogRecords, self).setUp()
+        self.queue = queue.Queue(1)
+        self.handler = access_log.QueueHandler(self.queue)
+        self.target = _ListHandler()
+
+    def _record(self, msg, args):
+        return logging.LogRecord('test', logging.INFO, __file__, 1, msg,
+                                 args, None)
+
+    def test_resolves_message_before_queueing(self):
+        values = {'name': 'first'}
+        self.handler.handle(self._record('%(name)s', (values,)))
+        values['name'] = 'second'
+
+        record = self.queue.get_nowait()
+        self.assertEqual('first', record.getMessage())
+
+    def test_drops_records_while_full(self):
+        self.handler.handle(self._record('one', None))
+        self.handler.handle(self._record('two', None))
+
+        self.assertEqual(1, self.handler.dropped)
+
+    def test_listener_writes_out_records_and_drop_count(self):
+        listener = access_log.QueueListener(self.queue, [self.target],
+                                            self.handler)
+        self.handler.handle(self._record('one', None))
+        self.handler.handle(self._record('two', None))
+
+        listener.start()
+        listener.stop()
+
+        self.assertEqual('one', self.target.records[0].getMessage())
+        self.assertIn('1 log records were dropped',
+                      self.target.records[1].getMessage())
+        self.assertEqual(0, self.handler.dropped)
+
+
+class WhenRateLimitingExceptions(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenRateLimitingExceptions, self).setUp()
+        patcher = mock.patch('time.time', return_value=1000)
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = access_log.ExceptionLogLimiter(burst=2, interval=60)
+
+    def test_limits_tracebacks_per_key(self):
+        self.assertEqual((True, 0), self.limiter.acquire('a'))
+        self.assertEqual((True, 0), self.limiter.acquire('a'))
+        self.assertEqual((False, 1), self.limiter.acquire('a'))
+        self.assertEqual((True, 0), self.limiter.acquire('b'))
+
+    def test_reports_suppressed_count_in_next_interval(self):
+        for _ in range(4):
+            self.limiter.acquire('a')
+        self.mock_time.return_value += 60
+
+        self.assertEqual((True, 2), self.limiter.acquire('a'))
+
+    def test_log_exception_logs_error_without_traceback_once_limited(self):
+        logger = mock.MagicMock()
+        self.addCleanup(access_log.reset)
+        with mock.patch.object(access_log, '_EXCEPTION_LIMITER',
+                               self.limiter):
+            for _ in range(3):
+                access_log.log_exception(logger, 'Failure', 'a')
+
+        self.assertEqual(2, logger.exception.call_count)
+        logger.error.assert_called_once_with('Failure')
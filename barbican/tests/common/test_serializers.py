@@ -0,0 +1,103 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import json
+
+import mock
+
+from barbican.common import hrefs
+from barbican.common import serializers
+from barbican.model import repositories
+from barbican.plugin.interface import secret_store as ss
+from barbican.plugin.util import mime_types
+from barbican.tests import database_utils
+
+
+class WhenSerializingSecretLists(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenSerializingSecretLists, self).setUp()
+        self.repo = repositories.SecretRepo()
+        self.serializer = serializers.SecretListSerializer(
+            base_href='http://localhost:9311/v1')
+
+        session = self.repo.get_session()
+        self.project = database_utils.create_project(session=session)
+        self.secret = database_utils.create_secret(self.project,
+                                                   session=session)
+        self.secret.name = 'name'
+        self.secret.secret_type = ss.SecretType.SYMMETRIC
+        self.secret.algorithm = 'aes'
+        self.secret.bit_length = 256
+        self.secret.expiration = (datetime.datetime.utcnow() +
+                                  datetime.timedelta(days=1))
+        session.commit()
+
+    def _get_rows(self):
+        rows, _, _, total = self.repo.get_secret_list(
+            self.project.external_id,
+            columns=self.serializer.columns)
+        self.assertEqual(len(rows), total)
+        return rows
+
+    def _get_orm_fields(self):
+        secret = self.repo.get_secret_by_id(self.secret.id)
+        with mock.patch('barbican.common.utils.get_base_url_from_request',
+                        return_value='http://localhost:9311'):
+            return hrefs.convert_to_hrefs(
+                mime_types.augment_fields_with_content_types(secret))
+
+    def test_matches_orm_fields_without_content_type(self):
+        rows = self._get_rows()
+
+        self.assertEqual([self._get_orm_fields()],
+                         self.serializer.serialize_rows(rows))
+
+    def test_matches_orm_fields_with_content_type(self):
+        session = self.repo.get_session()
+        database_utils.create_secret_metadatum(
+            self.secret, key='content_type', value='text/plain',
+            session=session)
+        database_utils.create_secret_metadatum(
+            self.secret, key='other', value='value', session=session)
+        session.commit()
+
+        rows = self._get_rows()
+        fields = self.serializer.serialize_rows(rows)
+
+        self.assertEqual([self._get_orm_fields()], fields)
+        self.assertEqual(mime_types.CTYPES_PLAIN, fields[0]['content_types'])
+
+    def test_count_ignores_metadata(self):
+        session = self.repo.get_session()
+        for key in ('content_type', 'other'):
+            database_utils.create_secret_metadatum(
+                self.secret, key=key, session=session)
+        database_utils.create_secret(self.project, session=session)
+        session.commit()
+
+        self.assertEqual(2, len(self._get_rows()))
+
+    def test_dumps_produces_json_bytes(self):
+        data = {'secrets': [{'name': 'name'}], 'total': 1}
+
+        encoded = serializers.dumps(data)
+
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(data, json.loads(encoded.decode('utf-8')))
+
+    @mock.patch.object(serializers, 'orjson', None)
+    def test_dumps_falls_back_without_orjson(self):
+        data = {'total': 0}
+        self.assertEqual(data, json.loads(serializers.dumps(data)))
@@ -18,6 +18,7 @@ import six
 
 from barbican.common import config
 from barbican.common import utils
+from barbican.plugin.crypto import simple_crypto
 from barbican.tests import utils as test_utils
 
 
@@ -196,3 +197,23 @@ class TestConfigValues(test_utils.BaseTestCase):
         # mechanism
         self.assertEqual('barbican', self.barbican_config.project)
         self.assertEqual('barbican', self.oslo_config.project)
+
+    def test_plugin_options_are_registered_with_shared_conf(self):
+        self.assertIs(self.barbican_config, simple_crypto.CONF)
+        self.assertEqual(
+            'Software Only Crypto',
+            self.barbican_config.simple_crypto_plugin.plugin_name)
+
+    def test_get_module_config_registers_options_on_demand(self):
+        def import_module(name):
+            self.assertEqual('barbican.plugin.crypto.manager', name)
+            config.set_module_config('crypto', self.barbican_config)
+
+        with mock.patch.dict(config._CONFIGS, clear=True):
+            with mock.patch('importlib.import_module',
+                            side_effect=import_module) as mock_import:
+                self.assertIs(self.barbican_config,
+                              config.get_module_config('crypto'))
+                self.assertIs(self.barbican_config,
+                              config.get_module_config('crypto'))
+        self.assertEqual(1, mock_import.call_count)
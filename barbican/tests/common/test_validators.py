@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import datetime
+import mock
 import six
 import unittest
 
@@ -22,6 +23,7 @@ import testtools
 
 from barbican.common import exception as excep
 from barbican.common import validators
+from barbican.plugin.util import translations
 from barbican.tests import certificate_utils as certs
 from barbican.tests import keys
 from barbican.tests import utils
@@ -112,6 +114,35 @@ class WhenTestingValidatorsFunctions(utils.BaseTestCase):
         self.assertTrue(is_too_big)
 
 
+class WhenTestingGetValidator(utils.BaseTestCase):
+
+    def test_returns_a_shared_instance(self):
+        validator = validators.get_validator(validators.NewSecretValidator)
+
+        self.assertIsInstance(validator, validators.NewSecretValidator)
+        self.assertIs(validator,
+                      validators.get_validator(validators.NewSecretValidator))
+
+    def test_compiles_the_schema_once(self):
+        validator = validators.get_validator(validators.ACLValidator)
+        schema_validator = validator._get_schema_validator()
+
+        with mock.patch.object(validators.schema, 'validate') as mock_validate:
+            validator.validate({'read': {'users': ['user1']}})
+
+        self.assertFalse(mock_validate.called)
+        self.assertIs(schema_validator, validator._get_schema_validator())
+
+    def test_raises_invalid_object_with_compiled_schema(self):
+        validator = validators.get_validator(validators.ACLValidator)
+
+        exception = self.assertRaises(
+            excep.InvalidObject,
+            validator.validate,
+            {'read': {'users': 'user1'}})
+        self.assertEqual('read', exception.invalid_property)
+
+
 @utils.parameterized_test_case
 class WhenTestingSecretValidator(utils.BaseTestCase):
 
@@ -500,6 +531,44 @@ class WhenTestingSecretValidator(utils.BaseTestCase):
 
         self.validator.validate(self.secret_req)
 
+    def test_validation_should_carry_decoded_base64_payload(self):
+        self.secret_req['payload_content_type'] = 'application/octet-stream'
+        self.secret_req['payload_content_encoding'] = 'base64'
+        self.secret_req['payload'] = 'bXktc2Vj\ncmV0LWhlcmU='
+
+        result = self.validator.validate(self.secret_req)
+
+        self.assertEqual(b'my-secret-here', result[validators.PAYLOAD_BYTES])
+
+    def _validate_base64_payload(self, payload):
+        self.secret_req['payload_content_type'] = 'application/octet-stream'
+        self.secret_req['payload_content_encoding'] = 'base64'
+        self.secret_req['payload'] = payload
+
+        # Decode the payload in chunks smaller than a group of four
+        # characters, as payloads larger than a chunk are.
+        iter_chunks = translations.iter_chunks
+        with mock.patch.object(
+                translations, 'iter_chunks',
+                lambda data: iter_chunks(data, chunk_size=3)):
+            return self.validator.validate(self.secret_req)[
+                validators.PAYLOAD_BYTES]
+
+    def test_validation_should_stop_decoding_at_first_padded_group(self):
+        self.assertEqual(base64.decode_as_bytes('QQ==QUI='),
+                         self._validate_base64_payload('QQ==QUI='))
+
+    def test_validation_should_ignore_data_after_padding(self):
+        self.assertEqual(base64.decode_as_bytes('QQ==x'),
+                         self._validate_base64_payload('QQ==x'))
+
+    def test_validation_should_not_carry_payload_bytes_sent_in(self):
+        self.secret_req[validators.PAYLOAD_BYTES] = 'not-the-payload'
+
+        result = self.validator.validate(self.secret_req)
+
+        self.assertNotIn(validators.PAYLOAD_BYTES, result)
+
     def test_validation_should_raise_with_bad_base64_payload(self):
         self.secret_req['payload_content_type'] = 'application/octet-stream'
         self.secret_req['payload_content_encoding'] = 'base64'
@@ -12,6 +12,9 @@
 
 import mock
 import sqlalchemy
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import sqlite
 
 from alembic import script as alembic_script
 
@@ -195,6 +198,226 @@ class WhenTestingBaseRepository(database_utils.RepositoryTestCase):
             exception_result.message)
 
 
+class WhenUsingUnitOfWork(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenUsingUnitOfWork, self).setUp()
+        self.session = repositories.get_session()
+        self.project = database_utils.create_project(session=self.session)
+        self.secret_repo = repositories.get_secret_repository()
+        self.secret_meta_repo = repositories.get_secret_meta_repository()
+
+        self.statements = []
+        engine = self.session.get_bind()
+
+        def record(conn, cursor, statement, parameters, context,
+                   executemany):
+            self.statements.append((statement.split()[0], executemany))
+
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', record)
+        self.addCleanup(sqlalchemy.event.remove, engine,
+                        'before_cursor_execute', record)
+
+    def _create_secret(self):
+        secret = models.Secret()
+        secret.project_id = self.project.id
+        self.secret_repo.create_from(secret, session=self.session)
+        self.secret_meta_repo.save({'a': '1', 'b': '2', 'c': '3'}, secret)
+        return secret
+
+    def test_should_flush_saved_entities_once(self):
+        with repositories.unit_of_work():
+            secret = self._create_secret()
+
+            self.assertIsNotNone(secret.id)
+            self.assertIs(False, secret.deleted)
+            self.assertEqual([], self.statements)
+
+        self.assertEqual([('INSERT', False), ('INSERT', True)],
+                         self.statements)
+        self.assertEqual(
+            {'a': '1', 'b': '2', 'c': '3'},
+            self.secret_meta_repo.get_metadata_for_secret(secret.id))
+
+    def test_should_flush_each_save_outside_unit_of_work(self):
+        self._create_secret()
+
+        self.assertEqual([('INSERT', False)] * 4, self.statements)
+
+    def test_should_not_flush_if_block_raises(self):
+        def create_and_fail():
+            with repositories.unit_of_work():
+                self._create_secret()
+                raise ValueError()
+
+        self.assertRaises(ValueError, create_and_fail)
+
+        self.assertEqual([], self.statements)
+        self.assertFalse(repositories.is_deferring_flush())
+
+    def test_should_raise_constraint_check_for_duplicates(self):
+        project = models.Project()
+        project.external_id = self.project.external_id
+        project_repo = repositories.get_project_repository()
+
+        def create_duplicate():
+            with repositories.unit_of_work():
+                project_repo.create_from(project, session=self.session)
+
+        self.assertRaises(exception.ConstraintCheck, create_duplicate)
+
+
+class WhenUpserting(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenUpserting, self).setUp()
+        self.session = repositories.get_session()
+        self.project = database_utils.create_project(session=self.session)
+        self.quotas_repo = repositories.get_project_quotas_repository()
+
+        self.statements = []
+        engine = self.session.get_bind()
+
+        def record(conn, cursor, statement, parameters, context,
+                   executemany):
+            self.statements.append(statement.split()[0])
+
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', record)
+        self.addCleanup(sqlalchemy.event.remove, engine,
+                        'before_cursor_execute', record)
+
+    def _upsert_quotas(self, quotas, update_columns=None):
+        repositories.upsert(
+            models.ProjectQuotas(self.project.id, quotas), ['project_id'],
+            update_columns=update_columns, session=self.session)
+
+    def test_should_insert_row_in_one_statement(self):
+        self._upsert_quotas({'secrets': 10}, update_columns=['secrets'])
+
+        self.assertEqual(['INSERT'], self.statements)
+        entity = self.quotas_repo.get_by_external_project_id(
+            self.project.external_id, session=self.session)
+        self.assertEqual(10, entity.secrets)
+
+    def test_should_update_conflicting_row(self):
+        self._upsert_quotas({'secrets': 10, 'orders': 20})
+        entity = self.quotas_repo.get_by_external_project_id(
+            self.project.external_id, session=self.session)
+        del self.statements[:]
+
+        self._upsert_quotas({'secrets': 5}, update_columns=['secrets'])
+
+        self.assertEqual(['INSERT'], self.statements)
+        self.assertEqual(5, entity.secrets)
+        self.assertEqual(20, entity.orders)
+        self.assertEqual(
+            1, self.session.query(models.ProjectQuotas).count())
+
+    def test_should_leave_conflicting_row_without_update_columns(self):
+        self._upsert_quotas({'secrets': 10})
+
+        self._upsert_quotas({'secrets': 5})
+
+        entity = self.quotas_repo.get_by_external_project_id(
+            self.project.external_id, session=self.session)
+        self.assertEqual(10, entity.secrets)
+
+    def test_should_create_one_active_kek_datum(self):
+        kek_repo = repositories.get_kek_datum_repository()
+        kek_datum = kek_repo.find_or_create_kek_datum(
+            self.project, 'plugin', session=self.session)
+
+        # Another request creating the KEK datum at the same time conflicts
+        # with it on the partial unique index, and does nothing.
+        repositories.upsert(
+            models.KEKDatum(project_id=self.project.id, plugin_name='plugin'),
+            ['project_id', 'plugin_name'],
+            conflict_where=sqlalchemy.text(models.KEK_DATA_ACTIVE_WHERE),
+            session=self.session)
+
+        self.assertEqual([kek_datum],
+                         kek_repo.get_project_entities(self.project.id))
+        self.assertEqual(
+            kek_datum,
+            kek_repo.find_or_create_kek_datum(self.project, 'plugin',
+                                              session=self.session))
+
+    def _compile(self, dialect, update_columns=None, conflict_where=None):
+        statement = repositories._build_upsert(
+            models.ProjectQuotas.__table__,
+            {'id': 'id1', 'project_id': 'project1', 'secrets': 10},
+            ['project_id'], update_columns or [], conflict_where,
+            dialect.name)
+        return str(statement.compile(dialect=dialect))
+
+    def test_should_build_postgresql_upsert(self):
+        dialect = postgresql.dialect()
+
+        self.assertIn(
+            'ON CONFLICT (project_id) DO UPDATE SET secrets = '
+            'excluded.secrets',
+            self._compile(dialect, update_columns=['secrets']))
+        self.assertIn(
+            'ON CONFLICT (project_id) WHERE active AND NOT deleted '
+            'DO NOTHING',
+            self._compile(dialect, conflict_where=sqlalchemy.text(
+                models.KEK_DATA_ACTIVE_WHERE)))
+
+    def test_should_build_mysql_upsert(self):
+        dialect = mysql.dialect()
+
+        self.assertIn(
+            'ON DUPLICATE KEY UPDATE secrets = VALUES(secrets)',
+            self._compile(dialect, update_columns=['secrets']))
+        self.assertIn('ON DUPLICATE KEY UPDATE id = project_quotas.id',
+                      self._compile(dialect))
+
+    def test_should_build_sqlite_upsert(self):
+        dialect = sqlite.dialect()
+
+        self.assertIn(
+            'ON CONFLICT (project_id) DO UPDATE SET secrets = '
+            'excluded.secrets',
+            self._compile(dialect, update_columns=['secrets']))
+        self.assertIn(
+            'ON CONFLICT (project_id) WHERE active AND NOT deleted '
+            'DO NOTHING',
+            self._compile(dialect, conflict_where=sqlalchemy.text(
+                models.KEK_DATA_ACTIVE_WHERE)))
+
+    def test_should_not_build_upsert_for_other_databases(self):
+        self.assertIsNone(repositories._build_upsert(
+            models.ProjectQuotas.__table__, {}, ['project_id'], [], None,
+            'oracle'))
+
+    @mock.patch.object(repositories, '_build_upsert', return_value=None)
+    def test_should_select_then_upsert_on_other_databases(self, mock_build):
+        self._upsert_quotas({'secrets': 10, 'orders': 20})
+        self.assertEqual(['SELECT', 'INSERT'], self.statements)
+        del self.statements[:]
+
+        self._upsert_quotas({'secrets': 5}, update_columns=['secrets'])
+        self._upsert_quotas({'secrets': 1})
+
+        self.assertEqual(['SELECT', 'UPDATE', 'SELECT'], self.statements)
+        entity = self.quotas_repo.get_by_external_project_id(
+            self.project.external_id, session=self.session)
+        self.assertEqual(5, entity.secrets)
+        self.assertEqual(20, entity.orders)
+
+    def test_should_not_reload_expired_instances(self):
+        self._upsert_quotas({'secrets': 10})
+        entity = self.quotas_repo.get_by_external_project_id(
+            self.project.external_id, session=self.session)
+        self.session.expire(entity)
+        del self.statements[:]
+
+        self._upsert_quotas({'secrets': 5}, update_columns=['secrets'])
+
+        self.assertEqual(['INSERT'], self.statements)
+        self.assertEqual(5, entity.secrets)
+
+
 class WhenTestingWrapDbError(utils.BaseTestCase):
 
     def setUp(self):
@@ -373,3 +596,119 @@ class WhenIncreasingRepositoryTestCoverage(utils.BaseTestCase):
         dummy_repo = DummyRepo()
         count = dummy_repo.get_project_entities('dummy_project_id')
         self.assertEqual([], count)
+
+
+class WhenUsingReadOnlyDatabase(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        repositories.CONF.set_override("sql_connection_readonly",
+                                       "sqlite:///:memory:")
+        self.addCleanup(repositories.CONF.clear_override,
+                        "sql_connection_readonly")
+        super(WhenUsingReadOnlyDatabase, self).setUp()
+        self.addCleanup(repositories.clear)
+
+        # Replicas receive their schema from the primary, so create it here.
+        models.BASE.metadata.create_all(repositories._RO_ENGINE)
+
+    def _session_engine(self):
+        return repositories.get_session().get_bind()
+
+    def test_should_use_primary_by_default(self):
+        repositories.start_read_only()
+
+        self.assertFalse(repositories.is_read_only())
+        self.assertIs(repositories._ENGINE, self._session_engine())
+
+    def test_should_use_replica_when_safe(self):
+        repositories.start_read_only(external_project_id='project1',
+                                     use_replica=True)
+
+        self.assertTrue(repositories.is_read_only())
+        self.assertIs(repositories._RO_ENGINE, self._session_engine())
+
+    def test_should_use_primary_for_read_write_requests(self):
+        repositories.start_read_only(use_replica=True)
+        repositories.clear()
+        repositories.start()
+
+        self.assertIs(repositories._ENGINE, self._session_engine())
+
+    def test_should_use_primary_after_recent_write_by_project(self):
+        repositories.record_project_write('project1')
+
+        repositories.start_read_only(external_project_id='project1',
+                                     use_replica=True)
+        self.assertIs(repositories._ENGINE, self._session_engine())
+        repositories.clear()
+
+        repositories.start_read_only(external_project_id='project2',
+                                     use_replica=True)
+        self.assertIs(repositories._RO_ENGINE, self._session_engine())
+
+    def test_should_use_replica_once_write_window_elapsed(self):
+        repositories.CONF.set_override(
+            "sql_readonly_read_after_write_seconds", 5)
+        self.addCleanup(repositories.CONF.clear_override,
+                        "sql_readonly_read_after_write_seconds")
+        with mock.patch.object(repositories.time, 'time', return_value=100):
+            repositories.record_project_write('project1')
+
+        with mock.patch.object(repositories.time, 'time', return_value=106):
+            repositories.start_read_only(external_project_id='project1',
+                                         use_replica=True)
+
+        self.assertTrue(repositories.is_read_only())
+        self.assertNotIn('project1', repositories._PROJECT_LAST_WRITE)
+
+    def test_should_prune_elapsed_writes_when_recording(self):
+        repositories.CONF.set_override(
+            "sql_readonly_read_after_write_seconds", 5)
+        self.addCleanup(repositories.CONF.clear_override,
+                        "sql_readonly_read_after_write_seconds")
+        with mock.patch.object(repositories.time, 'time', return_value=100):
+            repositories.record_project_write('project1')
+            repositories.record_project_write('project2')
+        with mock.patch.object(repositories.time, 'time', return_value=103):
+            repositories.record_project_write('project2')
+
+        with mock.patch.object(repositories.time, 'time', return_value=106):
+            repositories.record_project_write('project3')
+
+        self.assertEqual(['project2', 'project3'],
+                         list(repositories._PROJECT_LAST_WRITE))
+
+    def test_should_not_record_write_when_window_disabled(self):
+        repositories.CONF.set_override(
+            "sql_readonly_read_after_write_seconds", 0)
+        self.addCleanup(repositories.CONF.clear_override,
+                        "sql_readonly_read_after_write_seconds")
+
+        repositories.record_project_write('project1')
+
+        self.assertNotIn('project1', repositories._PROJECT_LAST_WRITE)
+
+    def test_should_switch_to_primary_on_leave_read_only(self):
+        repositories.start_read_only(use_replica=True)
+        replica_session = repositories.get_session()
+
+        repositories.leave_read_only()
+
+        self.assertIs(repositories._ENGINE, self._session_engine())
+        self.assertIsNot(replica_session, repositories.get_session())
+
+    def test_should_reset_routing_on_clear(self):
+        repositories.start_read_only(use_replica=True)
+        repositories.clear()
+
+        self.assertFalse(repositories.is_read_only())
+
+    def test_should_create_missing_project_in_primary(self):
+        from barbican.common import resources
+
+        repositories.start_read_only(use_replica=True)
+        project = resources.get_or_create_project('new-project')
+
+        self.assertFalse(repositories.is_read_only())
+        self.assertIn(project, repositories._SESSION_FACTORY())
+        self.assertNotIn(project, repositories._RO_SESSION_FACTORY())
@@ -10,6 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+
 from barbican.common import exception
 from barbican.model import models
 from barbican.model import repositories
@@ -288,6 +290,68 @@ class WhenTestingSecretACLRepository(database_utils.RepositoryTestCase,
         acls = self.acl_repo.get_by_secret_id(secret.id)
         self.assertEqual(0, len(acls))
 
+    def _reload_secret(self, secret_id):
+        session = self.acl_repo.get_session()
+        session.expunge_all()
+        return session.query(models.Secret).filter_by(id=secret_id).one()
+
+    def test_get_acl_summary(self):
+        self.addCleanup(repositories._ACL_CACHE.clear)
+        session = self.acl_repo.get_session()
+        secret = self._create_base_secret()
+        acl1 = self.acl_repo.create_from(models.SecretACL(
+            secret.id, 'read', False), session)
+        self.acl_repo.create_or_replace_from(
+            secret, acl1, user_ids=['u1', 'u2'], session=session)
+        acl2 = self.acl_repo.create_from(models.SecretACL(
+            secret.id, 'write'), session)
+        self.acl_repo.create_or_replace_from(secret, acl2, session=session)
+        session.commit()
+        secret = self._reload_secret(secret.id)
+
+        acls = self.acl_repo.get_acl_summary(secret)
+
+        self.assertFalse(repositories.is_loaded(secret, 'secret_acls'))
+        self.assertEqual(
+            {'read': repositories.ACLSummary(frozenset(['u1', 'u2']), False),
+             'write': repositories.ACLSummary(frozenset(), True)},
+            acls)
+        self.assertEqual(repositories.summarize_acls(secret.secret_acls),
+                         acls)
+
+    def test_get_acl_summary_is_cached_until_acls_change(self):
+        self.addCleanup(repositories._ACL_CACHE.clear)
+        repositories.CONF.set_override('acl_cache_ttl', 10)
+        self.addCleanup(repositories.CONF.clear_override, 'acl_cache_ttl')
+        session = self.acl_repo.get_session()
+        secret = self._create_base_secret()
+        acl = self.acl_repo.create_from(models.SecretACL(
+            secret.id, 'read'), session)
+        self.acl_repo.create_or_replace_from(
+            secret, acl, user_ids=['u1'], session=session)
+        session.commit()
+        secret = self._reload_secret(secret.id)
+
+        acls = self.acl_repo.get_acl_summary(secret)
+        with mock.patch.object(session, 'query') as mock_query:
+            self.assertEqual(acls, self.acl_repo.get_acl_summary(secret))
+        self.assertFalse(mock_query.called)
+
+        self.acl_repo.delete_acls_for_secret(secret)
+        session.commit()
+        secret = self._reload_secret(secret.id)
+
+        self.assertEqual({}, self.acl_repo.get_acl_summary(secret))
+
+    def test_get_acl_summary_is_not_cached_by_default(self):
+        self.addCleanup(repositories._ACL_CACHE.clear)
+        secret = self._create_base_secret()
+        secret = self._reload_secret(secret.id)
+
+        self.acl_repo.get_acl_summary(secret)
+
+        self.assertNotIn(secret.id, repositories._ACL_CACHE._entries)
+
 
 class WhenTestingContainerACLRepository(database_utils.RepositoryTestCase,
                                         TestACLMixin):
@@ -535,3 +599,23 @@ class WhenTestingContainerACLRepository(database_utils.RepositoryTestCase,
         self.acl_repo.delete_acls_for_container(container)
         acls = self.acl_repo.get_by_container_id(container.id)
         self.assertEqual(0, len(acls))
+
+    def test_get_acl_summary(self):
+        self.addCleanup(repositories._ACL_CACHE.clear)
+        session = self.acl_repo.get_session()
+        container = self._create_base_container()
+        acl = self.acl_repo.create_from(models.ContainerACL(
+            container.id, 'read', False), session)
+        self.acl_repo.create_or_replace_from(
+            container, acl, user_ids=['u1', 'u2'], session=session)
+        session.commit()
+        container_id = container.id
+        session.expunge_all()
+        container = session.query(models.Container).filter_by(
+            id=container_id).one()
+
+        acls = self.acl_repo.get_acl_summary(container)
+
+        self.assertEqual(
+            {'read': repositories.ACLSummary(frozenset(['u1', 'u2']), False)},
+            acls)
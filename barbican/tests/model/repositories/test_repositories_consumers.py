@@ -39,10 +39,6 @@ class WhenTestingContainerConsumerRepository(utils.RepositoryTestCase):
             container.id, project.id, {'name': 'name', 'URL': 'www.foo.com'})
         consumer.save(session=session)
 
-        # Commit things so far, because the 'create_or_update_from' call below
-        # will handle consumer metadata with same composite key items already
-        # existing, and then rollback this session's transaction, which would
-        # remove the items added above and result in a not-found error below.
         session.commit()
 
         # Try to create a consumer on the container...should re-use the
@@ -55,6 +51,27 @@ class WhenTestingContainerConsumerRepository(utils.RepositoryTestCase):
             container.id, project.external_id, session=session)
         self.assertEqual(1, len(container2.consumers))
 
+    def test_should_restore_deleted_consumer(self):
+        session = self.repo.get_session()
+        project = utils.create_project(session=session)
+        container = utils.create_container(project=project, session=session)
+        consumer = models.ContainerConsumerMetadatum(
+            container.id, project.id, {'name': 'name', 'URL': 'www.foo.com'})
+        self.repo.create_or_update_from(consumer, container, session=session)
+        self.repo.get_by_values(container.id, 'name', 'www.foo.com',
+                                session=session).delete(session=session)
+
+        consumer2 = models.ContainerConsumerMetadatum(
+            container.id, project.id, {'name': 'name', 'URL': 'www.foo.com'})
+        self.repo.create_or_update_from(consumer2, container, session=session)
+
+        consumers, offset, limit, total = self.repo.get_by_container_id(
+            container.id, session=session)
+        self.assertEqual(1, total)
+        self.assertFalse(consumers[0].deleted)
+        self.assertIsNone(consumers[0].deleted_at)
+        self.assertEqual(1, len(container.consumers))
+
     def test_should_raise_constraint_create_same_composite_key_no_id(self):
         session = self.repo.get_session()
 
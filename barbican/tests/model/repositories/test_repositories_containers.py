@@ -48,6 +48,25 @@ class WhenTestingContainerRepository(database_utils.RepositoryTestCase):
         db_container = self.repo.get_container_by_id(container.id)
         self.assertIsNotNone(db_container)
 
+    def test_get_container_checks_project_and_deleted(self):
+        session = self.repo.get_session()
+        project = database_utils.create_project(session=session)
+        container = database_utils.create_container(project, session=session)
+        session.commit()
+
+        db_container = self.repo.get(container.id, project.external_id)
+        self.assertEqual(container.id, db_container.id)
+        self.assertIsNone(self.repo.get(container.id, 'other project',
+                                        suppress_exception=True))
+
+        container.delete(session=session)
+        session.commit()
+
+        self.assertIsNone(self.repo.get(container.id, project.external_id,
+                                        suppress_exception=True))
+        self.assertIsNone(self.repo.get_container_by_id(
+            container.id, suppress_exception=True))
+
     def test_should_raise_notfound_exception(self):
         self.assertRaises(exception.NotFound, self.repo.get_container_by_id,
                           "invalid_id", suppress_exception=False)
@@ -10,6 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+
 from barbican.common import config
 from barbican.common import exception
 from barbican.model import models
@@ -120,3 +122,79 @@ class WhenTestingOrderRepository(database_utils.RepositoryTestCase):
 
         count = self.repo.get_count(project.id, session=session)
         self.assertEqual(1, count)
+
+    def _create_orders(self, count, session):
+        project = database_utils.create_project(session=session)
+        orders = []
+        for _ in range(count):
+            order = models.Order()
+            order.project_id = project.id
+            self.repo.create_from(order, session=session)
+            orders.append(order)
+        session.commit()
+        return orders
+
+    def test_get_for_processing(self):
+        session = self.repo.get_session()
+        orders = self._create_orders(3, session)
+        repositories.get_order_plugin_meta_repository().save(
+            {'foo': 'bar'}, orders[0])
+        session.commit()
+        order_ids = [order.id for order in orders]
+        session.expunge_all()
+
+        fetched = self.repo.get_for_processing(
+            order_ids[:2] + ['missing id'], session=session)
+
+        self.assertEqual(set(order_ids[:2]), {order.id for order in fetched})
+        for order in fetched:
+            self.assertTrue(repositories.is_loaded(order, 'project'))
+            self.assertEqual("my keystone id", order.project.external_id)
+        fetched = {order.id: order for order in fetched}
+        self.assertEqual(
+            {'foo': 'bar'},
+            repositories.get_loaded_metadata(fetched[order_ids[0]],
+                                             'order_plugin_metadata'))
+        self.assertEqual(
+            {},
+            repositories.get_loaded_metadata(fetched[order_ids[1]],
+                                             'order_barbican_metadata'))
+
+    def test_get_unprocessed_and_claim(self):
+        session = self.repo.get_session()
+        orders = self._create_orders(3, session)
+        orders[1].sub_status = 'processed'
+        orders[2].status = models.States.ACTIVE
+        session.commit()
+        later = datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+
+        unprocessed = self.repo.get_unprocessed(later, 10, session=session)
+
+        self.assertEqual([(orders[0].id, "my keystone id",
+                           orders[0].updated_at)], unprocessed)
+        self.assertTrue(self.repo.claim(orders[0].id, orders[0].updated_at,
+                                        session=session))
+        self.assertFalse(self.repo.claim(orders[0].id, orders[0].updated_at,
+                                         session=session))
+        self.assertEqual(
+            [], self.repo.get_unprocessed(orders[0].updated_at, 10,
+                                          session=session))
+
+    def test_set_unprocessed_error(self):
+        session = self.repo.get_session()
+        orders = self._create_orders(3, session)
+        orders[1].sub_status = 'processed'
+        order_ids = [order.id for order in orders]
+        session.commit()
+
+        count = self.repo.set_unprocessed_error(order_ids[:2], 500, 'reason',
+                                                session=session)
+        session.commit()
+        session.expire_all()
+
+        self.assertEqual(1, count)
+        self.assertEqual(models.States.ERROR, orders[0].status)
+        self.assertEqual('500', orders[0].error_status_code)
+        self.assertEqual('reason', orders[0].error_reason)
+        self.assertEqual(models.States.PENDING, orders[1].status)
+        self.assertEqual(models.States.PENDING, orders[2].status)
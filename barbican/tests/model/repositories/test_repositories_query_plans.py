@@ -0,0 +1,132 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Query plan regression tests for the hot list and lookup queries.
+
+The statements issued by the repositories are captured and explained, on
+SQLite with EXPLAIN QUERY PLAN and on PostgreSQL with EXPLAIN, with
+sequential scans disabled so that the tiny test tables don't make them
+cheaper than the indexes. Each test asserts that the queried table is
+searched through the expected index rather than scanned.
+"""
+import datetime
+import re
+
+import sqlalchemy
+
+from barbican.model import repositories
+from barbican.tests import database_utils
+
+
+class WhenExplainingHotQueries(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenExplainingHotQueries, self).setUp()
+        self.session = repositories.get_session()
+        self.project = database_utils.create_project(session=self.session)
+        self.session.commit()
+
+    def _explain(self, func, *args, **kwargs):
+        """Returns the query plans of the SELECT statements func issues."""
+        engine = self.session.get_bind()
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context,
+                    executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            func(*args, **kwargs)
+        finally:
+            sqlalchemy.event.remove(engine, 'before_cursor_execute', capture)
+
+        cursor = self.session.connection().connection.cursor()
+        if engine.dialect.name == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            prefix = 'EXPLAIN '
+        else:
+            prefix = 'EXPLAIN QUERY PLAN '
+        plans = []
+        for statement, parameters in statements:
+            cursor.execute(prefix + statement, parameters)
+            plans.append('\n'.join(str(row[-1]) for row in cursor.fetchall()))
+        return '\n'.join(plans)
+
+    def assertSearchedWith(self, plan, table, index_name):
+        self.assertIn(index_name, plan)
+        self.assertIsNone(re.search(r'\bSCAN %s\b(?! USING)' % table, plan))
+        self.assertNotIn('Seq Scan on %s' % table, plan)
+
+    def test_secret_list_uses_project_index(self):
+        plan = self._explain(
+            repositories.get_secret_repository().get_secret_list,
+            self.project.external_id, suppress_exception=True,
+            session=self.session)
+
+        self.assertSearchedWith(plan, 'secrets',
+                                'secrets_project_deleted_created_idx')
+
+    def test_acl_only_secret_list_uses_user_index(self):
+        plan = self._explain(
+            repositories.get_secret_repository().get_secret_list,
+            self.project.external_id, suppress_exception=True,
+            session=self.session, acl_only='true', user_id='user1')
+
+        self.assertSearchedWith(plan, 'secret_acl_users',
+                                'secret_acl_users_user_acl_idx')
+        self.assertNotIn('Seq Scan on secrets', plan)
+
+    def test_container_list_uses_project_index(self):
+        plan = self._explain(
+            repositories.get_container_repository().get_by_create_date,
+            self.project.external_id, suppress_exception=True,
+            session=self.session)
+
+        self.assertSearchedWith(plan, 'containers',
+                                'containers_project_deleted_created_idx')
+
+    def test_order_list_uses_project_index(self):
+        plan = self._explain(
+            repositories.get_order_repository().get_by_create_date,
+            self.project.external_id, suppress_exception=True,
+            session=self.session)
+
+        self.assertSearchedWith(plan, 'orders',
+                                'orders_project_deleted_created_idx')
+        # The index also provides the creation date ordering.
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_retry_task_lookup_uses_retry_at_index(self):
+        plan = self._explain(
+            repositories.get_order_retry_tasks_repository().get_by_create_date,
+            only_at_or_before_this_date=datetime.datetime.utcnow(),
+            suppress_exception=True, session=self.session)
+
+        self.assertSearchedWith(plan, 'order_retry_tasks',
+                                'order_retry_tasks_retry_at_idx')
+
+    def test_secret_metadata_lookups_use_secret_index(self):
+        plan = self._explain(
+            repositories.get_secret_meta_repository().get_metadata_for_secret,
+            'secret1')
+        self.assertSearchedWith(plan, 'secret_store_metadata',
+                                'secret_store_metadata_secret_deleted_idx')
+
+        plan = self._explain(
+            repositories.get_secret_user_meta_repository(
+            ).get_metadata_for_secret, 'secret1')
+        self.assertSearchedWith(plan, 'secret_user_metadata',
+                                'secret_user_metadata_secret_deleted_idx')
@@ -98,6 +98,51 @@ class WhenTestingSecretRepository(database_utils.RepositoryTestCase):
         db_secret = self.repo.get_secret_by_id(secret.id)
         self.assertIsNotNone(db_secret)
 
+    def test_get_secret_by_id_excludes_expired_and_deleted(self):
+        session = self.repo.get_session()
+        project = database_utils.create_project(session=session)
+
+        expired = models.Secret()
+        expired.project_id = project.id
+        expired.expiration = (datetime.datetime.utcnow() -
+                              datetime.timedelta(days=1))
+        self.repo.create_from(expired, session=session)
+
+        deleted = database_utils.create_secret(project, session=session)
+        deleted.delete(session=session)
+
+        session.commit()
+
+        self.assertIsNone(self.repo.get_secret_by_id(
+            expired.id, suppress_exception=True))
+        self.assertIsNone(self.repo.get_secret_by_id(
+            deleted.id, suppress_exception=True))
+
+    def test_get_secret_checks_project(self):
+        session = self.repo.get_session()
+        project = database_utils.create_project(session=session)
+        secret = database_utils.create_secret(project, session=session)
+        session.commit()
+
+        db_secret = self.repo.get(secret.id, project.external_id)
+        self.assertEqual(secret.id, db_secret.id)
+
+        self.assertIsNone(self.repo.get(secret.id, 'other project',
+                                        suppress_exception=True))
+
+    def test_get_secret_by_id_reuses_cached_query(self):
+        session = self.repo.get_session()
+        project = database_utils.create_project(session=session)
+        secret = database_utils.create_secret(project, session=session)
+        session.commit()
+
+        self.repo.get_secret_by_id(secret.id)
+        cached_queries = len(repositories._BAKERY.cache)
+        self.repo.get_secret_by_id(secret.id)
+        self.repo.get_secret_by_id('invalid_id', suppress_exception=True)
+
+        self.assertEqual(cached_queries, len(repositories._BAKERY.cache))
+
     def test_should_raise_notfound_exception(self):
         self.assertRaises(exception.NotFound, self.repo.get_secret_by_id,
                           "invalid_id", suppress_exception=False)
@@ -140,6 +185,56 @@ class WhenTestingSecretRepository(database_utils.RepositoryTestCase):
         self.assertEqual(10, limit)
         self.assertEqual(1, total)
 
+    def _create_secret_with_user_metadata(self, project, name, metadata,
+                                          session):
+        secret = self.repo.create_from(
+            models.Secret(dict(name=name, project_id=project.id)),
+            session=session)
+        for key, value in metadata.items():
+            meta_model = models.SecretUserMetadatum(key, value)
+            meta_model.secret_id = secret.id
+            meta_model.save(session=session)
+        return secret
+
+    def test_get_secret_list_with_metadata_filter(self):
+        session = self.repo.get_session()
+        project = database_utils.create_project(session=session)
+        prod = self._create_secret_with_user_metadata(
+            project, 'prod', {'env': 'prod', 'team': 'a'}, session)
+        self._create_secret_with_user_metadata(
+            project, 'dev', {'env': 'dev', 'team': 'a'}, session)
+        self._create_secret_with_user_metadata(
+            project, 'none', {}, session)
+        session.commit()
+
+        secrets, offset, limit, total = self.repo.get_secret_list(
+            project.external_id, metadata={'env': 'prod'}, session=session)
+        self.assertEqual([prod.id], [s.id for s in secrets])
+        self.assertEqual(1, total)
+
+        secrets, offset, limit, total = self.repo.get_secret_list(
+            project.external_id, metadata={'env': 'prod', 'team': 'b'},
+            session=session, suppress_exception=True)
+        self.assertEqual([], secrets)
+        self.assertEqual(0, total)
+
+    def test_get_secret_list_with_metadata_filter_sort_and_paging(self):
+        session = self.repo.get_session()
+        project = database_utils.create_project(session=session)
+        for name in ('b', 'd', 'a', 'c'):
+            self._create_secret_with_user_metadata(
+                project, name, {'env': 'prod'}, session)
+        self._create_secret_with_user_metadata(
+            project, 'e', {'env': 'dev'}, session)
+        session.commit()
+
+        secrets, offset, limit, total = self.repo.get_secret_list(
+            project.external_id, metadata={'env': 'prod'}, sort='name:desc',
+            offset_arg=1, limit_arg=2, session=session)
+
+        self.assertEqual(['c', 'b'], [s.name for s in secrets])
+        self.assertEqual(4, total)
+
     def test_get_by_create_date_nothing(self):
         session = self.repo.get_session()
         secrets, offset, limit, total = self.repo.get_secret_list(
@@ -10,6 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+
 from barbican.common import exception
 from barbican.model import repositories
 from barbican.tests import database_utils
@@ -39,3 +41,29 @@ class WhenTestingTransportKeyRepository(database_utils.RepositoryTestCase):
             self.repo.get_by_create_date,
             session=session,
             suppress_exception=False)
+
+    def test_get_latest_transport_key(self):
+        session = self.repo.get_session()
+        older = database_utils.create_transport_key(
+            plugin_name="plugin", transport_key="older", session=session)
+        older.created_at = datetime.datetime(2016, 1, 1)
+        latest = database_utils.create_transport_key(
+            plugin_name="plugin", transport_key="latest", session=session)
+        database_utils.create_transport_key(
+            plugin_name="other plugin", transport_key="other",
+            session=session)
+        session.commit()
+
+        key = self.repo.get_latest_transport_key("plugin", session=session)
+        self.assertEqual(latest.id, key.id)
+
+    def test_get_latest_transport_key_not_found(self):
+        session = self.repo.get_session()
+
+        self.assertRaises(
+            exception.NotFound,
+            self.repo.get_latest_transport_key,
+            "plugin",
+            session=session)
+        self.assertIsNone(self.repo.get_latest_transport_key(
+            "plugin", suppress_exception=True, session=session))
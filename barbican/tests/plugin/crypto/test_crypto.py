@@ -120,6 +120,41 @@ class WhenTestingSimpleCryptoPlugin(utils.BaseTestCase):
                                         mock.MagicMock())
         self.assertEqual(unencrypted, decrypted)
 
+    def test_batch_encryption(self):
+        unencrypted = [os.urandom(10), os.urandom(20)]
+        kek_meta_dto = self._get_mocked_kek_meta_dto()
+
+        with mock.patch.object(simple.fernet, 'Fernet',
+                               wraps=fernet.Fernet) as mock_fernet:
+            response_dtos = self.plugin.encrypt_batch(
+                [plugin.EncryptDTO(data) for data in unencrypted],
+                kek_meta_dto, mock.MagicMock())
+            decrypted = self.plugin.decrypt_batch(
+                [plugin.DecryptDTO(response_dto.cypher_text)
+                 for response_dto in response_dtos],
+                kek_meta_dto,
+                [response_dto.kek_meta_extended
+                 for response_dto in response_dtos],
+                mock.MagicMock())
+
+        self.assertEqual(unencrypted, decrypted)
+        # One Fernet to unwrap the KEK and one to use it, for each batch.
+        self.assertEqual(4, mock_fernet.call_count)
+
+    def test_generate_symmetric_batch(self):
+        kek_meta_dto = self._get_mocked_kek_meta_dto()
+        generate_dtos = [plugin.GenerateDTO('AES', bit_length, None, None)
+                         for bit_length in (128, 256)]
+
+        response_dtos = self.plugin.generate_symmetric_batch(
+            generate_dtos, kek_meta_dto, mock.MagicMock())
+
+        keys = self.plugin.decrypt_batch(
+            [plugin.DecryptDTO(response_dto.cypher_text)
+             for response_dto in response_dtos],
+            kek_meta_dto, [None, None], mock.MagicMock())
+        self.assertEqual([16, 32], [len(key) for key in keys])
+
     def test_generate_256_bit_key(self):
         secret = models.Secret()
         secret.bit_length = 256
@@ -438,3 +473,43 @@ class WhenTestingSimpleCryptoPlugin(utils.BaseTestCase):
 
     def test_get_plugin_name(self):
         self.assertIsNotNone(self.plugin.get_plugin_name())
+
+
+class WhenTestingCryptoPluginBaseBatches(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingCryptoPluginBaseBatches, self).setUp()
+        self.plugin = mock.MagicMock(spec=plugin.CryptoPluginBase)
+        self.kek_meta_dto = mock.MagicMock()
+
+    def test_encrypt_batch_falls_back_to_encrypt(self):
+        self.plugin.encrypt.side_effect = ['ct1', 'ct2']
+
+        result = plugin.CryptoPluginBase.encrypt_batch(
+            self.plugin, ['dto1', 'dto2'], self.kek_meta_dto, 'project')
+
+        self.assertEqual(['ct1', 'ct2'], result)
+        self.plugin.encrypt.assert_has_calls([
+            mock.call('dto1', self.kek_meta_dto, 'project'),
+            mock.call('dto2', self.kek_meta_dto, 'project')])
+
+    def test_decrypt_batch_falls_back_to_decrypt(self):
+        self.plugin.decrypt.side_effect = [b'pt1', b'pt2']
+
+        result = plugin.CryptoPluginBase.decrypt_batch(
+            self.plugin, ['dto1', 'dto2'], self.kek_meta_dto,
+            ['ext1', 'ext2'], 'project')
+
+        self.assertEqual([b'pt1', b'pt2'], result)
+        self.plugin.decrypt.assert_has_calls([
+            mock.call('dto1', self.kek_meta_dto, 'ext1', 'project'),
+            mock.call('dto2', self.kek_meta_dto, 'ext2', 'project')])
+
+    def test_generate_symmetric_batch_falls_back(self):
+        self.plugin.generate_symmetric.side_effect = ['ct1', 'ct2']
+
+        result = plugin.CryptoPluginBase.generate_symmetric_batch(
+            self.plugin, ['dto1', 'dto2'], self.kek_meta_dto, 'project')
+
+        self.assertEqual(['ct1', 'ct2'], result)
+        self.assertEqual(2, self.plugin.generate_symmetric.call_count)
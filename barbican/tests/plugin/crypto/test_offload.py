@@ -0,0 +1,146 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import mock
+
+from barbican.plugin.crypto import manager  # noqa
+from barbican.plugin.crypto import offload
+from barbican.plugin.crypto import simple_crypto
+from barbican.tests import utils
+
+
+class WhenTestingPluginCallExecutor(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingPluginCallExecutor, self).setUp()
+        self.plugin = simple_crypto.SimpleCryptoPlugin()
+        self.executor = offload.PluginCallExecutor(
+            enabled=True, max_calls_per_plugin=1)
+
+    def test_runs_call_on_native_thread(self):
+        caller = threading.current_thread()
+
+        thread = self.executor.run(self.plugin, threading.current_thread)
+
+        self.assertIsNot(caller, thread)
+
+    def test_returns_result_and_counts_calls(self):
+        func = mock.MagicMock(return_value='result')
+
+        result = self.executor.run(self.plugin, func, 'arg', kwarg='kwarg')
+
+        self.assertEqual('result', result)
+        func.assert_called_once_with('arg', kwarg='kwarg')
+        stats = self.executor.get_stats()
+        self.assertEqual(
+            {'active': 0, 'waiting': 0, 'max_waiting': 0, 'calls': 1},
+            stats['barbican.plugin.crypto.simple_crypto.SimpleCryptoPlugin'])
+
+    def test_releases_limit_when_call_fails(self):
+        func = mock.MagicMock(side_effect=ValueError)
+
+        self.assertRaises(ValueError, self.executor.run, self.plugin, func)
+        self.assertRaises(ValueError, self.executor.run, self.plugin, func)
+
+        stats = list(self.executor.get_stats().values())[0]
+        self.assertEqual(0, stats['active'])
+        self.assertEqual(2, stats['calls'])
+
+    @mock.patch('eventlet.tpool.execute')
+    def test_disabled_executor_calls_inline(self, mock_execute):
+        executor = offload.PluginCallExecutor(
+            enabled=False, max_calls_per_plugin=1)
+        func = mock.MagicMock(return_value='result')
+
+        self.assertEqual('result', executor.run(self.plugin, func))
+        self.assertFalse(mock_execute.called)
+        self.assertEqual({}, executor.get_stats())
+
+    @mock.patch('eventlet.tpool.execute')
+    def test_calls_plugin_not_thread_safe_inline(self, mock_execute):
+        plugin = mock.MagicMock(thread_safe=False)
+        func = mock.MagicMock(return_value='result')
+
+        self.assertEqual('result', self.executor.run(plugin, func))
+        self.assertFalse(mock_execute.called)
+
+    def test_defers_logs_of_offloaded_calls(self):
+        log_func = mock.MagicMock()
+
+        def func():
+            offload.deferred_log(log_func, 'message %s', 'arg')
+            return log_func.called
+
+        self.assertFalse(self.executor.run(self.plugin, func))
+        log_func.assert_called_once_with('message %s', 'arg')
+
+    def test_logs_immediately_when_not_offloaded(self):
+        log_func = mock.MagicMock()
+
+        offload.deferred_log(log_func, 'message')
+
+        log_func.assert_called_once_with('message')
+
+    def test_native_rlock_is_reentrant(self):
+        lock = offload.native_rlock()
+
+        with lock:
+            self.assertTrue(lock.acquire(False))
+            lock.release()
+
+    @mock.patch('eventlet.tpool.execute')
+    def test_limits_concurrent_calls_per_plugin(self, mock_execute):
+        limiter = self.executor._get_limiter('plugin')
+        limiter.acquire()
+
+        acquired = threading.Event()
+
+        def acquire():
+            limiter.acquire()
+            acquired.set()
+
+        waiter = threading.Thread(target=acquire)
+        waiter.start()
+        self.assertFalse(acquired.wait(0.1))
+        self.assertEqual(1, limiter.get_stats()['waiting'])
+
+        limiter.release()
+        self.assertTrue(acquired.wait(5))
+        waiter.join()
+        self.assertEqual(
+            {'active': 1, 'waiting': 0, 'max_waiting': 1, 'calls': 2},
+            limiter.get_stats())
+
+
+class WhenGettingExecutor(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenGettingExecutor, self).setUp()
+        offload._EXECUTOR = None
+        self.addCleanup(setattr, offload, '_EXECUTOR', None)
+
+    @mock.patch('eventlet.patcher.is_monkey_patched', return_value=False)
+    def test_disabled_without_eventlet(self, mock_patched):
+        self.assertFalse(offload.get_executor().enabled)
+
+    @mock.patch('eventlet.tpool.set_num_threads')
+    @mock.patch('eventlet.patcher.is_monkey_patched', return_value=True)
+    def test_enabled_under_eventlet(self, mock_patched, mock_set_threads):
+        executor = offload.get_executor()
+
+        self.assertTrue(executor.enabled)
+        self.assertEqual(1, executor.max_calls_per_plugin)
+        mock_set_threads.assert_called_once_with(20)
+        self.assertIs(executor, offload.get_executor())
@@ -236,6 +236,75 @@ class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
         self.assertEqual(1, self.pkcs11.encrypt.call_count)
         self.assertEqual(1, self.pkcs11.return_session.call_count)
 
+    def _get_kek_meta(self):
+        kek_meta = mock.MagicMock()
+        kek_meta.kek_label = 'pkek'
+        kek_meta.plugin_meta = ('{"iv": "iv==",'
+                                '"hmac": "hmac",'
+                                '"wrapped_key": "wrappedkey==",'
+                                '"mkek_label": "mkek_label",'
+                                '"hmac_label": "hmac_label"}')
+        return kek_meta
+
+    def test_encrypt_batch(self):
+        encrypt_dtos = [plugin_import.EncryptDTO(b'payload1'),
+                        plugin_import.EncryptDTO(b'payload2')]
+
+        response_dtos = self.plugin.encrypt_batch(
+            encrypt_dtos, self._get_kek_meta(), mock.MagicMock())
+
+        self.assertEqual(2, len(response_dtos))
+        for response_dto in response_dtos:
+            self.assertEqual(b'0', response_dto.cypher_text)
+            self.assertIn('iv', response_dto.kek_meta_extended)
+        # One session for the object cache, and one for the whole batch.
+        self.assertEqual(2, self.pkcs11.get_session.call_count)
+        self.assertEqual(1, self.pkcs11.unwrap_key.call_count)
+        self.assertEqual(2, self.pkcs11.encrypt.call_count)
+        self.assertEqual(1, self.pkcs11.return_session.call_count)
+
+    def test_decrypt_batch(self):
+        decrypt_dtos = [plugin_import.DecryptDTO(b'ct1'),
+                        plugin_import.DecryptDTO(b'ct2')]
+
+        pts = self.plugin.decrypt_batch(
+            decrypt_dtos, self._get_kek_meta(),
+            ['{"iv":"AAAA"}', '{"iv":"AAAB"}'], mock.MagicMock())
+
+        self.assertEqual([b'0', b'0'], pts)
+        self.assertEqual(2, self.pkcs11.get_session.call_count)
+        self.assertEqual(1, self.pkcs11.unwrap_key.call_count)
+        self.pkcs11.decrypt.assert_has_calls([
+            mock.call(4, b'\x00\x00\x00', b'ct1', 1),
+            mock.call(4, b'\x00\x00\x01', b'ct2', 1)])
+        self.assertEqual(1, self.pkcs11.return_session.call_count)
+
+    def test_generate_symmetric_batch(self):
+        generate_dtos = [plugin_import.GenerateDTO('AES', 128, None, None),
+                         plugin_import.GenerateDTO('AES', 256, None, None)]
+
+        response_dtos = self.plugin.generate_symmetric_batch(
+            generate_dtos, self._get_kek_meta(), mock.MagicMock())
+
+        self.assertEqual(2, len(response_dtos))
+        self.pkcs11.generate_random.assert_has_calls([
+            mock.call(16, 1), mock.call(32, 1)])
+        self.assertEqual(2, self.pkcs11.get_session.call_count)
+        self.assertEqual(2, self.pkcs11.encrypt.call_count)
+        self.assertEqual(1, self.pkcs11.return_session.call_count)
+
+    def test_encrypt_batch_returns_session_on_error(self):
+        self.pkcs11.encrypt.side_effect = ex.P11CryptoPluginException(
+            'Testing error handling')
+
+        self.assertRaises(ex.P11CryptoPluginException,
+                          self.plugin._encrypt_batch,
+                          [plugin_import.EncryptDTO(b'payload')],
+                          self._get_kek_meta(),
+                          mock.MagicMock())
+
+        self.assertEqual(1, self.pkcs11.return_session.call_count)
+
     def test_generate_asymmetric_raises_error(self):
         self.assertRaises(NotImplementedError,
                           self.plugin.generate_asymmetric,
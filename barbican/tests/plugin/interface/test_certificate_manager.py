@@ -19,6 +19,7 @@ import testtools
 from barbican.common import utils as common_utils
 from barbican.model import models
 from barbican.plugin.interface import certificate_manager as cm
+from barbican.plugin import simple_certificate_manager
 from barbican.tests import database_utils
 from barbican.tests import utils
 
@@ -314,3 +315,36 @@ class WhenTestingCertificatePluginManager(database_utils.RepositoryTestCase,
 
         self.plugin_returned.get_ca_info.assert_called_once_with()
         self.ca_repo.create_from.assert_has_calls([])
+
+
+class WhenTestingCertificatePluginBase(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingCertificatePluginBase, self).setUp()
+        self.plugin = simple_certificate_manager.SimpleCertificatePlugin()
+
+    def test_issue_certificate_requests_issues_each_request(self):
+        error = cm.CertificateGeneralException()
+        self.plugin.issue_certificate_request = mock.MagicMock(
+            side_effect=['result 1', error, 'result 3'])
+        requests = [('order %d' % i, {}, {}, cm.BarbicanMetaDTO())
+                    for i in range(3)]
+
+        results = self.plugin.issue_certificate_requests(requests)
+
+        self.assertEqual(['result 1', error, 'result 3'], results)
+        self.plugin.issue_certificate_request.assert_has_calls(
+            [mock.call(*request) for request in requests])
+
+    def test_check_certificate_statuses_checks_each_request(self):
+        error = cm.CertificateGeneralException()
+        self.plugin.check_certificate_status = mock.MagicMock(
+            side_effect=['result 1', error, 'result 3'])
+        requests = [('order %d' % i, {}, {}, cm.BarbicanMetaDTO())
+                    for i in range(3)]
+
+        results = self.plugin.check_certificate_statuses(requests)
+
+        self.assertEqual(['result 1', error, 'result 3'], results)
+        self.plugin.check_certificate_status.assert_has_calls(
+            [mock.call(*request) for request in requests])
@@ -15,12 +15,18 @@
 
 import base64
 import datetime
+import json
 import os
 import tempfile
+import threading
+import time
 
 from Crypto.PublicKey import RSA
 import mock
+import requests
 from requests import exceptions as request_exceptions
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
 import testtools
 
 from barbican.tests import keys
@@ -290,6 +296,7 @@ class WhenTestingDogtagCAPlugin(utils.BaseTestCase):
         CONF.dogtag_plugin.simple_cmc_profile = "caOtherCert"
         self.cfg = CONF
 
+        self.addCleanup(dogtag_import._SESSIONS.clear)
         self.plugin = dogtag_import.DogtagCAPlugin(CONF)
         self.plugin.certclient = self.certclient_mock
         self.order_id = mock.MagicMock()
@@ -752,6 +759,29 @@ class WhenTestingDogtagCAPlugin(utils.BaseTestCase):
         self.assertEqual(keys.get_certificate_pem(),
                          result_dto.certificate)
 
+    def test_check_statuses(self):
+        plugin_meta = {dogtag_import.DogtagCAPlugin.REQUEST_ID:
+                       self.request_id_mock}
+        self.certclient_mock.get_request.side_effect = [
+            self.request, pki.PKIException('error')]
+        self.certclient_mock.get_cert.return_value = self.cert
+        requests = [(self.order_id, mock.ANY, plugin_meta,
+                     self.barbican_meta_dto)] * 2
+
+        results = self.plugin.check_certificate_statuses(requests)
+
+        self.assertEqual(cm.CertificateStatus.CERTIFICATE_GENERATED,
+                         results[0].status)
+        self.assertIsInstance(results[1], pki.PKIException)
+
+    def test_connections_share_a_session(self):
+        connection = dogtag_import.create_connection(self.cfg, 'ca')
+        other_connection = dogtag_import.create_connection(self.cfg, 'kra')
+
+        self.assertIs(connection.session, other_connection.session)
+        connection.session.mount.assert_called_once_with(
+            'https://', mock.ANY)
+
     def test_check_status_raise_error_no_request_id(self):
         order_meta = mock.ANY
         plugin_meta = {}
@@ -926,3 +956,111 @@ class WhenTestingDogtagCAPlugin(utils.BaseTestCase):
             plugin_meta,
             self.barbican_meta_dto
         )
+
+
+class _PKIStubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Emulates the certificate request resource of the PKI REST API."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        time.sleep(self.server.delay)
+        request_id = self.path.rsplit('/', 1)[-1]
+        body = json.dumps({'requestID': request_id,
+                           'requestStatus': 'pending',
+                           'requestType': 'enrollment'}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _PKIStubServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           _PKIStubHandler)
+        self.client_ports = set()
+        self.delay = 0
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d/ca/rest/certrequests/' % (
+            self.server_address[1])
+
+
+@testtools.skipIf(not imports_ok, "Dogtag imports not available")
+class WhenUsingDogtagSessions(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenUsingDogtagSessions, self).setUp()
+        self.server = _PKIStubServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+
+    def _mount(self, timeout):
+        self.session.mount('http://', dogtag_import._TimeoutHTTPAdapter(
+            timeout=timeout, pool_connections=1, pool_maxsize=1))
+
+    def _set_override(self, name, value):
+        dogtag_import.CONF.set_override(name, value, group='dogtag_plugin')
+        self.addCleanup(dogtag_import.CONF.clear_override, name,
+                        group='dogtag_plugin')
+
+    def test_reuses_connection_across_requests(self):
+        self._mount((1, 1))
+
+        for request_id in ('1', '2', '3'):
+            resp = self.session.get(self.server.url + request_id)
+            self.assertEqual(request_id, resp.json()['requestID'])
+
+        self.assertEqual(1, len(self.server.client_ports))
+
+    def test_applies_default_timeout(self):
+        self._mount((1, 0.1))
+        self.server.delay = 0.5
+
+        self.assertRaises(request_exceptions.ReadTimeout,
+                          self.session.get, self.server.url + '1')
+
+    def test_keeps_explicit_timeout(self):
+        self._mount((1, 0.1))
+        self.server.delay = 0.5
+
+        resp = self.session.get(self.server.url + '1', timeout=(1, 5))
+
+        self.assertEqual('1', resp.json()['requestID'])
+
+    def test_configures_shared_session_adapter(self):
+        self._set_override('dogtag_host', 'localhost')
+        self._set_override('dogtag_port', '8443')
+        self._set_override('pem_path', '/etc/barbican/kra.pem')
+        self._set_override('connection_pool_size', 7)
+        self._set_override('connect_timeout', 3.0)
+        self._set_override('read_timeout', 30.0)
+        self.addCleanup(dogtag_import._SESSIONS.clear)
+        connection = mock.MagicMock(session=self.session)
+        other_connection = mock.MagicMock(session=requests.Session())
+
+        dogtag_import._share_session(dogtag_import.CONF, connection)
+        dogtag_import._share_session(dogtag_import.CONF, other_connection)
+
+        self.assertIs(self.session, other_connection.session)
+        adapter = self.session.get_adapter('https://localhost:8443/ca')
+        self.assertIsInstance(adapter, dogtag_import._TimeoutHTTPAdapter)
+        self.assertEqual((3.0, 30.0), adapter._timeout)
+        self.assertEqual(7, adapter._pool_connections)
+        self.assertEqual(7, adapter._pool_maxsize)
@@ -0,0 +1,148 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+
+import mock
+
+from barbican.common import utils
+from barbican.model import models
+from barbican.model import repositories
+from barbican.plugin.crypto import base
+from barbican.plugin.crypto import simple_crypto
+from barbican.plugin import kek_rotation
+from barbican.plugin import store_crypto
+from barbican.tests import database_utils
+
+
+class WhenRotatingProjectKEKs(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenRotatingProjectKEKs, self).setUp()
+        self.plugin = simple_crypto.SimpleCryptoPlugin()
+        self.plugin_name = utils.generate_fullname_for(self.plugin)
+        patcher = mock.patch('barbican.plugin.crypto.manager.get_manager')
+        mock_get_manager = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_get_manager.return_value.get_plugin_retrieve.return_value = (
+            self.plugin)
+
+        self.kek_repo = repositories.get_kek_datum_repository()
+        self.datum_repo = repositories.get_encrypted_datum_repository()
+        self.project = database_utils.create_project()
+        self.old_kek, _ = store_crypto._find_or_create_kek_objects(
+            self.plugin, self.project)
+        self.secrets = [self._store_secret(b'secret %d' % i)
+                        for i in range(3)]
+        repositories.commit()
+
+    def _store_secret(self, unencrypted):
+        kek_datum, kek_meta_dto = store_crypto._find_or_create_kek_objects(
+            self.plugin, self.project)
+        response_dto = self.plugin.encrypt(
+            base.EncryptDTO(unencrypted), kek_meta_dto,
+            self.project.external_id)
+        secret = database_utils.create_secret(self.project)
+        datum = models.EncryptedDatum(secret, kek_datum)
+        datum.cypher_text = base64.b64encode(response_dto.cypher_text)
+        datum.kek_meta_extended = response_dto.kek_meta_extended
+        self.datum_repo.create_from(datum)
+        return secret
+
+    def _decrypt(self, secret):
+        datum = self.datum_repo.get_session().query(
+            models.EncryptedDatum).filter_by(secret_id=secret.id).one()
+        return datum.kek_id, self.plugin.decrypt(
+            base.DecryptDTO(base64.b64decode(datum.cypher_text)),
+            base.KEKMetaDTO(datum.kek_meta_project),
+            datum.kek_meta_extended, self.project.external_id)
+
+    def test_rotate_kek(self):
+        new_kek = kek_rotation.rotate_kek(self.project, self.plugin_name)
+
+        self.assertNotEqual(self.old_kek.id, new_kek.id)
+        self.assertTrue(new_kek.active)
+        self.assertTrue(new_kek.bind_completed)
+        self.assertFalse(self.kek_repo.get(self.old_kek.id, None).active)
+        self.assertEqual(
+            new_kek,
+            self.kek_repo.find_or_create_kek_datum(self.project,
+                                                   self.plugin_name))
+
+    def test_secrets_stay_readable_once_kek_rotated(self):
+        kek_rotation.rotate_kek(self.project, self.plugin_name)
+
+        self.assertEqual((self.old_kek.id, b'secret 0'),
+                         self._decrypt(self.secrets[0]))
+
+    def test_reencrypts_secrets_under_new_kek(self):
+        new_kek = kek_rotation.rotate_kek(self.project, self.plugin_name)
+        repositories.commit()
+        progress_callback = mock.MagicMock()
+
+        progress = kek_rotation.KEKReencryptor(
+            self.project, self.plugin_name, batch_size=2,
+            progress_callback=progress_callback).run()
+
+        for i, secret in enumerate(self.secrets):
+            self.assertEqual((new_kek.id, b'secret %d' % i),
+                             self._decrypt(secret))
+        self.assertEqual([2, 3], [
+            call[0][0].reencrypted
+            for call in progress_callback.call_args_list])
+        self.assertEqual([1, 0], [
+            call[0][0].remaining
+            for call in progress_callback.call_args_list])
+        self.assertEqual(3, progress.reencrypted)
+        self.assertEqual(0, progress.remaining)
+
+    def test_deletes_drained_keks(self):
+        new_kek = kek_rotation.rotate_kek(self.project, self.plugin_name)
+        repositories.commit()
+
+        kek_rotation.KEKReencryptor(self.project, self.plugin_name).run()
+
+        self.assertEqual([new_kek],
+                         self.kek_repo.get_project_entities(self.project.id))
+        self.assertEqual(
+            {new_kek.id: 3}, self.datum_repo.count_by_kek(self.project.id))
+
+    def test_nothing_to_reencrypt_without_rotation(self):
+        progress = kek_rotation.KEKReencryptor(
+            self.project, self.plugin_name).run()
+
+        self.assertEqual((0, 0), progress[:2])
+        self.assertEqual(
+            {self.old_kek.id: 3},
+            self.datum_repo.count_by_kek(self.project.id))
+
+    @mock.patch('time.sleep')
+    @mock.patch('time.time', return_value=1000)
+    def test_reencryption_is_throttled(self, mock_time, mock_sleep):
+        kek_rotation.rotate_kek(self.project, self.plugin_name)
+        repositories.commit()
+
+        kek_rotation.KEKReencryptor(self.project, self.plugin_name,
+                                    batch_size=2, max_rate=4).run()
+
+        # Crypto plugin calls may also yield with time.sleep(0).
+        self.assertEqual(
+            [mock.call(0.5), mock.call(0.75)],
+            [call for call in mock_sleep.call_args_list
+             if call != mock.call(0)])
+
+    def test_reencryption_progress_rate(self):
+        self.assertEqual(
+            4.0, kek_rotation.ReencryptionProgress(10, 0, 2.5).rate)
+        self.assertEqual(
+            0.0, kek_rotation.ReencryptionProgress(0, 10, 0).rate)
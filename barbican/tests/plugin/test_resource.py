@@ -21,6 +21,8 @@ from barbican.model import models
 from barbican.plugin.interface import secret_store
 from barbican.plugin import resources
 from barbican.plugin import store_crypto
+from barbican.plugin.util import payload_cache
+from barbican.plugin.util import transport_keys
 from barbican.tests import utils
 
 
@@ -100,6 +102,23 @@ class WhenTestingPluginResource(testtools.TestCase,
         self.assertEqual(spec['algorithm'], dto.key_spec.alg)
         self.assertEqual(spec['bit_length'], dto.key_spec.bit_length)
         self.assertEqual(self.content_type, dto.content_type)
+        self.assertIsNone(dto.secret_bytes)
+
+    def test_store_secret_dto_with_decoded_bytes(self):
+        spec = {'algorithm': 'AES', 'bit_length': 256,
+                'secret_type': 'symmetric'}
+        secret_bytes = b'ABCDEFABCDEFABCDEFABCDEF'
+
+        self.plugin_resource.store_secret(
+            unencrypted_raw=base64.b64encode(secret_bytes),
+            content_type_raw=self.content_type,
+            content_encoding='base64',
+            secret_model=models.Secret(spec),
+            project_model=self.project_model,
+            unencrypted_bytes=secret_bytes)
+
+        dto = self.moc_plugin.store_secret.call_args_list[0][0][0]
+        self.assertEqual(secret_bytes, dto.secret_bytes)
 
     @utils.parameterized_dataset({
         'general_secret_store': {
@@ -162,6 +181,33 @@ class WhenTestingPluginResource(testtools.TestCase,
             None)
         self.assertEqual(raw_secret, secret)
 
+    @mock.patch('barbican.plugin.util.payload_cache.is_enabled_for')
+    def test_get_secret_from_payload_cache(self, mock_is_enabled_for):
+        mock_is_enabled_for.return_value = True
+        cache = payload_cache.PayloadCache(ttl_seconds=5, max_entries=10)
+        patcher = mock.patch.object(payload_cache, '_PAYLOAD_CACHE', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        raw_secret = b'ABCDEFABCDEFABCDEFABCDEF'
+        self.secret_meta_repo.get_metadata_for_secret.return_value = {
+            'content_type': self.content_type}
+        self.moc_plugin.get_secret.return_value = secret_store.SecretDTO(
+            'symmetric', base64.b64encode(raw_secret), None,
+            self.content_type)
+        secret_model = models.Secret({'secret_type': 'symmetric'})
+
+        for _ in range(2):
+            secret = self.plugin_resource.get_secret(
+                '*/*', secret_model, self.project_model)
+            self.assertEqual(raw_secret, secret)
+
+        self.assertEqual(1, self.moc_plugin.get_secret.call_count)
+        self.assertEqual(
+            1, self.secret_meta_repo.get_metadata_for_secret.call_count)
+
+        self.plugin_resource.delete_secret(secret_model, 'project_id')
+        self.assertIsNone(cache.get(secret_model.id, secret_model.updated_at))
+
     def test_generate_asymmetric_with_passphrase(self):
         """test asymmetric secret generation with passphrase."""
         secret_container = self.plugin_resource.generate_asymmetric_secret(
@@ -223,3 +269,30 @@ class WhenTestingPluginResource(testtools.TestCase,
 
         self.secret_repo.delete_entity_by_id.assert_called_once_with(
             entity_id=secret_model.id, external_project_id=project_id)
+
+    @mock.patch('barbican.plugin.util.transport_keys.get_transport_key_cache')
+    def test_get_transport_key_id_for_retrieval(self, mock_get_cache):
+        mock_get_cache.return_value.get.return_value = (
+            transport_keys.CachedTransportKey('key id', 'plugin', 'tkey'))
+        self.secret_meta_repo.get_metadata_for_secret.return_value = {
+            'plugin_name': 'plugin'}
+
+        transport_key_id = (
+            self.plugin_resource.get_transport_key_id_for_retrieval(
+                mock.MagicMock()))
+
+        self.assertEqual('key id', transport_key_id)
+        mock_get_cache.return_value.get.assert_called_once_with(
+            self.moc_plugin)
+        self.moc_plugin.get_transport_key.assert_not_called()
+
+    @mock.patch('barbican.plugin.util.transport_keys.get_transport_key_cache')
+    def test_get_transport_key_id_for_retrieval_without_support(
+            self, mock_get_cache):
+        mock_get_cache.return_value.get.return_value = None
+        self.secret_meta_repo.get_metadata_for_secret.return_value = {
+            'plugin_name': 'plugin'}
+
+        self.assertIsNone(
+            self.plugin_resource.get_transport_key_id_for_retrieval(
+                mock.MagicMock()))
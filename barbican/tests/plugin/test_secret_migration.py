@@ -0,0 +1,254 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import threading
+
+import mock
+
+from barbican.common import exception
+from barbican.common import utils
+from barbican.model import models
+from barbican.model import repositories
+from barbican.plugin.crypto import simple_crypto
+from barbican.plugin.interface import secret_store
+from barbican.plugin import secret_migration
+from barbican.plugin import store_crypto
+from barbican.tests import database_utils
+
+
+class FakeSecretStore(object):
+    """Secret store plugin keeping its secrets in memory."""
+
+    def __init__(self):
+        self.secrets = {}
+
+    def store_secret(self, secret_dto):
+        key_id = str(len(self.secrets))
+        self.secrets[key_id] = base64.b64decode(secret_dto.secret)
+        return {'key_id': key_id}
+
+    def get_secret(self, secret_type, metadata):
+        return secret_store.SecretDTO(
+            secret_type, base64.b64encode(self.secrets[metadata['key_id']]),
+            secret_store.KeySpec(), metadata.get('content_type'))
+
+    def delete_secret(self, metadata):
+        del self.secrets[metadata['key_id']]
+
+
+class WhenMigratingSecrets(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenMigratingSecrets, self).setUp()
+        self.fake_store = FakeSecretStore()
+        self.crypto_store = store_crypto.StoreCryptoAdapterPlugin()
+        self.crypto_plugin = simple_crypto.SimpleCryptoPlugin()
+        self.crypto_plugin_name = utils.generate_fullname_for(
+            self.crypto_plugin)
+        store_plugins = {
+            utils.generate_fullname_for(self.fake_store): self.fake_store,
+            utils.generate_fullname_for(self.crypto_store): self.crypto_store,
+        }
+
+        patcher = mock.patch(
+            'barbican.plugin.interface.secret_store.get_manager')
+        store_manager = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        store_manager.extensions = [
+            mock.MagicMock(obj=self.fake_store),
+            mock.MagicMock(obj=self.crypto_store)]
+        store_manager.extensions[0].name = 'fake_store'
+        store_manager.extensions[1].name = 'store_crypto'
+        store_manager.get_plugin_retrieve_delete.side_effect = (
+            store_plugins.get)
+
+        patcher = mock.patch('barbican.plugin.crypto.manager.get_manager')
+        crypto_manager = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        crypto_manager.extensions = [mock.MagicMock(obj=self.crypto_plugin)]
+        crypto_manager.extensions[0].name = 'simple_crypto'
+        crypto_manager.get_plugin_retrieve.return_value = self.crypto_plugin
+
+        self.secret_repo = repositories.get_secret_repository()
+        self.meta_repo = repositories.get_secret_meta_repository()
+        self.project = database_utils.create_project()
+        self.fake_store_model = self._create_store('fake', 'fake_store')
+        self.crypto_store_model = self._create_store(
+            'crypto', 'store_crypto', 'simple_crypto')
+        self.secrets = [self._store_secret(b'secret %d' % i)
+                        for i in range(3)]
+        repositories.commit()
+
+    def _create_store(self, name, store_plugin, crypto_plugin=None):
+        store_model = models.SecretStores(name, store_plugin, crypto_plugin)
+        repositories.get_secret_stores_repository().create_from(store_model)
+        return store_model
+
+    def _store_secret(self, unencrypted, project=None):
+        secret = database_utils.create_secret(project or self.project)
+        metadata = self.fake_store.store_secret(secret_store.SecretDTO(
+            secret.secret_type, base64.b64encode(unencrypted), None,
+            'text/plain'))
+        metadata['plugin_name'] = utils.generate_fullname_for(
+            self.fake_store)
+        metadata['content_type'] = 'text/plain'
+        self.meta_repo.save(metadata, secret)
+        return secret
+
+    def _get_payload(self, secret_id):
+        secret = self.secret_repo.get_secret_by_id(secret_id)
+        metadata = self.meta_repo.get_metadata_for_secret(secret_id)
+        context = store_crypto.StoreCryptoContext(self.project,
+                                                  secret_model=secret)
+        secret_dto = self.crypto_store.get_secret(secret.secret_type,
+                                                  metadata, context)
+        return metadata, base64.b64decode(secret_dto.secret)
+
+    def _migrate(self, target_store=None, **kwargs):
+        kwargs.setdefault('project_model', self.project)
+        kwargs.setdefault('workers', 0)
+        return secret_migration.SecretMigrator(
+            target_store or self.crypto_store_model, **kwargs).run()
+
+    def test_migrates_secrets_to_target_store(self):
+        progress = self._migrate()
+
+        self.assertEqual((3, 0, 0), progress[:3])
+        for i, secret in enumerate(self.secrets):
+            metadata, payload = self._get_payload(secret.id)
+            self.assertEqual(b'secret %d' % i, payload)
+            self.assertEqual(
+                utils.generate_fullname_for(self.crypto_store),
+                metadata['plugin_name'])
+            self.assertEqual('text/plain', metadata['content_type'])
+            self.assertNotIn('key_id', metadata)
+        self.assertEqual({}, self.fake_store.secrets)
+
+    def test_migrates_secrets_back_from_crypto_store(self):
+        self._migrate()
+
+        progress = self._migrate(self.fake_store_model)
+
+        self.assertEqual((3, 0, 0), progress[:3])
+        self.assertEqual(
+            [b'secret 0', b'secret 1', b'secret 2'],
+            sorted(self.fake_store.secrets.values()))
+        self.assertEqual(
+            {}, repositories.get_encrypted_datum_repository().count_by_kek(
+                self.project.id))
+
+    def test_skips_secrets_already_in_target_store(self):
+        self._migrate()
+
+        progress = self._migrate()
+
+        self.assertEqual((0, 3, 0), progress[:3])
+
+    def test_only_migrates_secrets_of_project(self):
+        other_project = database_utils.create_project(external_id='other')
+        other_secret = self._store_secret(b'other', project=other_project)
+        repositories.commit()
+
+        self._migrate()
+
+        self.assertEqual(
+            utils.generate_fullname_for(self.fake_store),
+            self.meta_repo.get_metadata_for_secret(
+                other_secret.id)['plugin_name'])
+
+    def test_migrates_secrets_of_source_store(self):
+        other_project = database_utils.create_project(external_id='other')
+        self._store_secret(b'other', project=other_project)
+        repositories.commit()
+
+        progress = self._migrate(project_model=None,
+                                 source_store=self.fake_store_model,
+                                 page_size=2)
+
+        self.assertEqual((4, 0, 0), progress[:3])
+        self.assertEqual({}, self.fake_store.secrets)
+
+    def test_failed_secrets_are_left_in_place(self):
+        progress_callback = mock.MagicMock()
+        with mock.patch.object(self.crypto_plugin, 'encrypt',
+                               side_effect=ValueError):
+            progress = self._migrate(page_size=2,
+                                     progress_callback=progress_callback)
+
+        self.assertEqual((0, 0, 3), progress[:3])
+        self.assertEqual([2, 3], [
+            call[0][0].failed for call in progress_callback.call_args_list])
+        self.assertEqual(3, len(self.fake_store.secrets))
+        for secret in self.secrets:
+            metadata = self.meta_repo.get_metadata_for_secret(secret.id)
+            self.assertEqual(utils.generate_fullname_for(self.fake_store),
+                             metadata['plugin_name'])
+
+    def test_failed_deletion_from_source_store_is_ignored(self):
+        with mock.patch.object(self.fake_store, 'delete_secret',
+                               side_effect=ValueError):
+            progress = self._migrate()
+
+        self.assertEqual((3, 0, 0), progress[:3])
+
+    def test_migrates_secrets_with_worker_threads(self):
+        migrated = []
+
+        def migrate_secret(secret_id):
+            migrated.append(secret_id)
+            return secret_migration.MIGRATED
+
+        migrator = secret_migration.SecretMigrator(
+            self.crypto_store_model, project_model=self.project, workers=2,
+            page_size=2)
+        with mock.patch.object(migrator, '_migrate_secret',
+                               side_effect=migrate_secret):
+            progress = migrator.run()
+
+        self.assertEqual((3, 0, 0), progress[:3])
+        self.assertEqual(sorted(secret.id for secret in self.secrets),
+                         sorted(migrated))
+
+    def test_limits_migrations_per_store(self):
+        migrator = secret_migration.SecretMigrator(
+            self.crypto_store_model, per_store_concurrency=1)
+        acquired = []
+
+        def migrate():
+            with migrator._limit(('b', None), ('a', None)):
+                acquired.append(True)
+
+        with migrator._limit(('a', None)):
+            thread = threading.Thread(target=migrate)
+            thread.start()
+            thread.join(0.1)
+            self.assertEqual([], acquired)
+        thread.join()
+
+        self.assertEqual([True], acquired)
+
+    def test_get_secret_store(self):
+        self.assertEqual(
+            self.fake_store_model.id,
+            secret_migration.get_secret_store('fake').id)
+        self.assertEqual(
+            'crypto',
+            secret_migration.get_secret_store(
+                self.crypto_store_model.id).name)
+        self.assertRaises(exception.NotFound,
+                          secret_migration.get_secret_store, 'missing')
+
+    def test_migrate_command_requires_project_or_source_store(self):
+        self.assertRaises(ValueError, secret_migration.migrate_command,
+                          None, 'crypto')
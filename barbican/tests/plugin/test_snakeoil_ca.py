@@ -29,6 +29,24 @@ from barbican.tests import certificate_utils
 from barbican.tests import utils
 
 
+def store_ca_keypair(ca, serial=1):
+    """Stores a self-signed cert and key for a SnakeoilCA."""
+    key = certificate_utils.create_key_pair(crypto.TYPE_RSA, 1024)
+    cert = crypto.X509()
+    cert.set_serial_number(serial)
+    snakeoil_ca.set_subject_X509Name(cert.get_subject(), ca.subject_dn)
+    cert.set_issuer(cert.get_subject())
+    cert.gmtime_adj_notBefore(0)
+    cert.gmtime_adj_notAfter(3600)
+    cert.set_pubkey(key)
+    cert.sign(key, 'sha256')
+    ca.cert = cert
+    ca.key = key
+    ca.chain = crypto.dump_certificate(crypto.FILETYPE_PEM, cert)
+    ca.pkcs7 = b'pkcs7'
+    return cert
+
+
 class BaseTestCase(utils.BaseTestCase):
 
     def setUp(self):
@@ -140,6 +158,50 @@ class CaTestCase(BaseTestCase):
         self.assertEqual("Sub CA Test CN", subject.CN)
 
 
+class CaCacheTestCase(BaseTestCase):
+
+    def setUp(self):
+        super(CaCacheTestCase, self).setUp()
+        self.subject_dn = 'cn=Test CN,o=Test O'
+        self.ca = snakeoil_ca.SnakeoilCA(
+            cert_path=os.path.join(self.tmp_dir, 'ca.cert'),
+            key_path=os.path.join(self.tmp_dir, 'ca.key'),
+            chain_path=os.path.join(self.tmp_dir, 'ca.chain'),
+            pkcs7_path=os.path.join(self.tmp_dir, 'ca.pkcs7'),
+            subject_dn=self.subject_dn)
+        store_ca_keypair(self.ca)
+
+    def test_parsed_files_are_cached(self):
+        with mock.patch.object(crypto, 'load_certificate',
+                               wraps=crypto.load_certificate) as mock_load:
+            cert = self.ca.cert
+            self.assertIs(cert, self.ca.cert)
+        self.assertEqual(1, mock_load.call_count)
+        self.assertIs(self.ca.key, self.ca.key)
+        self.assertEqual(b'pkcs7', self.ca.pkcs7)
+
+    def test_cache_is_invalidated_when_file_is_modified(self):
+        self.assertEqual(1, self.ca.cert.get_serial_number())
+
+        other_ca = snakeoil_ca.SnakeoilCA(
+            cert_path=self.ca.cert_path, subject_dn=self.subject_dn)
+        other_ca.cert = store_ca_keypair(
+            snakeoil_ca.SnakeoilCA(subject_dn=self.subject_dn), serial=2)
+        stat = os.stat(self.ca.cert_path)
+        os.utime(self.ca.cert_path, (stat.st_atime, stat.st_mtime + 10))
+
+        self.assertEqual(2, self.ca.cert.get_serial_number())
+
+    def test_cache_is_invalidated_by_setter(self):
+        ca = snakeoil_ca.SnakeoilCA(subject_dn=self.subject_dn)
+        store_ca_keypair(ca)
+        self.assertEqual(1, ca.cert.get_serial_number())
+
+        store_ca_keypair(ca, serial=2)
+
+        self.assertEqual(2, ca.cert.get_serial_number())
+
+
 class CertManagerTestCase(BaseTestCase):
 
     def setUp(self):
@@ -186,6 +248,24 @@ class CertManagerTestCase(BaseTestCase):
         cert = cm.make_certificate(req)
         self.assertNotEqual(first_serial, cert.get_serial_number())
 
+    def test_make_certificates(self):
+        ca = snakeoil_ca.SnakeoilCA(subject_dn='cn=Test CN,o=Test O')
+        ca_cert = store_ca_keypair(ca)
+        req = certificate_utils.get_valid_csr_object()
+
+        certs = snakeoil_ca.CertManager(ca).make_certificates([req, req])
+
+        self.assertEqual(2, len(certs))
+        self.assertNotEqual(certs[0].get_serial_number(),
+                            certs[1].get_serial_number())
+        for cert in certs:
+            self.assertEqual(ca_cert.get_subject(), cert.get_issuer())
+            cert = x509.load_der_x509_certificate(
+                crypto.dump_certificate(crypto.FILETYPE_ASN1, cert),
+                default_backend())
+            crypto.verify(ca_cert, cert.signature,
+                          cert.tbs_certificate_bytes, 'sha256')
+
 
 class SnakeoilCAPluginTestCase(BaseTestCase):
 
@@ -287,6 +367,41 @@ class SnakeoilCAPluginTestCase(BaseTestCase):
         crypto.load_certificate(
             crypto.FILETYPE_PEM, base64.b64decode(resp.certificate))
 
+    def test_issue_certificate_requests(self):
+        store_ca_keypair(self.plugin.ca)
+        req = certificate_utils.get_valid_csr_object()
+        req_enc = base64.b64encode(
+            crypto.dump_certificate_request(crypto.FILETYPE_PEM, req))
+        invalid_ca_dto = cm.BarbicanMetaDTO(plugin_ca_id='invalid_ca_id')
+        requests = [
+            (self.order_id, {'request_data': req_enc}, {},
+             self.barbican_meta_dto),
+            (self.order_id, {}, {}, self.barbican_meta_dto),
+            (self.order_id, {'request_data': req_enc}, {}, invalid_ca_dto),
+            (self.order_id, {'request_data': req_enc}, {},
+             self.barbican_meta_dto),
+        ]
+
+        with mock.patch.object(
+                snakeoil_ca.CertManager, 'make_certificates',
+                autospec=True,
+                side_effect=snakeoil_ca.CertManager.make_certificates
+        ) as mock_make_certificates:
+            results = self.plugin.issue_certificate_requests(requests)
+
+        self.assertEqual(1, mock_make_certificates.call_count)
+        self.assertEqual(4, len(results))
+        for result in (results[0], results[3]):
+            self.assertEqual(cm.CertificateStatus.CERTIFICATE_GENERATED,
+                             result.status)
+            crypto.load_certificate(
+                crypto.FILETYPE_PEM, base64.b64decode(result.certificate))
+            self.assertEqual(base64.b64encode(b'pkcs7'),
+                             result.intermediates)
+        self.assertEqual(cm.CertificateStatus.CLIENT_DATA_ISSUE_SEEN,
+                         results[1].status)
+        self.assertIsInstance(results[2], cm.CertificateGeneralException)
+
     def test_no_request_data(self):
         res = self.plugin.issue_certificate_request(
             self.order_id, {}, {}, self.barbican_meta_dto)
@@ -189,6 +189,104 @@ class WhenTestingStoreCrypto(TestSecretStoreBase):
         self.assertEqual(self.kek_meta_dto, test_kek_meta_dto)
         self.assertEqual(self.project_id, test_project_id)
 
+    def test_store_secret_with_decoded_bytes(self):
+        """Test storing a secret already decoded from base64."""
+        self.secret_dto.secret_bytes = b'decoded'
+
+        self.plugin_to_test.store_secret(self.secret_dto, self.context)
+
+        args, kwargs = self.encrypting_plugin.encrypt.call_args
+        self.assertEqual(b'decoded', args[0].unencrypted)
+
+    def _get_batch_contexts(self, count=2):
+        contexts = []
+        for index in range(count):
+            secret_model = models.Secret({'algorithm': 'myalg',
+                                          'bit_length': 1024,
+                                          'mode': 'mymode'})
+            secret_model.encrypted_data = [self.encrypted_datum_model]
+            contexts.append(store_crypto.StoreCryptoContext(
+                secret_model=secret_model,
+                project_model=self.project_model))
+        return contexts
+
+    def test_store_secret_batch(self):
+        """Test storing secrets with a single call to the crypto plugin."""
+        contexts = self._get_batch_contexts()
+        self.encrypting_plugin.encrypt_batch.return_value = [
+            self.response_dto, self.response_dto]
+        secret_dto2 = secret_store.SecretDTO(
+            secret_store.SecretType.OPAQUE, None, secret_store.KeySpec(),
+            self.content_type, secret_bytes=b'decoded')
+
+        response = self.plugin_to_test.store_secret_batch(
+            [self.secret_dto, secret_dto2], contexts)
+
+        self.assertEqual([None, None], response)
+        self.assertFalse(self.encrypting_plugin.encrypt.called)
+        args, kwargs = self.encrypting_plugin.encrypt_batch.call_args
+        encrypt_dtos, test_kek_meta_dto, test_project_id = args
+        self.assertEqual([b'secret', b'decoded'],
+                         [dto.unencrypted for dto in encrypt_dtos])
+        self.assertEqual(self.kek_meta_dto, test_kek_meta_dto)
+        self.assertEqual(self.project_id, test_project_id)
+        self.assertEqual(self.content_type, contexts[1].content_type)
+
+        store_mock = store_crypto._store_secret_and_datum
+        self.assertEqual(2, store_mock.call_count)
+
+    def test_store_secret_batch_of_several_projects_raises(self):
+        contexts = self._get_batch_contexts()
+        contexts[1].project_model = mock.MagicMock(id='other-project')
+
+        self.assertRaises(ValueError, self.plugin_to_test.store_secret_batch,
+                          [self.secret_dto, self.secret_dto], contexts)
+        self.assertFalse(self.encrypting_plugin.encrypt_batch.called)
+
+    def test_get_secret_batch(self):
+        """Test decrypting secrets with a single call to the plugin."""
+        contexts = self._get_batch_contexts()
+        self.retrieving_plugin.decrypt_batch.return_value = [b'one', b'two']
+
+        secret_dtos = self.plugin_to_test.get_secret_batch(contexts)
+
+        self.assertEqual([base64.b64encode(b'one'), base64.b64encode(b'two')],
+                         [secret_dto.secret for secret_dto in secret_dtos])
+        self.assertEqual(
+            [self.encrypted_datum_model.content_type] * 2,
+            [secret_dto.content_type for secret_dto in secret_dtos])
+        self.assertFalse(self.retrieving_plugin.decrypt.called)
+        args, kwargs = self.retrieving_plugin.decrypt_batch.call_args
+        decrypt_dtos, test_kek_meta, kek_meta_extendeds, project_id = args
+        self.assertEqual([b'cypher_text'] * 2,
+                         [dto.encrypted for dto in decrypt_dtos])
+        self.assertEqual(['extended_meta'] * 2, kek_meta_extendeds)
+        self.assertEqual(self.project_id, project_id)
+
+    def test_get_secret_batch_without_datum_raises(self):
+        contexts = self._get_batch_contexts()
+        contexts[1].secret_model.encrypted_data = []
+
+        self.assertRaises(secret_store.SecretNotFoundException,
+                          self.plugin_to_test.get_secret_batch, contexts)
+
+    def test_generate_symmetric_key_batch(self):
+        contexts = self._get_batch_contexts()
+        self.generating_plugin.generate_symmetric_batch.return_value = [
+            self.response_dto, self.response_dto]
+
+        response = self.plugin_to_test.generate_symmetric_key_batch(
+            self.spec_aes, contexts)
+
+        self.assertEqual([None, None], response)
+        generate_batch_mock = self.generating_plugin.generate_symmetric_batch
+        generate_dtos, test_kek_meta_dto, test_project_id = (
+            generate_batch_mock.call_args[0])
+        self.assertEqual(2, len(generate_dtos))
+        self.assertEqual(self.spec_aes.bit_length, generate_dtos[0].bit_length)
+        self.assertEqual(
+            2, store_crypto._store_secret_and_datum.call_count)
+
     def test_store_secret_without_context_type(self):
         """Test storing a secret."""
         self.context.content_type = None
@@ -0,0 +1,189 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from barbican.common import exception
+from barbican.plugin.crypto import simple_crypto
+from barbican.plugin.interface import secret_store
+from barbican.plugin.util import circuit_breaker
+from barbican.tests import utils
+
+
+class WhenTestingCircuitBreaker(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingCircuitBreaker, self).setUp()
+        patcher = mock.patch('time.time', return_value=1000)
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = circuit_breaker.CircuitBreaker(
+            'plugin', window_seconds=60, minimum_calls=4, failure_ratio=0.5,
+            slow_call_seconds=10, open_seconds=30)
+
+    def _call(self, exc=None, duration=0):
+        def func():
+            self.mock_time.return_value += duration
+            if exc:
+                raise exc
+            return 'result'
+
+        with self.breaker.guard():
+            return func()
+
+    def _fail(self, count=1):
+        for _ in range(count):
+            self.assertRaises(ValueError, self._call, ValueError())
+
+    def test_opens_once_failure_ratio_is_reached(self):
+        self._call()
+        self._fail(2)
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+
+        self._fail()
+
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state)
+        self.assertRaises(exception.PluginBackendUnavailable, self._call)
+
+    def test_needs_minimum_calls_to_open(self):
+        self._fail(3)
+
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+
+    def test_client_errors_are_not_failures(self):
+        for _ in range(4):
+            self.assertRaises(
+                secret_store.SecretAlgorithmNotSupportedException,
+                self._call,
+                secret_store.SecretAlgorithmNotSupportedException('alg'))
+
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+        self.assertEqual(0, self.breaker.get_status()['failures'])
+
+    def test_slow_calls_are_failures(self):
+        for _ in range(4):
+            self.assertEqual('result', self._call(duration=10))
+
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state)
+
+    def test_calls_outside_the_window_are_dropped(self):
+        self._fail(3)
+        self.mock_time.return_value += 61
+        self._fail()
+
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+        self.assertEqual(1, self.breaker.get_status()['calls'])
+
+    def test_caller_can_flag_failures(self):
+        for _ in range(4):
+            with self.breaker.guard() as call:
+                call.failed = True
+
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state)
+
+    def test_half_open_probe_success_closes(self):
+        self._fail(4)
+        self.mock_time.return_value += 30
+
+        self.assertEqual('result', self._call())
+
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+        self.assertEqual(0, self.breaker.get_status()['calls'])
+
+    def test_half_open_probe_failure_reopens(self):
+        self._fail(4)
+        self.mock_time.return_value += 30
+
+        self._fail()
+
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state)
+        self.assertRaises(exception.PluginBackendUnavailable, self._call)
+
+    def test_half_open_lets_a_single_probe_through(self):
+        self._fail(4)
+        self.mock_time.return_value += 30
+
+        with self.breaker.guard():
+            self.assertEqual(circuit_breaker.HALF_OPEN, self.breaker.state)
+            self.assertRaises(exception.PluginBackendUnavailable, self._call)
+
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+
+    def test_interrupted_probe_lets_the_next_one_through(self):
+        self._fail(4)
+        self.mock_time.return_value += 30
+
+        self.assertRaises(KeyboardInterrupt, self._call, KeyboardInterrupt())
+
+        self.assertEqual(circuit_breaker.HALF_OPEN, self.breaker.state)
+        self.assertEqual('result', self._call())
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+
+    def test_interrupted_calls_are_not_counted(self):
+        self.assertRaises(KeyboardInterrupt, self._call, KeyboardInterrupt())
+
+        self.assertEqual(0, self.breaker.get_status()['calls'])
+
+    def test_get_status(self):
+        self._call(duration=2)
+        self._fail()
+
+        self.assertEqual(
+            {'state': circuit_breaker.CLOSED, 'calls': 2, 'failures': 1,
+             'average_latency': 1.0},
+            self.breaker.get_status())
+
+
+class WhenGuardingPluginCalls(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenGuardingPluginCalls, self).setUp()
+        self.plugin = simple_crypto.SimpleCryptoPlugin()
+        self.func = mock.MagicMock(return_value='result')
+        self.addCleanup(circuit_breaker._BREAKERS.clear)
+
+    def test_calls_through_when_disabled(self):
+        self.assertEqual('result',
+                         circuit_breaker.call(self.plugin, self.func, 'arg'))
+
+        self.func.assert_called_once_with('arg')
+        self.assertEqual({}, circuit_breaker._BREAKERS)
+        self.assertIsNone(circuit_breaker.get_status(self.plugin))
+
+    def test_tracks_calls_per_plugin_when_enabled(self):
+        circuit_breaker.CONF.set_override('enabled', True,
+                                          group='circuit_breaker')
+        self.addCleanup(circuit_breaker.CONF.clear_override, 'enabled',
+                        group='circuit_breaker')
+
+        self.assertEqual('result',
+                         circuit_breaker.call(self.plugin, self.func, 'arg'))
+
+        status = circuit_breaker.get_status(self.plugin)
+        self.assertEqual(circuit_breaker.CLOSED, status['state'])
+        self.assertEqual(1, status['calls'])
+        self.assertIs(circuit_breaker.get_circuit_breaker(self.plugin),
+                      circuit_breaker._BREAKERS[
+                          'barbican.plugin.crypto.simple_crypto.'
+                          'SimpleCryptoPlugin'])
+
+    def test_notifies_call_observers(self):
+        observer = mock.MagicMock()
+        circuit_breaker.add_call_observer(observer)
+        self.addCleanup(circuit_breaker.remove_call_observer, observer)
+        self.func.side_effect = ValueError()
+
+        self.assertRaises(ValueError, circuit_breaker.call, self.plugin,
+                          self.func)
+
+        observer.assert_called_once_with(self.plugin, mock.ANY)
@@ -0,0 +1,113 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from barbican.plugin.util import payload_cache
+from barbican.tests import utils
+
+
+class WhenTestingPayloadCache(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingPayloadCache, self).setUp()
+        patcher = mock.patch('time.time', return_value=1000)
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = payload_cache.PayloadCache(ttl_seconds=5, max_entries=2)
+
+    def test_returns_cached_payload_of_same_version(self):
+        self.cache.put('secret1', 'v1', 'text/plain', u'c2VjcmV0')
+
+        self.assertEqual(('text/plain', u'c2VjcmV0'),
+                         self.cache.get('secret1', 'v1'))
+        self.assertIsNone(self.cache.get('secret1', 'v2'))
+        self.assertIsNone(self.cache.get('secret2', 'v1'))
+
+    def test_holds_payloads_encrypted(self):
+        self.cache.put('secret1', 'v1', 'text/plain', b'c2VjcmV0')
+
+        entry = self.cache._entries['secret1']
+        self.assertNotIn(b'c2VjcmV0', entry)
+        self.assertEqual(u'c2VjcmV0', self.cache.get('secret1', 'v1').secret)
+
+    def test_entries_expire(self):
+        self.cache.put('secret1', 'v1', 'text/plain', 'c2VjcmV0')
+        self.mock_time.return_value += 5
+
+        self.assertIsNone(self.cache.get('secret1', 'v1'))
+
+    def test_evicts_oldest_entries(self):
+        for secret_id in ('secret1', 'secret2', 'secret3'):
+            self.cache.put(secret_id, 'v1', 'text/plain', 'c2VjcmV0')
+
+        self.assertIsNone(self.cache.get('secret1', 'v1'))
+        self.assertIsNotNone(self.cache.get('secret3', 'v1'))
+        self.assertEqual(1, self.cache.get_stats()['evictions'])
+
+    def test_invalidate(self):
+        self.cache.put('secret1', 'v1', 'text/plain', 'c2VjcmV0')
+
+        self.cache.invalidate('secret1')
+
+        self.assertIsNone(self.cache.get('secret1', 'v1'))
+
+    def test_get_stats(self):
+        self.cache.put('secret1', 'v1', 'text/plain', 'c2VjcmV0')
+        self.cache.get('secret1', 'v1')
+        self.cache.get('secret2', 'v1')
+        self.cache.invalidate('secret1')
+
+        self.assertEqual(
+            {'entries': 0, 'hits': 1, 'misses': 1, 'evictions': 0,
+             'invalidations': 1},
+            self.cache.get_stats())
+
+
+class WhenTestingPayloadCacheEnablement(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingPayloadCacheEnablement, self).setUp()
+        self.secret = mock.MagicMock(id='secret1')
+        self.project = mock.MagicMock(external_id='project1')
+
+    def _set_override(self, name, value):
+        payload_cache.CONF.set_override(name, value, group='payload_cache')
+        self.addCleanup(payload_cache.CONF.clear_override, name,
+                        group='payload_cache')
+
+    def test_disabled_by_default(self):
+        self.assertFalse(
+            payload_cache.is_enabled_for(self.secret, self.project))
+
+    def test_enabled_per_project(self):
+        self._set_override('project_ids', ['project1'])
+
+        self.assertTrue(
+            payload_cache.is_enabled_for(self.secret, self.project))
+        self.assertFalse(payload_cache.is_enabled_for(
+            self.secret, mock.MagicMock(external_id='project2')))
+
+    def test_enabled_per_secret(self):
+        self._set_override('secret_ids', ['secret1'])
+
+        self.assertTrue(payload_cache.is_enabled_for(self.secret, None))
+        self.assertFalse(payload_cache.is_enabled_for(
+            mock.MagicMock(id='secret2'), self.project))
+
+    def test_disabled_with_no_ttl(self):
+        self._set_override('project_ids', ['project1'])
+        self._set_override('ttl_seconds', 0)
+
+        self.assertFalse(
+            payload_cache.is_enabled_for(self.secret, self.project))
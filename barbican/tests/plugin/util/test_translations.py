@@ -14,6 +14,7 @@
 # limitations under the License.
 
 from oslo_serialization import base64
+import six
 
 from barbican.plugin.interface import secret_store as s
 from barbican.plugin.util import translations
@@ -258,6 +259,64 @@ class WhenDenormalizingAfterDecryption(utils.BaseTestCase):
         self.assertEqual(base64.decode_as_bytes(encoded_pem), denorm_secret)
 
 
+class WhenBase64EncodingInChunks(utils.BaseTestCase):
+
+    def test_encodes_data_spanning_many_chunks(self):
+        unencrypted = b''.join(six.int2byte(i % 256) for i in range(100000))
+
+        b64payload, _ = translations.normalize_before_encryption(
+            unencrypted, 'application/octet-stream', None,
+            s.SecretType.OPAQUE)
+
+        self.assertEqual(base64.encode_as_bytes(unencrypted), b64payload)
+
+
+class WhenDecodingBase64InChunks(utils.BaseTestCase):
+
+    def _decode(self, chunks):
+        return b''.join(translations.iter_base64_decode(chunks))
+
+    def test_decodes_chunks_split_within_groups(self):
+        encoded = base64.encode_as_text(b'some secret data')
+
+        decoded = self._decode(translations.iter_chunks(encoded, 5))
+
+        self.assertEqual(b'some secret data', decoded)
+
+    def test_discards_non_base64_characters(self):
+        encoded = base64.encode_as_bytes(b'some secret data')
+
+        decoded = self._decode([encoded[:7], b'\n', encoded[7:], b'\r\n'])
+
+        self.assertEqual(b'some secret data', decoded)
+
+    def test_stops_at_first_padded_group(self):
+        for size in range(1, 9):
+            self.assertEqual(
+                b'A', self._decode(translations.iter_chunks(b'QQ==QUI=',
+                                                            size)))
+
+    def test_ignores_data_after_padding(self):
+        for size in range(1, 6):
+            self.assertEqual(
+                b'A', self._decode(translations.iter_chunks(b'QQ==x', size)))
+
+    def test_ignores_padding_not_completing_a_group(self):
+        encoded = b'=QU=JD'
+
+        decoded = self._decode(translations.iter_chunks(encoded, 2))
+
+        self.assertEqual(b'ABC', decoded)
+
+    def test_raises_for_incomplete_data(self):
+        encoded = base64.encode_as_text(b'some secret data')
+
+        self.assertRaises(ValueError, self._decode, [encoded[:-1]])
+
+    def test_raises_for_non_ascii_text(self):
+        self.assertRaises(ValueError, self._decode, [u'\u00e9t\u00e9'])
+
+
 class WhenConvertingKeyFormats(utils.BaseTestCase):
     def setUp(self):
         super(WhenConvertingKeyFormats, self).setUp()
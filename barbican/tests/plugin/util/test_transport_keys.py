@@ -0,0 +1,182 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from barbican.common import utils
+from barbican.model import repositories
+from barbican.plugin.interface import secret_store
+from barbican.plugin.util import transport_keys
+from barbican.tests import database_utils
+
+
+class TransportKeyStore(secret_store.SecretStoreBase):
+    """Secret store whose transport key can be rotated by the tests."""
+
+    def __init__(self):
+        self.transport_key = 'transport key 1'
+        self.get_transport_key_calls = 0
+        self.is_current_calls = 0
+
+    def get_plugin_name(self):
+        return 'transport key store'
+
+    def generate_symmetric_key(self, key_spec):
+        raise NotImplementedError  # pragma: no cover
+
+    def generate_asymmetric_key(self, key_spec):
+        raise NotImplementedError  # pragma: no cover
+
+    def store_secret(self, secret_dto):
+        raise NotImplementedError  # pragma: no cover
+
+    def get_secret(self, secret_type, secret_metadata):
+        raise NotImplementedError  # pragma: no cover
+
+    def generate_supports(self, key_spec):
+        return True
+
+    def delete_secret(self, secret_metadata):
+        raise NotImplementedError  # pragma: no cover
+
+    def store_secret_supports(self, key_spec):
+        return True
+
+    def get_transport_key(self):
+        self.get_transport_key_calls += 1
+        return self.transport_key
+
+    def is_transport_key_current(self, transport_key):
+        self.is_current_calls += 1
+        return transport_key == self.transport_key
+
+
+class WhenCachingTransportKeys(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenCachingTransportKeys, self).setUp()
+        self.plugin = TransportKeyStore()
+        self.plugin_name = utils.generate_fullname_for(self.plugin)
+        self.cache = transport_keys.TransportKeyCache(ttl=300)
+        self.key_repo = repositories.get_transport_key_repository()
+
+    def _check_in_foreground(self, plugin_name, store_plugin):
+        # The in-memory test database is not shared across threads.
+        self.cache._check_in_background(plugin_name, store_plugin)
+
+    def test_first_get_persists_the_plugin_key(self):
+        key = self.cache.get(self.plugin)
+
+        self.assertEqual('transport key 1', key.transport_key)
+        self.assertEqual(self.plugin_name, key.plugin_name)
+        latest_key = self.key_repo.get_latest_transport_key(self.plugin_name)
+        self.assertEqual(key.id, latest_key.id)
+
+    def test_created_key_is_committed_apart_from_the_request(self):
+        key = self.cache.get(self.plugin)
+
+        # Read-only requests, such as GETs, are never committed.
+        repositories.rollback()
+        repositories.clear()
+
+        self.assertEqual(
+            key.id,
+            self.key_repo.get_latest_transport_key(self.plugin_name).id)
+
+    def test_get_reuses_current_persisted_key(self):
+        first_key = self.cache.get(self.plugin)
+
+        other_cache = transport_keys.TransportKeyCache(ttl=300)
+        key = other_cache.get(self.plugin)
+        self.assertEqual(first_key.id, key.id)
+        self.assertEqual(1, self.plugin.get_transport_key_calls)
+        self.assertEqual(1, self.plugin.is_current_calls)
+
+        self.assertEqual(key, other_cache.get(self.plugin))
+        self.assertEqual(1, self.plugin.is_current_calls)
+
+    def test_get_does_not_call_plugin_while_fresh(self):
+        self.cache.get(self.plugin)
+
+        for _ in range(5):
+            self.cache.get(self.plugin)
+        self.assertEqual(1, self.plugin.get_transport_key_calls)
+        self.assertEqual(0, self.plugin.is_current_calls)
+
+    @mock.patch('time.time')
+    def test_stale_key_is_served_while_checked_in_background(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.get(self.plugin)
+        repositories.commit()
+        key = self.cache.get(self.plugin)
+
+        mock_time.return_value = 1000 + 300
+        with mock.patch.object(self.cache, '_start_check') as mock_check:
+            self.assertEqual(key, self.cache.get(self.plugin))
+        mock_check.assert_called_once_with(self.plugin_name, self.plugin)
+
+    def test_background_check_persists_rotated_key(self):
+        self.cache.get(self.plugin)
+        repositories.commit()
+        old_key = self.cache.get(self.plugin)
+
+        self.plugin.transport_key = 'transport key 2'
+        self._check_in_foreground(self.plugin_name, self.plugin)
+
+        new_key = self.cache.get(self.plugin)
+        self.assertNotEqual(old_key.id, new_key.id)
+        self.assertEqual('transport key 2', new_key.transport_key)
+        self.assertEqual(
+            new_key.id,
+            self.key_repo.get_latest_transport_key(self.plugin_name).id)
+
+    def test_background_check_keeps_current_key(self):
+        self.cache.get(self.plugin)
+        repositories.commit()
+        key = self.cache.get(self.plugin)
+
+        self._check_in_foreground(self.plugin_name, self.plugin)
+
+        self.assertEqual(key, self.cache.get(self.plugin))
+        self.assertEqual(1, self.plugin.get_transport_key_calls)
+
+    def test_start_check_runs_only_one_check_per_plugin(self):
+        with mock.patch('threading.Thread') as mock_thread:
+            self.cache._start_check(self.plugin_name, self.plugin)
+            self.cache._start_check(self.plugin_name, self.plugin)
+        self.assertEqual(1, mock_thread.call_count)
+
+    def test_caches_plugins_without_transport_keys(self):
+        self.plugin.transport_key = None
+
+        self.assertIsNone(self.cache.get(self.plugin))
+        self.assertIsNone(self.cache.get(self.plugin))
+        self.assertEqual(1, self.plugin.get_transport_key_calls)
+        self.assertFalse(self.cache.supports_transport_keys(self.plugin))
+        self.assertEqual(1, self.plugin.get_transport_key_calls)
+
+    def test_zero_ttl_checks_with_plugin_every_time(self):
+        self.cache = transport_keys.TransportKeyCache(ttl=0)
+        self.cache.get(self.plugin)
+        repositories.commit()
+
+        self.cache.get(self.plugin)
+        self.cache.get(self.plugin)
+        self.assertEqual(2, self.plugin.is_current_calls)
+
+    def test_invalidate(self):
+        self.cache.get(self.plugin)
+
+        self.cache.invalidate(self.plugin_name)
+        self.cache.get(self.plugin)
+        self.assertEqual(1, self.plugin.is_current_calls)
@@ -14,6 +14,7 @@
 # limitations under the License.
 import mock
 
+from barbican.common import config
 from barbican import queue
 from barbican.queue import client
 from barbican.tests import utils
@@ -75,6 +76,136 @@ class WhenUsingAsyncTaskClient(utils.BaseTestCase):
             project_id=self.external_project_id,
             request_id=self.request_id)
 
+    def test_should_check_batch_of_certificate_orders(self):
+        orders = [{'order_id': self.order_id,
+                   'project_id': self.external_project_id,
+                   'request_id': self.request_id}]
+
+        self.client.check_certificate_statuses(orders)
+
+        self.mock_client.cast.assert_called_with(
+            {}, 'check_certificate_statuses', orders=orders)
+
+
+class WhenBatchingTypeOrders(utils.BaseTestCase):
+    """Test coalescing type orders into batches."""
+
+    def setUp(self):
+        super(WhenBatchingTypeOrders, self).setUp()
+
+        for name, value in (('cast_batch_window_ms', 60000),
+                            ('cast_batch_max_size', 3)):
+            config.CONF.set_override(name, value, group='queue')
+            self.addCleanup(config.CONF.clear_override, name, group='queue')
+
+        self.mock_client = mock.MagicMock()
+        get_client_patcher = mock.patch('barbican.queue.get_client',
+                                        return_value=self.mock_client)
+        get_client_patcher.start()
+        self.addCleanup(get_client_patcher.stop)
+
+        self.client = client.TaskClient()
+        self.addCleanup(self.client._type_order_batcher.flush)
+
+    def _process_type_orders(self, count):
+        orders = [{'order_id': 'order%d' % i,
+                   'project_id': self.external_project_id,
+                   'request_id': self.request_id} for i in range(count)]
+        for order in orders:
+            self.client.process_type_order(**order)
+        return orders
+
+    def test_should_cast_a_full_batch_right_away(self):
+        orders = self._process_type_orders(4)
+
+        self.mock_client.cast.assert_called_once_with(
+            {}, 'process_type_orders', orders=orders[:3])
+
+    def test_should_cast_pending_orders_on_flush(self):
+        orders = self._process_type_orders(2)
+        self.assertFalse(self.mock_client.cast.called)
+
+        self.client._type_order_batcher.flush()
+
+        self.mock_client.cast.assert_called_once_with(
+            {}, 'process_type_orders', orders=orders)
+
+    def test_should_cast_pending_orders_after_window(self):
+        self.client._type_order_batcher._window = 0.01
+        orders = self._process_type_orders(1)
+
+        self.client._type_order_batcher._timer.join()
+
+        self.mock_client.cast.assert_called_once_with(
+            {}, 'process_type_orders', orders=orders)
+
+    def test_should_retry_failed_casts(self):
+        batcher = self.client._type_order_batcher
+        batcher.retry_delay = 0
+        on_failure = mock.MagicMock()
+        batcher._on_failure = on_failure
+        self.mock_client.cast.side_effect = [Exception(), None]
+
+        orders = [{'order_id': 'order1'}]
+
+        with mock.patch('threading.Timer') as mock_timer:
+            batcher._cast(orders)
+            mock_timer.assert_called_once_with(0, batcher._cast,
+                                               (orders, 1))
+            batcher._cast(orders, 1)
+
+        self.assertEqual(2, self.mock_client.cast.call_count)
+        self.assertFalse(on_failure.called)
+
+    def test_should_hand_over_batch_once_retries_are_exhausted(self):
+        batcher = self.client._type_order_batcher
+        on_failure = mock.MagicMock()
+        batcher._on_failure = on_failure
+        self.mock_client.cast.side_effect = Exception()
+
+        orders = [{'order_id': 'order1'}]
+
+        with mock.patch('threading.Timer') as mock_timer:
+            batcher._cast(orders, config.CONF.queue.cast_batch_retries)
+
+        self.assertFalse(mock_timer.called)
+        on_failure.assert_called_once_with(orders)
+
+    @mock.patch('barbican.model.repositories.independent_session')
+    @mock.patch('barbican.model.repositories.get_order_repository')
+    def test_should_put_unsent_orders_in_error(self, mock_get_repo,
+                                               mock_session):
+        orders = [{'order_id': 'order1'}, {'order_id': 'order2'}]
+
+        self.client._handle_unsent_orders(orders)
+
+        repo = mock_get_repo.return_value
+        repo.set_unprocessed_error.assert_called_once_with(
+            ['order1', 'order2'], 500, mock.ANY,
+            session=mock_session.return_value.__enter__.return_value)
+
+    @mock.patch('barbican.model.repositories.get_order_repository')
+    def test_should_leave_unsent_orders_to_drain(self, mock_get_repo):
+        config.CONF.set_override('drain_pending_orders_after_seconds', 60,
+                                 group='queue')
+        self.addCleanup(config.CONF.clear_override,
+                        'drain_pending_orders_after_seconds', group='queue')
+
+        self.client._handle_unsent_orders([{'order_id': 'order1'}])
+
+        self.assertFalse(mock_get_repo.called)
+
+    def test_should_not_batch_other_tasks(self):
+        self.client.check_certificate_status(
+            order_id=self.order_id,
+            project_id=self.external_project_id,
+            request_id=self.request_id)
+
+        self.mock_client.cast.assert_called_once_with(
+            {}, 'check_certificate_status', order_id=self.order_id,
+            project_id=self.external_project_id,
+            request_id=self.request_id)
+
 
 class WhenCreatingDirectTaskClient(utils.BaseTestCase):
     """Test using the synchronous task client (i.e. standalone mode)."""
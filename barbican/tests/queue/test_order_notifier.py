@@ -0,0 +1,86 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import mock
+
+from barbican.model import repositories
+from barbican.queue import order_notifier
+from barbican.tests import database_utils
+from barbican.tests import utils
+
+
+class WhenUsingOrderNotifier(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenUsingOrderNotifier, self).setUp()
+        self.notifier = order_notifier.OrderNotifier()
+
+    def test_wait_times_out_without_notification(self):
+        self.assertFalse(self.notifier.wait('order1', 0.01))
+        self.assertEqual(0, self.notifier.count_waiters())
+
+    def test_notify_wakes_up_waiters_of_the_order(self):
+        results = []
+
+        def wait(order_id):
+            results.append((order_id, self.notifier.wait(order_id, 0.5)))
+
+        waiting = [threading.Thread(target=wait, args=(order_id,))
+                   for order_id in ('order1', 'order1', 'order2')]
+        for thread in waiting:
+            thread.start()
+        while self.notifier.count_waiters() < 3:
+            threading.Event().wait(0.001)
+
+        self.notifier.notify('order1')
+        for thread in waiting:
+            thread.join()
+
+        self.assertEqual(
+            [('order1', True), ('order1', True), ('order2', False)],
+            sorted(results))
+        self.assertEqual(0, self.notifier.count_waiters())
+
+    def test_notify_without_waiters(self):
+        self.notifier.notify('order1')
+
+        self.assertEqual(0, self.notifier.count_waiters())
+
+
+class WhenNotifyingOnCommit(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenNotifyingOnCommit, self).setUp()
+        patcher = mock.patch.object(order_notifier, 'notify')
+        self.mock_notify = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = repositories.get_session()
+
+    def test_notifies_once_committed(self):
+        order_notifier.notify_on_commit(self.session, 'order1')
+        self.assertFalse(self.mock_notify.called)
+
+        self.session.commit()
+        self.session.commit()
+
+        self.mock_notify.assert_called_once_with('order1')
+
+    def test_does_not_notify_once_rolled_back(self):
+        order_notifier.notify_on_commit(self.session, 'order1')
+
+        self.session.rollback()
+        self.session.commit()
+
+        self.assertFalse(self.mock_notify.called)
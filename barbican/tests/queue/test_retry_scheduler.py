@@ -93,6 +93,34 @@ class WhenRunningPeriodicServerRetryLogic(database_utils.RepositoryTestCase):
             *args, **kwargs
         )
 
+    def test_should_enqueue_status_checks_in_batches(self):
+        self._set_status_check_batch_size(2)
+        orders = self._create_status_checks(3)
+
+        self.periodic_server._check_retry_tasks()
+
+        retry_repo = repositories.get_order_retry_tasks_repository()
+        entities, _, _, total = retry_repo.get_by_create_date(
+            suppress_exception=True)
+        self.assertEqual(0, total)
+        batches = [call[0][0] for call in
+                   self.queue_client.check_certificate_statuses.call_args_list]
+        self.assertEqual([2, 1], [len(batch) for batch in batches])
+        self.assertEqual(sorted(orders),
+                         sorted(order['order_id'] for batch in batches
+                                for order in batch))
+        self.assertFalse(self.queue_client.check_certificate_status.called)
+
+    def test_should_enqueue_status_checks_one_by_one_when_not_batched(self):
+        self._set_status_check_batch_size(0)
+        orders = self._create_status_checks(1)
+
+        self.periodic_server._check_retry_tasks()
+
+        self.queue_client.check_certificate_status.assert_called_once_with(
+            order_id=orders[0], project_id='keystone1234', request_id=None)
+        self.assertFalse(self.queue_client.check_certificate_statuses.called)
+
     @mock.patch('barbican.model.repositories.commit')
     def test_should_fail_and_force_a_rollback(self, mock_commit):
         mock_commit.side_effect = Exception()
@@ -147,6 +175,27 @@ class WhenRunningPeriodicServerRetryLogic(database_utils.RepositoryTestCase):
 
         return args, kwargs, retry_repo
 
+    def _set_status_check_batch_size(self, size):
+        retry_scheduler.CONF.set_override(
+            'status_check_batch_size', size, group='retry_scheduler')
+        self.addCleanup(retry_scheduler.CONF.clear_override,
+                        'status_check_batch_size', group='retry_scheduler')
+
+    def _create_status_checks(self, count):
+        project = database_utils.create_project()
+        order_ids = []
+        for _ in range(count):
+            order = database_utils.create_order(project=project)
+            database_utils.create_order_retry(
+                order=order, retry_task='check_certificate_status',
+                retry_args=[],
+                retry_kwargs={'order_id': order.id,
+                              'project_id': 'keystone1234',
+                              'request_id': None})
+            order_ids.append(order.id)
+        database_utils.get_session().commit()
+        return order_ids
+
 
 class WhenRunningPeriodicServer(oslotest.BaseTestCase):
     """Tests the timing-related functionality of the periodic task retry server.
@@ -16,8 +16,10 @@ import datetime
 import mock
 import six
 
+from barbican.common import config
 from barbican.model import models
 from barbican.model import repositories
+from barbican.plugin.interface import certificate_manager as cm
 from barbican.queue import server
 from barbican.tasks import common
 from barbican.tests import database_utils
@@ -303,6 +305,30 @@ class WhenCallingTasksMethod(utils.BaseTestCase):
             mock.ANY, 'result', None, 'order1234',
             'keystone1234', 'request1234')
 
+    @mock.patch('barbican.queue.server.schedule_order_retry_tasks')
+    @mock.patch('barbican.tasks.resources.BeginTypeOrder')
+    def test_should_process_batch_of_begin_orders(self, mock_begin_order,
+                                                  mock_schedule):
+        method = mock_begin_order.return_value.process_and_suppress_exceptions
+        method.return_value = 'result'
+        orders = [{'order_id': order_id,
+                   'project_id': self.external_project_id,
+                   'request_id': self.request_id}
+                  for order_id in ('order1', 'order2')]
+
+        self.tasks.process_type_orders(None, orders)
+
+        self.assertEqual(
+            [mock.call('order1', self.external_project_id),
+             mock.call('order2', self.external_project_id)],
+            method.call_args_list)
+        self.assertEqual(
+            [mock.call(mock.ANY, 'result', None, order_id=order_id,
+                       project_id=self.external_project_id,
+                       request_id=self.request_id)
+             for order_id in ('order1', 'order2')],
+            mock_schedule.call_args_list)
+
     @mock.patch('barbican.queue.server.schedule_order_retry_tasks')
     @mock.patch('barbican.tasks.resources.UpdateOrder')
     def test_should_process_update_order(
@@ -461,3 +487,111 @@ class WhenUsingTaskServer(database_utils.RepositoryTestCase):
         self.assertEqual(
             six.u('500'),
             order_result.error_status_code)
+
+    def test_process_batch_of_type_orders_from_prefetched_orders(self):
+        second_order = database_utils.create_order(
+            project=self.order.project)
+        order_ids = [self.order.id, second_order.id]
+        for order in (self.order, second_order):
+            order.type = 'bogus-type'  # Force error out of business logic.
+        repositories.commit()
+
+        with mock.patch.object(repositories.OrderRepo, 'get') as order_get, \
+                mock.patch.object(repositories.ProjectRepo,
+                                  'get') as project_get:
+            self.server.process_type_orders(
+                None, [{'order_id': order_id, 'project_id': self.external_id,
+                        'request_id': self.request_id}
+                       for order_id in order_ids])
+
+        self.assertFalse(order_get.called)
+        self.assertFalse(project_get.called)
+        order_repo = repositories.get_order_repository()
+        for order_id in order_ids:
+            order = order_repo.get(order_id, self.external_id)
+            self.assertEqual(models.States.ERROR, order.status)
+
+    @mock.patch('barbican.plugin.interface.certificate_manager'
+                '.CertificatePluginManager')
+    def test_process_batch_of_certificate_orders_issues_them_together(
+            self, mock_manager):
+        cert_plugin = mock_manager.return_value.get_plugin.return_value
+        cert_plugin.issue_certificate_requests.return_value = [
+            cm.ResultDTO(cm.CertificateStatus.WAITING_FOR_CA)] * 2
+        second_order = database_utils.create_order(
+            project=self.order.project)
+        order_ids = [self.order.id, second_order.id]
+        for order in (self.order, second_order):
+            order.type = models.OrderType.CERTIFICATE
+            order.meta = {}
+        repositories.commit()
+
+        self.server.process_type_orders(
+            None, [{'order_id': order_id, 'project_id': self.external_id,
+                    'request_id': self.request_id}
+                   for order_id in order_ids])
+
+        self.assertEqual(
+            order_ids,
+            [request[0] for request in
+             cert_plugin.issue_certificate_requests.call_args[0][0]])
+        self.assertFalse(cert_plugin.issue_certificate_request.called)
+        order_repo = repositories.get_order_repository()
+        for order_id in order_ids:
+            order = order_repo.get(order_id, self.external_id)
+            self.assertEqual(models.States.PENDING, order.status)
+            self.assertEqual('cert_request_pending', order.sub_status)
+
+    @mock.patch('barbican.plugin.interface.certificate_manager'
+                '.CertificatePluginManager')
+    def test_check_batch_of_certificate_orders_together(self, mock_manager):
+        cert_plugin = mock_manager.return_value.get_plugin_by_name.return_value
+        cert_plugin.check_certificate_statuses.return_value = [
+            cm.ResultDTO(cm.CertificateStatus.WAITING_FOR_CA)] * 2
+        second_order = database_utils.create_order(
+            project=self.order.project)
+        order_ids = [self.order.id, second_order.id]
+        for order in (self.order, second_order):
+            order.type = models.OrderType.CERTIFICATE
+            order.meta = {}
+            database_utils.create_order_meta_datum(
+                order=order, key='plugin_name', value='cert_plugin')
+        repositories.commit()
+
+        self.server.check_certificate_statuses(
+            None, [{'order_id': order_id, 'project_id': self.external_id,
+                    'request_id': self.request_id}
+                   for order_id in order_ids])
+
+        mock_manager.return_value.get_plugin_by_name.assert_called_with(
+            'cert_plugin')
+        self.assertEqual(
+            order_ids,
+            [request[0] for request in
+             cert_plugin.check_certificate_statuses.call_args[0][0]])
+        self.assertFalse(cert_plugin.check_certificate_status.called)
+        retry_repo = repositories.get_order_retry_tasks_repository()
+        retries, _, _, _ = retry_repo.get_by_create_date(
+            suppress_exception=True)
+        self.assertEqual(
+            sorted(order_ids),
+            sorted(retry.order_id for retry in retries
+                   if retry.retry_task == 'check_certificate_status'))
+
+    def test_drain_pending_orders(self):
+        config.CONF.set_override('drain_pending_orders_after_seconds', 60,
+                                 group='queue')
+        self.addCleanup(config.CONF.clear_override,
+                        'drain_pending_orders_after_seconds', group='queue')
+        order_id = self.order.id
+        self.order.updated_at = (datetime.datetime.utcnow() -
+                                 datetime.timedelta(hours=1))
+        repositories.commit()
+
+        with mock.patch.object(self.server, 'process_type_orders') as process:
+            self.server._drain_pending_orders()
+            self.server._drain_pending_orders()
+
+        process.assert_called_once_with(
+            None, [{'order_id': order_id, 'project_id': self.external_id,
+                    'request_id': None}])
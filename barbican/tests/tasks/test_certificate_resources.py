@@ -770,10 +770,87 @@ class WhenIssuingCertificateRequests(BaseCertificateRequestsTestCase):
             cert_res.ORDER_STATUS_CA_UNAVAIL_FOR_ISSUE.message,
             self.result_follow_on.status_message)
 
+    @mock.patch('barbican.plugin.util.circuit_breaker.guard')
+    def test_should_return_ca_unavailable_while_breaker_is_open(self,
+                                                                mock_guard):
+        mock_guard.side_effect = excep.PluginBackendUnavailable(
+            plugin_name='foo-plugin')
+
+        cert_res.issue_certificate_request(self.order,
+                                           self.project,
+                                           self.result_follow_on)
+
+        self.assertFalse(self.cert_plugin.issue_certificate_request.called)
+        epm = self.cert_event_plugin_patcher.target._EVENT_PLUGIN_MANAGER
+        epm.notify_ca_is_unavailable.assert_called_once_with(
+            self.project.id,
+            hrefs.convert_order_to_href(self.order.id),
+            mock_guard.side_effect.client_message,
+            cert_man.ERROR_RETRY_MSEC
+        )
+        self.assertEqual(
+            common.RetryTasks.INVOKE_SAME_TASK,
+            self.result_follow_on.retry_task)
+        self.assertEqual(
+            cert_res.ORDER_STATUS_CA_UNAVAIL_FOR_ISSUE.id,
+            self.result_follow_on.status)
+
     def test_should_raise_status_not_supported(self):
         self._test_should_raise_status_not_supported(
             cert_res.issue_certificate_request)
 
+    def test_should_use_result_issued_ahead(self):
+        self.addCleanup(cert_res.clear_results_ahead)
+        self.cert_plugin.issue_certificate_requests.return_value = [
+            self.result]
+
+        cert_res.issue_certificate_requests([(self.order, self.project)])
+        self._test_should_return_waiting_for_ca(
+            cert_res.issue_certificate_request)
+
+        self.cert_plugin.issue_certificate_requests.assert_called_once_with(
+            [(self.order.id, self.order_meta, self.plugin_meta,
+              self.barbican_meta_dto)])
+        self.assertFalse(self.cert_plugin.issue_certificate_request.called)
+        self.mock_save_plugin.assert_called_once_with(
+            self.order, self.plugin_meta)
+        self.mock_barbican_save_plugin.assert_called_once_with(
+            self.order, self.barbican_meta)
+
+    def test_should_raise_exception_raised_ahead(self):
+        self.addCleanup(cert_res.clear_results_ahead)
+        error = cert_man.CertificateGeneralException()
+        self.cert_plugin.issue_certificate_requests.return_value = [error]
+
+        cert_res.issue_certificate_requests([(self.order, self.project)])
+
+        self.assertRaises(
+            cert_man.CertificateGeneralException,
+            cert_res.issue_certificate_request,
+            self.order, self.project, self.result_follow_on)
+        self.assertFalse(self.cert_plugin.issue_certificate_request.called)
+
+    def test_should_issue_request_when_batch_failed(self):
+        self.addCleanup(cert_res.clear_results_ahead)
+        self.cert_plugin.issue_certificate_requests.side_effect = Exception()
+
+        cert_res.issue_certificate_requests([(self.order, self.project)])
+        self._test_should_return_waiting_for_ca(
+            cert_res.issue_certificate_request)
+
+        self._verify_issue_certificate_plugins_called()
+
+    def test_should_not_use_results_ahead_once_cleared(self):
+        self.cert_plugin.issue_certificate_requests.return_value = [
+            self.result]
+
+        cert_res.issue_certificate_requests([(self.order, self.project)])
+        cert_res.clear_results_ahead()
+        self._test_should_return_waiting_for_ca(
+            cert_res.issue_certificate_request)
+
+        self._verify_issue_certificate_plugins_called()
+
     def _verify_issue_certificate_plugins_called(self):
         self.cert_plugin.issue_certificate_request.assert_called_once_with(
             self.order.id,
@@ -878,6 +955,37 @@ class WhenCheckingCertificateRequests(BaseCertificateRequestsTestCase):
         self.assertIsNotNone(
             self.order.order_barbican_meta.get('generated_csr'))
 
+    def test_should_use_status_checked_ahead(self):
+        self.addCleanup(cert_res.clear_results_ahead)
+        self.cert_plugin.check_certificate_statuses.return_value = [
+            self.result]
+
+        cert_res.check_certificate_requests([(self.order, self.project)])
+        self._test_should_return_waiting_for_ca(
+            cert_res.check_certificate_request)
+
+        self.cert_plugin.check_certificate_statuses.assert_called_once_with(
+            [(self.order.id, self.order_meta, self.plugin_meta,
+              self.barbican_meta_dto)])
+        self.assertFalse(self.cert_plugin.check_certificate_status.called)
+        self.mock_save_plugin.assert_called_once_with(
+            self.order, self.plugin_meta)
+
+    def test_should_return_ca_unavailable_for_batch_while_breaker_open(self):
+        self.addCleanup(cert_res.clear_results_ahead)
+
+        with mock.patch.object(cert_res.circuit_breaker, 'guard') as guard:
+            guard.side_effect = excep.PluginBackendUnavailable(
+                plugin_name='cert_plugin')
+            cert_res.check_certificate_requests([(self.order, self.project)])
+        cert_res.check_certificate_request(
+            self.order, self.project, self.result_follow_on)
+
+        self.assertFalse(self.cert_plugin.check_certificate_statuses.called)
+        self.assertEqual(
+            cert_res.ORDER_STATUS_CA_UNAVAIL_FOR_CHECK.id,
+            self.result_follow_on.status)
+
     def _verify_check_certificate_plugins_called(self):
         self.cert_plugin.check_certificate_status.assert_called_once_with(
             self.order.id,
@@ -155,6 +155,25 @@ class WhenUsingOrderTaskHelper(BaseOrderTestCase):
             sub_status_message[:-1], self.order.sub_status_message)
         self.order_repo.save.assert_called_once_with(self.order)
 
+    @mock.patch('barbican.queue.order_notifier.notify_on_commit')
+    def test_should_notify_waiters_of_order_done(self, mock_notify):
+        self.helper.handle_success(self.order, self.result)
+        self.helper.handle_error(self.order, 'status_code', 'reason',
+                                 ValueError())
+
+        session = self.order_repo.get_session.return_value
+        self.assertEqual([mock.call(session, self.order.id)] * 2,
+                         mock_notify.call_args_list)
+
+    @mock.patch('barbican.queue.order_notifier.notify_on_commit')
+    def test_should_not_notify_waiters_of_order_still_pending(
+            self, mock_notify):
+        self.result.retry_task = common.RetryTasks.INVOKE_SAME_TASK
+
+        self.helper.handle_success(self.order, self.result)
+
+        self.assertFalse(mock_notify.called)
+
 
 class WhenBeginningKeyTypeOrder(BaseOrderTestCase):
 
@@ -197,6 +216,18 @@ class WhenBeginningKeyTypeOrder(BaseOrderTestCase):
         # Order state doesn't change because can't retrieve it to change it.
         self.assertEqual(models.States.PENDING, self.order.status)
 
+    @mock.patch('barbican.plugin.resources.generate_secret')
+    def test_should_skip_processed_order(self, mock_generate_secret):
+        self.order.status = models.States.ERROR
+
+        result = self.resource.process(self.order.id,
+                                       self.external_project_id)
+
+        self.assertIsNone(result)
+        self.assertFalse(mock_generate_secret.called)
+        self.assertFalse(self.order_repo.save.called)
+        self.assertEqual(models.States.ERROR, self.order.status)
+
     def test_should_fail_during_processing(self):
         # Force an error during the processing handler phase.
         self.project_repo.get = mock.MagicMock(return_value=None,
@@ -125,6 +125,19 @@ class MockModelRepositoryMixin(object):
     added to the tear-down of the respective classes.
     """
 
+    def setup_container_acl_repository_mock(
+            self, mock_container_acl_repo=mock.MagicMock()):
+        """Mocks the container-acl repository factory function
+
+        :param mock_container_acl_repo: The pre-configured mock
+                                        container-acl repo to be returned.
+        """
+        self.mock_container_acl_repo_patcher = None
+        self._setup_repository_mock(
+            repo_factory='get_container_acl_repository',
+            mock_repo_obj=mock_container_acl_repo,
+            patcher_obj=self.mock_container_acl_repo_patcher)
+
     def setup_container_consumer_repository_mock(
             self, mock_container_consumer_repo=mock.MagicMock()):
         """Mocks the container consumer repository factory function
@@ -242,6 +255,19 @@ class MockModelRepositoryMixin(object):
                                     mock_repo_obj=mock_project_repo,
                                     patcher_obj=self.mock_project_repo_patcher)
 
+    def setup_secret_acl_repository_mock(
+            self, mock_secret_acl_repo=mock.MagicMock()):
+        """Mocks the secret-acl repository factory function
+
+        :param mock_secret_acl_repo: The pre-configured mock secret-acl repo
+                                     to be returned.
+        """
+        self.mock_secret_acl_repo_patcher = None
+        self._setup_repository_mock(
+            repo_factory='get_secret_acl_repository',
+            mock_repo_obj=mock_secret_acl_repo,
+            patcher_obj=self.mock_secret_acl_repo_patcher)
+
     def setup_secret_meta_repository_mock(
             self, mock_secret_meta_repo=mock.MagicMock()):
         """Mocks the secret-meta repository factory function
@@ -0,0 +1,136 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Micro-benchmark of the hottest repository lookups.
+
+Compares the CPU time per lookup of the cached (baked) queries used by the
+repositories against building an equivalent Query object on every call, as
+was done before. Uses an in-memory SQLite database so that the numbers are
+dominated by query construction and compilation rather than by I/O.
+
+Usage, from the top of the source tree:
+
+    PYTHONPATH=. python tools/benchmarks/bench_repository_lookups.py \
+        [--iterations N]
+"""
+import argparse
+import logging
+import time
+
+from oslo_utils import timeutils
+from sqlalchemy import or_
+
+from barbican.model import models
+from barbican.model import repositories
+# Registers the secret store options read during database setup.
+from barbican.plugin.interface import secret_store  # noqa
+from barbican.tests import database_utils
+
+
+def _uncached_get_secret_by_id(session, secret_id):
+    utcnow = timeutils.utcnow()
+    query = session.query(models.Secret)
+    query = query.filter_by(id=secret_id, deleted=False)
+    query = query.filter(or_(models.Secret.expiration.is_(None),
+                             models.Secret.expiration > utcnow))
+    return query.one()
+
+
+def _uncached_get_secret(session, secret_id, external_project_id):
+    query = repositories.SecretRepo()._do_build_get_query(
+        secret_id, external_project_id, session)
+    return query.filter_by(deleted=False).one()
+
+
+def _uncached_find_project(session, external_project_id):
+    query = session.query(models.Project)
+    return query.filter_by(external_id=external_project_id).one()
+
+
+def _uncached_get_metadata(session, secret_id):
+    query = session.query(models.SecretStoreMetadatum)
+    query = query.filter_by(deleted=False)
+    query = query.filter(models.SecretStoreMetadatum.secret_id == secret_id)
+    return {m.key: m.value for m in query.all()}
+
+
+def _uncached_get_container_by_id(session, container_id):
+    query = session.query(models.Container)
+    return query.filter_by(id=container_id, deleted=False).one()
+
+
+def _measure(func, iterations):
+    func()  # warm up, e.g. to populate the query cache
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    database_utils.setup_in_memory_db()
+    # The test database setup turns on SQL statement logging, which would
+    # dominate the measurements.
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+    session = repositories.get_session()
+
+    project = database_utils.create_project(session=session)
+    secret = database_utils.create_secret(project, session=session)
+    database_utils.create_secret_metadatum(secret, session=session)
+    container = database_utils.create_container(project, session=session)
+    session.commit()
+
+    secret_repo = repositories.get_secret_repository()
+    project_repo = repositories.get_project_repository()
+    meta_repo = repositories.get_secret_meta_repository()
+    container_repo = repositories.get_container_repository()
+
+    lookups = [
+        ('SecretRepo.get_secret_by_id',
+         lambda: _uncached_get_secret_by_id(session, secret.id),
+         lambda: secret_repo.get_secret_by_id(secret.id, session=session)),
+        ('SecretRepo.get',
+         lambda: _uncached_get_secret(session, secret.id,
+                                      project.external_id),
+         lambda: secret_repo.get(secret.id, project.external_id,
+                                 session=session)),
+        ('ProjectRepo.find_by_external_project_id',
+         lambda: _uncached_find_project(session, project.external_id),
+         lambda: project_repo.find_by_external_project_id(
+             project.external_id, session=session)),
+        ('SecretStoreMetadatumRepo.get_metadata_for_secret',
+         lambda: _uncached_get_metadata(session, secret.id),
+         lambda: meta_repo.get_metadata_for_secret(secret.id)),
+        ('ContainerRepo.get_container_by_id',
+         lambda: _uncached_get_container_by_id(session, container.id),
+         lambda: container_repo.get_container_by_id(container.id,
+                                                    session=session)),
+    ]
+
+    print('{0:<50} {1:>12} {2:>12} {3:>8}'.format(
+        'lookup', 'before (us)', 'after (us)', 'speedup'))
+    for name, before, after in lookups:
+        before_us = _measure(before, args.iterations)
+        after_us = _measure(after, args.iterations)
+        print('{0:<50} {1:>12.1f} {2:>12.1f} {3:>7.2f}x'.format(
+            name, before_us, after_us, before_us / after_us))
+
+    database_utils.in_memory_cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the peak memory used to read large secret uploads.
+
+For a binary secret of each size, measures:
+
+    put-whole        reading a PUT body and base64 encoding it for the
+                     secret store as done before: reading
+                     pecan.request.body and encoding the payload whole
+    put-chunked      the same, reading the body and base64 encoding it in
+                     bounded chunks
+    validate-whole   validating the base64 payload of a POST, once loaded
+                     from the JSON body, by decoding it whole as done before
+    validate-chunked the same, decoding it one chunk at a time
+
+Peak memory is measured with tracemalloc, in MiB, not counting the request
+body waiting in wsgi.input nor the loaded POST payload.
+
+Usage, from the top of the source tree:
+
+    PYTHONPATH=. python tools/benchmarks/bench_secret_upload_memory.py \
+        [--sizes MIB [MIB ...]]
+"""
+import argparse
+import base64
+import io
+import os
+import tracemalloc
+
+import webob
+
+from barbican import api
+from barbican.common import config
+from barbican.common import validators
+from barbican.plugin.util import translations
+
+CONF = config.CONF
+
+MIB = 1024 * 1024
+
+
+def _make_request(body, content_type):
+    req = webob.Request.blank('/', method='POST')
+    req.environ.update({
+        'wsgi.input': io.BytesIO(body),
+        'CONTENT_LENGTH': str(len(body)),
+        'CONTENT_TYPE': content_type,
+    })
+    return req
+
+
+def _put_whole(req):
+    payload = req.body
+    if validators.secret_too_big(payload):
+        raise ValueError('Secret too big')
+    return base64.b64encode(payload)
+
+
+def _put_chunked(req):
+    payload = api.read_body(req, CONF.max_allowed_secret_in_bytes)
+    return translations.normalize_before_encryption(
+        payload, 'application/octet-stream', None, 'opaque')
+
+
+def _validate_whole(payload):
+    base64.b64decode(payload)
+
+
+def _validate_chunked(payload):
+    for _ in translations.iter_base64_decode(
+            translations.iter_chunks(payload)):
+        pass
+
+
+def _peak(func, arg):
+    tracemalloc.start()
+    try:
+        func(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1, 2, 5, 10])
+    args = parser.parse_args()
+
+    CONF.set_override('max_allowed_secret_in_bytes', max(args.sizes) * MIB)
+
+    modes = ('put-whole', 'put-chunked', 'validate-whole', 'validate-chunked')
+    print('%-8s' % 'MiB' + ''.join('%18s' % mode for mode in modes))
+    for size in args.sizes:
+        secret = os.urandom(size * MIB)
+        payload = base64.b64encode(secret).decode('ascii')
+
+        peaks = [
+            _peak(_put_whole,
+                  _make_request(secret, 'application/octet-stream')),
+            _peak(_put_chunked,
+                  _make_request(secret, 'application/octet-stream')),
+            _peak(_validate_whole, payload),
+            _peak(_validate_chunked, payload),
+        ]
+        print('%-8d' % size +
+              ''.join('%18.1f' % (peak / float(MIB)) for peak in peaks))
+
+
+if __name__ == '__main__':
+    main()
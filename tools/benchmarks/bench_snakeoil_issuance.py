@@ -0,0 +1,117 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the certificate issuance throughput of the Snakeoil CA plugin.
+
+Issues a burst of certificate orders against a file backed Snakeoil CA in
+three ways:
+
+    reparse  one issue_certificate_request() call per order, with the
+             parsed CA objects dropped before each call, as every access
+             re-read and re-parsed the CA files before they were cached
+    cached   one issue_certificate_request() call per order
+    batch    one issue_certificate_requests() call for the whole burst
+
+Usage, from the top of the source tree:
+
+    PYTHONPATH=. python tools/benchmarks/bench_snakeoil_issuance.py \
+        [--orders N] [--rounds N] [--ca-key-size BITS]
+"""
+import argparse
+import base64
+import os
+import shutil
+import tempfile
+import time
+
+from OpenSSL import crypto
+
+from barbican.plugin.interface import certificate_manager as cert_manager
+from barbican.plugin import snakeoil_ca
+
+
+def _make_plugin(directory, ca_key_size):
+    conf = snakeoil_ca.CONF
+    for name, file_name in (('ca_cert_path', 'ca.cert'),
+                            ('ca_cert_key_path', 'ca.key'),
+                            ('ca_cert_chain_path', 'ca.chain'),
+                            ('ca_cert_pkcs7_path', 'ca.p7b')):
+        conf.set_override(name, os.path.join(directory, file_name),
+                          group='snakeoil_ca_plugin')
+    conf.set_override('subca_cert_key_directory',
+                      os.path.join(directory, 'subcas'),
+                      group='snakeoil_ca_plugin')
+
+    plugin = snakeoil_ca.SnakeoilCACertificatePlugin(conf)
+    plugin.ca.key_size = ca_key_size
+    plugin.ca.ensure_exists()
+    return plugin
+
+
+def _make_requests(count):
+    key = crypto.PKey()
+    key.generate_key(crypto.TYPE_RSA, 2048)
+    csr = crypto.X509Req()
+    csr.get_subject().CN = 'host.example.net'
+    csr.set_pubkey(key)
+    csr.sign(key, 'sha256')
+    request_data = base64.b64encode(
+        crypto.dump_certificate_request(crypto.FILETYPE_PEM, csr))
+    return [('order-%d' % i, {'request_data': request_data}, {},
+             cert_manager.BarbicanMetaDTO())
+            for i in range(count)]
+
+
+def _reparse(plugin, requests):
+    for request in requests:
+        plugin.ca._parsed.clear()
+        plugin.issue_certificate_request(*request)
+
+
+def _cached(plugin, requests):
+    for request in requests:
+        plugin.issue_certificate_request(*request)
+
+
+def _batch(plugin, requests):
+    plugin.issue_certificate_requests(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--ca-key-size', type=int, default=2048)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        plugin = _make_plugin(directory, args.ca_key_size)
+        requests = _make_requests(args.orders)
+
+        print('%-8s %14s' % ('mode', 'certs/second'))
+        for name, func in (('reparse', _reparse), ('cached', _cached),
+                           ('batch', _batch)):
+            best = None
+            for _ in range(args.rounds):
+                start = time.time()
+                func(plugin, requests)
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print('%-8s %14.1f' % (name, args.orders / best))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
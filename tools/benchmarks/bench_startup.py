@@ -0,0 +1,130 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the cold start time of the Barbican processes.
+
+Each target is started in a fresh interpreter, a number of times, and the
+median wall clock time is reported, along with the number of times the
+configuration files were parsed and the optional backend libraries that
+ended up imported:
+
+    api     imports barbican.api.app and calls create_main_app()
+    worker  imports barbican.cmd.worker, parses the configuration and
+            initializes the queue, as barbican-worker does before it
+            launches its service
+    manage  runs "barbican-manage --help"
+
+Usage, from the top of the source tree:
+
+    PYTHONPATH=. python tools/benchmarks/bench_startup.py \
+        [--runs N] [target ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_PRELUDE = """
+import json
+import sys
+import time
+
+from oslo_config import cfg
+
+start = time.time()
+parses = [0]
+_call = cfg.ConfigOpts.__call__
+
+
+def _counting_call(self, *args, **kwargs):
+    parses[0] += 1
+    return _call(self, *args, **kwargs)
+
+
+cfg.ConfigOpts.__call__ = _counting_call
+"""
+
+_REPORT = """
+sys.stdout = sys.__stdout__
+print(json.dumps({
+    'seconds': time.time() - start,
+    'parses': parses[0],
+    'modules': sorted(m for m in %r if m in sys.modules),
+}))
+"""
+
+_TARGETS = {
+    'api': """
+from barbican.api import app
+app.create_main_app(None)
+""",
+    'worker': """
+from barbican.cmd import worker
+from barbican.common import config
+from barbican import queue
+config.CONF([], project='barbican')
+queue.init(config.CONF)
+""",
+    'manage': """
+import io
+sys.stdout = io.StringIO()
+sys.argv = ['barbican-manage', '--help']
+from barbican.cmd import barbican_manage
+try:
+    barbican_manage.main()
+except SystemExit:
+    pass
+""",
+}
+
+_BACKEND_MODULES = ('cffi', 'eventlet', 'kmip', 'pki')
+
+
+def _run(target):
+    code = _PRELUDE + _TARGETS[target] + _REPORT % (_BACKEND_MODULES,)
+    start = time.time()
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     env=os.environ.copy())
+    result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    result['process_seconds'] = time.time() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('targets', nargs='*',
+                        help='any of %s' % ', '.join(sorted(_TARGETS)))
+    args = parser.parse_args()
+    targets = args.targets or sorted(_TARGETS)
+    for target in targets:
+        if target not in _TARGETS:
+            parser.error('unknown target %s' % target)
+
+    print('%-8s %12s %12s %8s  %s' % ('target', 'startup ms', 'process ms',
+                                      'parses', 'backend modules'))
+    for target in targets:
+        results = [_run(target) for _ in range(args.runs)]
+        print('%-8s %12.1f %12.1f %8d  %s' % (
+            target,
+            statistics.median(r['seconds'] for r in results) * 1e3,
+            statistics.median(r['process_seconds'] for r in results) * 1e3,
+            results[-1]['parses'],
+            ', '.join(results[-1]['modules']) or '-'))
+
+
+if __name__ == '__main__':
+    main()